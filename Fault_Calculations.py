@@ -16,7 +16,14 @@ TODO: Need to finish implementation of IEC method
 import os
 import g74
 import g74.constants as constants
+import g74.parallel
+import g74.instrumentation
+import g74.profiling
+import g74.cache
+import g74.incremental
+import g74.export
 import time
+import collections
 import pandas as pd
 
 # Meta Data
@@ -27,10 +34,36 @@ __phone__ = '+44 7899 984158'
 __status__ = 'In Development - Beta'
 
 
+def study_details(message, study, incremental_study=None, engine=None):
+	"""
+		Adds any note about the approximation made by an incremental study or the differences from BKDY when the
+		native engine is used to the message written with the results
+	:param str message:  Message to include on the first row of the Excel worksheet
+	:param str study:  Fault study type, e.g. constants.GUI.bkdy_3ph
+	:param g74.incremental.IncrementalStudy incremental_study: (optional=None) - Incremental study if carried out
+	:param str engine: (optional=None) - Engine from constants.ShortCircuit.engines used for the study
+	:return (str, dict) (message, metadata):  Message and metadata to write with the results
+	"""
+	metadata = None
+	if engine == constants.ShortCircuit.engine_native:
+		message = '{} ({})'.format(message, constants.ShortCircuit.native_engine_note)
+		metadata = {constants.ShortCircuit.key_metadata: engine}
+
+	if incremental_study is None:
+		return message, metadata
+	note = incremental_study.note(study=study)
+	if note:
+		message = '{} ({})'.format(message, note)
+	metadata = dict(metadata or dict())
+	metadata.update(incremental_study.metadata(study=study))
+	return message, metadata
+
+
 def fault_study(
 		psse_handler,
 		local_uid, sav_case, local_temp_folder, excel_file, fault_times, buses, local_logger, reload_sav=True,
-		fault_types=((1, ), (0, 0))
+		fault_types=((1, ), (0, 0)), use_cache=None, incremental=None, export_formats=None,
+		excel_export=constants.Export.excel, engine=None
 ):
 	"""
 		Run G74 fault study calculation using PSSE BKDY or IEC methods and obtain the
@@ -47,10 +80,25 @@ def fault_study(
 	:param tuple fault_types: (optional=((1,),(1,1))) - Details which faults should be carried out based on either:
 								BKDY method - 3 Phase fault
 								IEC method - 3 Phase or LG fault
-	:return None:
+	:param bool use_cache: (optional=None) - If True then results already stored for this SAV case are used rather
+								than repeating the fault studies, if None then determined by constants.Cache
+	:param bool incremental: (optional=None) - If True then only the busbars close to changes in the SAV case since
+								the previous study are faulted, if None then determined by constants.Incremental.  Only
+								possible if the cache is enabled.
+	:param list export_formats: (optional=None) - Binary formats the results are also written to (parquet, feather or
+								hdf5), if None then determined by constants.Export
+	:param bool excel_export: (optional) - If False then the results are only written to the binary formats
+	:param str engine: (optional=None) - Engine from constants.ShortCircuit.engines used for the 3 phase fault study,
+								if None then determined by constants.ShortCircuit
+	:return collections.OrderedDict results:  Results for each type of fault study carried out
 	"""
+	c = constants.Instrumentation
+	if engine is None:
+		engine = constants.ShortCircuit.engine
+	# Timing spans and PSSE API call counts are only reported for this study
+	g74.instrumentation.reset()
+
 	# Produce temporary files
-	t = time.time()
 	temp_bkd_file = os.path.join(local_temp_folder, 'bkdy_machines{}'.format(constants.PSSE.ext_bkd))
 
 	# Get path for export SAV case
@@ -58,120 +106,169 @@ def fault_study(
 	temp_sav_case = os.path.join(local_temp_folder, '{}_{}.sav'.format(sav_name, local_uid))
 
 	# Initialise PSSE and load SAV case
-	psse_handler.load_data_case(pth_sav=sav_case)
+	with g74.instrumentation.span(c.span_load_case):
+		psse_handler.load_data_case(pth_sav=sav_case)
+
+	# Results are cached based on the contents of the original SAV case before any changes have been made
+	if g74.cache.cache_enabled(setting=use_cache):
+		local_logger.info(
+			'Cached fault study results will be used if available for this SAV case, changes to PSSE or settings not '
+			'included in constants.Cache are not detected'
+		)
+		result_cache = g74.cache.ResultCache(pth_sav=sav_case)
+	else:
+		result_cache = None
+
+	# Incremental study compares the SAV case with the previous study and so must be before any changes are made
+	if result_cache is not None and g74.incremental.incremental_enabled(setting=incremental):
+		incremental_study = g74.incremental.IncrementalStudy(cache=result_cache)
+	else:
+		incremental_study = None
 
 	# Get handle to logger and determine whether running for PSSE or from Python
 	local_logger.app = psse_handler
-	print('Running from PSSE status is: {}'.format(logger.app.run_in_psse))
-	local_logger.info('Running from PSSE status is: {}'.format(logger.app.run_in_psse))
-	local_logger.info('Took {:.2f} seconds to initialise PSSe and load SAV case'.format(time.time()-t))
-	t = time.time()
+	print('Running from PSSE status is: {}'.format(local_logger.app.run_in_psse))
+	local_logger.info('Running from PSSE status is: {}'.format(local_logger.app.run_in_psse))
 
 	# Create the files for the existing machines that will be used for the BKDY fault study
-	bkdy = g74.psse.BkdyFaultStudy(psse_control=psse_handler)
-	bkdy.create_breaker_duty_file(target_path=temp_bkd_file)
-	local_logger.info('Took {:.2f} seconds to create BKDY files for machines'.format(time.time()-t))
-	t = time.time()
+	with g74.instrumentation.span(c.span_idev):
+		bkdy = g74.psse.BkdyFaultStudy(
+			psse_control=psse_handler, streaming=True, output_folder=local_temp_folder, engine=engine
+		)
+		bkdy.create_breaker_duty_file(target_path=temp_bkd_file)
 
 	# Update model to include contribution from embedded machines
-	g74_data = g74.psse.G74FaultInfeed()
-	g74_data.identify_machine_parameters()
-	g74_data.calculate_machine_mva_values()
-	local_logger.info(
-		(
-			'Took {:.2f} seconds to add G74 machines that represent contribution from embedded load'
-		).format(time.time()-t)
-	)
-	t = time.time()
+	with g74.instrumentation.span(c.span_g74):
+		g74_data = g74.psse.G74FaultInfeed()
+		g74_data.identify_machine_parameters()
+		g74_data.calculate_machine_mva_values()
 
 	# Save a temporary SAV case so can reload prior to carrying out either the BKDY or IEC fault study
 	if temp_sav_case:
 		psse_handler.save_data_case(pth_sav=temp_sav_case)
 
-	# TODO:  At this point want to add in also IEC fault study for LG
-	# Carry out fault current study for each time step
-	if sum(fault_types[0]):
-		# Fun BKDY - 3 Phase fault study and then write to Excel Workbook
-		df_bkdy = bkdy.calculate_fault_currents(
-			fault_times=fault_times, g74_infeed=g74_data,
-			buses=buses,
-			delete=True
-		)
-
-		# Export results to excel
-		g74.file_handling.write_fault_data_to_excel(
-			pth=excel_file, df=df_bkdy, message='BKDY 3Phase Fault Current Results',
-			sheet_name=constants.Excel.bkdy_sheet_name,
-			tab_color=constants.Excel.bkdy_tab_color
-		)
-
-		# Produce error message at end of output to report potential busbar fault error issues
-		if bkdy.unreliable_faulted_buses:
-			msg0 = (
-				'The following busbars had an issue carrying out the fault current study which has been reported above and '
-				'as such the value for these busbars is unreliable:'
-			)
-			msg1 = '\n'.join(['\t - {}'.format(bus) for bus in set(bkdy.unreliable_faulted_buses)])
-			logger.warning('{}\n{}'.format(msg0, msg1))
-
-	if sum(fault_types[1]):
-		# Have to reload SAV case since the bkdy method will have converted the save case
-		psse_handler.load_data_case(pth_sav=temp_sav_case)
-
-		# IEC method for fault current calculations
-		iec = g74.psse.IecFaults(psse=psse_handler, buses=buses_to_fault)
-
-		if fault_types[1][0]:
-			local_logger.debug('Fault study being carried out for IEC LLL')
-			df_iec_lll = iec.calculate_fault_currents(
-				fault_times=fault_times, g74_infeed=g74_data,
-				lll=True, lg=False
-			)
-
-			# Export results to excel
-			g74.file_handling.write_fault_data_to_excel(
-				pth=excel_file, df=df_iec_lll, message='IEC 3Phase Fault Current Results',
-				sheet_name=constants.Excel.iec_sheet_name_lll,
-				tab_color=constants.Excel.iec_tab_color
-			)
-
-		if fault_types[1][1]:
-			local_logger.debug('Fault study being carried out for IEC LLL')
-			df_iec_lg = iec.calculate_fault_currents(
-				fault_times=fault_times, g74_infeed=g74_data,
-				lll=False, lg=True
-			)
+	# Fault times (or for a whole network study the busbars) are shared between separate PSSE worker processes which
+	# load the temporary SAV case, this is not possible when running from within PSSE
+	if constants.Parallel.processes > 1 and temp_sav_case and not psse_handler.run_in_psse:
+		if buses:
+			executor = g74.parallel.FaultTimeExecutor(pth_sav=temp_sav_case, pth_logs=local_logger.pth_logs)
+		else:
+			executor = g74.parallel.BusPartitionScheduler(pth_sav=temp_sav_case, pth_logs=local_logger.pth_logs)
+	else:
+		executor = None
+
+	# All results are added to the same workbook (and any binary files) which is saved once the studies are complete,
+	# if a study fails then the partial results are removed
+	with g74.export.ResultsExport(
+			pth_excel=excel_file, formats=export_formats, excel=excel_export, sav_case=sav_case,
+			sav_hash=result_cache.sav_hash if result_cache is not None else None
+	) as results_export:
+		results = collections.OrderedDict()
+
+		# TODO:  At this point want to add in also IEC fault study for LG
+		# Carry out fault current study for each time step
+		if sum(fault_types[0]):
+			# Fun BKDY - 3 Phase fault study and then write to Excel Workbook
+			with g74.instrumentation.span(c.span_bkdy_study):
+				df_bkdy = bkdy.calculate_fault_currents(
+					fault_times=fault_times, g74_infeed=g74_data,
+					buses=buses,
+					delete=True,
+					executor=executor,
+					cache=result_cache,
+					incremental=incremental_study
+				)
+			results[constants.GUI.bkdy_3ph] = df_bkdy
 
 			# Export results to excel
-			g74.file_handling.write_fault_data_to_excel(
-				pth=excel_file, df=df_iec_lg, message='IEC Line-Ground Fault Current Results',
-				sheet_name=constants.Excel.iec_sheet_name_lg,
-				tab_color=constants.Excel.iec_tab_color
+			message, metadata = study_details(
+				message='BKDY 3Phase Fault Current Results', study=constants.GUI.bkdy_3ph,
+				incremental_study=incremental_study, engine=engine
 			)
+			with g74.instrumentation.span(c.span_excel, sheet=constants.Excel.bkdy_sheet_name):
+				results_export.write_fault_data(
+					df=df_bkdy, message=message,
+					sheet_name=constants.Excel.bkdy_sheet_name, method=constants.GUI.bkdy_3ph, fault_times=fault_times,
+					tab_color=constants.Excel.bkdy_tab_color, metadata=metadata
+				)
+
+			# Produce error message at end of output to report potential busbar fault error issues
+			if bkdy.unreliable_faulted_buses:
+				msg0 = (
+					'The following busbars had an issue carrying out the fault current study which has been reported '
+					'above and as such the value for these busbars is unreliable:'
+				)
+				msg1 = '\n'.join(['\t - {}'.format(bus) for bus in set(bkdy.unreliable_faulted_buses)])
+				local_logger.warning('{}\n{}'.format(msg0, msg1))
+
+		if sum(fault_types[1]):
+			# Have to reload SAV case since the bkdy method will have converted the save case
+			with g74.instrumentation.span(c.span_reload):
+				psse_handler.load_data_case(pth_sav=temp_sav_case)
+
+			# IEC method for fault current calculations
+			iec = g74.psse.IecFaults(psse=psse_handler, buses=buses)
+
+			# LLL and LG faults are studied together so the equivalent machines are only updated once for each fault
+			# time
+			studies = [
+				study for study, selected in zip((constants.GUI.iec_3ph, constants.GUI.iec_lg), fault_types[1])
+				if selected
+			]
+			local_logger.debug('Fault study being carried out for {}'.format(', '.join(studies)))
+			with g74.instrumentation.span(c.span_iec_study, studies=studies):
+				dfs_iec = iec.calculate_study_fault_currents(
+					fault_times=fault_times, g74_infeed=g74_data, studies=studies, executor=executor,
+					cache=result_cache, incremental=incremental_study
+				)
+			results.update(dfs_iec)
+
+			if constants.GUI.iec_3ph in dfs_iec:
+				# Export results to excel
+				message, metadata = study_details(
+					message='IEC 3Phase Fault Current Results', study=constants.GUI.iec_3ph,
+					incremental_study=incremental_study
+				)
+				with g74.instrumentation.span(c.span_excel, sheet=constants.Excel.iec_sheet_name_lll):
+					results_export.write_fault_data(
+						df=dfs_iec[constants.GUI.iec_3ph], message=message,
+						sheet_name=constants.Excel.iec_sheet_name_lll, method=constants.GUI.iec_3ph,
+						fault_times=fault_times, tab_color=constants.Excel.iec_tab_color, metadata=metadata
+					)
+
+			if constants.GUI.iec_lg in dfs_iec:
+				# Export results to excel
+				message, metadata = study_details(
+					message='IEC Line-Ground Fault Current Results', study=constants.GUI.iec_lg,
+					incremental_study=incremental_study
+				)
+				with g74.instrumentation.span(c.span_excel, sheet=constants.Excel.iec_sheet_name_lg):
+					results_export.write_fault_data(
+						df=dfs_iec[constants.GUI.iec_lg], message=message,
+						sheet_name=constants.Excel.iec_sheet_name_lg, method=constants.GUI.iec_lg,
+						fault_times=fault_times, tab_color=constants.Excel.iec_tab_color, metadata=metadata
+					)
+
+		with g74.instrumentation.span(c.span_excel_save):
+			results_export.close()
 
 	# Save temporary SAV case (if necessary)
 	if temp_sav_case:
 		psse_handler.save_data_case(pth_sav=temp_sav_case)
-	local_logger.info('Took {:.2f} seconds to carry out all fault current studies.'.format(time.time() - t))
-	t = time.time()
-
-	local_logger.info('Results written to Excel workbook: {}'.format(excel_file))
-	local_logger.info('Took {:.2f} seconds to save results'.format(time.time()-t))
-	t = time.time()
 
 	# Will reload original SAV case if required
 	if reload_sav:
-		psse_handler.load_data_case(pth_sav=pth_sav_case)
-		local_logger.debug('Original sav case: {} reloaded'.format(pth_sav_case))
+		with g74.instrumentation.span(c.span_reload):
+			psse_handler.load_data_case(pth_sav=sav_case)
+		local_logger.debug('Original sav case: {} reloaded'.format(sav_case))
 
 	# Restore output to defaults
 	psse_handler.change_output(destination=1)
 
-	local_logger.info(
-		'Took {:.2f} seconds to reload SAV case and export warning messages (if any)'.format(time.time()-t)
-	)
+	# Summary of where the time has gone and a trace which can be viewed in chrome://tracing
+	g74.instrumentation.export(pth_logs=local_logger.pth_logs, uid=local_uid)
 
-	return None
+	return results
 
 
 def get_busbars(psse_handler):
@@ -251,12 +348,23 @@ if __name__ == '__main__':
 		bkdy_faults = gui.bkdy_faults
 		iec_faults = gui.iec_faults
 
-		fault_study(
+		# Engine used for the 3 phase fault study
+		if gui.bo_native_engine.get():
+			study_engine = constants.ShortCircuit.engine_native
+		else:
+			study_engine = constants.ShortCircuit.engine_bkdy
+
+		study_inputs = dict(
 			psse_handler=psse,
 			local_uid=uid, sav_case=pth_sav_case, local_temp_folder=temp_folder, excel_file=target_file,
 			fault_times=faults, buses=buses_to_fault, reload_sav=reload_sav_case, local_logger=logger,
-			fault_types=(bkdy_faults, iec_faults)
+			fault_types=(bkdy_faults, iec_faults), engine=study_engine
 		)
+		# Profile files are written next to the log files, the study is only wrapped if profiling is enabled
+		if g74.profiling.profiling_enabled(gui_setting=gui.bo_profile.get()):
+			g74.profiling.profile_call(fault_study, temp_folder, uid, **study_inputs)
+		else:
+			fault_study(**study_inputs)
 
 		# Open the exported excel if setting is as such
 		# TODO: Alternatively, adjust to just display in an instance of excel rather than having to save the results
@@ -0,0 +1,367 @@
+"""
+#######################################################################################################################
+###											PSSE G74 Fault Studies													###
+###		Headless batch runner which carries out the fault study for each SAV case listed in a manifest				###
+###																													###
+###		Code developed by David Mills (david.mills@PSCconsulting.com, +44 7899 984158) as part of PSC 		 		###
+###		project JK7938 - SHEPD - studies and automation																###
+###																													###
+#######################################################################################################################
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import collections
+import multiprocessing
+
+import pandas as pd
+
+import g74
+import g74.cache as cache
+import g74.export as export
+import g74.file_handling as file_handling
+import g74.constants as constants
+
+# Sheet name, message and tab colour used for the consolidated results of each type of fault study
+STUDY_SHEETS = collections.OrderedDict((
+	(constants.GUI.bkdy_3ph, (constants.Excel.bkdy_sheet_name, 'BKDY 3Phase', constants.Excel.bkdy_tab_color)),
+	(constants.GUI.iec_3ph, (constants.Excel.iec_sheet_name_lll, 'IEC 3Phase', constants.Excel.iec_tab_color)),
+	(constants.GUI.iec_lg, (constants.Excel.iec_sheet_name_lg, 'IEC Line-Ground', constants.Excel.iec_tab_color))
+))
+
+# Logger and PSSE session for a worker process, created once and then reused for every case the worker studies
+WORKER = dict()
+
+
+def load_manifest(pth_manifest, engine=None):
+	"""
+		Reads the cases to study from the JSON manifest.  Paths are relative to the folder containing the manifest and
+		values given at the top level are used for any case which does not include them, e.g.
+			{"fault_times": [0.06, 0.1], "studies": ["BKDY_3PH"], "engine": "NATIVE", "cases": [
+				{"name": "winter_peak", "sav_case": "winter.sav"},
+				{"name": "summer_outage", "sav_case": "summer.sav", "busbars_file": "busbars.xlsx"}
+			]}
+	:param str pth_manifest:  Full path to the manifest
+	:param str engine: (optional=None) - Engine from constants.ShortCircuit.engines for the 3 phase fault study of any
+								case which does not include one, if None then the value at the top level of the manifest
+								or constants.Batch.default_engine is used
+	:return list cases:  Dictionary for each case with the keys in constants.Batch
+	"""
+	c = constants.Batch
+	logger = logging.getLogger(constants.Logging.logger_name)
+
+	with open(pth_manifest, 'r') as f:
+		manifest = json.load(f)
+	folder = os.path.dirname(os.path.abspath(pth_manifest))
+
+	if not manifest.get(c.cases):
+		logger.critical('No cases have been listed in the manifest {}'.format(pth_manifest))
+		raise ValueError('No cases in manifest')
+
+	defaults = {
+		c.buses: list(),
+		c.busbars_file: None,
+		c.fault_times: list(c.default_fault_times),
+		c.studies: list(c.default_studies),
+		c.excel: constants.Export.excel,
+		c.engine: c.default_engine
+	}
+	defaults.update((k, v) for k, v in manifest.items() if k != c.cases)
+	if engine is not None:
+		defaults[c.engine] = engine
+
+	cases = list()
+	for i, entry in enumerate(manifest[c.cases]):
+		case = dict(defaults)
+		case.update(entry)
+
+		if not case.get(c.sav_case) or not os.path.isfile(os.path.join(folder, case[c.sav_case])):
+			logger.critical(
+				'The SAV case <{}> for case {} in the manifest {} does not exist'.format(
+					case.get(c.sav_case), i + 1, pth_manifest
+				)
+			)
+			raise ValueError('SAV case does not exist')
+		case[c.sav_case] = os.path.join(folder, case[c.sav_case])
+		case[c.name] = str(case.get(c.name) or os.path.splitext(os.path.basename(case[c.sav_case]))[0])
+
+		unknown = [x for x in case[c.studies] if x not in constants.GUI.fault_types]
+		if unknown:
+			logger.critical(
+				'The studies {} for case {} are not recognised, only the following can be used: {}'.format(
+					', '.join(unknown), case[c.name], ', '.join(STUDY_SHEETS)
+				)
+			)
+			raise ValueError('Unrecognised study')
+
+		if case[c.engine] not in constants.ShortCircuit.engines:
+			logger.critical(
+				'The engine {} for case {} is not recognised, only the following can be used: {}'.format(
+					case[c.engine], case[c.name], ', '.join(constants.ShortCircuit.engines)
+				)
+			)
+			raise ValueError('Unrecognised engine')
+
+		if case[c.busbars_file]:
+			case[c.buses] = file_handling.import_busbars_list(path=os.path.join(folder, case[c.busbars_file]))
+		case[c.buses] = [int(x) for x in case[c.buses]]
+		case[c.fault_times] = [float(x) for x in case[c.fault_times]]
+		cases.append(case)
+
+	names = [case[c.name] for case in cases]
+	duplicates = sorted(set(x for x in names if names.count(x) > 1))
+	if duplicates:
+		logger.critical(
+			'The following case names are used more than once in the manifest {}: {}'.format(
+				pth_manifest, ', '.join(duplicates)
+			)
+		)
+		raise ValueError('Duplicate case names')
+
+	return cases
+
+
+def fault_types(studies):
+	"""
+		Converts the names of the fault studies into the fault types used by Fault_Calculations.fault_study
+	:param list studies:  Studies from constants.GUI.fault_types
+	:return tuple fault_types:
+	"""
+	g = constants.GUI
+	return (int(g.bkdy_3ph in studies), ), (int(g.iec_3ph in studies), int(g.iec_lg in studies))
+
+
+def run_case(case, psse_control, logger, output_folder):
+	"""
+		Runs the fault study for a single case, any error is logged and reported in the summary rather than stopping the
+		remaining cases
+	:param dict case:  Case returned by load_manifest
+	:param g74.psse.PsseControl psse_control:  PSSE session which is reused for each case
+	:param g74.Logger logger:  Logger for the study
+	:param str output_folder:  Folder the Excel workbook for the case is written to
+	:return (dict, dict) (summary, results):  Summary of the study and the results for each type of fault study
+	"""
+	# Imported here since Fault_Calculations is the top level script rather than part of the package
+	import Fault_Calculations
+
+	c = constants.Batch
+	name = case[c.name]
+	excel_file = os.path.join(output_folder, '{}.xlsx'.format(name))
+	summary = collections.OrderedDict((
+		(c.name, name),
+		(c.sav_case, case[c.sav_case]),
+		(c.key_sav_hash, cache.file_hash(pth=case[c.sav_case])),
+		(c.fault_times, list(case[c.fault_times])),
+		(c.engine, case[c.engine]),
+		(c.key_excel, excel_file if case[c.excel] else None)
+	))
+
+	logger.info('Fault study for case {} using SAV case {} started'.format(name, case[c.sav_case]))
+	t0 = time.time()
+	temp_folder = tempfile.mkdtemp()
+	try:
+		results = Fault_Calculations.fault_study(
+			psse_handler=psse_control, local_uid=name, sav_case=case[c.sav_case], local_temp_folder=temp_folder,
+			excel_file=excel_file, fault_times=list(case[c.fault_times]), buses=list(case[c.buses]),
+			local_logger=logger, reload_sav=False, fault_types=fault_types(studies=case[c.studies]),
+			excel_export=case[c.excel], engine=case[c.engine]
+		)
+		summary[c.key_status] = c.status_complete
+	except Exception as error:
+		logger.error('Fault study for case {} failed with the error: {}'.format(name, error))
+		results = dict()
+		summary[c.key_status] = c.status_failed
+		summary[c.key_error] = str(error)
+	finally:
+		shutil.rmtree(temp_folder, ignore_errors=True)
+
+	summary[c.key_seconds] = time.time() - t0
+	logger.info(
+		'Fault study for case {} {} in {:.2f} seconds'.format(name, summary[c.key_status], summary[c.key_seconds])
+	)
+	return summary, results
+
+
+def initialise_worker(pth_logs, uid):
+	"""
+		Creates the logger and PSSE session for a worker process
+	:param str pth_logs:  Folder for the log files
+	:param str uid:  Identifier for the batch, the process id is added so each worker has its own log files
+	:return None:
+	"""
+	# Worker processes are not able to start their own worker processes
+	constants.Parallel.processes = 1
+	WORKER['logger'] = g74.Logger(pth_logs=pth_logs, uid='{}_{}'.format(uid, os.getpid()), debug=constants.DEBUG_MODE)
+	WORKER['psse'] = g74.psse.PsseControl()
+	return None
+
+
+def case_worker(task):
+	"""
+		Runs a single case in a worker process using the PSSE session created by initialise_worker
+	:param dict task:  Details of the case with the keys case and output_folder
+	:return (dict, dict) (summary, results):  See run_case
+	"""
+	return run_case(
+		case=task['case'], psse_control=WORKER['psse'], logger=WORKER['logger'], output_folder=task['output_folder']
+	)
+
+
+def consolidate(case_results, output_folder, formats=None, excel=constants.Export.excel):
+	"""
+		Combines the results of every case into a single set of results for each type of fault study, with the case as
+		the first level of the index, and writes them to one Excel workbook and / or binary files
+	:param list case_results:  (summary, results) returned by run_case for each case
+	:param str output_folder:  Folder to write the consolidated results to
+	:param list formats: (optional=None) - Binary formats to write, if None then determined by constants.Export
+	:param bool excel: (optional) - If False then the results are only written to the binary formats
+	:return list files:  Files the consolidated results have been written to
+	"""
+	c = constants.Batch
+	pth_excel = os.path.join(output_folder, '{}.xlsx'.format(c.results_name))
+	results_export = export.ResultsExport(pth_excel=pth_excel, formats=formats, excel=excel)
+
+	for study, (sheet_name, message, tab_color) in STUDY_SHEETS.items():
+		studied = [(summary, results[study]) for summary, results in case_results if study in results]
+		if not studied:
+			continue
+		# Columns are combined so cases studied for different fault times can be included in the same results
+		df = pd.concat(
+			[df for _, df in studied], keys=[summary[c.name] for summary, _ in studied],
+			names=[c.case_label, constants.General.bus_number], sort=False
+		)
+		message = '{} Fault Current Results for {} cases'.format(message, len(studied))
+		native = [
+			summary[c.name] for summary, _ in studied
+			if study == constants.GUI.bkdy_3ph and summary.get(c.engine) == constants.ShortCircuit.engine_native
+		]
+		if native:
+			message = '{} ({} for the cases: {})'.format(
+				message, constants.ShortCircuit.native_engine_note, ', '.join(native)
+			)
+		results_export.write_fault_data(
+			df=df, message=message,
+			sheet_name=sheet_name, method=study, tab_color=tab_color,
+			fault_times=sorted(set(t for summary, _ in studied for t in summary[c.fault_times])),
+			metadata={
+				c.cases: dict(
+					(
+						summary[c.name], {
+							c.sav_case: summary[c.sav_case], c.key_sav_hash: summary[c.key_sav_hash],
+							c.engine: summary.get(c.engine)
+						}
+					)
+					for summary, _ in studied
+				)
+			}
+		)
+
+	results_export.close()
+	files = list(results_export.files)
+	if results_export.results_wkbk is not None:
+		files.insert(0, pth_excel)
+	return files
+
+
+def run_batch(
+		pth_manifest, output_folder=None, processes=1, formats=None, excel=constants.Export.excel, logger=None,
+		engine=None
+):
+	"""
+		Carries out the fault study for every case in the manifest without the GUI.  If a single process is used then
+		PSSE is only initialised once and reused for every case, otherwise the cases are shared between worker processes
+		which each initialise PSSE once.
+	:param str pth_manifest:  Full path to the JSON manifest, see load_manifest
+	:param str output_folder: (optional=None) - Folder results are written to, if None then the folder of the manifest
+	:param int processes: (optional=1) - Number of worker processes to share the cases between
+	:param list formats: (optional=None) - Binary formats the consolidated results are written to, if None then
+								determined by constants.Export
+	:param bool excel: (optional) - If False then the consolidated results are only written to the binary formats
+	:param g74.Logger logger: (optional=None) - Logger to use, if None then one is created in the output folder
+	:param str engine: (optional=None) - Engine from constants.ShortCircuit.engines for the 3 phase fault study of any
+								case which does not include one in the manifest, see load_manifest
+	:return list summaries:  Summary of the study for each case
+	"""
+	c = constants.Batch
+	if output_folder is None:
+		output_folder = os.path.dirname(os.path.abspath(pth_manifest))
+	pth_logs = os.path.join(output_folder, c.logs_folder)
+	if not os.path.isdir(pth_logs):
+		os.makedirs(pth_logs)
+
+	uid = '{}_{}'.format(c.results_name, time.strftime('%Y%m%d_%H%M%S'))
+	if logger is None:
+		logger = g74.Logger(pth_logs=pth_logs, uid=uid, debug=constants.DEBUG_MODE)
+
+	cases = load_manifest(pth_manifest=pth_manifest, engine=engine)
+	processes = max(1, min(int(processes), len(cases)))
+	logger.info('Batch of {} cases started using {} process(es)'.format(len(cases), processes))
+	t0 = time.time()
+
+	if processes == 1:
+		psse_control = g74.psse.PsseControl()
+		case_results = [
+			run_case(case=case, psse_control=psse_control, logger=logger, output_folder=output_folder)
+			for case in cases
+		]
+	else:
+		pool = multiprocessing.Pool(processes=processes, initializer=initialise_worker, initargs=(pth_logs, uid))
+		try:
+			case_results = pool.map(
+				case_worker, [{'case': case, 'output_folder': output_folder} for case in cases], chunksize=1
+			)
+		finally:
+			pool.close()
+			pool.join()
+
+	summaries = [summary for summary, _ in case_results]
+	studied = [x for x in case_results if x[1]]
+	files = list()
+	if studied:
+		files = consolidate(case_results=studied, output_folder=output_folder, formats=formats, excel=excel)
+	for summary, _ in case_results:
+		summary[c.key_results] = files if summary[c.key_status] == c.status_complete else list()
+
+	with open(os.path.join(output_folder, c.summary_file), 'w') as f:
+		json.dump(summaries, f, indent=2)
+
+	failed = [summary[c.name] for summary in summaries if summary[c.key_status] == c.status_failed]
+	if failed:
+		logger.error('The following cases failed, see the log files for details: {}'.format(', '.join(failed)))
+	logger.info(
+		'Batch of {} cases completed in {:.2f} seconds with {} failure(s)'.format(
+			len(cases), time.time() - t0, len(failed)
+		)
+	)
+	return summaries
+
+
+if __name__ == '__main__':
+	# Run from the parent folder using:  python -m g74.batch manifest.json
+	parser = argparse.ArgumentParser(description='Carries out the G74 fault study for each SAV case in a manifest')
+	parser.add_argument('manifest', help='JSON file listing the SAV cases, busbars and fault times to study')
+	parser.add_argument('--output', help='Folder to write the results to, defaults to the folder of the manifest')
+	parser.add_argument(
+		'--processes', type=int, default=1, help='Number of worker processes to share the cases between'
+	)
+	parser.add_argument(
+		'--formats', nargs='*', help='Binary formats to also write the consolidated results to (parquet, feather, hdf5)'
+	)
+	parser.add_argument('--no-excel', action='store_true', help='Only write the consolidated results to binary formats')
+	parser.add_argument(
+		'--engine', choices=constants.ShortCircuit.engines,
+		help='Engine for the 3 phase fault study of any case which does not include one in the manifest'
+	)
+	args = parser.parse_args()
+
+	batch_summaries = run_batch(
+		pth_manifest=args.manifest, output_folder=args.output, processes=args.processes, formats=args.formats,
+		excel=not args.no_excel, engine=args.engine
+	)
+	sys.exit(int(any(x[constants.Batch.key_status] == constants.Batch.status_failed for x in batch_summaries)))
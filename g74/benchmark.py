@@ -0,0 +1,557 @@
+"""
+#######################################################################################################################
+###											PSSE G74 Fault Studies													###
+###		Benchmarks for measuring the performance of the processing carried out by the G74 tool						###
+###																													###
+###		Code developed by David Mills (david.mills@PSCconsulting.com, +44 7899 984158) as part of PSC 		 		###
+###		project JK7938 - SHEPD - studies and automation																###
+###																													###
+#######################################################################################################################
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import logging
+import platform
+import contextlib
+import collections
+
+import numpy as np
+import pandas as pd
+
+import g74
+import g74.constants as constants
+import g74.psse as psse
+import g74.instrumentation as instrumentation
+import g74.file_handling as file_handling
+import g74.mock_psse as mock_psse
+import g74.synthetic as synthetic
+
+# Linux only, used to reset the peak resident memory at the start of each stage
+PTH_CLEAR_REFS = '/proc/self/clear_refs'
+PTH_STATUS = '/proc/self/status'
+
+# Example BKDY report used as the template for producing larger reports
+TEMPLATE_BKDY_REPORT = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'test_files', 'bkdy_output.csv')
+
+
+def build_bkdy_report(number_of_buses, template=TEMPLATE_BKDY_REPORT):
+	"""
+		Produces a BKDY report with the requested number of busbars by repeating the busbar results in the template
+		report and renumbering the busbars
+	:param int number_of_buses:  Number of busbars to include in the report
+	:param str template: (optional) - Full path to the BKDY report to use as a template
+	:return str contents:  Contents of the BKDY report
+	"""
+	with open(template, 'rb') as f:
+		lines = f.read().splitlines()
+
+	# Split into the header and the results for each busbar (busbar, FAULT CURRENT and THEVENIN IMPEDANCE lines)
+	header_end = [i for i, line in enumerate(lines) if constants.BkdyFileOutput.start in line][0] + 1
+	header = lines[:header_end]
+	results = [
+		lines[i-1:i+2] for i, line in enumerate(lines)
+		if line.startswith(constants.BkdyFileOutput.current)
+	]
+
+	bus_end = constants.BkdyFileOutput.bus_field[1]
+	report = list(header)
+	for i in range(number_of_buses):
+		bus_line, current_line, impedance_line = results[i % len(results)]
+		report.append('{:>{}}{}'.format(i + 1, bus_end, bus_line[bus_end:]))
+		report.append(current_line)
+		report.append(impedance_line)
+
+	return '\n'.join(report) + '\n'
+
+
+def time_function(func, repeats=3, **kwargs):
+	"""
+		Returns the fastest time taken to run a function
+	:param func:  Function to time
+	:param int repeats: (optional=3) - Number of times to run the function
+	:param kwargs:  Arguments passed to the function
+	:return float duration:  Fastest time in seconds
+	"""
+	durations = list()
+	for _ in range(repeats):
+		t0 = time.time()
+		func(**kwargs)
+		durations.append(time.time() - t0)
+	return min(durations)
+
+
+def parse_bkdy_report_regex(output_file):
+	"""
+		Processes a BKDY report using the regex search on each line
+	:param str output_file:  Full path to the BKDY report
+	:return pd.DataFrame df:
+	"""
+	with open(output_file, 'rb') as f:
+		contents = f.read()
+	return psse.BkdyFile.parse_bkdy_report(contents=contents)
+
+
+def benchmark_bkdy_parsing(number_of_buses=10000, repeats=3):
+	"""
+		Compares the time taken to process a BKDY report using the regex search on each line against the memory mapped
+		fixed width processing
+	:param int number_of_buses: (optional=10000) - Number of busbars in the BKDY report
+	:param int repeats: (optional=3) - Number of times each method is run, fastest time is reported
+	:return dict results:  Time taken by each method and the number of busbars processed per second
+	"""
+	logger = logging.getLogger(constants.Logging.logger_name)
+
+	contents = build_bkdy_report(number_of_buses=number_of_buses)
+	handle, pth_report = tempfile.mkstemp(suffix=constants.General.ext_csv)
+	with os.fdopen(handle, 'wb') as f:
+		f.write(contents)
+
+	try:
+		# Confirm both methods return the same results before timing them
+		df_regex = psse.BkdyFile.parse_bkdy_report(contents=contents)
+		df_fixed = psse.BkdyFile.parse_bkdy_report_fixed_width(output_file=pth_report)
+		if not df_fixed.equals(df_regex):
+			raise ValueError('Fixed width processing of the BKDY report does not match the regex search')
+
+		t_regex = time_function(func=parse_bkdy_report_regex, repeats=repeats, output_file=pth_report)
+		t_fixed = time_function(
+			func=psse.BkdyFile.parse_bkdy_report_fixed_width, repeats=repeats, output_file=pth_report
+		)
+	finally:
+		os.remove(pth_report)
+
+	results = {
+		'buses': number_of_buses,
+		'regex_seconds': t_regex,
+		'fixed_width_seconds': t_fixed,
+		'regex_buses_per_second': number_of_buses / t_regex,
+		'fixed_width_buses_per_second': number_of_buses / t_fixed,
+		'speed_up': t_regex / t_fixed
+	}
+	logger.info(
+		(
+			'BKDY report with {} busbars processed in {:.3f} seconds using the regex search and {:.3f} seconds using '
+			'fixed width processing ({:.1f} times faster)'
+		).format(number_of_buses, t_regex, t_fixed, results['speed_up'])
+	)
+
+	return results
+
+
+def peak_rss():
+	"""
+		Returns the peak resident memory of this process since it was last reset
+	:return float peak:  Peak resident memory in MB, None if it cannot be determined on this platform
+	"""
+	if os.path.exists(PTH_STATUS):
+		with open(PTH_STATUS, 'r') as f:
+			for line in f:
+				if line.startswith('VmHWM:'):
+					return float(line.split()[1]) / 1024.0
+	try:
+		import resource
+	except ImportError:
+		return None
+	# Only available as the peak for the life of the process and reported in kB on Linux
+	return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def reset_peak_rss():
+	"""
+		Resets the peak resident memory so that the peak can be measured for each stage, only possible on Linux
+	:return bool success:
+	"""
+	try:
+		with open(PTH_CLEAR_REFS, 'w') as f:
+			f.write('5')
+	except (IOError, OSError):
+		return False
+	return True
+
+
+class StageTimer:
+	"""
+		Records the wall time and peak resident memory of each stage of a benchmark which is not part of the fault study
+	"""
+	def __init__(self):
+		self.logger = logging.getLogger(constants.Logging.logger_name)
+		self.c = constants.Benchmark
+		self.stages = collections.OrderedDict()
+
+	@contextlib.contextmanager
+	def stage(self, name):
+		"""
+			Context manager that records the time taken and peak memory for the code run within it
+		:param str name:  Name of the stage
+		"""
+		reset_peak_rss()
+		t0 = time.time()
+		yield
+		self.stages[name] = {self.c.key_seconds: time.time() - t0, self.c.key_peak_rss: peak_rss()}
+		self.logger.debug('Benchmark stage {} completed in {:.3f} seconds'.format(name, time.time() - t0))
+
+
+def measure_peak_rss():
+	"""
+		Returns the peak resident memory since it was last measured and then resets it, used by the instrumentation
+		recorder to measure the peak memory of each span
+	:return float peak:  Peak resident memory in MB, None if it cannot be determined on this platform
+	"""
+	peak = peak_rss()
+	reset_peak_rss()
+	return peak
+
+
+def memory_limitations():
+	"""
+		Returns the known limitations of the peak memory measurement on this platform
+	:return list limitations:
+	"""
+	c = constants.Benchmark
+	if peak_rss() is None:
+		return [c.limitation_no_memory]
+	if not reset_peak_rss():
+		return [c.limitation_no_reset]
+	return list()
+
+
+def span_stages(spans):
+	"""
+		Combines the timing spans recorded during a fault study into the stages of the pipeline.  Spans with the same
+		name are added together, except those for a fault time which are a separate stage for each fault time.
+	:param list spans:  Spans recorded by g74.instrumentation.Recorder
+	:return collections.OrderedDict stages:  Time, peak memory, number of calls and depth of each stage in the order
+								they were started
+	"""
+	c = constants.Benchmark
+	stages = collections.OrderedDict()
+	for span in sorted(spans, key=lambda x: (x.start, x.depth)):
+		name = span.name
+		if 'fault_time' in span.args:
+			name = c.stage_fault_time.format(span.name, span.args['fault_time'])
+		stage = stages.setdefault(
+			name, {c.key_seconds: 0.0, c.key_peak_rss: None, c.key_calls: 0, c.key_depth: span.depth}
+		)
+		stage[c.key_seconds] += span.duration
+		stage[c.key_calls] += 1
+		if span.peak_memory is not None:
+			stage[c.key_peak_rss] = max(stage[c.key_peak_rss] or 0.0, span.peak_memory)
+	return stages
+
+
+def benchmark_pipeline(
+		number_of_buses, local_logger, fault_times=constants.Benchmark.fault_times, meshed=False, radial_solve=True,
+		output_folder=None
+):
+	"""
+		Runs Fault_Calculations.fault_study for a synthetic network using the stand in PSSE backend and takes the time
+		and peak memory of each stage from the timing spans recorded by g74.instrumentation
+	:param int number_of_buses:  Number of busbars in the synthetic network
+	:param g74.Logger local_logger:  Logger passed to the fault study, the Chrome trace is written next to its logs
+	:param tuple fault_times: (optional) - Fault times to study
+	:param bool meshed: (optional=False) - Whether the synthetic network is meshed
+	:param bool radial_solve: (optional=True) - If True then the stand in PSSE backend produces the BKDY report for
+							each fault time from the synthetic network rather than rebuilding the native solver for
+							each report, which is quicker for radial networks (meshed networks are solved with the
+							native solver either way).  Either way the time is that of the stand in rather than PSSE.
+	:param str output_folder: (optional=None) - Folder for the network, reports and Excel workbook, if None then a
+							temporary folder is used and deleted afterwards
+	:return dict results:  Number of busbars, the time and peak memory of each stage, the PSSE API calls and any
+							known limitations of the memory measurement
+	"""
+	# Imported here since Fault_Calculations is the top level script rather than part of the package
+	import Fault_Calculations
+
+	c = constants.Benchmark
+	logger = logging.getLogger(constants.Logging.logger_name)
+	fault_times = list(fault_times)
+
+	delete_folder = output_folder is None
+	if delete_folder:
+		output_folder = tempfile.mkdtemp()
+
+	network = synthetic.SyntheticNetwork(number_of_buses=number_of_buses, meshed=meshed)
+	pth_sav = network.to_json(pth=os.path.join(output_folder, 'synthetic_{}.json'.format(number_of_buses)))
+	pth_excel = os.path.join(output_folder, 'synthetic_{}.xlsx'.format(number_of_buses))
+
+	limitations = memory_limitations()
+	for limitation in limitations:
+		logger.warning(limitation)
+
+	recorder = instrumentation.RECORDER
+	mock_psspy, _ = mock_psse.install()
+	if radial_solve:
+		mock_psspy.bkdy_report = network.bkdy_report
+	recorder.memory = measure_peak_rss
+	try:
+		t0 = time.time()
+		Fault_Calculations.fault_study(
+			psse_handler=psse.PsseControl(), local_uid='benchmark_{}'.format(number_of_buses), sav_case=pth_sav,
+			local_temp_folder=output_folder, excel_file=pth_excel, fault_times=fault_times, buses=list(),
+			local_logger=local_logger, reload_sav=False, use_cache=False
+		)
+		seconds = time.time() - t0
+	finally:
+		recorder.memory = None
+		mock_psse.uninstall()
+		if delete_folder:
+			shutil.rmtree(output_folder, ignore_errors=True)
+
+	results = {
+		c.key_buses: number_of_buses,
+		'fault_times': fault_times,
+		'meshed': meshed,
+		'radial_solve': radial_solve,
+		c.key_stages: span_stages(spans=recorder.spans),
+		c.key_api_calls: dict((name, calls) for name, (calls, _) in recorder.api_calls.items()),
+		c.key_seconds: seconds,
+		c.key_limitations: limitations
+	}
+	logger.info(
+		'Fault study pipeline for a synthetic network with {} busbars completed in {:.2f} seconds'.format(
+			number_of_buses, results[c.key_seconds]
+		)
+	)
+
+	return results
+
+
+def fault_results(number_of_buses, fault_times=constants.Benchmark.fault_times):
+	"""
+		Produces results in the same format as the fault studies, i.e. the busbar details followed by the fault current
+		values for each fault time, with random values
+	:param int number_of_buses:  Number of busbars
+	:param tuple fault_times: (optional) - Fault times to include
+	:return pd.DataFrame df:
+	"""
+	cg = constants.General
+	cb = constants.BkdyFileOutput
+	values = (cb.ik11, cb.ibsym, cb.ibasym, cb.idc, cb.ip, cb.r, cb.x, cg.x_r)
+	columns = [(cg.node_label, x) for x in (cg.bus_name, cg.bus_voltage, cg.pre_fault)]
+	columns += [('{} {}'.format(t, constants.SHEPD.time_units), x) for t in fault_times for x in values]
+
+	buses = np.arange(1, number_of_buses + 1)
+	df = pd.DataFrame(
+		np.random.rand(number_of_buses, len(columns)), index=pd.Index(buses, name=cg.bus_number),
+		columns=pd.MultiIndex.from_tuples(columns, names=constants.SHEPD.output_headers)
+	)
+	# Busbar details are returned by PSSE with mixed types
+	df[(cg.node_label, cg.bus_name)] = ['BUS_{}'.format(x) for x in buses]
+	df[(cg.node_label, cg.bus_voltage)] = np.random.choice([11.0, 33.0, 132.0], number_of_buses).astype(object)
+	return df
+
+
+def benchmark_excel_transpose(
+		number_of_buses=constants.Benchmark.export_buses, fault_times=constants.Benchmark.export_fault_times,
+		constant_memory=constants.Excel.constant_memory, output_folder=None
+):
+	"""
+		Compares the time, peak memory and file size of exporting a set of results to Excel for each of the options for
+		producing the transposed sheet
+	:param int number_of_buses: (optional) - Number of busbars in the results
+	:param tuple fault_times: (optional) - Fault times in the results
+	:param bool constant_memory: (optional) - Whether the workbook is written in constant memory mode
+	:param str output_folder: (optional=None) - Folder for the Excel workbooks, if None then a temporary folder is used
+							and deleted afterwards
+	:return dict results:  Number of busbars, the time, peak memory and file size for each option and any known
+							limitations of the memory measurement
+	"""
+	c = constants.Benchmark
+	logger = logging.getLogger(constants.Logging.logger_name)
+
+	delete_folder = output_folder is None
+	if delete_folder:
+		output_folder = tempfile.mkdtemp()
+
+	ce = constants.Excel
+	df = fault_results(number_of_buses=number_of_buses, fault_times=fault_times)
+	limitations = memory_limitations()
+	for limitation in limitations:
+		logger.warning(limitation)
+	timer = StageTimer()
+	try:
+		for transpose in (ce.transpose_full, ce.transpose_streamed, ce.transpose_none):
+			name = c.stage_transpose.format(transpose)
+			pth_excel = os.path.join(output_folder, 'results_{}.xlsx'.format(transpose))
+			with timer.stage(name):
+				with file_handling.ResultsWorkbook(
+						pth=pth_excel, constant_memory=constant_memory, transpose=transpose
+				) as results_wkbk:
+					results_wkbk.write_fault_data(
+						df=df, message='BKDY 3Phase Fault Current Results',
+						sheet_name=ce.bkdy_sheet_name, tab_color=ce.bkdy_tab_color
+					)
+			timer.stages[name][c.key_file_size] = os.path.getsize(pth_excel) / 2.0**20
+	finally:
+		if delete_folder:
+			shutil.rmtree(output_folder, ignore_errors=True)
+
+	full = timer.stages[c.stage_transpose.format(ce.transpose_full)]
+	for name, stage in timer.stages.items():
+		logger.info(
+			(
+				'Excel export of {} busbars with {}:  {:.2f} seconds ({:.0%} of full transpose) and {:.1f} MB'
+			).format(
+				number_of_buses, name, stage[c.key_seconds], stage[c.key_seconds] / max(full[c.key_seconds], 1e-9),
+				stage[c.key_file_size]
+			)
+		)
+
+	return {
+		c.key_buses: number_of_buses,
+		'fault_times': list(fault_times),
+		'constant_memory': constant_memory,
+		c.key_stages: timer.stages,
+		c.key_limitations: limitations
+	}
+
+
+def run_pipeline_benchmarks(sizes=constants.Benchmark.sizes, pth_results=None, **kwargs):
+	"""
+		Runs the pipeline benchmark for each network size and optionally writes the results to a JSON file
+	:param tuple sizes: (optional) - Number of busbars in each synthetic network
+	:param str pth_results: (optional=None) - Full path to the JSON file to write the results to
+	:param kwargs:  Any additional arguments for benchmark_pipeline
+	:return dict results:
+	"""
+	results = {
+		'python': platform.python_version(),
+		'platform': platform.platform(),
+		'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+		constants.Benchmark.key_runs: [benchmark_pipeline(number_of_buses=size, **kwargs) for size in sizes]
+	}
+
+	if pth_results:
+		with open(pth_results, 'w') as f:
+			json.dump(results, f, indent=1)
+
+	return results
+
+
+def compare_to_baseline(
+		results, baseline, time_tolerance=constants.Benchmark.time_tolerance,
+		memory_tolerance=constants.Benchmark.memory_tolerance
+):
+	"""
+		Compares the pipeline benchmark results against a baseline for the same network sizes and reports any stages
+		which are slower or use more memory than the tolerance allows
+	:param dict results:  Results returned by run_pipeline_benchmarks
+	:param dict baseline:  Previous results returned by run_pipeline_benchmarks or loaded from the JSON file
+	:param float time_tolerance: (optional) - Fractional increase in time allowed
+	:param float memory_tolerance: (optional) - Fractional increase in peak memory allowed
+	:return list regressions:  Details of each regression
+	"""
+	c = constants.Benchmark
+	logger = logging.getLogger(constants.Logging.logger_name)
+
+	baseline_runs = dict((run[c.key_buses], run) for run in baseline[c.key_runs])
+	regressions = list()
+	for run in results[c.key_runs]:
+		baseline_run = baseline_runs.get(run[c.key_buses])
+		if baseline_run is None:
+			logger.warning('No baseline results for a network with {} busbars'.format(run[c.key_buses]))
+			continue
+
+		for name, stage in run[c.key_stages].items():
+			baseline_stage = baseline_run[c.key_stages].get(name)
+			if baseline_stage is None:
+				continue
+
+			checks = (
+				(c.key_seconds, time_tolerance, c.min_seconds),
+				(c.key_peak_rss, memory_tolerance, 0.0)
+			)
+			for key, tolerance, minimum in checks:
+				value = stage.get(key)
+				baseline_value = baseline_stage.get(key)
+				if value is None or baseline_value is None or value < minimum:
+					continue
+				if value > baseline_value * (1.0 + tolerance):
+					regressions.append({
+						c.key_buses: run[c.key_buses], 'stage': name, 'measure': key,
+						'value': value, 'baseline': baseline_value
+					})
+					logger.warning(
+						(
+							'Regression in {} for stage {} with {} busbars:  {:.3f} compared to a baseline of {:.3f}'
+						).format(key, name, run[c.key_buses], value, baseline_value)
+					)
+
+	return regressions
+
+
+if __name__ == '__main__':
+	# Run from the parent folder using:  python -m g74.benchmark
+	parser = argparse.ArgumentParser(description='Benchmarks for the G74 fault studies')
+	parser.add_argument(
+		'--pipeline', action='store_true', help='Benchmark each stage of the fault study rather than BKDY parsing'
+	)
+	parser.add_argument(
+		'--excel', action='store_true', help='Compare the options for producing the transposed Excel sheet'
+	)
+	parser.add_argument('--sizes', type=int, nargs='+', default=list(constants.Benchmark.sizes))
+	parser.add_argument('--output', help='JSON file to write the pipeline results to')
+	parser.add_argument('--baseline', help='JSON file with previous pipeline results to compare against')
+	args = parser.parse_args()
+
+	if args.excel:
+		for buses in args.sizes:
+			result = benchmark_excel_transpose(number_of_buses=buses)
+			print('{:>7} busbars:'.format(buses))
+			for stage_name, stage_result in result[constants.Benchmark.key_stages].items():
+				print(
+					'\t{:<24}{:>10.3f}s{:>10}{:>10.1f}MB file'.format(
+						stage_name, stage_result[constants.Benchmark.key_seconds],
+						'-' if stage_result[constants.Benchmark.key_peak_rss] is None else
+						'{:.0f}MB'.format(stage_result[constants.Benchmark.key_peak_rss]),
+						stage_result[constants.Benchmark.key_file_size]
+					)
+				)
+		sys.exit(0)
+
+	if not args.pipeline:
+		for buses in args.sizes:
+			result = benchmark_bkdy_parsing(number_of_buses=buses)
+			print(
+				'{:>7} busbars:  regex {:.3f}s, fixed width {:.3f}s, {:.1f}x faster'.format(
+					buses, result['regex_seconds'], result['fixed_width_seconds'], result['speed_up']
+				)
+			)
+		sys.exit(0)
+
+	# Log files and the Chrome trace for each run are written to the temporary folder
+	benchmark_logger = g74.Logger(pth_logs=tempfile.gettempdir(), uid='benchmark', debug=constants.DEBUG_MODE)
+	benchmark_results = run_pipeline_benchmarks(
+		sizes=args.sizes, pth_results=args.output, local_logger=benchmark_logger
+	)
+	for benchmark_run in benchmark_results[constants.Benchmark.key_runs]:
+		print('{:>7} busbars:'.format(benchmark_run[constants.Benchmark.key_buses]))
+		for stage_name, stage_result in benchmark_run[constants.Benchmark.key_stages].items():
+			# Stages nested within another stage are indented
+			print(
+				'\t{:<32}{:>10.3f}s{:>10}'.format(
+					'  ' * stage_result[constants.Benchmark.key_depth] + stage_name,
+					stage_result[constants.Benchmark.key_seconds],
+					'-' if stage_result[constants.Benchmark.key_peak_rss] is None else
+					'{:.0f}MB'.format(stage_result[constants.Benchmark.key_peak_rss])
+				)
+			)
+		for limitation in benchmark_run[constants.Benchmark.key_limitations]:
+			print('\tLIMITATION:  {}'.format(limitation))
+
+	if args.baseline:
+		with open(args.baseline, 'r') as baseline_file:
+			benchmark_regressions = compare_to_baseline(results=benchmark_results, baseline=json.load(baseline_file))
+		for regression in benchmark_regressions:
+			print(
+				'REGRESSION {buses} busbars {stage} {measure}:  {value:.3f} (baseline {baseline:.3f})'.format(
+					**regression
+				)
+			)
+		sys.exit(1 if benchmark_regressions else 0)
@@ -0,0 +1,261 @@
+"""
+#######################################################################################################################
+###											PSSE G74 Fault Studies													###
+###		On disk cache of fault study results so that repeated studies of an unchanged SAV case are not re-run		###
+###																													###
+###		Code developed by David Mills (david.mills@PSCconsulting.com, +44 7899 984158) as part of PSC 		 		###
+###		project JK7938 - SHEPD - studies and automation																###
+###																													###
+#######################################################################################################################
+"""
+
+import os
+import json
+import glob
+import hashlib
+import logging
+
+import pandas as pd
+
+import g74.constants as constants
+
+# Hash of the source code for each package folder, calculated once since the code does not change while running
+CODE_VERSIONS = dict()
+
+
+def file_hash(pth, block_size=constants.Cache.hash_block_size):
+	"""
+		Calculates a hash of the contents of a file, the file is read in blocks so large cases are not loaded at once
+	:param str pth:  Full path to the file
+	:param int block_size: (optional) - Number of bytes read at a time
+	:return str digest:
+	"""
+	sha = hashlib.sha256()
+	with open(pth, 'rb') as f:
+		for block in iter(lambda: f.read(block_size), b''):
+			sha.update(block)
+	return sha.hexdigest()
+
+
+def stable_value(value):
+	"""
+		Converts a value into lists, strings and numbers which are always converted to the same text, e.g. dictionaries
+		with tuples as keys are converted into a sorted list of pairs
+	:param value:
+	:return stable_value:
+	"""
+	if isinstance(value, dict):
+		return sorted([repr(k), stable_value(v)] for k, v in value.items())
+	elif isinstance(value, (list, tuple, set, frozenset)):
+		values = [stable_value(x) for x in value]
+		return sorted(values) if isinstance(value, (set, frozenset)) else values
+	elif isinstance(value, (bool, int, long, float, str, unicode)) or value is None:
+		return value
+	elif hasattr(value, 'pattern') and hasattr(value, 'flags'):
+		# Compiled regular expressions are described by the expression rather than their location in memory
+		return [value.pattern, value.flags]
+	return repr(value)
+
+
+def class_parameters(cls):
+	"""
+		Returns the values defined in a constants class which could affect the results
+	:param cls:  Class from constants, e.g. constants.G74
+	:return list parameters:  Sorted list of (name, value) pairs
+	"""
+	return stable_value(dict((k, v) for k, v in vars(cls).items() if not k.startswith('_') and not callable(v)))
+
+
+def code_version(folder=None):
+	"""
+		Calculates a hash of the source code so that results produced by a different version of the code are not used,
+		the hash is only calculated once for each folder
+	:param str folder: (optional=None) - Package folder, if None then the folder containing this module
+	:return str digest:
+	"""
+	if folder is None:
+		folder = os.path.dirname(os.path.abspath(__file__))
+	if folder not in CODE_VERSIONS:
+		sha = hashlib.sha256()
+		files = sorted(set(
+			os.path.normpath(pth) for pattern in constants.Cache.source_files
+			for pth in glob.glob(os.path.join(folder, pattern))
+		))
+		for pth in files:
+			sha.update(os.path.basename(pth).encode('utf-8'))
+			sha.update(file_hash(pth=pth).encode('utf-8'))
+		CODE_VERSIONS[folder] = sha.hexdigest()
+	return CODE_VERSIONS[folder]
+
+
+def cache_enabled(setting=None):
+	"""
+		Determines whether fault study results should be cached
+	:param bool setting: (optional=None) - If provided then this setting is used
+	:return bool enabled:  If no setting then True if enabled in constants.Cache or by the environment variable
+	"""
+	if setting is not None:
+		return bool(setting)
+	value = os.environ.get(constants.Cache.env_var, str())
+	return constants.Cache.enabled or value.strip().lower() in constants.Cache.env_enabled
+
+
+def bypass_enabled():
+	"""
+		Determines whether the cache should be bypassed based on the environment variable in constants.Cache
+	:return bool bypass:
+	"""
+	value = os.environ.get(constants.Cache.bypass_env_var, str())
+	return value.strip().lower() in constants.Cache.env_enabled
+
+
+class ResultCache:
+	"""
+		Stores the processed fault current DataFrames produced for a SAV case so that when a study is repeated with the
+		same busbars, fault times and parameters the PSSE fault studies do not need to be run again.
+
+		Results are stored as pickle files named by a hash of the inputs, the least recently used results are deleted
+		once the total size of the cache exceeds the limit.  The inputs include the values in constants which affect
+		the results and a hash of the source code, changes to anything else (e.g. the PSSE version) are not detected
+		and so the cache is only used if enabled, see constants.Cache.
+	"""
+	def __init__(self, pth_sav, folder=None, max_size_mb=constants.Cache.max_size_mb, bypass=None):
+		"""
+		:param str pth_sav:  Full path to the SAV case the studies are run on, the contents are included in the key
+		:param str folder: (optional=None) - Folder to store the results in, if None then taken from constants.Cache
+		:param float max_size_mb: (optional) - Maximum total size of the cached results
+		:param bool bypass: (optional=None) - If True then cached results are not used (new results are still
+								stored), if None then determined by the environment variable in constants.Cache
+		"""
+		self.logger = logging.getLogger(constants.Logging.logger_name)
+		self.c = constants.Cache
+
+		if folder is None:
+			folder = os.environ.get(self.c.folder_env_var, self.c.folder)
+		self.folder = folder
+		self.max_bytes = int(max_size_mb * 2**20)
+		self.bypass = bypass_enabled() if bypass is None else bypass
+
+		if not os.path.isdir(self.folder):
+			try:
+				os.makedirs(self.folder)
+			except OSError:
+				# Another process running a study at the same time may have already created the folder
+				if not os.path.isdir(self.folder):
+					raise
+
+		self.pth_sav = pth_sav
+		self.sav_hash = file_hash(pth=pth_sav)
+
+	def key(self, buses, fault_times, study, incremental=False, engine=None):
+		"""
+			Produces the key for the results of a study
+		:param list buses:  Busbars faulted, an empty list is used for all busbars
+		:param list fault_times:  Fault times studied
+		:param str study:  Fault study type, e.g. constants.GUI.bkdy_3ph
+		:param bool incremental: (optional=False) - If True then the key is for the latest results of an incremental
+								study which do not depend on the contents of the SAV case
+		:param str engine: (optional=None) - Engine from constants.ShortCircuit.engines used for the study if the study
+								type can be run with more than one engine
+		:return str key:
+		"""
+		inputs = {
+			'version': self.c.version,
+			'sav': None if incremental else self.sav_hash,
+			'incremental': incremental,
+			'buses': sorted(int(x) for x in buses),
+			'fault_times': sorted(float(x) for x in fault_times),
+			'study': study,
+			'engine': engine,
+			'code': code_version(),
+			'convert_to_kA': constants.convert_to_kA,
+			'constants': [[name, class_parameters(getattr(constants, name))] for name in self.c.result_classes]
+		}
+		# Keys are sorted and other values converted to strings so the same inputs always produce the same key
+		text = json.dumps(inputs, sort_keys=True, default=repr)
+		return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+	def path(self, key):
+		"""
+			Returns the file the results for a key are stored in
+		:param str key:
+		:return str pth:
+		"""
+		return os.path.join(self.folder, '{}{}'.format(key, self.c.extension))
+
+	def get(self, key):
+		"""
+			Returns the cached results for a key
+		:param str key:
+		:return (pd.DataFrame, dict) or None (df, metadata):  Results and any additional details stored with them, None
+								if there are no results or the cache is bypassed
+		"""
+		pth = self.path(key=key)
+		if self.bypass or not os.path.isfile(pth):
+			return None
+
+		try:
+			df, metadata = pd.read_pickle(pth)
+		except Exception:
+			# Corrupt or incompatible results are ignored and will be replaced by the new results
+			self.logger.warning('Unable to read cached results from {} and so will be recalculated'.format(pth))
+			return None
+
+		# Modified time is updated so the least recently used results are deleted first
+		os.utime(pth, None)
+		self.logger.info('Cached fault study results used from {}'.format(pth))
+		return df, metadata
+
+	def put(self, key, df, metadata=None):
+		"""
+			Stores the results for a key and then deletes the least recently used results if the cache is too large
+		:param str key:
+		:param pd.DataFrame df:  Results to store
+		:param dict metadata: (optional=None) - Any additional details to store with the results
+		:return str pth:  File the results are stored in
+		"""
+		pth = self.path(key=key)
+		# Written to a temporary file first so a study that fails part way through never leaves a partial result, the
+		# process id is included since studies running in other processes may be storing the same results
+		pth_temp = '{}.{}.tmp'.format(pth, os.getpid())
+		pd.to_pickle((df, metadata or dict()), pth_temp)
+		try:
+			os.remove(pth)
+		except OSError:
+			pass
+		os.rename(pth_temp, pth)
+		self.logger.debug('Fault study results cached in {}'.format(pth))
+
+		self.evict()
+		return pth
+
+	def evict(self):
+		"""
+			Deletes the least recently used results until the total size is within the limit
+		:return list deleted:  Files that have been deleted
+		"""
+		files = [
+			(os.path.getmtime(pth), os.path.getsize(pth), pth)
+			for pth in glob.glob(os.path.join(self.folder, '*{}'.format(self.c.extension)))
+		]
+		total = sum(x[1] for x in files)
+		deleted = list()
+		for _, size, pth in sorted(files):
+			if total <= self.max_bytes:
+				break
+			os.remove(pth)
+			total -= size
+			deleted.append(pth)
+
+		if deleted:
+			self.logger.debug('{} least recently used results deleted from the cache'.format(len(deleted)))
+		return deleted
+
+	def clear(self):
+		"""
+			Deletes all the cached results
+		:return None:
+		"""
+		for pth in glob.glob(os.path.join(self.folder, '*{}'.format(self.c.extension))):
+			os.remove(pth)
+		return None
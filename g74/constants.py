@@ -55,6 +55,9 @@ class GUI:
 	# Open excel with completed files
 	open_excel = 1
 
+	# Profile the fault study, can also be enabled with the environment variable in constants.Profiling
+	profile_study = 0
+
 	# Number of characters to fit into entry box for busbars
 	busbar_box_size = 9
 
@@ -206,6 +209,26 @@ class BkdyFileOutput:
 	x = 'X (p.u. on {:.0f} MVA)'.format(base_mva)
 	r = 'R (p.u. on {:.0f} MVA)'.format(base_mva)
 
+	# Columns returned for each busbar when the BKDY report is streamed rather than processed in full, these are
+	# the only values needed for the combined results
+	record_columns = (ik11, ibsym, ibasym, idc, ip, r, x, v_prefault)
+	# Number of busbars returned in each chunk when the BKDY report is streamed
+	chunk_size = 2000
+
+	# The BKDY report is fixed width and so values are sliced from the following (start, end) character positions
+	# in each line.  Values are in the same order as returned by the regex search so the positions in col_positions
+	# apply to both.  The regex search is only used for lines which do not match this layout or contain an
+	# Infinity value, since the regex search returns Infin and ity as two separate values.  The only difference is
+	# that negative angles keep their sign when sliced whereas the regex search drops it, the angles are not one of
+	# the values retained in col_positions and so the results are the same.  Opt-in, by default the regex search is
+	# used for every line.
+	fixed_width = False
+	# Approximate number of bytes of the memory mapped BKDY report processed at once
+	section_size = 4 * 1024 * 1024
+	bus_field = (0, 6)
+	current_fields = ((21, 37), (37, 46), (46, 56), (56, 65), (65, 74), (74, 83), (83, 92))
+	impedance_fields = ((19, 37), (37, 46), (49, 56), (56, 65), (65, 74), (74, 83), (83, 92))
+
 	# Error flag if Vpk returns infinity
 	infinity_error = '*******'
 
@@ -291,6 +314,49 @@ class BkdyFileOutput:
 		return cols, expected_length
 
 
+class IEC:
+	"""
+		Constants for the IEC fault current calculations
+	"""
+	# If set to True then busbars with the same pre-fault voltage are faulted with a single call to
+	# pssarrays.iecs_currents rather than a call for every busbar
+	batched = True
+	# Tolerance (p.u.) that the pre-fault voltages are rounded to when grouping busbars, the rounded value is used as
+	# the pre-fault voltage for all busbars in the group.  If 0.0 then only busbars with exactly the same pre-fault
+	# voltage are grouped and so the results are the same as faulting each busbar individually.  Opt-in since any
+	# other value changes the results.
+	vfactor_tolerance = 0.0
+	# Bus subsystem used for each group of busbars, must be different to PSSE.sid
+	batch_sid = 2
+
+	def __init__(self):
+		"""
+			Purely to avoid error message
+		"""
+		pass
+
+
+class Parallel:
+	"""
+		Constants for running the fault studies in separate worker processes
+	"""
+	# Number of worker processes (and therefore PSSE sessions) the fault times are shared between, each process
+	# requires a PSSE licence and so set to 1 to run all fault times in the current PSSE session
+	processes = 1
+	# Number of times a worker process that fails is retried
+	retries = 1
+	# When faulting all busbars the busbars are split into this many shards per worker process
+	shards_per_process = 1
+	# Identifier added to the log files of each worker process
+	uid = 'fault_worker'
+
+	def __init__(self):
+		"""
+			Purely to avoid error message
+		"""
+		pass
+
+
 class Loads:
 	bus = 'NUMBER'
 	load = 'MVAACT'
@@ -315,6 +381,7 @@ class Machines:
 	xneg = 'XNEG'
 	xzero = 'XZERO'
 	zsource = 'ZSORCE'
+	mbase = 'MBASE'
 	rsource = 'R Source'
 	xsource = 'X Source'
 
@@ -375,6 +442,420 @@ class Busbars:
 		pass
 
 
+class Branches:
+	"""
+		Constants for the branch (non-transformer and two winding transformer) data
+	"""
+	from_bus = 'FROMNUMBER'
+	to_bus = 'TONUMBER'
+	status = 'STATUS'
+	# Impedance of non-transformer branches and actual impedance of transformers including tap ratio (p.u.)
+	rx = 'RX'
+	rx_transformer = 'RXACT'
+	charging = 'CHARGING'
+
+	# Labels used once the complex impedance has been split into its components
+	r = 'R'
+	x = 'X'
+
+	def __init__(self):
+		"""
+			Purely to avoid error message
+		"""
+		pass
+
+
+class ShortCircuit:
+	"""
+		Constants for the native short circuit solver which is used by the stand in PSSE backend for testing and
+		benchmarking without PSSE and can be selected in place of PSSE BKDY for the 3 phase fault study
+	"""
+	# Engine used for the 3 phase fault study (BkdyFaultStudy), the native engine solves the network exported from the
+	# SAV case rather than running BKDY
+	engine_bkdy = 'BKDY'
+	engine_native = 'NATIVE'
+	engines = (engine_bkdy, engine_native)
+	engine = engine_bkdy
+	# Included in the results message and metadata when the native engine is used since the results differ from BKDY
+	native_engine_note = (
+		'Fault currents calculated with the native short circuit solver rather than PSSE BKDY.  Existing machines are '
+		"represented by their subtransient reactance (X'') at every fault time whereas BKDY decays them using the "
+		'default time constants in the breaker duty file, and so the break currents at later fault times may be '
+		'higher than BKDY would give.  Transformers are represented by their impedance only, their off-nominal tap '
+		'ratio and phase shift are ignored'
+	)
+	# Key used for the engine in the metadata stored with the results
+	key_metadata = 'engine'
+
+	# System frequency (Hz) used for the DC decay
+	frequency = 50.0
+
+	# Ordering used when factorising the admittance matrix to limit the fill in
+	ordering = 'MMD_AT_PLUS_A'
+	# If the admittance matrix cannot be factorised for the selected inverse then the thevenin impedances are solved
+	# for this number of busbars at the same time, larger values are faster but use more memory (number of busbars x
+	# batch size complex values).  The batch is reduced so that there are no more than max_batch_values complex values
+	# (16 bytes each).
+	batch_size = 500
+	max_batch_values = 5000000
+
+	# Keys used in the network description (JSON) file
+	key_base_mva = 'base_mva'
+	key_buses = 'buses'
+	key_branches = 'branches'
+	key_machines = 'machines'
+	key_loads = 'loads'
+	key_zero_sequence_shunts = 'zero_sequence_shunts'
+
+	# Columns of each table in the network description, busbar numbers are used to link the tables together
+	bus_columns = ('bus', 'name', 'nominal_kv', 'voltage_pu')
+	branch_columns = ('from_bus', 'to_bus', 'r', 'x', 'b', 'status')
+	machine_columns = ('bus', 'id', 'mva', 'r', 'x_subtr', 'x_trans', 'x_synch')
+	load_columns = ('bus', 'mva')
+	zero_sequence_shunt_columns = ('bus', 'r', 'x')
+	# Optional columns for the negative and zero sequence networks
+	branch_sequence_columns = ('r0', 'x0')
+	machine_sequence_columns = ('r2', 'x2', 'r0', 'x0')
+
+	def __init__(self):
+		"""
+			Purely to avoid error message
+		"""
+		pass
+
+
+class Synthetic:
+	"""
+		Constants for the synthetic networks used to benchmark the fault studies at different network sizes
+	"""
+	# Voltage levels (kV) and the fraction of busbars at each level, all remaining busbars are 11 kV
+	kv_132 = 132.0
+	kv_33 = 33.0
+	kv_11 = 11.0
+	fraction_132 = 0.01
+	fraction_33 = 0.1
+
+	# Typical branch impedances (p.u. on the system base) for circuits at each voltage level and for transformers
+	# from each voltage level down to the next.  Each branch is scaled by a random factor in the range below.
+	line_impedance = {kv_132: (0.008, 0.046), kv_33: (0.09, 0.16), kv_11: (0.15, 0.1)}
+	transformer_impedance = {kv_132: (0.005, 0.22), kv_33: (0.03, 0.67)}
+	impedance_factor = (0.5, 1.5)
+	# Zero sequence impedance of circuits relative to the positive sequence
+	line_zero_sequence_factor = 3.0
+
+	# Grid infeed at the first 132 kV busbar, (r, x_subtr, x_trans, x_synch, r0, x0) on the machine base
+	grid_mva = 5000.0
+	grid_parameters = (0.1, 1.0, 1.0, 1.0, 0.1, 1.0)
+	# Embedded machines, (r, x_subtr, x_trans, x_synch) on the machine base and unearthed
+	machine_mva = (1.0, 20.0)
+	machine_parameters = (0.01, 0.2, 0.3, 1.5)
+	# Range of load (MVA) at each load busbar
+	load_mva = (0.1, 2.0)
+	# Range of pre-fault voltage (p.u.)
+	voltage_pu = (0.97, 1.03)
+
+	# For meshed networks the number of additional ties between busbars at the same voltage as a fraction of the
+	# number of busbars
+	mesh_fraction = 0.05
+	# Default seed so that the same network is produced each time
+	seed = 7938
+
+	def __init__(self):
+		"""
+			Purely to avoid error message
+		"""
+		pass
+
+
+class Benchmark:
+	"""
+		Constants for the end to end benchmarks of the fault study pipeline
+	"""
+	# Network sizes (number of busbars) and fault times used by default
+	sizes = (1000, 10000, 100000)
+	fault_times = (0.0, 0.01, 0.06, 0.1)
+
+	# Stages of the pipeline are the timing spans recorded by the fault study (see Instrumentation), spans for a fault
+	# time are a separate stage for each fault time
+	stage_fault_time = '{}_{:.3f}'
+
+	# Size of the results used to compare the options for the transposed Excel sheet and the name of each stage
+	export_buses = 10000
+	export_fault_times = (0.0, 0.01, 0.02, 0.03, 0.04, 0.05, 0.06, 0.08, 0.1, 0.12)
+	stage_transpose = 'transpose_{}'
+
+	# Keys used in the JSON results
+	key_runs = 'runs'
+	key_buses = 'buses'
+	key_stages = 'stages'
+	key_seconds = 'seconds'
+	key_peak_rss = 'peak_rss_mb'
+	key_file_size = 'file_size_mb'
+	key_calls = 'calls'
+	key_depth = 'depth'
+	key_api_calls = 'api_calls'
+	key_limitations = 'limitations'
+
+	# Known limitations of the peak memory measurement which are included in the results
+	limitation_no_memory = 'Peak resident memory is not available on this platform (e.g. Windows) and is not recorded'
+	limitation_no_reset = (
+		'Peak resident memory cannot be reset on this platform and so is the peak for the life of the process rather '
+		'than for each stage'
+	)
+
+	# A stage is reported as a regression if it is slower or uses more memory than the baseline by more than these
+	# fractions.  Stages quicker than min_seconds are ignored since they are dominated by noise.
+	time_tolerance = 0.25
+	memory_tolerance = 0.25
+	min_seconds = 0.05
+
+	def __init__(self):
+		"""
+			Purely to avoid error message
+		"""
+		pass
+
+
+class Instrumentation:
+	"""
+		Constants for the timing spans and PSSE API call counters
+	"""
+	# Chrome trace written next to the log files with the study identifier as the start of the name
+	trace_suffix = '_trace.json'
+
+	# Columns of the summary table
+	col_name = 'Span / API function'
+	col_calls = 'Calls'
+	col_total = 'Total (s)'
+	col_mean = 'Mean (s)'
+	col_max = 'Longest (s)'
+
+	# Names of the spans used throughout the package
+	span_load_case = 'load_case'
+	span_idev = 'idev_creation'
+	span_g74 = 'g74_injection'
+	span_machine_impedance = 'g74_machine_impedance'
+	span_bkdy_study = 'bkdy_study'
+	span_iec_study = 'iec_study'
+	span_bkdy = 'bkdy_fault_time'
+	span_iec = 'iec_fault_time'
+	span_combine = 'combine_results'
+	span_post_processing = 'pandas_post_processing'
+	span_excel = 'excel_export'
+	span_excel_save = 'excel_save'
+	span_reload = 'reload_case'
+	span_cache = 'result_cache'
+	span_native = 'native_fault_study'
+
+	def __init__(self):
+		"""
+			Purely to avoid error message
+		"""
+		pass
+
+
+class Profiling:
+	"""
+		Constants for profiling a complete fault study
+	"""
+	# Profiling is enabled if this environment variable is set to one of the values below (or by the GUI)
+	env_var = 'G74_PROFILE'
+	env_enabled = ('1', 'true', 'yes', 'on')
+
+	# Files written to the same folder as the log files with the study identifier as the start of the name
+	stats_suffix = '_profile.pstats'
+	collapsed_suffix = '_profile.folded'
+
+	# Interval (seconds) at which the call stack is sampled for the flamegraph
+	sample_interval = 0.005
+	# Functions with the most cumulative time written to the log
+	top_functions = 30
+
+	def __init__(self):
+		"""
+			Purely to avoid error message
+		"""
+		pass
+
+
+class Cache:
+	"""
+		Constants for the on disk cache of fault study results
+	"""
+	# Results are only cached if enabled here or with the environment variable, cached results can be bypassed with
+	# the bypass environment variable
+	enabled = False
+	env_var = 'G74_CACHE'
+	bypass_env_var = 'G74_CACHE_BYPASS'
+	env_enabled = ('1', 'true', 'yes', 'on')
+	# Folder used for the cache, can be changed with the environment variable
+	folder_env_var = 'G74_CACHE_DIR'
+	folder = os.path.join(os.environ.get('LOCALAPPDATA', os.path.expanduser('~')), 'JK7938_G74', 'cache')
+
+	# Least recently used results are deleted once the total size of the cache exceeds this value
+	max_size_mb = 1024.0
+	extension = '.pkl'
+	# Size of the blocks the SAV case is read in when calculating the hash
+	hash_block_size = 2**20
+	# Increment if the format of the cached results changes so that old results are no longer used
+	version = 2
+	# Classes in this module with values that affect the results, all of their values are included in the key along
+	# with a hash of the source code so changes to either mean the cached results are no longer used
+	result_classes = (
+		'General', 'PSSE', 'BkdyFileOutput', 'IEC', 'Loads', 'Machines', 'Plant', 'Busbars', 'Branches', 'ShortCircuit',
+		'G74', 'SHEPD'
+	)
+	# Source files (relative to the package folder) included in the hash of the source code
+	source_files = ('*.py', os.path.join('..', 'Fault_Calculations.py'))
+
+	def __init__(self):
+		"""
+			Purely to avoid error message
+		"""
+		pass
+
+
+class Incremental:
+	"""
+		Constants for the incremental re-study which only re-faults the busbars close to changes in the SAV case
+	"""
+	# Incremental studies are only carried out if enabled here or with the environment variable
+	enabled = False
+	env_var = 'G74_INCREMENTAL'
+	env_enabled = ('1', 'true', 'yes', 'on')
+
+	# Busbars within this number of branches of a change to the busbar or branch data are faulted again, this is an
+	# approximation since there is no limit on how much the fault currents further away could have changed.  Changes
+	# to machines or loads (which determine the G74 contribution) change the fault currents throughout the network and
+	# so every busbar connected to them is faulted again.
+	max_distance = 3
+	# Number of decimal places that values are rounded to before being compared
+	decimals = 6
+
+	# Labels for the data stored with the results
+	snapshot = 'snapshot'
+	buses = 'buses'
+	machines = 'machines'
+	loads = 'loads'
+	branches = 'branches'
+	three_winding = 'three_winding'
+	# Label for the details of the incremental study included with the results
+	key_metadata = 'incremental'
+	key_reused = 'reused_buses'
+	key_requested = 'requested_buses'
+	key_max_distance = 'max_distance'
+
+	def __init__(self):
+		"""
+			Purely to avoid error message
+		"""
+		pass
+
+
+class Export:
+	"""
+		Constants for exporting the fault study results to columnar binary formats alongside or instead of Excel
+	"""
+	# Results are written to Excel unless disabled here
+	excel = True
+
+	# Binary formats the results are also written to, each requires an optional package (pyarrow for parquet and
+	# feather, pytables for hdf5).  Can also be set with the environment variable as a comma separated list.
+	parquet = 'parquet'
+	feather = 'feather'
+	hdf5 = 'hdf5'
+	formats = ()
+	env_var = 'G74_EXPORT_FORMATS'
+	extensions = {parquet: '.parquet', feather: '.feather', hdf5: '.h5'}
+	packages = {parquet: 'pyarrow', feather: 'pyarrow', hdf5: 'tables'}
+
+	# Key the metadata is stored under in the file and the key for the results in HDF5 files
+	key = 'g74'
+	# Columns are stored as a single level with the levels joined by this separator
+	separator = ' | '
+
+	# Labels for the metadata stored with the results
+	method = 'method'
+	sav_case = 'sav_case'
+	sav_hash = 'sav_hash'
+	fault_times = 'fault_times'
+	column_levels = 'column_levels'
+	columns = 'columns'
+	index_names = 'index_names'
+
+	def __init__(self):
+		"""
+			Purely to avoid error message
+		"""
+		pass
+
+
+class Batch:
+	"""
+		Constants for the headless batch runner which carries out the fault study for each SAV case in a manifest
+	"""
+	# Keys in the JSON manifest, values given at the top level are used for any case which does not include them
+	cases = 'cases'
+	name = 'name'
+	sav_case = 'sav_case'
+	buses = 'buses'
+	busbars_file = 'busbars_file'
+	fault_times = 'fault_times'
+	studies = 'studies'
+	excel = 'excel'
+	engine = 'engine'
+
+	# Values used if not given in the manifest
+	default_fault_times = (0.06, )
+	default_studies = (GUI.bkdy_3ph, )
+	default_engine = ShortCircuit.engine
+
+	# Consolidated results, summary of each case and log files are written to the output folder
+	results_name = 'batch_results'
+	summary_file = 'batch_summary.json'
+	logs_folder = 'logs'
+	# Name of the first level of the index of the consolidated results
+	case_label = 'Case'
+
+	# Keys and values used in the summary of each case
+	key_status = 'status'
+	key_seconds = 'seconds'
+	key_error = 'error'
+	key_excel = 'excel_file'
+	key_sav_hash = 'sav_hash'
+	key_results = 'results'
+	status_complete = 'complete'
+	status_failed = 'failed'
+
+	def __init__(self):
+		"""
+			Purely to avoid error message
+		"""
+		pass
+
+
+class Service:
+	"""
+		Constants for the study service which keeps PSSE initialised in long running worker processes between studies
+	"""
+	# Number of worker processes, each requires a PSSE licence
+	processes = 1
+	# Seconds between checks that the worker processes are still running while waiting for a result
+	poll_seconds = 1.0
+	# Identifier used for the log files of each worker process
+	uid = 'study_service'
+
+	# Keys added to the summary of each study
+	key_job = 'job'
+	key_worker = 'worker'
+
+	def __init__(self):
+		"""
+			Purely to avoid error message
+		"""
+		pass
+
+
 class Logging:
 	"""
 		Log file names to use
@@ -415,6 +896,18 @@ class Excel:
 	iec_sheet_name_lll = 'IEC Method LLL'
 	iec_sheet_name_lg = 'IEC Method LG'
 
+	# When True results are streamed to the workbook one row at a time so large studies do not use excessive memory
+	constant_memory = True
+
+	# Transposed copy of each set of results:  streamed writes each column as a row so the results are never
+	# transposed in memory, full transposes the DataFrame before writing it and none skips the transposed sheet
+	transpose_streamed = 'streamed'
+	transpose_full = 'full'
+	transpose_none = 'none'
+	transpose = transpose_streamed
+	# Maximum number of columns in an Excel worksheet, the transposed sheet is skipped if more would be needed
+	max_columns = 16384
+
 	def __init__(self):
 		pass
 
@@ -499,6 +992,11 @@ class G74:
 	# #tx_r = 0.07142
 	# #tx_x = 1.0
 
+	# If set to True then once the equivalent machines have been added only the X'', X' and X values that have changed
+	# by more than the tolerance (p.u.) are updated for each fault time
+	incremental_update = True
+	update_tolerance = 1e-6
+
 	# This is the minimum fault time that must be considered for the faults to determine Ik'' and Ip
 	min_fault_time = 0.0
 	# This is the time considered for returning the peak fault current
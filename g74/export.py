@@ -0,0 +1,290 @@
+"""
+#######################################################################################################################
+###											PSSE G74 Fault Studies													###
+###		Export of the fault study results to columnar binary formats (parquet, feather or HDF5)						###
+###																													###
+###		Code developed by David Mills (david.mills@PSCconsulting.com, +44 7899 984158) as part of PSC 		 		###
+###		project JK7938 - SHEPD - studies and automation																###
+###																													###
+#######################################################################################################################
+"""
+
+import os
+import json
+import logging
+
+import pandas as pd
+
+import g74.cache as cache
+import g74.file_handling as file_handling
+import g74.constants as constants
+
+
+def export_formats(setting=None):
+	"""
+		Determines which binary formats the results should be exported to
+	:param list setting: (optional=None) - If provided then these formats are used
+	:return tuple formats:  If no setting then the formats from the environment variable or constants.Export
+	"""
+	c = constants.Export
+	if setting is None:
+		value = os.environ.get(c.env_var)
+		setting = c.formats if value is None else value.split(',')
+	formats = tuple(x.strip().lower() for x in setting if x.strip())
+
+	unknown = [x for x in formats if x not in c.extensions]
+	if unknown:
+		logger = logging.getLogger(constants.Logging.logger_name)
+		logger.critical(
+			'The export formats {} are not recognised, only the following formats can be used: {}'.format(
+				', '.join(unknown), ', '.join(sorted(c.extensions))
+			)
+		)
+		raise ValueError('Unrecognised export format')
+	return formats
+
+
+def flatten_columns(df):
+	"""
+		Combines the levels of the column headers into a single level since the binary formats only support string
+		column names, the original headers are included in the metadata so they can be restored
+	:param pd.DataFrame df:  Results with MultiIndex columns
+	:return (pd.DataFrame, list) (df_flat, columns):  Results with a single level of columns and the original columns
+	"""
+	columns = [list(x) if isinstance(x, tuple) else [x] for x in df.columns.tolist()]
+	df_flat = df.copy()
+	df_flat.columns = [constants.Export.separator.join(str(x) for x in col) for col in columns]
+	# Columns which PSSE returns as mixed types are converted where possible
+	df_flat = df_flat.infer_objects()
+	return df_flat, columns
+
+
+def restore_columns(df, metadata):
+	"""
+		Restores the column headers and index names from the metadata
+	:param pd.DataFrame df:  Results as stored in the file
+	:param dict metadata:  Metadata stored with the results
+	:return pd.DataFrame df:
+	"""
+	c = constants.Export
+	df.columns = pd.MultiIndex.from_tuples([tuple(x) for x in metadata[c.columns]], names=metadata[c.column_levels])
+	df.index.names = metadata[c.index_names]
+	return df
+
+
+def arrow_table(df, metadata):
+	"""
+		Converts the results into a pyarrow table with the metadata included in the schema
+	:param pd.DataFrame df:  Results with a single level of columns
+	:param dict metadata:
+	:return pyarrow.Table table:
+	"""
+	import pyarrow as pa
+
+	table = pa.Table.from_pandas(df, preserve_index=True)
+	schema_metadata = dict(table.schema.metadata or dict())
+	schema_metadata[constants.Export.key.encode('utf-8')] = json.dumps(metadata).encode('utf-8')
+	return table.replace_schema_metadata(schema_metadata)
+
+
+def write_results(pth, df, metadata, fmt):
+	"""
+		Writes the results to a binary file along with the metadata
+	:param str pth:  Full path to the file to write
+	:param pd.DataFrame df:  Results produced by the fault study
+	:param dict metadata:  Details of the study to store with the results
+	:param str fmt:  Format to write, one of the formats in constants.Export
+	:return str pth:  File written or None if the package needed for the format is not installed
+	"""
+	c = constants.Export
+	logger = logging.getLogger(constants.Logging.logger_name)
+
+	df_flat, columns = flatten_columns(df=df)
+	metadata = dict(metadata)
+	metadata[c.columns] = columns
+	metadata[c.column_levels] = list(df.columns.names)
+	metadata[c.index_names] = list(df.index.names)
+
+	try:
+		if fmt == c.parquet:
+			import pyarrow.parquet as pq
+			pq.write_table(arrow_table(df=df_flat, metadata=metadata), pth)
+		elif fmt == c.feather:
+			import pyarrow as pa
+			# Written as an Arrow IPC file (feather version 2) so that the schema metadata is kept
+			table = arrow_table(df=df_flat, metadata=metadata)
+			writer = pa.RecordBatchFileWriter(pth, table.schema)
+			writer.write_table(table)
+			writer.close()
+		else:
+			with pd.HDFStore(pth, mode='w') as store:
+				store.put(c.key, df_flat)
+				store.get_storer(c.key).attrs.metadata = json.dumps(metadata)
+	except ImportError:
+		# Study results are still written to any other formats rather than the study failing
+		logger.error(
+			(
+				'Unable to export the results to {} since the optional package required for {} is not installed, '
+				'this can be installed with: pip install {}'
+			).format(pth, fmt, c.packages[fmt])
+		)
+		return None
+
+	logger.debug('Results written to {} file {}'.format(fmt, pth))
+	return pth
+
+
+def read_results(pth):
+	"""
+		Reads the results from a binary file written by write_results
+	:param str pth:  Full path to the file, the format is determined from the extension
+	:return (pd.DataFrame, dict) (df, metadata):  Results with the original column headers and the metadata
+	"""
+	c = constants.Export
+	ext = os.path.splitext(pth)[1].lower()
+	if ext == c.extensions[c.hdf5]:
+		with pd.HDFStore(pth, mode='r') as store:
+			df = store[c.key]
+			metadata = json.loads(store.get_storer(c.key).attrs.metadata)
+	else:
+		import pyarrow as pa
+		if ext == c.extensions[c.parquet]:
+			import pyarrow.parquet as pq
+			table = pq.read_table(pth)
+		else:
+			table = pa.ipc.open_file(pth).read_all()
+		metadata = json.loads(table.schema.metadata[c.key.encode('utf-8')].decode('utf-8'))
+		df = table.to_pandas()
+
+	return restore_columns(df=df, metadata=metadata), metadata
+
+
+class ResultsExport:
+	"""
+		Writes the results of each fault study to the Excel workbook and / or columnar binary files which are much
+		faster to read back in for further processing
+	"""
+	def __init__(self, pth_excel, formats=None, excel=constants.Export.excel, sav_case=None, sav_hash=None):
+		"""
+		:param str pth_excel:  Full path to the Excel workbook, binary files are named based on this
+		:param list formats: (optional=None) - Binary formats to write, if None then determined by constants.Export
+		:param bool excel: (optional) - If False then the results are only written to the binary formats
+		:param str sav_case: (optional=None) - SAV case studied which is included in the metadata
+		:param str sav_hash: (optional=None) - Hash of the SAV case, calculated if not provided
+		"""
+		self.logger = logging.getLogger(constants.Logging.logger_name)
+		self.pth_excel = pth_excel
+		self.formats = export_formats(setting=formats)
+
+		self.results_wkbk = file_handling.ResultsWorkbook(pth=pth_excel) if excel else None
+		if self.results_wkbk is None and not self.formats:
+			self.logger.warning(
+				'Results are not being written to an Excel workbook and no binary formats have been selected (see {}) '
+				'and so the results are only returned'.format(constants.Export.env_var)
+			)
+
+		self.sav_case = sav_case
+		if sav_hash is None and sav_case and self.formats:
+			sav_hash = cache.file_hash(pth=sav_case)
+		self.sav_hash = sav_hash
+
+		# Binary files that have been written
+		self.files = list()
+		self.closed = False
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		# Results of a study which has failed are removed rather than leaving a partially written workbook
+		if exc_type is None:
+			self.close()
+		else:
+			self.discard()
+		return False
+
+	def path(self, sheet_name, fmt):
+		"""
+			Returns the binary file used for a set of results
+		:param str sheet_name:  Name of the sheet the results are written to in the Excel workbook
+		:param str fmt:  Format of the file
+		:return str pth:
+		"""
+		folder, file_name = os.path.split(self.pth_excel)
+		name = '{}_{}{}'.format(
+			os.path.splitext(file_name)[0], sheet_name.replace(' ', '_'), constants.Export.extensions[fmt]
+		)
+		return os.path.join(folder, name)
+
+	def write_fault_data(self, df, message, sheet_name, method, fault_times, tab_color=None, metadata=None):
+		"""
+			Writes the fault current data to the Excel workbook and each of the binary formats
+		:param pd.DataFrame df:  Results produced by the fault study
+		:param str message:  Message to include on first row of the Excel worksheet
+		:param str sheet_name:  Name of sheet to use, also used to name the binary files
+		:param str method:  Fault study type, e.g. constants.GUI.bkdy_3ph
+		:param list fault_times:  Fault times studied
+		:param str tab_color: (optional=None) - Hexidemical code for tab_color to use
+		:param dict metadata: (optional=None) - Any additional details to store with the results
+		:return None:
+		"""
+		if self.results_wkbk is not None:
+			self.results_wkbk.write_fault_data(df=df, message=message, sheet_name=sheet_name, tab_color=tab_color)
+
+		c = constants.Export
+		study_metadata = {
+			c.method: method,
+			c.sav_case: self.sav_case,
+			c.sav_hash: self.sav_hash,
+			c.fault_times: [float(x) for x in fault_times]
+		}
+		study_metadata.update(metadata or dict())
+		for fmt in self.formats:
+			pth = write_results(
+				pth=self.path(sheet_name=sheet_name, fmt=fmt), df=df, metadata=study_metadata, fmt=fmt
+			)
+			if pth:
+				self.files.append(pth)
+
+		return None
+
+	def close(self):
+		"""
+			Saves the Excel workbook and reports where the results have been written, only the first call has any effect
+		:return None:
+		"""
+		if self.closed:
+			return None
+		self.closed = True
+		if self.results_wkbk is not None:
+			self.results_wkbk.close()
+			self.logger.info('Results written to Excel workbook: {}'.format(self.pth_excel))
+		if self.files:
+			self.logger.info(
+				'Results written to the following files:\n{}'.format('\n'.join('\t- {}'.format(x) for x in self.files))
+			)
+		return None
+
+	def discard(self):
+		"""
+			Removes the Excel workbook and any binary files already written, used if a fault study fails so that
+			partial results are not left behind
+		:return None:
+		"""
+		self.closed = True
+		removed = list(self.files)
+		if self.results_wkbk is not None:
+			self.results_wkbk.discard()
+			removed.insert(0, self.pth_excel)
+		for pth in self.files:
+			if os.path.exists(pth):
+				os.remove(pth)
+		self.files = list()
+
+		if removed:
+			self.logger.warning(
+				'Fault study did not complete and so the partial results have been removed:\n{}'.format(
+					'\n'.join('\t- {}'.format(x) for x in removed)
+				)
+			)
+		return None
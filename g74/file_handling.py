@@ -9,8 +9,11 @@
 #######################################################################################################################
 """
 
+import os
 import string
+import math
 import logging
+import numpy as np
 import pandas as pd
 import xlsxwriter
 import g74.constants as constants
@@ -127,39 +130,230 @@ def write_fault_data_to_excel(pth, df, message, sheet_name, tab_color=None):
 	:param str tab_color:  Hexidemical code for tab_color to use
 	:return None:
 	"""
-	logger = logging.getLogger(constants.Logging.logger_name)
+	# Workbook is saved as soon as the results have been added, use ResultsWorkbook to write several sets of results
+	with ResultsWorkbook(pth=pth) as results_wkbk:
+		results_wkbk.write_fault_data(df=df, message=message, sheet_name=sheet_name, tab_color=tab_color)
+
+	return None
+
+
+def excel_value(value):
+	"""
+		Converts a value from a DataFrame into a type XlsxWriter can write
+	:param value:  Value to convert
+	:return value:  Python equivalent or None if the cell should be left empty
+	"""
+	# numpy integers are not a subclass of int on all platforms
+	if isinstance(value, np.generic):
+		value = value.item()
+	if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+		return None
+	return value
+
+
+def write_rows(wksh, df, startrow, transpose=False):
+	"""
+		Writes a DataFrame to a worksheet one row at a time in the same layout as pd.DataFrame.to_excel.  Needed in
+		constant memory mode where XlsxWriter only keeps the current row in memory and so the cells must be written in
+		row order, whereas pandas writes a column at a time.
+		Cells are not merged vertically and so for a MultiIndex the label is only written on the first row it applies
+		to.
+	:param xlsxwriter.worksheet.Worksheet wksh:  Worksheet to write to
+	:param pd.DataFrame df:  DataFrame to write
+	:param int startrow:  Row to write the header to
+	:param bool transpose: (optional=False) - If True then written in the same layout as df.T but with each column
+							written as a row so the DataFrame is never transposed in memory
+	:return int row:  Next empty row after the DataFrame
+	"""
+	if transpose:
+		index, columns = df.columns, df.index
+		rows = (df.iloc[:, i].tolist() for i in range(df.shape[1]))
+	else:
+		index, columns = df.index, df.columns
+		rows = df.itertuples(index=False, name=None)
+
+	num_index = index.nlevels
+	num_levels = columns.nlevels
+	row = startrow
+
+	# Column headers with each level on a separate row, labels repeated for neighbouring columns are merged
+	column_names = columns.names
+	columns = [x if num_levels > 1 else (x, ) for x in columns.tolist()]
+	for level in range(num_levels):
+		if num_levels > 1 and column_names[level] is not None:
+			wksh.write(row, num_index - 1, excel_value(column_names[level]))
+		col = 0
+		while col < len(columns):
+			label = columns[col][:level + 1]
+			end = col
+			if level < num_levels - 1:
+				while end + 1 < len(columns) and columns[end + 1][:level + 1] == label:
+					end += 1
+			if end > col:
+				wksh.merge_range(row, num_index + col, row, num_index + end, excel_value(label[-1]))
+			else:
+				wksh.write(row, num_index + col, excel_value(label[-1]))
+			col = end + 1
+		row += 1
+
+	# Names of the index are on a separate row unless there is only a single row of column headers
+	if any(name is not None for name in index.names):
+		if num_levels == 1:
+			row -= 1
+		for col, name in enumerate(index.names):
+			if name is not None:
+				wksh.write(row, col, excel_value(name))
+		row += 1
+
+	# Index and values for each row
+	previous = None
+	for labels, values in zip(index.tolist(), rows):
+		labels = labels if num_index > 1 else (labels, )
+		for col, label in enumerate(labels):
+			if previous is None or labels[:col + 1] != previous[:col + 1]:
+				wksh.write(row, col, excel_value(label))
+		for col, value in enumerate(values):
+			value = excel_value(value)
+			if value is not None:
+				wksh.write(row, num_index + col, value)
+		previous = labels
+		row += 1
+
+	return row
 
-	# Load workbook
-	with pd.ExcelWriter(path=pth, engine=excel_engine) as wkbk:
-		# Confirm sheet name isn't duplicated and then create new sheet
-		sheet_name = worksheet_name_checker(wkbk=wkbk, sheet_name=sheet_name)
-		wksh = wkbk.book.add_worksheet(name=sheet_name)
 
-		# Create name for transposed sheet as well
-		sheet_name_transposed = worksheet_name_checker(wkbk=wkbk, sheet_name='{}_transposed'.format(sheet_name))
-		wksh_t = wkbk.book.add_worksheet(name=sheet_name_transposed)
+class ResultsWorkbook:
+	"""
+		Excel workbook which stays open while the results of each of the fault studies are added so that each sheet is
+		only written once and the workbook is saved once at the end.
+
+		In constant memory mode XlsxWriter writes each row to a temporary file once the next row is started and so the
+		memory used does not depend on the size of the DataFrames.
+	"""
+	def __init__(self, pth, constant_memory=constants.Excel.constant_memory, transpose=constants.Excel.transpose):
+		"""
+		:param str pth:  Full path to excel workbook to write, any existing workbook is replaced
+		:param bool constant_memory: (optional) - If True then rows are streamed to the workbook as they are written
+		:param str transpose: (optional) - How the transposed sheets are produced, see constants.Excel
+		"""
+		self.logger = logging.getLogger(constants.Logging.logger_name)
+		self.pth = pth
+		self.constant_memory = constant_memory
+
+		c = constants.Excel
+		if transpose not in (c.transpose_streamed, c.transpose_full, c.transpose_none):
+			self.logger.critical(
+				'Transpose option {} is not recognised, must be one of {}, {} or {}'.format(
+					transpose, c.transpose_streamed, c.transpose_full, c.transpose_none
+				)
+			)
+			raise ValueError('Unrecognised transpose option')
+		self.transpose = transpose
+
+		self.wkbk = pd.ExcelWriter(path=pth, engine=excel_engine, options={'constant_memory': constant_memory})
+		self.closed = False
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+		return False
+
+	def add_worksheet(self, sheet_name, message, tab_color=None):
+		"""
+			Adds a new worksheet with a message on the first row
+		:param str sheet_name:  Name of sheet to use, changed if the name already exists
+		:param str message:  Message to include on first row
+		:param str tab_color: (optional=None) - Hexidemical code for tab_color to use
+		:return (str, xlsxwriter.worksheet.Worksheet) (sheet_name, wksh):  Name actually used and the worksheet
+		"""
+		# Confirm sheet name isn't duplicated and then create new sheet
+		sheet_name = worksheet_name_checker(wkbk=self.wkbk, sheet_name=sheet_name)
+		wksh = self.wkbk.book.add_worksheet(name=sheet_name)
 
 		# Have to add worksheet to Pandas list of worksheets
 		# (https://stackoverflow.com/questions/32957441/putting-many-python-pandas-dataframes-to-one-excel-worksheet)
-		wkbk.sheets[sheet_name] = wksh
-		logger.debug('New worksheet named {} added to workbook {}'.format(sheet_name, wkbk.path))
-		wkbk.sheets[sheet_name_transposed] = wksh_t
-		logger.debug('New worksheet named {} added to workbook {}'.format(sheet_name_transposed, wkbk.path))
+		self.wkbk.sheets[sheet_name] = wksh
+		self.logger.debug('New worksheet named {} added to workbook {}'.format(sheet_name, self.pth))
 
 		# Write some details on the status first and colour the tab accordingly
-		row = 0
-		col = 0
-		wksh.write_string(row=row, col=col, string=message)
-		wksh_t.write_string(row=row, col=col, string=message)
+		wksh.write_string(row=0, col=0, string=message)
 		# Only set tab_color if not None
 		if tab_color:
 			wksh.set_tab_color(tab_color)
-			wksh_t.set_tab_color(tab_color)
 
-		# Write DataFrame to excel worksheet
-		df.to_excel(wkbk, sheet_name=sheet_name, startrow=row+constants.Excel.row_spacing)
-		logger.debug('DataFrame written to worksheet {}'.format(sheet_name))
-		df.T.to_excel(wkbk, sheet_name=sheet_name_transposed, startrow=row+constants.Excel.row_spacing)
-		logger.debug('Transposed DataFrame written to worksheet {}'.format(sheet_name_transposed))
+		return sheet_name, wksh
 
-	return None
+	def write_dataframe(self, df, message, sheet_name, tab_color=None, transpose=False):
+		"""
+			Writes a DataFrame to a new worksheet
+		:param pd.DataFrame df:  Pandas Dataframe to write
+		:param str message:  Message to include on first row
+		:param str sheet_name:  Name of sheet to use
+		:param str tab_color: (optional=None) - Hexidemical code for tab_color to use
+		:param bool transpose: (optional=False) - If True then written transposed a column at a time
+		:return str sheet_name:  Name of the sheet written to
+		"""
+		sheet_name, wksh = self.add_worksheet(sheet_name=sheet_name, message=message, tab_color=tab_color)
+		startrow = constants.Excel.row_spacing
+		if self.constant_memory or transpose:
+			write_rows(wksh=wksh, df=df, startrow=startrow, transpose=transpose)
+		else:
+			df.to_excel(self.wkbk, sheet_name=sheet_name, startrow=startrow)
+		self.logger.debug('DataFrame written to worksheet {}'.format(sheet_name))
+		return sheet_name
+
+	def write_fault_data(self, df, message, sheet_name, tab_color=None):
+		"""
+			Writes the fault current data to a worksheet along with a second worksheet with the data transposed unless
+			the transposed sheet is disabled
+		:param pd.DataFrame df:  Pandas Dataframe to write
+		:param str message:  Message to include on first row
+		:param str sheet_name:  Name of sheet to use (an additional sheet is also created with the name transposed)
+		:param str tab_color: (optional=None) - Hexidemical code for tab_color to use
+		:return None:
+		"""
+		c = constants.Excel
+		sheet_name = self.write_dataframe(df=df, message=message, sheet_name=sheet_name, tab_color=tab_color)
+		if self.transpose == c.transpose_none:
+			return None
+
+		sheet_name_transposed = '{}_transposed'.format(sheet_name)
+		if df.columns.nlevels + len(df.index) > c.max_columns:
+			self.logger.warning(
+				(
+					'The worksheet {} has not been written since the {} busbars would need more than the {} columns '
+					'allowed in an Excel worksheet'
+				).format(sheet_name_transposed, len(df.index), c.max_columns)
+			)
+		elif self.transpose == c.transpose_full:
+			self.write_dataframe(df=df.T, message=message, sheet_name=sheet_name_transposed, tab_color=tab_color)
+		else:
+			self.write_dataframe(
+				df=df, message=message, sheet_name=sheet_name_transposed, tab_color=tab_color, transpose=True
+			)
+		return None
+
+	def close(self):
+		"""
+			Saves the workbook, only the first call has any effect
+		:return None:
+		"""
+		if not self.closed:
+			self.wkbk.close()
+			self.closed = True
+			self.logger.debug('Workbook {} saved'.format(self.pth))
+		return None
+
+	def discard(self):
+		"""
+			Closes the workbook and deletes it so that a partially written workbook is not left behind, otherwise
+			XlsxWriter saves the workbook when it is garbage collected
+		:return None:
+		"""
+		self.close()
+		if os.path.exists(self.pth):
+			os.remove(self.pth)
+		self.logger.debug('Workbook {} deleted'.format(self.pth))
+		return None
@@ -73,6 +73,8 @@ class MainGUI:
 		self.bo_fault_3_ph_iec = Tk.BooleanVar()
 		self.bo_fault_1_ph_iec = Tk.BooleanVar()
 		self.bo_open_excel = Tk.BooleanVar()
+		self.bo_profile = Tk.BooleanVar()
+		self.bo_native_engine = Tk.BooleanVar()
 		self.hyp_help_instructions = Tk.Label()
 		self.psc_logo_wm = Tk.PhotoImage()
 		self.psc_logo = Tk.Label()
@@ -94,6 +96,8 @@ class MainGUI:
 		)
 		# Add tick boxes for fault types to include
 		self.add_fault_types(col=self.col())
+		# Add tick box for whether the native solver is used rather than BKDY for the 3 phase fault study
+		self.add_native_engine(row=self.row(1), col=self.col())
 
 		# Add button for importing / viewing busbars
 		self.add_cmd_import_busbars(row=self.row(1), col=self.col())
@@ -108,6 +112,9 @@ class MainGUI:
 		# Add tick box for whether it needs to be opened again on completion
 		self.add_open_excel(row=self.row(1), col=self.col())
 
+		# Add tick box for whether the study should be profiled
+		self.add_profile_study(row=self.row(1), col=self.col())
+
 		# Add help button which loads work instructions
 		self.add_hyp_help_instructions(row=self.row(1), col=self.col())
 
@@ -304,6 +311,27 @@ class MainGUI:
 				check_button.config(state=Tk.DISABLED)
 		return i
 
+	def add_native_engine(self, row, col):
+		"""
+			Function to add a tick box on whether the 3 phase fault study uses the native short circuit solver rather
+			than the PSSE BKDY method
+			:param int row:  Row number to use
+			:param int col:  Column number to use
+			:return None:
+		"""
+		lbl = 'Use native solver for 3 Phase fault'
+		self.bo_native_engine.set(constants.ShortCircuit.engine == constants.ShortCircuit.engine_native)
+		# Add tick box
+		check_button = Tk.Checkbutton(
+			self.master, text=lbl, variable=self.bo_native_engine
+		)
+		check_button.grid(row=row, column=col, columnspan=2, sticky=Tk.W)
+		CreateToolTip(widget=check_button, text=(
+			'If selected the 3 phase fault currents are calculated with the native sparse short circuit solver which '
+			'is much quicker than BKDY for large networks.  {}.'
+		).format(constants.ShortCircuit.native_engine_note))
+		return None
+
 	def add_open_excel(self, row, col):
 		"""
 			Function to add a tick box on whether the user wants to open the Excel file of results at the end
@@ -323,6 +351,26 @@ class MainGUI:
 		))
 		return None
 
+	def add_profile_study(self, row, col):
+		"""
+			Function to add a tick box on whether the fault study should be profiled to diagnose slow studies
+			:param int row:  Row number to use
+			:param int col:  Column number to use
+			:return None:
+		"""
+		lbl = 'Profile fault study'
+		self.bo_profile.set(constants.GUI.profile_study)
+		# Add tick box
+		check_button = Tk.Checkbutton(
+			self.master, text=lbl, variable=self.bo_profile
+		)
+		check_button.grid(row=row, column=col, columnspan=2, sticky=Tk.W)
+		CreateToolTip(widget=check_button, text=(
+			'If selected the time taken by each function is recorded and saved alongside the log files, this will '
+			'slow down the study.  Can also be enabled by setting the environment variable {}=1.'
+		).format(constants.Profiling.env_var))
+		return None
+
 	def add_hyp_help_instructions(self, row, col):
 		"""
 			Function just adds the hyperlink to the GUI which is used for loading the work instructions
@@ -0,0 +1,353 @@
+"""
+#######################################################################################################################
+###											PSSE G74 Fault Studies													###
+###		Incremental re-study which only re-faults the busbars electrically close to changes in the SAV case			###
+###																													###
+###		Code developed by David Mills (david.mills@PSCconsulting.com, +44 7899 984158) as part of PSC 		 		###
+###		project JK7938 - SHEPD - studies and automation																###
+###																													###
+#######################################################################################################################
+"""
+
+import os
+import logging
+import collections
+
+import numpy as np
+import pandas as pd
+
+import g74.psse as psse
+import g74.constants as constants
+
+
+def incremental_enabled(setting=None):
+	"""
+		Determines whether incremental studies should be carried out
+	:param bool setting: (optional=None) - If provided then this setting is used
+	:return bool enabled:  If no setting then True if enabled in constants.Incremental or by the environment variable
+	"""
+	if setting is not None:
+		return bool(setting)
+	value = os.environ.get(constants.Incremental.env_var, str())
+	return constants.Incremental.enabled or value.strip().lower() in constants.Incremental.env_enabled
+
+
+def changed_rows(df_new, df_old, bus_columns, decimals=constants.Incremental.decimals):
+	"""
+		Compares two sets of data and returns the busbars connected to any rows that have been added, removed or
+		changed.  Rows are compared as a whole so parallel elements with identical data are handled correctly.
+	:param pd.DataFrame df_new:  Data extracted from the current case
+	:param pd.DataFrame df_old:  Data extracted from the previous case, must have the same columns
+	:param list bus_columns:  Columns which contain the busbars that the element is connected to
+	:param int decimals: (optional) - Number of decimal places values are rounded to before being compared
+	:return set buses:
+	"""
+	def records(df):
+		return collections.Counter(
+			tuple(round(x, decimals) if isinstance(x, float) else x for x in row)
+			for row in df.itertuples(index=False)
+		)
+
+	new, old = records(df_new), records(df_old)
+	positions = [list(df_new.columns).index(col) for col in bus_columns]
+	differences = (new - old) + (old - new)
+	return set(int(row[i]) for row in differences for i in positions)
+
+
+def real_values(df):
+	"""
+		Returns the real part of the values, needed where PSSE data which includes complex values has been combined into
+		a single DataFrame
+	:param pd.DataFrame df:
+	:return pd.DataFrame df:
+	"""
+	return pd.DataFrame(np.real(df.values.astype(complex)), index=df.index, columns=df.columns)
+
+
+class NetworkSnapshot:
+	"""
+		Busbar, machine, load and branch data extracted from the PSSE case so that the case used for a study can be
+		compared with the case used for the previous study
+	"""
+	def __init__(self, data=None):
+		"""
+		:param dict data: (optional=None) - Data from a previous snapshot, if None then extracted from the PSSE case
+		"""
+		self.c = constants.Incremental
+		self.data = data if data is not None else self.extract()
+
+	def extract(self):
+		"""
+			Extracts the data which affects the fault currents from the PSSE case
+		:return dict data:  DataFrame for each type of element
+		"""
+		c = self.c
+		# Values are converted to consistent types since PSSE returns the data in columns of mixed types
+		cb = constants.Busbars
+		bus_data = psse.BusData()
+		df_buses = pd.DataFrame({
+			cb.bus: bus_data.df[cb.bus].astype(int),
+			cb.state: bus_data.df[cb.state].astype(int),
+			cb.nominal: bus_data.df[cb.nominal].astype(float),
+			cb.voltage: bus_data.df[cb.voltage].astype(float)
+		}, columns=[cb.bus, cb.state, cb.nominal, cb.voltage])
+
+		# Equivalent machines added for the G74 contribution are not part of the case being studied
+		cm = constants.Machines
+		machine_data = psse.MachineData()
+		machine_data.update()
+		df = machine_data.df.loc[machine_data.df[cm.identifier].str.strip() != constants.G74.machine_id]
+		real_columns = [cm.rpos, cm.xsubtr, cm.xtrans, cm.xsynch, cm.mbase, cm.rsource, cm.xsource]
+		df_machines = pd.concat(
+			[df[cm.bus].astype(int), df[cm.identifier].str.strip(), real_values(df[real_columns])], axis=1
+		)
+
+		cl = constants.Loads
+		load_data = psse.LoadData()
+		df_loads = pd.DataFrame({
+			cl.bus: load_data.df[cl.bus].astype(int),
+			cl.identifier: load_data.df[cl.identifier].astype(str).str.strip(),
+			cl.load: load_data.df[cl.load].astype(float)
+		}, columns=[cl.bus, cl.identifier, cl.load])
+
+		cbr = constants.Branches
+		branch_data = psse.BranchData()
+		df_branches = pd.concat(
+			[
+				real_values(branch_data.df[[cbr.from_bus, cbr.to_bus, cbr.status]]).astype(int),
+				real_values(branch_data.df[[cbr.r, cbr.x, cbr.charging]])
+			], axis=1
+		)
+
+		return {
+			c.buses: df_buses.reset_index(drop=True),
+			c.machines: df_machines.reset_index(drop=True),
+			c.loads: df_loads.reset_index(drop=True),
+			c.branches: df_branches.reset_index(drop=True),
+			c.three_winding: int(branch_data.three_winding_count())
+		}
+
+	@property
+	def buses(self):
+		"""
+			Busbars in the case
+		:return list buses:
+		"""
+		return [int(x) for x in self.data[self.c.buses][constants.Busbars.bus]]
+
+	@property
+	def three_winding(self):
+		"""
+			Number of three winding transformers in the case, these are not included in the branch data and so changes
+			to them cannot be detected
+		:return int number:
+		"""
+		return int(self.data.get(self.c.three_winding, 0))
+
+	def changed_buses(self, previous, sources=None):
+		"""
+			Returns the busbars where the busbar data or any connected machine, load or branch has changed
+		:param NetworkSnapshot previous:  Snapshot of the case used for the previous study
+		:param bool sources: (optional=None) - If True then only the busbars where a machine or load has changed, if
+								False then only the busbars where the busbar or branch data has changed
+		:return set buses:
+		"""
+		c = self.c
+		bus_columns = {
+			c.buses: [constants.Busbars.bus],
+			c.machines: [constants.Machines.bus],
+			c.loads: [constants.Loads.bus],
+			c.branches: [constants.Branches.from_bus, constants.Branches.to_bus]
+		}
+		if sources is not None:
+			bus_columns = dict(
+				(name, columns) for name, columns in bus_columns.items() if (name in (c.machines, c.loads)) == sources
+			)
+		changed = set()
+		for name, columns in bus_columns.items():
+			changed |= changed_rows(df_new=self.data[name], df_old=previous.data[name], bus_columns=columns)
+		return changed
+
+	def adjacency(self):
+		"""
+			Returns the busbars connected to each busbar by an in-service branch
+		:return dict adjacent:
+		"""
+		cb = constants.Branches
+		df = self.data[self.c.branches]
+		df = df.loc[df[cb.status] > 0]
+		adjacent = collections.defaultdict(set)
+		for from_bus, to_bus in zip(df[cb.from_bus], df[cb.to_bus]):
+			adjacent[int(from_bus)].add(int(to_bus))
+			adjacent[int(to_bus)].add(int(from_bus))
+		return adjacent
+
+	def affected_buses(self, previous, max_distance=constants.Incremental.max_distance):
+		"""
+			Returns the busbars within the maximum number of branches of a change to the busbar or branch data and every
+			busbar connected to a machine or load that has changed, since these change the fault currents throughout
+			the network.  Both the current and previous branches are considered so busbars close to a branch that has
+			been removed are also included.
+		:param NetworkSnapshot previous:  Snapshot of the case used for the previous study
+		:param int max_distance: (optional) - Maximum number of branches from a changed busbar
+		:return set buses:
+		"""
+		adjacent = self.adjacency()
+		for bus, neighbours in previous.adjacency().items():
+			adjacent[bus] |= neighbours
+
+		def within(buses, distance=None):
+			# Busbars within the distance of the busbars, if None then all the busbars connected to them
+			found = set(buses)
+			frontier = set(found)
+			steps = 0
+			while frontier and (distance is None or steps < distance):
+				frontier = set(x for bus in frontier for x in adjacent.get(bus, ())) - found
+				found |= frontier
+				steps += 1
+			return found
+
+		return (
+			within(buses=self.changed_buses(previous=previous, sources=False), distance=max_distance) |
+			within(buses=self.changed_buses(previous=previous, sources=True))
+		)
+
+
+class IncrementalStudy:
+	"""
+		Re-faults only the busbars affected by changes to the SAV case since the previous study with the same busbars,
+		fault times and parameters.  The results for all other busbars are taken from the previous study.
+
+		This is an approximation since busbars more than the maximum distance from a change to the busbar or branch
+		data are not faulted again, the number of busbars taken from the previous study is reported in the log and
+		with the results (see note and metadata).  A full study is carried out if the case contains any three winding
+		transformers since changes to these cannot be detected.
+
+		The previous results are stored in the result cache and so bypassing the cache runs a full study.
+	"""
+	def __init__(self, cache, max_distance=constants.Incremental.max_distance):
+		"""
+			Must be created before the equivalent G74 machines are added to the PSSE case
+		:param g74.cache.ResultCache cache:  Cache used to store the results of the previous study
+		:param int max_distance: (optional) - Busbars within this number of branches of a change are re-faulted
+		"""
+		self.logger = logging.getLogger(constants.Logging.logger_name)
+		self.cache = cache
+		self.max_distance = max_distance
+		self.snapshot = NetworkSnapshot()
+
+		# Study for each key returned by plan and (busbars taken from the previous study, busbars requested) for each
+		# study once the results have been merged
+		self.studies = dict()
+		self.reused = dict()
+
+	def plan(self, buses, fault_times, study, engine=None):
+		"""
+			Determines which busbars need to be faulted
+		:param list buses:  Busbars requested, if empty then all busbars
+		:param list fault_times:  Fault times studied
+		:param str study:  Fault study type, e.g. constants.GUI.bkdy_3ph
+		:param str engine: (optional=None) - Engine from constants.ShortCircuit.engines used for the study so results
+								from a different engine are not merged
+		:return (str, list, list, pd.DataFrame) (key, requested, to_fault, df_previous):  Key the results are stored
+								under, busbars requested, busbars to fault and results of the previous study (None if
+								there is no previous study and so all busbars must be faulted)
+		"""
+		key = self.cache.key(buses=buses, fault_times=fault_times, study=study, incremental=True, engine=engine)
+		requested = pd.Index([int(x) for x in buses] or self.snapshot.buses).unique().tolist()
+		self.studies[key] = study
+
+		previous = self.cache.get(key=key)
+		if previous is None:
+			self.logger.info('No previous {} study available and so all busbars will be faulted'.format(study))
+			return key, requested, list(buses), None
+
+		df_previous, metadata = previous
+		previous_snapshot = NetworkSnapshot(data=metadata[constants.Incremental.snapshot])
+		if self.snapshot.three_winding or previous_snapshot.three_winding:
+			self.logger.warning(
+				(
+					'The SAV case contains {} three winding transformers, changes to these cannot be detected and so '
+					'all busbars will be faulted for the {} study rather than an incremental study'
+				).format(max(self.snapshot.three_winding, previous_snapshot.three_winding), study)
+			)
+			return key, requested, list(buses), None
+
+		affected = self.snapshot.affected_buses(previous=previous_snapshot, max_distance=self.max_distance)
+		to_fault = [bus for bus in requested if bus in affected or bus not in df_previous.index]
+		self.logger.info(
+			(
+				'{} of {} busbars are affected by changes to the SAV case since the previous {} study and will be '
+				'faulted, the results for all other busbars are taken from the previous study'
+			).format(len(to_fault), len(requested), study)
+		)
+		return key, requested, to_fault, df_previous
+
+	def merge(self, key, requested, df_previous, df_new):
+		"""
+			Combines the results for the busbars that have been faulted with the previous results and stores them for
+			the next study
+		:param str key:  Key returned by plan
+		:param list requested:  Busbars requested
+		:param pd.DataFrame df_previous:  Results of the previous study, None if all busbars were faulted
+		:param pd.DataFrame df_new:  Results for the busbars that have been faulted, None if no busbars faulted
+		:return pd.DataFrame df:  Results for all the requested busbars
+		"""
+		if df_previous is None:
+			df = df_new
+		elif df_new is None or df_new.empty:
+			df = df_previous
+		else:
+			df = pd.concat(
+				[df_previous.drop(df_new.index, errors='ignore'), df_new.reindex(columns=df_previous.columns)], axis=0
+			)
+		# Busbars which are no longer in the case are removed
+		df = df.reindex([bus for bus in requested if bus in df.index])
+		df.index.name = constants.General.bus_number
+
+		reused = 0
+		if df_previous is not None:
+			reused = len(df.index.difference(df_new.index)) if df_new is not None else len(df)
+		study = self.studies.get(key)
+		self.reused[study] = (reused, len(df))
+		if reused:
+			self.logger.warning(
+				(
+					'Incremental {} study has taken the results for {} of {} busbars from the previous study, these '
+					'are approximate since only busbars within {} branches of a change to the busbar or branch data '
+					'have been faulted again'
+				).format(study, reused, len(df), self.max_distance)
+			)
+
+		self.cache.put(key=key, df=df, metadata={constants.Incremental.snapshot: self.snapshot.data})
+		return df
+
+	def note(self, study):
+		"""
+			Returns a note to include with the results describing the approximation made by the incremental study
+		:param str study:  Fault study type, e.g. constants.GUI.bkdy_3ph
+		:return str note:  None if the results for all busbars have been calculated by this study
+		"""
+		reused, total = self.reused.get(study, (0, 0))
+		if not reused:
+			return None
+		return (
+			'Incremental study - results for {} of {} busbars are from the previous study and are approximate'
+		).format(reused, total)
+
+	def metadata(self, study):
+		"""
+			Returns the details of the incremental study to store with the results
+		:param str study:  Fault study type, e.g. constants.GUI.bkdy_3ph
+		:return dict metadata:
+		"""
+		c = constants.Incremental
+		reused, total = self.reused.get(study, (0, 0))
+		return {
+			c.key_metadata: {
+				c.key_reused: reused,
+				c.key_requested: total,
+				c.key_max_distance: self.max_distance,
+				c.three_winding: self.snapshot.three_winding
+			}
+		}
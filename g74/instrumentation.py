@@ -0,0 +1,275 @@
+"""
+#######################################################################################################################
+###											PSSE G74 Fault Studies													###
+###		Timing spans and PSSE API call counters used throughout the package to report where the study time goes		###
+###																													###
+###		Code developed by David Mills (david.mills@PSCconsulting.com, +44 7899 984158) as part of PSC 		 		###
+###		project JK7938 - SHEPD - studies and automation																###
+###																													###
+#######################################################################################################################
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+import contextlib
+import collections
+
+import pandas as pd
+
+import g74.constants as constants
+
+# Details of each completed span, start and duration are in seconds and the peak memory is in MB (None if not measured)
+Span = collections.namedtuple('Span', ('name', 'start', 'duration', 'depth', 'pid', 'tid', 'args', 'peak_memory'))
+
+
+class Recorder:
+	"""
+		Records nested timing spans and the number of calls to (and time spent in) each PSSE API function so that a
+		summary table and a Chrome trace (viewed in chrome://tracing or Perfetto) can be produced for a study
+	"""
+	def __init__(self):
+		self.logger = logging.getLogger(constants.Logging.logger_name)
+		self.c = constants.Instrumentation
+		self.t0 = time.time()
+		self.spans = list()
+		self.stack = list()
+		# Number of calls and total time for each API function
+		self.api_calls = collections.OrderedDict()
+		# Function returning the peak memory (MB) since it was last called, if None then memory is not measured
+		self.memory = None
+		# Peak memory of each span still running
+		self.memory_stack = list()
+
+	def reset(self):
+		"""
+			Clears all recorded spans and API calls
+		:return None:
+		"""
+		self.t0 = time.time()
+		self.spans = list()
+		self.stack = list()
+		self.api_calls = collections.OrderedDict()
+		self.memory_stack = list()
+
+	def memory_checkpoint(self, peak=None):
+		"""
+			Adds the peak memory since the last checkpoint to the innermost span still running
+		:param float peak: (optional=None) - Peak memory to add, if None then it is measured
+		:return None:
+		"""
+		if peak is None:
+			peak = self.memory()
+		if self.memory_stack and peak is not None:
+			self.memory_stack[-1] = peak if self.memory_stack[-1] is None else max(self.memory_stack[-1], peak)
+		return None
+
+	@contextlib.contextmanager
+	def span(self, name, **args):
+		"""
+			Context manager which records the time taken by the code run within it, spans can be nested
+		:param str name:  Name of the span, spans with the same name are combined in the summary
+		:param args:  Any additional details to include in the trace
+		"""
+		measure_memory = self.memory is not None
+		if measure_memory:
+			# Memory used before the span started belongs to the span it is nested in
+			self.memory_checkpoint()
+			self.memory_stack.append(None)
+		start = time.time()
+		self.stack.append(name)
+		try:
+			yield
+		finally:
+			self.stack.pop()
+			duration = time.time() - start
+			peak_memory = None
+			if measure_memory:
+				self.memory_checkpoint()
+				peak_memory = self.memory_stack.pop()
+				# The span it is nested in has at least the same peak
+				self.memory_checkpoint(peak=peak_memory)
+			self.spans.append(
+				Span(
+					name=name, start=start, duration=duration, depth=len(self.stack), pid=os.getpid(),
+					tid=threading.current_thread().ident, args=args, peak_memory=peak_memory
+				)
+			)
+			self.logger.debug(
+				'{}{} completed in {:.3f} seconds'.format(name, ' {}'.format(args) if args else '', duration)
+			)
+
+	def timed(self, name=None):
+		"""
+			Decorator which records a span for every call to the function
+		:param str name: (optional=None) - Name of the span, if None then the name of the function is used
+		:return decorator:
+		"""
+		def decorator(func):
+			span_name = name or func.__name__
+
+			def wrapper(*args, **kwargs):
+				with self.span(span_name):
+					return func(*args, **kwargs)
+			wrapper.__name__ = func.__name__
+			wrapper.__doc__ = func.__doc__
+			return wrapper
+		return decorator
+
+	def record_api_call(self, name, duration):
+		"""
+			Adds a call to a PSSE API function
+		:param str name:  Name of the API function
+		:param float duration:  Time taken in seconds
+		:return None:
+		"""
+		calls, total = self.api_calls.get(name, (0, 0.0))
+		self.api_calls[name] = (calls + 1, total + duration)
+		return None
+
+	def summary(self):
+		"""
+			Produces a summary of the spans and API calls
+		:return pd.DataFrame df:  Number of calls, total time, mean time and longest time for each span and API
+								function, sorted with the longest total time first
+		"""
+		c = self.c
+		rows = collections.OrderedDict()
+		for span in self.spans:
+			calls, total, longest = rows.get(span.name, (0, 0.0, 0.0))
+			rows[span.name] = (calls + 1, total + span.duration, max(longest, span.duration))
+		for name, (calls, total) in self.api_calls.items():
+			rows[name] = (calls, total, float('nan'))
+
+		df = pd.DataFrame(
+			[(name, calls, total, longest) for name, (calls, total, longest) in rows.items()],
+			columns=(c.col_name, c.col_calls, c.col_total, c.col_max)
+		)
+		df[c.col_mean] = df[c.col_total] / df[c.col_calls]
+		df = df.set_index(c.col_name)[[c.col_calls, c.col_total, c.col_mean, c.col_max]]
+		return df.sort_values(c.col_total, ascending=False)
+
+	def summary_table(self):
+		"""
+			Returns the summary as a formatted table for the log files
+		:return str table:
+		"""
+		df = self.summary()
+		if df.empty:
+			return 'No timing spans or PSSE API calls recorded'
+		# API functions do not record the longest call
+		return df.to_string(float_format=lambda x: '-' if pd.isnull(x) else '{:.3f}'.format(x))
+
+	def chrome_trace(self):
+		"""
+			Produces the spans in the Chrome trace event format with the API call counts as metadata
+		:return dict trace:
+		"""
+		events = [
+			{
+				'name': span.name, 'ph': 'X', 'ts': (span.start - self.t0) * 1e6, 'dur': span.duration * 1e6,
+				'pid': span.pid, 'tid': span.tid, 'args': dict((k, str(v)) for k, v in span.args.items())
+			}
+			for span in sorted(self.spans, key=lambda x: (x.start, x.depth))
+		]
+		api_calls = dict(
+			(name, {self.c.col_calls: calls, self.c.col_total: total})
+			for name, (calls, total) in self.api_calls.items()
+		)
+		return {'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': {'api_calls': api_calls}}
+
+	def export(self, pth_logs, uid):
+		"""
+			Writes the summary table to the log and the Chrome trace to a JSON file next to the log files
+		:param str pth_logs:  Folder the log files are stored in
+		:param str uid:  Unique identifier for the study, used in the file name
+		:return str pth_trace:  Full path to the trace file
+		"""
+		pth_trace = os.path.join(pth_logs, '{}{}'.format(uid, self.c.trace_suffix))
+		with open(pth_trace, 'w') as f:
+			json.dump(self.chrome_trace(), f)
+
+		self.logger.info('Time taken by each stage and PSSE API function:\n{}'.format(self.summary_table()))
+		self.logger.info('Chrome trace of the study written to {}'.format(pth_trace))
+		return pth_trace
+
+
+class ApiCounter(object):
+	"""
+		Wraps the psspy or pssarrays module so that every call to an API function is counted and timed by the
+		recorder.  Attributes which are not functions are returned unchanged.
+	"""
+	def __init__(self, module, prefix, recorder=None):
+		"""
+		:param module:  Module (or stand in object) providing the API functions
+		:param str prefix:  Prefix for the function names in the summary, e.g. psspy
+		:param Recorder recorder: (optional=None) - Recorder to use, if None then the package recorder
+		"""
+		self._module = module
+		self._prefix = prefix
+		self._recorder = recorder if recorder is not None else RECORDER
+
+	def __getattr__(self, name):
+		# Private attributes are never forwarded, avoids recursion before __init__ has run (e.g. when unpickling)
+		if name.startswith('_'):
+			raise AttributeError(name)
+		attribute = getattr(self._module, name)
+		if not callable(attribute):
+			return attribute
+
+		recorder = self._recorder
+		label = '{}.{}'.format(self._prefix, name)
+
+		def wrapper(*args, **kwargs):
+			start = time.time()
+			try:
+				return attribute(*args, **kwargs)
+			finally:
+				recorder.record_api_call(name=label, duration=time.time() - start)
+		wrapper.__name__ = getattr(attribute, '__name__', name)
+		wrapper.__doc__ = getattr(attribute, '__doc__', None)
+
+		# Stored so the wrapper is only created once for each function
+		setattr(self, name, wrapper)
+		return wrapper
+
+
+# Recorder used throughout the package
+RECORDER = Recorder()
+
+
+def span(name, **args):
+	"""
+		Records the time taken by the code run within the span using the package recorder
+	:param str name:  Name of the span
+	:param args:  Any additional details to include in the trace
+	"""
+	return RECORDER.span(name, **args)
+
+
+def timed(name=None):
+	"""
+		Decorator which records a span for every call to the function using the package recorder
+	:param str name: (optional=None) - Name of the span, if None then the name of the function is used
+	"""
+	return RECORDER.timed(name=name)
+
+
+def reset():
+	"""
+		Clears everything recorded by the package recorder
+	:return None:
+	"""
+	return RECORDER.reset()
+
+
+def export(pth_logs, uid):
+	"""
+		Writes the summary table to the log and the Chrome trace next to the log files for the package recorder
+	:param str pth_logs:  Folder the log files are stored in
+	:param str uid:  Unique identifier for the study
+	:return str pth_trace:
+	"""
+	return RECORDER.export(pth_logs=pth_logs, uid=uid)
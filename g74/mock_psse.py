@@ -0,0 +1,852 @@
+"""
+#######################################################################################################################
+###											PSSE G74 Fault Studies													###
+###		In process stand in for the psspy and pssarrays modules backed by a network description rather than a	###
+###		PSSE SAV case so that the studies can be run, tested and benchmarked without a PSSE installation			###
+###																													###
+###		Code developed by David Mills (david.mills@PSCconsulting.com, +44 7899 984158) as part of PSC 		 		###
+###		project JK7938 - SHEPD - studies and automation																###
+###																													###
+#######################################################################################################################
+"""
+
+import os
+import math
+import time
+import logging
+import collections
+
+import numpy as np
+
+import g74.constants as constants
+import g74.psse as psse
+import g74.short_circuit as short_circuit
+
+# Header of the BKDY report, {date} and {fault_time} are populated when the report is written
+BKDY_REPORT_HEADER = (
+	'\x0c    PTI INTERACTIVE POWER SYSTEM SIMULATOR--PSS(R)E     {date}\n'
+	'                                                                       POLAR\n'
+	'                                                                    COORDINATES\n'
+	'FAULT DUTY TIME IS {fault_time:6.3f} SECONDS - ALL BREAKERS\n'
+	'\n'
+	'                                 INITIAL RMS      DECREMENTED RMS    /DECREMENTED CURRENTS/\n'
+	'X------ FAULTED BUS ------X   ALTERNATING CURNT  ALTERNATING CURNT PEAK DC  TOT RMS TOT PEAK\n'
+)
+
+# Values returned by pssarrays.iecs_currents for each faulted busbar
+IecCurrents = collections.namedtuple('IecCurrents', ('ia1', 'ia0', 'ipc', 'idc', 'ibsym', 'ibuns'))
+IecImpedance = collections.namedtuple('IecImpedance', ('z1', 'z2', 'z0'))
+
+
+class IecResults:
+	"""
+		Results in the same structure as returned by pssarrays.iecs_currents
+	"""
+	def __init__(self, ierr=0, scfmt='polar', scunit='physical', fltbus=None, flt3ph=None, fltlg=None, thevz=None):
+		"""
+		:param int ierr: (optional=0) - Error code
+		:param str scfmt: (optional='polar') - Coordinates of the results, polar values are stored as
+						complex(magnitude, angle in radians)
+		:param str scunit: (optional='physical') - Units of the currents, physical values are in amps
+		:param list fltbus: (optional=None) - Faulted busbars
+		:param list flt3ph: (optional=None) - IecCurrents for a 3 phase fault at each busbar
+		:param list fltlg: (optional=None) - IecCurrents for a LG fault at each busbar
+		:param list thevz: (optional=None) - IecImpedance (p.u.) at each busbar
+		"""
+		self.ierr = ierr
+		self.scfmt = scfmt
+		self.scunit = scunit
+		self.fltbus = fltbus or list()
+		self.flt3ph = flt3ph or list()
+		self.fltlg = fltlg or list()
+		self.thevz = thevz or list()
+
+
+def bkdy_bus_label(bus, name, nominal_kv):
+	"""
+		Returns the line identifying the faulted busbar in a BKDY report
+	:param int bus:  Busbar number
+	:param str name:  Busbar name, only the first 12 characters are included
+	:param float nominal_kv:  Nominal voltage of the busbar
+	:return str line:
+	"""
+	# Nominal voltage is always 6 characters, i.e. 11.000 or 132.00
+	decimals = max(0, 5 - len(str(int(nominal_kv))))
+	return '{:>6} [{:<12}{:>6.{}f}]'.format(bus, str(name)[:12], nominal_kv, decimals)
+
+
+def format_bkdy_report(fault_time, buses, names, nominal_kv, v_prefault, z, date=None):
+	"""
+		Produces the contents of a BKDY report for the thevenin impedance at each busbar.  Values are written to the
+		same fixed width positions as a PSSE report and so can be processed by BkdyFile.
+	:param float fault_time:  Fault duty time in seconds
+	:param list buses:  Busbar numbers
+	:param list names:  Busbar names
+	:param np.ndarray nominal_kv:  Nominal voltage of each busbar
+	:param np.ndarray v_prefault:  Pre-fault voltage (p.u.) of each busbar
+	:param np.ndarray z:  Thevenin impedance (p.u. on the system base) of each busbar, busbars that could not be
+						solved should be infinite
+	:param str date: (optional=None) - Date included in the header, if None then the current time is used
+	:return str contents:
+	"""
+	if date is None:
+		date = time.strftime('%a, %b %d %Y  %H:%M').upper()
+
+	nominal_kv = np.asarray(nominal_kv, dtype=float)
+	v_prefault = np.asarray(v_prefault, dtype=float)
+	z = np.asarray(z, dtype=complex)
+	solved = np.isfinite(z)
+
+	# Currents in amps
+	i_base = constants.PSSE.base_mva / (3**0.5 * nominal_kv) * 1000.0
+	i_fault = np.zeros(len(z), dtype=complex)
+	i_fault[solved] = v_prefault[solved] / z[solved] * i_base[solved]
+	i_magnitude = np.abs(i_fault)
+	i_angle = np.degrees(np.angle(i_fault))
+	r_x = np.zeros(len(z))
+	r_x[solved] = z.real[solved] / z.imag[solved]
+	i_dc = 2**0.5 * i_magnitude * np.exp(-2.0 * math.pi * constants.ShortCircuit.frequency * fault_time * r_x)
+	i_rms = (i_magnitude**2 + i_dc**2)**0.5
+	i_peak = 2**0.5 * i_magnitude + i_dc
+
+	lines = [BKDY_REPORT_HEADER.format(date=date, fault_time=fault_time)]
+	for i, bus in enumerate(buses):
+		lines.append(bkdy_bus_label(bus=bus, name=names[i], nominal_kv=nominal_kv[i]))
+		lines.append(
+			'{}  (AMPS){:>16.1f}{:>9.2f}{:>10.1f}{:>9.2f}{:>9.1f}{:>9.1f}{:>9.1f}'.format(
+				constants.BkdyFileOutput.current, i_magnitude[i], i_angle[i], i_magnitude[i], i_angle[i], i_dc[i],
+				i_rms[i], i_peak[i]
+			)
+		)
+		if solved[i]:
+			impedance = '{:>18.5f}{:>9.5f}'.format(z[i].real, z[i].imag)
+		else:
+			impedance = '{}{}'.format(' ' * 9, '*' * 18)
+		lines.append(
+			'{}:{} V:{:>7.4f}{:>9.2f}{:>9.1f}{:>9.1f}{:>9.1f}'.format(
+				constants.BkdyFileOutput.impedance, impedance, v_prefault[i], 0.0, i_dc[i], i_rms[i], i_peak[i]
+			)
+		)
+
+	return '\n'.join(lines) + '\n'
+
+
+class MockPsspy:
+	"""
+		Stand in for the subset of the psspy API used by the G74 tool.  The SAV case is a network description (JSON)
+		file in the format read by g74.short_circuit.NetworkModel and the fault currents are calculated using the
+		native short circuit solver.
+
+		Differences from PSSE that should be borne in mind when using the results:
+			- No load flow is carried out, the pre-fault voltages are those in the network description
+			- Machines are represented by their subtransient impedance at every fault time, the equivalent machines
+				added by G74FaultInfeed are decremented by updating their impedance
+			- All branches are returned as non-transformer branches, the number of three winding transformers reported
+				can be set with three_winding
+	"""
+	def __init__(self, pth_sav=None):
+		"""
+		:param str pth_sav: (optional=None) - Network description file to load as the SAV case
+		"""
+		self.logger = logging.getLogger(constants.Logging.logger_name)
+
+		# Number of calls made to each of the API functions
+		self.calls = collections.Counter()
+
+		self.sav = str()
+		self.base_mva = constants.PSSE.base_mva
+		self.buses = collections.OrderedDict()
+		self.machines = collections.OrderedDict()
+		self.loads = list()
+		self.plants = set()
+		self.branches = list()
+		self.subsystems = dict()
+		self.converted = False
+		# Number of three winding transformers reported since they are not part of the network description
+		self.three_winding = 0
+		# Function taking the fault_time and buses that returns the BKDY report, if None then the native solver is used
+		self.bkdy_report = None
+
+		# Output settings
+		self.report_destination = constants.PSSE.output_default
+		self.report_file = str()
+		self.short_circuit_unit = constants.PSSE.def_short_circuit_units
+		self.short_circuit_coordinate = constants.PSSE.def_short_circuit_coordinates
+
+		if pth_sav is not None:
+			self.case(sfile=pth_sav)
+
+	def count(self, name):
+		""" Records a call to an API function """
+		self.calls[name] += 1
+
+	# ----- Case handling -----
+	def psseinit(self, buses=150000):
+		self.count('psseinit')
+		return 0
+
+	def load_model(self, model):
+		"""
+			Populates the case from a network model
+		:param g74.short_circuit.NetworkModel model:
+		:return None:
+		"""
+		self.base_mva = model.base_mva
+		machine_buses = set(model.df_machines['bus'].astype(int))
+
+		self.buses = collections.OrderedDict()
+		for bus in model.df_buses.itertuples(index=False):
+			self.buses[int(bus.bus)] = {
+				'NUMBER': int(bus.bus),
+				'TYPE': 2 if int(bus.bus) in machine_buses else 1,
+				'BASE': float(bus.nominal_kv),
+				'PU': float(bus.voltage_pu),
+				'NAME': str(bus.name)
+			}
+
+		self.machines = collections.OrderedDict()
+		for mac in model.df_machines.itertuples(index=False):
+			self.add_machine(
+				bus=int(mac.bus), machine_id=str(mac.id), mbase=float(mac.mva), r_source=float(mac.r),
+				x_source=float(mac.x_subtr)
+			)
+			self.machines[(int(mac.bus), str(mac.id))].update({
+				'RPOS': float(mac.r), 'XSUBTR': float(mac.x_subtr), 'XTRANS': float(mac.x_trans),
+				'XSYNCH': float(mac.x_synch), 'RNEG': float(mac.r2), 'XNEG': float(mac.x2), 'RZERO': float(mac.r0),
+				'XZERO': float(mac.x0)
+			})
+		self.plants = set(machine_buses)
+
+		self.loads = list()
+		load_ids = collections.Counter()
+		for load in model.df_loads.itertuples(index=False):
+			load_ids[int(load.bus)] += 1
+			self.loads.append({
+				'NUMBER': int(load.bus), 'ID': str(load_ids[int(load.bus)]), 'STATUS': 1, 'MVAACT': float(load.mva)
+			})
+
+		self.branches = [
+			{
+				'FROMNUMBER': int(brn.from_bus), 'TONUMBER': int(brn.to_bus), 'STATUS': int(brn.status),
+				'RX': complex(brn.r, brn.x), 'CHARGING': float(brn.b), 'R0': float(brn.r0), 'X0': float(brn.x0)
+			}
+			for brn in model.df_branches.itertuples(index=False)
+		]
+		self.subsystems = dict()
+		self.converted = False
+
+		return None
+
+	def network_model(self, include_loads=True):
+		"""
+			Produces a network model of the current state of the case including any changes made through the API
+		:param bool include_loads: (optional=True) - If False then the loads are not included, used for the fault
+							studies since the contribution from the loads is represented by the machines added by
+							G74FaultInfeed
+		:return g74.short_circuit.NetworkModel model:
+		"""
+		buses = [
+			{'bus': bus['NUMBER'], 'name': bus['NAME'], 'nominal_kv': bus['BASE'], 'voltage_pu': bus['PU']}
+			for bus in self.buses.values()
+		]
+		branches = [
+			{
+				'from_bus': brn['FROMNUMBER'], 'to_bus': brn['TONUMBER'], 'r': brn['RX'].real, 'x': brn['RX'].imag,
+				'b': brn['CHARGING'], 'status': brn['STATUS'], 'r0': brn['R0'], 'x0': brn['X0']
+			}
+			for brn in self.branches
+		]
+		machines = [
+			{
+				'bus': mac['NUMBER'], 'id': mac['ID'], 'mva': mac['MBASE'], 'r': mac['RPOS'], 'x_subtr': mac['XSUBTR'],
+				'x_trans': mac['XTRANS'], 'x_synch': mac['XSYNCH'], 'r2': mac['RNEG'], 'x2': mac['XNEG'],
+				'r0': mac['RZERO'], 'x0': mac['XZERO']
+			}
+			for mac in self.machines.values() if mac['STATUS'] == 1
+		]
+		loads = [
+			{'bus': load['NUMBER'], 'mva': load['MVAACT']} for load in self.loads if load['STATUS'] == 1 and include_loads
+		]
+
+		return short_circuit.NetworkModel(
+			buses=buses, branches=branches, machines=machines, loads=loads, base_mva=self.base_mva
+		)
+
+	def case(self, sfile):
+		self.count('case')
+		if not os.path.isfile(sfile):
+			return 3
+		self.load_model(model=short_circuit.NetworkModel.from_json(pth=sfile))
+		self.sav = sfile
+		return 0
+
+	def save(self, sfile):
+		self.count('save')
+		try:
+			self.network_model().to_json(pth=sfile)
+		except IOError:
+			return 2
+		self.sav = sfile
+		return 0
+
+	def sfiles(self):
+		self.count('sfiles')
+		return self.sav, str()
+
+	def sysmva(self):
+		self.count('sysmva')
+		return self.base_mva
+
+	# ----- Output settings -----
+	def report_output(self, islct=1, filarg='', options1=0):
+		self.count('report_output')
+		self.report_destination = islct
+		self.report_file = filarg
+		return 0
+
+	def progress_output(self, islct=1, filarg='', options1=0):
+		self.count('progress_output')
+		return 0
+
+	def alert_output(self, islct=1, filarg='', options1=0):
+		self.count('alert_output')
+		return 0
+
+	def prompt_output(self, islct=1, filarg='', options1=0):
+		self.count('prompt_output')
+		return 0
+
+	def lines_per_page_one_device(self, device=1, lines=60):
+		self.count('lines_per_page_one_device')
+		return 0
+
+	def short_circuit_units(self, ival=1):
+		self.count('short_circuit_units')
+		self.short_circuit_unit = ival
+		return 0
+
+	def short_circuit_coordinates(self, ival=1):
+		self.count('short_circuit_coordinates')
+		self.short_circuit_coordinate = ival
+		return 0
+
+	def solution_parameters_4(self, **kwargs):
+		self.count('solution_parameters_4')
+		return 0
+
+	# ----- Load flow and conversion, the pre-fault voltages are not recalculated -----
+	def fnsl(self, **kwargs):
+		self.count('fnsl')
+		return 0
+
+	def fdns(self, **kwargs):
+		self.count('fdns')
+		return 0
+
+	def solved(self):
+		self.count('solved')
+		return 0
+
+	def cong(self, opt=0):
+		self.count('cong')
+		if self.converted:
+			return 2
+		self.converted = True
+		return 0
+
+	def conl(self, sid=-1, all=0, apiopt=0, status1=0, status2=0, loadin1=0.0, loadin2=0.0, loadin3=0.0, loadin4=0.0):
+		self.count('conl')
+		return 0, 0
+
+	def ordr(self, opt=0):
+		self.count('ordr')
+		return 0
+
+	def fact(self):
+		self.count('fact')
+		return 0
+
+	# ----- Subsystems -----
+	def bsysinit(self, sid):
+		self.count('bsysinit')
+		if not 0 <= sid <= 11:
+			return 1
+		self.subsystems[sid] = set()
+		return 0
+
+	def bsyso(self, sid, busnum):
+		self.count('bsyso')
+		if sid not in self.subsystems:
+			return 1
+		if busnum not in self.buses:
+			return 2
+		self.subsystems[sid].add(busnum)
+		return 0
+
+	def bsys(
+			self, sid, usekv=0, basekv=(0.0, 0.0), numarea=0, areas=(), numbus=0, buses=(), numowner=0, owners=(),
+			numzone=0, zones=()
+	):
+		# Only selection by busbar number is supported
+		self.count('bsys')
+		if not 0 <= sid <= 11:
+			return 1
+		buses = list(buses)[:numbus]
+		if numbus < 0 or any(bus not in self.buses for bus in buses):
+			return 5
+		self.subsystems[sid] = set(buses)
+		return 0
+
+	def subsystem_buses(self, sid, flag=1):
+		"""
+			Returns the busbars in the subsystem in the order they are in the case
+		:param int sid:  Subsystem, -1 for all busbars
+		:param int flag:  (optional=1) - If 1 then busbars which are out of service are excluded
+		:return list buses:  List of busbars or None if the subsystem has not been defined
+		"""
+		if sid == -1:
+			buses = self.buses.keys()
+		elif sid in self.subsystems:
+			buses = [bus for bus in self.buses if bus in self.subsystems[sid]]
+		else:
+			return None
+		if flag == 1:
+			buses = [bus for bus in buses if self.buses[bus]['TYPE'] != 4]
+		return list(buses)
+
+	# ----- Data extraction -----
+	def array_data(self, records, string, fields):
+		"""
+			Returns the requested values for each record in the same format as the psspy array functions
+		:param list records:  Dictionary for each element
+		:param tuple string:  Values requested
+		:param tuple fields:  Values that are available from this function
+		:return (int, list) (ierr, values):  Error code (4 if a value is not available) and a list of values for each
+								item in string
+		"""
+		if isinstance(string, str):
+			string = (string, )
+		if any(name not in fields for name in string):
+			return 4, None
+		return 0, [[record[name] for record in records] for name in string]
+
+	def bus_records(self, sid, flag):
+		buses = self.subsystem_buses(sid=sid, flag=flag)
+		if buses is None:
+			return None
+		return [self.buses[bus] for bus in buses]
+
+	def abusint(self, sid=-1, flag=1, string=()):
+		self.count('abusint')
+		records = self.bus_records(sid=sid, flag=flag)
+		if records is None:
+			return 1, None
+		return self.array_data(records=records, string=string, fields=('NUMBER', 'TYPE'))
+
+	def abusreal(self, sid=-1, flag=1, string=()):
+		self.count('abusreal')
+		records = self.bus_records(sid=sid, flag=flag)
+		if records is None:
+			return 1, None
+		return self.array_data(records=records, string=string, fields=('BASE', 'PU'))
+
+	def abuschar(self, sid=-1, flag=1, string=()):
+		self.count('abuschar')
+		records = self.bus_records(sid=sid, flag=flag)
+		if records is None:
+			return 1, None
+		records = [
+			{'NAME': bus['NAME'], 'EXNAME': '{:<12} {:6.2f}'.format(bus['NAME'][:12], bus['BASE'])} for bus in records
+		]
+		return self.array_data(records=records, string=string, fields=('NAME', 'EXNAME'))
+
+	def machine_records(self, sid, flag):
+		buses = self.subsystem_buses(sid=sid, flag=2 if flag == 4 else 1)
+		if buses is None:
+			return None
+		buses = set(buses)
+		return [
+			mac for mac in self.machines.values()
+			if mac['NUMBER'] in buses and (flag in (2, 4) or mac['STATUS'] == 1)
+		]
+
+	def amachint(self, sid=-1, flag=1, string=()):
+		self.count('amachint')
+		records = self.machine_records(sid=sid, flag=flag)
+		if records is None:
+			return 1, None
+		return self.array_data(records=records, string=string, fields=('NUMBER', 'STATUS'))
+
+	def amachreal(self, sid=-1, flag=1, string=()):
+		self.count('amachreal')
+		records = self.machine_records(sid=sid, flag=flag)
+		if records is None:
+			return 1, None
+		return self.array_data(
+			records=records, string=string,
+			fields=('MBASE', 'RPOS', 'XSUBTR', 'XTRANS', 'XSYNCH', 'RNEG', 'XNEG', 'RZERO', 'XZERO')
+		)
+
+	def amachcplx(self, sid=-1, flag=1, string=()):
+		self.count('amachcplx')
+		records = self.machine_records(sid=sid, flag=flag)
+		if records is None:
+			return 1, None
+		return self.array_data(records=records, string=string, fields=('ZSORCE', ))
+
+	def amachchar(self, sid=-1, flag=1, string=()):
+		self.count('amachchar')
+		records = self.machine_records(sid=sid, flag=flag)
+		if records is None:
+			return 1, None
+		records = [{'ID': '{:<2}'.format(mac['ID'])} for mac in records]
+		return self.array_data(records=records, string=string, fields=('ID', ))
+
+	def aindmaccount(self, sid=-1, flag=1):
+		self.count('aindmaccount')
+		return 0, 0
+
+	def agenbusint(self, sid=-1, flag=1, string=()):
+		self.count('agenbusint')
+		buses = self.subsystem_buses(sid=sid, flag=1)
+		if buses is None:
+			return 1, None
+		records = [{'NUMBER': bus, 'STATUS': 1} for bus in buses if bus in self.plants]
+		return self.array_data(records=records, string=string, fields=('NUMBER', 'STATUS'))
+
+	def load_records(self, sid, flag):
+		buses = self.subsystem_buses(sid=sid, flag=1)
+		if buses is None:
+			return None
+		buses = set(buses)
+		return [load for load in self.loads if load['NUMBER'] in buses and (flag != 1 or load['STATUS'] == 1)]
+
+	def aloadint(self, sid=-1, flag=1, string=()):
+		self.count('aloadint')
+		records = self.load_records(sid=sid, flag=flag)
+		if records is None:
+			return 1, None
+		return self.array_data(records=records, string=string, fields=('NUMBER', 'STATUS'))
+
+	def aloadreal(self, sid=-1, flag=1, string=()):
+		self.count('aloadreal')
+		records = self.load_records(sid=sid, flag=flag)
+		if records is None:
+			return 1, None
+		return self.array_data(records=records, string=string, fields=('MVAACT', ))
+
+	def aloadchar(self, sid=-1, flag=1, string=()):
+		self.count('aloadchar')
+		records = self.load_records(sid=sid, flag=flag)
+		if records is None:
+			return 1, None
+		records = [{'ID': '{:<2}'.format(load['ID'])} for load in records]
+		return self.array_data(records=records, string=string, fields=('ID', ))
+
+	def branch_records(self, sid, flag):
+		buses = self.subsystem_buses(sid=sid, flag=1)
+		if buses is None:
+			return None
+		buses = set(buses)
+		return [
+			brn for brn in self.branches
+			if (brn['FROMNUMBER'] in buses or brn['TONUMBER'] in buses) and (flag != 1 or brn['STATUS'] == 1)
+		]
+
+	def abrnint(self, sid=-1, owner=1, ties=1, flag=1, entry=1, string=()):
+		self.count('abrnint')
+		records = self.branch_records(sid=sid, flag=flag)
+		if records is None:
+			return 1, None
+		return self.array_data(records=records, string=string, fields=('FROMNUMBER', 'TONUMBER', 'STATUS'))
+
+	def abrncplx(self, sid=-1, owner=1, ties=1, flag=1, entry=1, string=()):
+		self.count('abrncplx')
+		records = self.branch_records(sid=sid, flag=flag)
+		if records is None:
+			return 1, None
+		return self.array_data(records=records, string=string, fields=('RX', ))
+
+	def abrnreal(self, sid=-1, owner=1, ties=1, flag=1, entry=1, string=()):
+		self.count('abrnreal')
+		records = self.branch_records(sid=sid, flag=flag)
+		if records is None:
+			return 1, None
+		return self.array_data(records=records, string=string, fields=('CHARGING', ))
+
+	def atrnint(self, sid=-1, owner=1, ties=1, flag=1, entry=1, string=()):
+		self.count('atrnint')
+		return self.array_data(records=list(), string=string, fields=('FROMNUMBER', 'TONUMBER', 'STATUS'))
+
+	def atrncplx(self, sid=-1, owner=1, ties=1, flag=1, entry=1, string=()):
+		self.count('atrncplx')
+		return self.array_data(records=list(), string=string, fields=('RXACT', ))
+
+	def atr3count(self, sid=-1, owner=1, ties=1, flag=1, entry=1):
+		self.count('atr3count')
+		return 0, self.three_winding
+
+	# ----- Data changes -----
+	def bus_data_3(self, i, intgar1=None, intgar2=None, intgar3=None, intgar4=None, realar1=None, realar2=None, **kwargs):
+		self.count('bus_data_3')
+		if i not in self.buses:
+			return 1
+		bus = self.buses[i]
+		for name, value in (('TYPE', intgar1), ('BASE', realar1), ('PU', realar2), ('NAME', kwargs.get('name'))):
+			if value is not None:
+				bus[name] = value
+		return 0
+
+	def plant_data(self, i, intgar1=None, realar1=None, realar2=None):
+		self.count('plant_data')
+		if i not in self.buses:
+			return 1
+		self.plants.add(i)
+		return 0
+
+	def add_machine(self, bus, machine_id, mbase, r_source, x_source):
+		"""
+			Adds a new in service machine with the source impedance used for all of the sequence impedances
+		"""
+		self.machines[(bus, machine_id)] = {
+			'NUMBER': bus, 'ID': machine_id, 'STATUS': 1, 'MBASE': mbase, 'ZSORCE': complex(r_source, x_source),
+			'RPOS': r_source, 'XSUBTR': x_source, 'XTRANS': x_source, 'XSYNCH': x_source,
+			'RNEG': np.nan, 'XNEG': np.nan, 'RZERO': np.nan, 'XZERO': np.nan
+		}
+
+	def change_machine(self, mac, intgar1=None, realar7=None, realar8=None, realar9=None):
+		"""
+			Updates the status, machine base and source impedance of an existing machine
+		"""
+		if intgar1 is not None:
+			mac['STATUS'] = intgar1
+		if realar7 is not None:
+			mac['MBASE'] = realar7
+		if realar8 is not None or realar9 is not None:
+			r_source = mac['ZSORCE'].real if realar8 is None else realar8
+			x_source = mac['ZSORCE'].imag if realar9 is None else realar9
+			mac['ZSORCE'] = complex(r_source, x_source)
+
+	def machine_data_2(self, i, id, intgar1=None, realar7=None, realar8=None, realar9=None, **kwargs):
+		self.count('machine_data_2')
+		if i not in self.buses:
+			return 1
+		if i not in self.plants:
+			return 3
+		key = (i, str(id).strip())
+		if key not in self.machines:
+			self.add_machine(
+				bus=i, machine_id=key[1], mbase=self.base_mva if realar7 is None else realar7,
+				r_source=0.0 if realar8 is None else realar8, x_source=1.0 if realar9 is None else realar9
+			)
+		self.change_machine(self.machines[key], intgar1=intgar1, realar7=realar7, realar8=realar8, realar9=realar9)
+		return 0
+
+	def machine_chng_2(self, i, id, intgar1=None, realar7=None, realar8=None, realar9=None, **kwargs):
+		self.count('machine_chng_2')
+		key = (i, str(id).strip())
+		if key not in self.machines:
+			return 2
+		self.change_machine(self.machines[key], intgar1=intgar1, realar7=realar7, realar8=realar8, realar9=realar9)
+		return 0
+
+	def seq_machine_data_3(
+			self, i, id, intgar1=None, realar1=None, realar2=None, realar3=None, realar4=None, realar5=None,
+			realar6=None, realar7=None, realar8=None, **kwargs
+	):
+		self.count('seq_machine_data_3')
+		key = (i, str(id).strip())
+		if key not in self.machines:
+			return 2
+		mac = self.machines[key]
+		for name, value in zip(
+				('RPOS', 'XSUBTR', 'RNEG', 'XNEG', 'RZERO', 'XZERO', 'XTRANS', 'XSYNCH'),
+				(realar1, realar2, realar3, realar4, realar5, realar6, realar7, realar8)
+		):
+			if value is not None:
+				mac[name] = value
+		return 0
+
+	# ----- Fault studies -----
+	def fault_buses(self, sid, all_buses):
+		"""
+			Returns the busbars to be faulted
+		:param int sid:  Subsystem
+		:param int all_buses:  If 1 then all busbars are faulted
+		:return list buses:
+		"""
+		return self.subsystem_buses(sid=-1 if all_buses else sid)
+
+	def bkdy(self, sid=-1, all=0, apiopt=1, lvlbak=-1, flttim=0.0, bfile='', ffile='', efile=''):
+		self.count('bkdy')
+		buses = self.fault_buses(sid=sid, all_buses=all)
+		if buses is None:
+			return 1
+		if not self.converted:
+			# Generators and loads must be converted first
+			return 5
+
+		if self.bkdy_report is not None:
+			contents = self.bkdy_report(fault_time=flttim, buses=buses)
+		else:
+			model = self.network_model(include_loads=False)
+			solver = short_circuit.ShortCircuitSolver(model=model)
+			z = solver.thevenin_impedances(fault_time=flttim, buses=buses)
+			df_buses = model.df_buses.loc[buses]
+			contents = format_bkdy_report(
+				fault_time=flttim, buses=buses, names=df_buses['name'].tolist(),
+				nominal_kv=df_buses['nominal_kv'].values, v_prefault=df_buses['voltage_pu'].values, z=z
+			)
+
+		# Report is only written if the output has been directed to a file
+		if self.report_destination == constants.PSSE.output_file and self.report_file:
+			with open(self.report_file, 'w') as f:
+				f.write(contents)
+
+		return 0
+
+
+class MockPssarrays:
+	"""
+		Stand in for pssarrays.iecs_currents which uses the state of the case in a MockPsspy
+	"""
+	def __init__(self, psspy):
+		"""
+		:param MockPsspy psspy:  Case that the fault studies are carried out on
+		"""
+		self.psspy = psspy
+
+	def iecs_currents(
+			self, sid=-1, all=0, flt3ph=0, fltlg=0, fltloc=0, lnchrg=1, zcorec=0, loadop=1, optnftrc=2,
+			brktime=0.1, vfactorc=1.1, **kwargs
+	):
+		self.psspy.count('iecs_currents')
+		scunit = 'physical' if self.psspy.short_circuit_unit == 1 else 'pu'
+		scfmt = 'polar' if self.psspy.short_circuit_coordinate == 1 else 'rectangular'
+
+		buses = self.psspy.fault_buses(sid=sid, all_buses=all)
+		if buses is None:
+			return IecResults(ierr=1, scfmt=scfmt, scunit=scunit)
+
+		# Loads are not included (loadop=1), the equivalent machines added by G74FaultInfeed are included as machines
+		model = self.psspy.network_model(include_loads=False)
+		solver = short_circuit.SequenceFaultSolver(model=model)
+		z1, z2, z0 = solver.sequence_impedances(fault_time=brktime, buses=buses)
+
+		return iec_results(
+			buses=buses, nominal_kv=model.df_buses.loc[buses, 'nominal_kv'].values, z1=z1, z2=z2, z0=z0,
+			brktime=brktime, vfactorc=vfactorc, flt3ph=flt3ph, fltlg=fltlg, scfmt=scfmt, scunit=scunit,
+			base_mva=model.base_mva
+		)
+
+
+def coordinates(value, scfmt):
+	"""
+		Returns a complex value in the coordinates used for the IEC results
+	:param complex value:
+	:param str scfmt:  Either polar or rectangular
+	:return complex value:  For polar the real part is the magnitude and the imaginary part the angle in radians
+	"""
+	if scfmt == 'polar':
+		return complex(abs(value), np.angle(value))
+	return complex(value)
+
+
+def iec_results(
+		buses, nominal_kv, z1, z2, z0, brktime, vfactorc=1.0, flt3ph=1, fltlg=0, scfmt='polar', scunit='physical',
+		base_mva=constants.PSSE.base_mva
+):
+	"""
+		Produces the results of an IEC fault study in the same structure as returned by pssarrays.iecs_currents from
+		the sequence thevenin impedances at each busbar
+	:param list buses:  Faulted busbars
+	:param np.ndarray nominal_kv:  Nominal voltage of each busbar
+	:param np.ndarray z1:  Positive sequence thevenin impedance (p.u.), infinite if the busbar could not be solved
+	:param np.ndarray z2:  Negative sequence thevenin impedance (p.u.)
+	:param np.ndarray z0:  Zero sequence thevenin impedance (p.u.)
+	:param float brktime:  Breaker opening time in seconds
+	:param float vfactorc: (optional=1.0) - Voltage factor, either a single value or a value for each busbar
+	:param int flt3ph: (optional=1) - If 1 then 3 phase fault currents are included
+	:param int fltlg: (optional=0) - If 1 then LG fault currents are included
+	:param str scfmt: (optional='polar') - Coordinates of the results, polar or rectangular
+	:param str scunit: (optional='physical') - Units of the currents, physical or pu
+	:param float base_mva: (optional) - System base MVA
+	:return IecResults results:
+	"""
+	z1 = np.asarray(z1, dtype=complex)
+	z2 = np.asarray(z2, dtype=complex)
+	z0 = np.asarray(z0, dtype=complex)
+	vfactorc = np.ones(len(buses)) * vfactorc
+	if scunit == 'physical':
+		i_base = base_mva / (3**0.5 * np.asarray(nominal_kv, dtype=float)) * 1000.0
+	else:
+		i_base = np.ones(len(buses))
+
+	results = IecResults(scfmt=scfmt, scunit=scunit, fltbus=list(buses))
+	for fault_type, fault, z_fault, multiplier, zero_sequence in (
+			('flt3ph', flt3ph, z1, 1.0, 0.0), ('fltlg', fltlg, z1 + z2 + z0, 3.0, 1.0)
+	):
+		if not fault:
+			continue
+		solved = np.isfinite(z_fault)
+		# Total fault current phasor
+		i_fault = np.zeros(len(buses), dtype=complex)
+		i_fault[solved] = multiplier * vfactorc[solved] / z_fault[solved] * i_base[solved]
+		r_x = np.zeros(len(buses))
+		r_x[solved] = z_fault.real[solved] / z_fault.imag[solved]
+		ik = np.abs(i_fault)
+		ip = (1.02 + 0.98 * np.exp(-3.0 * r_x)) * 2**0.5 * ik
+		idc = 2**0.5 * ik * np.exp(-2.0 * math.pi * constants.ShortCircuit.frequency * brktime * r_x)
+		ibuns = (ik**2 + idc**2)**0.5
+		# Sequence components of the faulted phase, for a LG fault the positive, negative and zero sequence currents
+		# are each a third of the fault current whereas a 3 phase fault only has a positive sequence current
+		ia1 = i_fault / multiplier
+		ia0 = i_fault / 3.0 * zero_sequence
+
+		currents = [
+			IecCurrents(
+				ia1=coordinates(value=ia1[i], scfmt=scfmt), ia0=coordinates(value=ia0[i], scfmt=scfmt),
+				ipc=complex(ip[i]), idc=complex(idc[i]), ibsym=coordinates(value=i_fault[i], scfmt=scfmt),
+				ibuns=complex(ibuns[i])
+			)
+			for i in range(len(buses))
+		]
+		setattr(results, fault_type, currents)
+
+	# Busbars which could not be solved have no impedance
+	z1, z2, z0 = [np.where(np.isfinite(z), z, complex(np.nan)) for z in (z1, z2, z0)]
+	results.thevz = [
+		IecImpedance(
+			z1=coordinates(value=z1[i], scfmt=scfmt), z2=coordinates(value=z2[i], scfmt=scfmt),
+			z0=coordinates(value=z0[i], scfmt=scfmt)
+		)
+		for i in range(len(buses))
+	]
+
+	return results
+
+
+def install(pth_sav=None):
+	"""
+		Creates the stand in psspy and pssarrays modules and sets them as the modules used by g74.psse
+	:param str pth_sav: (optional=None) - Network description file to load as the SAV case
+	:return (MockPsspy, MockPssarrays) (psspy, pssarrays):
+	"""
+	mock_psspy = MockPsspy(pth_sav=pth_sav)
+	mock_pssarrays = MockPssarrays(psspy=mock_psspy)
+	psse.set_backend(psspy_module=mock_psspy, pssarrays_module=mock_pssarrays)
+	logging.getLogger(constants.Logging.logger_name).debug('Stand in PSSE backend installed in place of psspy')
+
+	return mock_psspy, mock_pssarrays
+
+
+def uninstall():
+	"""
+		Removes the stand in modules from g74.psse so that PSSE will be initialised the next time it is needed
+	:return None:
+	"""
+	for name in ('psspy', 'pssarrays', 'sliderPy'):
+		if name in psse.__dict__:
+			del psse.__dict__[name]
+
+	return None
@@ -0,0 +1,340 @@
+"""
+#######################################################################################################################
+###											PSSE G74 Fault Studies													###
+###		Runs the fault studies for different fault times or busbars in separate PSSE worker processes				###
+###																													###
+###		Code developed by David Mills (david.mills@PSCconsulting.com, +44 7899 984158) as part of PSC 		 		###
+###		project JK7938 - SHEPD - studies and automation																###
+###																													###
+#######################################################################################################################
+"""
+
+import os
+import shutil
+import logging
+import tempfile
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+import g74
+import g74.constants as constants
+import g74.psse as psse
+
+# Logger for the worker process, created by initialise_worker
+WORKER = dict()
+
+
+def initialise_worker(pth_logs=None, initialiser=None):
+	"""
+		Creates the logger for a worker process and installs any stand in backend, run once when each worker process
+		starts since nothing set up in the main process is available when the worker processes are spawned
+	:param str pth_logs: (optional=None) - Folder for the log files, if None then no log files are written
+	:param initialiser: (optional=None) - Function with no arguments that installs a stand in backend (e.g.
+						g74.mock_psse.install), if None then the worker initialises PSSE
+	:return None:
+	"""
+	# Worker processes are not able to start their own worker processes
+	constants.Parallel.processes = 1
+	if pth_logs:
+		WORKER['logger'] = g74.Logger(
+			pth_logs=pth_logs, uid='{}_{}'.format(constants.Parallel.uid, os.getpid()), debug=constants.DEBUG_MODE
+		)
+	if initialiser is not None:
+		initialiser()
+	return None
+
+
+def psse_session():
+	"""
+		Initialises PSSE if it is not already available in this process
+	:return g74.psse.PsseControl psse_control:
+	"""
+	psse_control = psse.PsseControl()
+	# PSSE will already be available if a stand in backend has been installed or it has already been initialised
+	if 'psspy' not in psse.__dict__:
+		psse.InitialisePsspy().initialise_psse(running_from_psse=psse_control.run_in_psse)
+	return psse_control
+
+
+def psse_fault_time_worker(task):
+	"""
+		Worker that runs in a separate process with its own PSSE session.  Loads the SAV case, adds the G74 equivalent
+		machines and runs the fault study for the fault times it has been given.
+	:param dict task:  Details of the study to run with the keys:
+						pth_sav - SAV case to load
+						study - Type of fault study from constants.GUI.fault_types
+						fault_times - Fault times to study
+						buses - Busbars to fault, if empty then all busbars are faulted
+						breaker_duty_file - Breaker duty file for the BKDY study
+						engine - (optional) Engine from constants.ShortCircuit.engines for the BKDY study
+	:return (pd.DataFrame, list) (df, unreliable_buses):  Combined results for each fault time before processing and
+						the busbars for which the BKDY results are unreliable (negative fault impedance)
+	"""
+	logger = logging.getLogger(constants.Logging.logger_name)
+	logger.debug('{} fault study for {} fault times in process {}'.format(
+		task['study'], len(task['fault_times']), os.getpid()
+	))
+	psse_control = psse_session()
+	psse_control.load_data_case(pth_sav=task['pth_sav'])
+
+	g74_infeed = psse.G74FaultInfeed()
+	g74_infeed.identify_machine_parameters()
+	g74_infeed.calculate_machine_mva_values()
+
+	study = task['study']
+	unreliable_buses = list()
+	if study == constants.GUI.bkdy_3ph:
+		bkdy = psse.BkdyFaultStudy(
+			psse_control=psse_control, streaming=True, engine=task.get('engine', constants.ShortCircuit.engine)
+		)
+		bkdy.breaker_duty_file = task['breaker_duty_file']
+		bkdy.define_faulted_buses(buses=task['buses'])
+		# Each worker writes its BKDY reports to its own folder
+		output_folder = tempfile.mkdtemp()
+		try:
+			df = bkdy.study_fault_times(
+				fault_times=task['fault_times'], g74_infeed=g74_infeed, delete=True, output_folder=output_folder
+			)
+		finally:
+			shutil.rmtree(output_folder, ignore_errors=True)
+		unreliable_buses = [int(bus) for bus in bkdy.unreliable_faulted_buses]
+	elif study in (constants.GUI.iec_3ph, constants.GUI.iec_lg):
+		iec = psse.IecFaults(psse=psse_control, buses=task['buses'])
+		df = iec.study_fault_times(
+			fault_times=task['fault_times'], g74_infeed=g74_infeed,
+			lll=study == constants.GUI.iec_3ph, lg=study == constants.GUI.iec_lg
+		)
+	else:
+		raise ValueError('Unknown fault study type {}'.format(study))
+
+	return df, unreliable_buses
+
+
+class WorkerExecutor:
+	"""
+		Runs tasks using a pluggable worker in a number of separate processes, each of which has its own PSSE session.
+		Any task that fails is retried without rerunning the tasks which were successful.
+	"""
+	def __init__(
+			self, pth_sav, processes=constants.Parallel.processes, worker=psse_fault_time_worker,
+			retries=constants.Parallel.retries, initialiser=None, pth_logs=None
+	):
+		"""
+		:param str pth_sav:  SAV case that each worker loads, must already include any changes needed for the study
+		:param int processes: (optional) - Maximum number of worker processes, if 1 then the worker is run in this
+							process
+		:param worker: (optional) - Function that takes a task dictionary and returns the combined results for the
+							task and the busbars with unreliable results, must be defined at module level so it
+							can be pickled
+		:param int retries: (optional) - Number of times a failed task is retried
+		:param initialiser: (optional=None) - Function run when each worker process starts that installs a stand in
+							backend, must be defined at module level, if None then PSSE is initialised
+		:param str pth_logs: (optional=None) - Folder for the log files of each worker process, if None then the
+							folder of the SAV case is used
+		"""
+		self.logger = logging.getLogger(constants.Logging.logger_name)
+		self.pth_sav = pth_sav
+		self.processes = max(1, int(processes))
+		self.worker = worker
+		self.retries = retries
+		self.initialiser = initialiser
+		if pth_logs is None and pth_sav:
+			pth_logs = os.path.dirname(os.path.abspath(pth_sav))
+		self.pth_logs = pth_logs
+
+	def execute(self, tasks):
+		"""
+			Runs the worker for each task, in separate processes if more than one process is allowed
+		:param list tasks:  List of task dictionaries
+		:return list outcomes:  (success, result or exception) for each task
+		"""
+		outcomes = list()
+		processes = min(self.processes, len(tasks))
+		if processes <= 1:
+			for task in tasks:
+				try:
+					outcomes.append((True, self.worker(task)))
+				except Exception as error:
+					outcomes.append((False, error))
+			return outcomes
+
+		pool = multiprocessing.Pool(
+			processes=processes, initializer=initialise_worker, initargs=(self.pth_logs, self.initialiser)
+		)
+		try:
+			async_results = [pool.apply_async(self.worker, (task, )) for task in tasks]
+			for async_result in async_results:
+				try:
+					outcomes.append((True, async_result.get()))
+				except Exception as error:
+					outcomes.append((False, error))
+		finally:
+			pool.close()
+			pool.join()
+
+		return outcomes
+
+	def map(self, tasks):
+		"""
+			Runs the worker for each task retrying any that fail
+		:param list tasks:  List of task dictionaries
+		:return list results:  Result returned by the worker for each task
+		"""
+		results = dict()
+		pending = list(enumerate(tasks))
+		for attempt in range(self.retries + 1):
+			failed = list()
+			outcomes = self.execute(tasks=[task for _, task in pending])
+			for (i, task), (success, result) in zip(pending, outcomes):
+				if success:
+					results[i] = result
+				else:
+					failed.append((i, task))
+					self.logger.warning(
+						'Attempt {} of task {} failed with the error: {}'.format(attempt + 1, i, result)
+					)
+
+			pending = failed
+			if not pending:
+				break
+
+		if pending:
+			self.logger.critical(
+				'The following tasks failed after {} attempts: {}'.format(
+					self.retries + 1, [i for i, _ in pending]
+				)
+			)
+			raise ValueError('Fault study failed in worker process')
+
+		return [results[i] for i in range(len(tasks))]
+
+
+class FaultTimeExecutor(WorkerExecutor):
+	"""
+		Shares the fault times between a number of worker processes, each of which runs the fault study in its own
+		PSSE session, and combines the results.  The worker is pluggable so that a different backend can be used.
+	"""
+	def split_fault_times(self, fault_times):
+		"""
+			Shares the fault times between the worker processes
+		:param list fault_times:  Fault times to study
+		:return list groups:  List of fault times for each worker
+		"""
+		number_of_groups = min(self.processes, len(fault_times))
+		return [fault_times[i::number_of_groups] for i in range(number_of_groups)]
+
+	def run(self, fault_times, study, buses=list(), **kwargs):
+		"""
+			Runs the fault study for all of the fault times and combines the results
+		:param list fault_times:  Fault times to study
+		:param str study:  Type of fault study from constants.GUI.fault_types
+		:param list buses: (optional) - Busbars to fault, if empty then all busbars are faulted
+		:param kwargs:  Any additional values needed by the worker
+		:return (pd.DataFrame, list) (df, unreliable_buses):  Combined results with the fault time as the first level
+							of the columns and the busbars with unreliable results reported by any of the workers
+		"""
+		tasks = list()
+		for group in self.split_fault_times(fault_times=fault_times):
+			task = dict(pth_sav=self.pth_sav, study=study, fault_times=group, buses=list(buses))
+			task.update(kwargs)
+			tasks.append(task)
+
+		self.logger.info(
+			'{} fault study for {} fault times shared between {} worker processes'.format(
+				study, len(fault_times), len(tasks)
+			)
+		)
+		results = self.map(tasks=tasks)
+
+		# Combine the results from each worker back into the original fault time order
+		dfs = dict()
+		unreliable_buses = list()
+		for df, worker_unreliable_buses in results:
+			for fault_time in df.columns.get_level_values(0).unique():
+				dfs[fault_time] = df[fault_time]
+			unreliable_buses.extend(worker_unreliable_buses)
+
+		df = pd.concat([dfs[fault_time] for fault_time in fault_times], axis=1, keys=fault_times)
+		return df, unreliable_buses
+
+
+class BusPartitionScheduler(WorkerExecutor):
+	"""
+		Splits the busbars into balanced shards, each of which is faulted for all of the fault times in a separate
+		worker process with its own bus subsystem, and merges the results back together in busbar order.  Used in the
+		same way as FaultTimeExecutor.
+	"""
+	def __init__(
+			self, pth_sav, processes=constants.Parallel.processes, worker=psse_fault_time_worker,
+			retries=constants.Parallel.retries, shards=None, initialiser=None, pth_logs=None
+	):
+		"""
+		:param str pth_sav:  SAV case that each worker loads, must already include any changes needed for the study
+		:param int processes: (optional) - Maximum number of worker processes
+		:param worker: (optional) - Function that takes a task dictionary and returns the combined results for the
+							busbars in the task and those with unreliable results
+		:param int retries: (optional) - Number of times a failed shard is retried
+		:param int shards: (optional=None) - Number of shards to split the busbars into, if None then based on
+							constants.Parallel.shards_per_process.  More shards means less rerun if a shard fails.
+		:param initialiser: (optional=None) - Function run when each worker process starts, see WorkerExecutor
+		:param str pth_logs: (optional=None) - Folder for the log files of each worker process, see WorkerExecutor
+		"""
+		WorkerExecutor.__init__(
+			self, pth_sav=pth_sav, processes=processes, worker=worker, retries=retries, initialiser=initialiser,
+			pth_logs=pth_logs
+		)
+		if shards is None:
+			shards = self.processes * constants.Parallel.shards_per_process
+		self.shards = max(1, int(shards))
+
+	def split_buses(self, buses):
+		"""
+			Splits the busbars into shards of (as near as possible) equal size keeping them in order
+		:param list buses:  Busbars to fault
+		:return list shards:  List of busbars in each shard
+		"""
+		number_of_shards = min(self.shards, len(buses))
+		return [shard.tolist() for shard in np.array_split(np.array(buses), number_of_shards)]
+
+	@staticmethod
+	def all_buses():
+		"""
+			Returns all of the busbars in the SAV case loaded in PSSE
+		:return list buses:
+		"""
+		bus_data = psse.BusData()
+		return bus_data.df[bus_data.c.bus].astype(int).tolist()
+
+	def run(self, fault_times, study, buses=list(), **kwargs):
+		"""
+			Runs the fault study for all of the busbars and combines the results
+		:param list fault_times:  Fault times to study
+		:param str study:  Type of fault study from constants.GUI.fault_types
+		:param list buses: (optional) - Busbars to fault, if empty then all busbars are faulted
+		:param kwargs:  Any additional values needed by the worker
+		:return (pd.DataFrame, list) (df, unreliable_buses):  Combined results with the fault time as the first level
+							of the columns and the busbars with unreliable results reported by any of the shards
+		"""
+		if not buses:
+			buses = self.all_buses()
+		buses = pd.Index(buses).unique().tolist()
+
+		tasks = list()
+		for shard in self.split_buses(buses=buses):
+			task = dict(pth_sav=self.pth_sav, study=study, fault_times=list(fault_times), buses=shard)
+			task.update(kwargs)
+			tasks.append(task)
+
+		self.logger.info(
+			'{} fault study for {} busbars split into {} shards run in up to {} worker processes'.format(
+				study, len(buses), len(tasks), self.processes
+			)
+		)
+		results = self.map(tasks=tasks)
+
+		# Merge the shards back into busbar order
+		df = pd.concat([df for df, _ in results], axis=0)
+		unreliable_buses = [bus for _, shard_unreliable_buses in results for bus in shard_unreliable_buses]
+		return df.reindex(buses), unreliable_buses
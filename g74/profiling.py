@@ -0,0 +1,157 @@
+"""
+#######################################################################################################################
+###											PSSE G74 Fault Studies													###
+###		Optional profiling of a complete fault study, writes cProfile stats and a collapsed stack flamegraph file	###
+###																													###
+###		Code developed by David Mills (david.mills@PSCconsulting.com, +44 7899 984158) as part of PSC 		 		###
+###		project JK7938 - SHEPD - studies and automation																###
+###																													###
+#######################################################################################################################
+"""
+
+import os
+import sys
+import time
+import pstats
+import logging
+import cProfile
+import StringIO
+import threading
+import collections
+
+import g74.constants as constants
+
+
+def profiling_enabled(gui_setting=False):
+	"""
+		Determines whether the fault study should be profiled
+	:param bool gui_setting: (optional=False) - Setting selected in the GUI
+	:return bool enabled:  True if selected in the GUI or the environment variable in constants.Profiling is set
+	"""
+	value = os.environ.get(constants.Profiling.env_var, str())
+	return bool(gui_setting) or value.strip().lower() in constants.Profiling.env_enabled
+
+
+class StackSampler:
+	"""
+		Samples the call stack of a thread at a fixed interval from a separate thread and counts each unique stack so
+		they can be written in the collapsed format used by flamegraph.pl and speedscope
+	"""
+	def __init__(self, thread_id=None, interval=constants.Profiling.sample_interval):
+		"""
+		:param int thread_id: (optional=None) - Thread to sample, if None then the thread creating the sampler
+		:param float interval: (optional) - Time in seconds between samples
+		"""
+		self.thread_id = thread_id if thread_id is not None else threading.current_thread().ident
+		self.interval = interval
+		self.stacks = collections.Counter()
+		self._stop = threading.Event()
+		self._thread = None
+
+	@staticmethod
+	def frame_label(frame):
+		"""
+			Returns the label used for a frame in the collapsed stacks
+		:param frame:
+		:return str label:  module:function:line
+		"""
+		code = frame.f_code
+		return '{}:{}:{}'.format(os.path.basename(code.co_filename), code.co_name, code.co_firstlineno)
+
+	def sample(self):
+		"""
+			Records the current stack of the sampled thread
+		:return None:
+		"""
+		frame = sys._current_frames().get(self.thread_id)
+		labels = list()
+		while frame is not None:
+			labels.append(self.frame_label(frame))
+			frame = frame.f_back
+		if labels:
+			self.stacks[';'.join(reversed(labels))] += 1
+		return None
+
+	def run(self):
+		"""
+			Samples until stopped
+		:return None:
+		"""
+		while not self._stop.wait(self.interval):
+			self.sample()
+
+	def start(self):
+		"""
+			Starts sampling in a background thread
+		:return None:
+		"""
+		self._stop.clear()
+		self._thread = threading.Thread(target=self.run, name='G74StackSampler')
+		self._thread.daemon = True
+		self._thread.start()
+
+	def stop(self):
+		"""
+			Stops sampling and waits for the background thread to finish
+		:return None:
+		"""
+		self._stop.set()
+		if self._thread is not None:
+			self._thread.join()
+			self._thread = None
+
+	def write_collapsed(self, pth):
+		"""
+			Writes the stacks in the collapsed format, one line per unique stack followed by the number of samples
+		:param str pth:  Full path to the file to write
+		:return str pth:
+		"""
+		with open(pth, 'w') as f:
+			for stack, count in sorted(self.stacks.items()):
+				f.write('{} {}\n'.format(stack, count))
+		return pth
+
+
+def profile_call(func, pth_folder, uid, *args, **kwargs):
+	"""
+		Runs a function with cProfile and a stack sampler and writes the cProfile stats and the collapsed stacks to
+		files next to the log files.  Only used when profiling is enabled so there is no overhead otherwise.
+	:param func:  Function to profile, for example Fault_Calculations.fault_study
+	:param str pth_folder:  Folder to write the profile files to
+	:param str uid:  Unique identifier for the study, used in the file names
+	:param args:  Arguments for the function
+	:param kwargs:  Keyword arguments for the function
+	:return (result, str, str) (result, pth_stats, pth_collapsed):  Value returned by the function and the paths
+								to the cProfile stats and collapsed stacks
+	"""
+	c = constants.Profiling
+	logger = logging.getLogger(constants.Logging.logger_name)
+	pth_stats = os.path.join(pth_folder, '{}{}'.format(uid, c.stats_suffix))
+	pth_collapsed = os.path.join(pth_folder, '{}{}'.format(uid, c.collapsed_suffix))
+
+	logger.info('Profiling of {} enabled, this will slow down the study'.format(func.__name__))
+	profiler = cProfile.Profile()
+	sampler = StackSampler()
+	t0 = time.time()
+	sampler.start()
+	profiler.enable()
+	try:
+		result = func(*args, **kwargs)
+	finally:
+		profiler.disable()
+		sampler.stop()
+		# Profile results are written even if the study fails since these are the cases that need diagnosing
+		profiler.dump_stats(pth_stats)
+		sampler.write_collapsed(pth=pth_collapsed)
+
+		summary = StringIO.StringIO()
+		pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(c.top_functions)
+		logger.debug('Functions with the most cumulative time:\n{}'.format(summary.getvalue()))
+		logger.info(
+			(
+				'Profile of {} ({:.2f} seconds, {} stack samples) written to {} and collapsed stacks for a flamegraph '
+				'written to {}'
+			).format(func.__name__, time.time() - t0, sum(sampler.stacks.values()), pth_stats, pth_collapsed)
+		)
+
+	return result, pth_stats, pth_collapsed
@@ -11,6 +11,7 @@
 
 # Project specific imports
 import g74.constants as constants
+import g74.instrumentation as instrumentation
 
 # Generic python package imports
 import sys
@@ -21,6 +22,8 @@ import numpy as np
 import math
 import time
 import re
+import mmap
+import collections
 
 # Version of PSSE that will be initialised
 DEFAULT_PSSE_VERSION = 33
@@ -28,6 +31,29 @@ DEFAULT_PSSE_VERSION = 33
 # TODO: Report error for busbars which do not actually exist in model
 
 
+def set_backend(psspy_module, pssarrays_module=None, sliderpy_module=None):
+	"""
+		Sets the modules used for all calls to the PSSE API rather than importing them from the PSSE installation with
+		InitialisePsspy.  Allows a stand in for PSSE (for example g74.mock_psse) to be used for testing and
+		benchmarking without a PSSE installation.  Calls to the psspy and pssarrays functions are counted by
+		g74.instrumentation in the same way as for PSSE.
+	:param psspy_module:  Object providing the psspy functions
+	:param pssarrays_module: (optional=None) - Object providing the pssarrays functions
+	:param sliderpy_module: (optional=None) - Object providing the sliderPy functions
+	:return None:
+	"""
+	global psspy
+	global pssarrays
+	global sliderPy
+	psspy = instrumentation.ApiCounter(module=psspy_module, prefix='psspy')
+	pssarrays = None if pssarrays_module is None else instrumentation.ApiCounter(
+		module=pssarrays_module, prefix='pssarrays'
+	)
+	sliderPy = sliderpy_module
+
+	return None
+
+
 def extract_values(line, expected_length=0):
 	"""
 		Extract values from line and if can be converted to a float return as list
@@ -119,6 +145,8 @@ class InitialisePsspy:
 			import redirect
 			psspy = reload(psspy)
 			redirect = reload(redirect)
+			# Every call to the PSSE API is counted and timed
+			psspy = instrumentation.ApiCounter(module=psspy, prefix='psspy')
 			self.psspy = psspy
 
 		except ImportError:
@@ -136,6 +164,7 @@ class InitialisePsspy:
 			# Import pssarrays used for data extraction from PSSE
 			import pssarrays
 			pssarrays = reload(pssarrays)
+			pssarrays = instrumentation.ApiCounter(module=pssarrays, prefix='pssarrays')
 			self.pssarrays = pssarrays
 		except ImportError:
 			self.pssarrays = None
@@ -491,7 +520,7 @@ class MachineData:
 		ierr_real, rarray = func_real(
 			sid=self.sid,
 			flag=self.flag,
-			string=(self.c.rpos, self.c.xsubtr, self.c.xtrans, self.c.xsynch))
+			string=(self.c.rpos, self.c.xsubtr, self.c.xtrans, self.c.xsynch, self.c.mbase))
 		ierr_cplx, xarray = func_cplx(
 			sid=self.sid,
 			flag=self.flag,
@@ -515,7 +544,8 @@ class MachineData:
 		# Column headers initially in same order as data but then reordered to something more useful for exporting
 		# in case needed
 		initial_columns = [
-			self.c.bus, self.c.rpos, self.c.xsubtr, self.c.xtrans, self.c.xsynch, self.c.zsource, self.c.identifier
+			self.c.bus, self.c.rpos, self.c.xsubtr, self.c.xtrans, self.c.xsynch, self.c.mbase, self.c.zsource,
+			self.c.identifier
 		]
 
 		# Transposed so columns in correct location and then columns reordered to something more suitable
@@ -662,6 +692,96 @@ class MachineData:
 		return None
 
 
+class BranchData:
+	"""
+		Class will contain the impedance data for all non-transformer branches and two winding transformers.  Three
+		winding transformers are not included (see three_winding_count) and only the impedance of the two winding
+		transformers is included, their off-nominal tap ratio and phase shift are not.
+	"""
+	def __init__(self, flag=1, sid=-1):
+		"""
+		:param int flag: (optional=1) - Only in-service branches are returned
+		:param int sid:
+		"""
+		self.sid = sid
+		self.flag = flag
+		self.logger = logging.getLogger(constants.Logging.logger_name)
+
+		self.c = constants.Branches
+
+		self.df = pd.DataFrame()
+		self.update()
+
+	def update(self):
+		"""
+			Update DataFrame with the branch and transformer impedances
+		:return None:
+		"""
+		# Declare functions
+		func_brn_int = psspy.abrnint
+		func_brn_cplx = psspy.abrncplx
+		func_brn_real = psspy.abrnreal
+		func_trn_int = psspy.atrnint
+		func_trn_cplx = psspy.atrncplx
+
+		# Retrieve data from PSSE, entry=1 returns each branch once
+		ierr_brn_int, brn_iarray = func_brn_int(
+			sid=self.sid, flag=self.flag, entry=1, string=(self.c.from_bus, self.c.to_bus, self.c.status))
+		ierr_brn_cplx, brn_xarray = func_brn_cplx(sid=self.sid, flag=self.flag, entry=1, string=(self.c.rx, ))
+		ierr_brn_real, brn_rarray = func_brn_real(sid=self.sid, flag=self.flag, entry=1, string=(self.c.charging, ))
+		ierr_trn_int, trn_iarray = func_trn_int(
+			sid=self.sid, flag=self.flag, entry=1, string=(self.c.from_bus, self.c.to_bus, self.c.status))
+		ierr_trn_cplx, trn_xarray = func_trn_cplx(
+			sid=self.sid, flag=self.flag, entry=1, string=(self.c.rx_transformer, ))
+
+		ierrs = (ierr_brn_int, ierr_brn_cplx, ierr_brn_real, ierr_trn_int, ierr_trn_cplx)
+		if sum(ierrs) > 0:
+			funcs = (func_brn_int, func_brn_cplx, func_brn_real, func_trn_int, func_trn_cplx)
+			self.logger.critical(
+				(
+					'Unable to retrieve the branch data from the SAV case and PSSE returned the following error codes '
+					'{} from the functions {}'
+				).format(ierrs, ['<{}>'.format(func.__name__) for func in funcs])
+			)
+			raise SyntaxError('Error importing data from PSSE SAV case')
+
+		# Transformers have no line charging
+		initial_columns = [self.c.from_bus, self.c.to_bus, self.c.status, self.c.rx, self.c.charging]
+		df_branches = pd.DataFrame(brn_iarray + brn_xarray + brn_rarray).transpose()
+		df_branches.columns = initial_columns
+		df_transformers = pd.DataFrame(trn_iarray + trn_xarray).transpose()
+		df_transformers.columns = initial_columns[:-1]
+		df_transformers[self.c.charging] = 0.0
+
+		df = pd.concat([df_branches, df_transformers], axis=0, ignore_index=True)
+
+		# Split out impedance into R and X
+		z = df[self.c.rx].astype(complex)
+		df[self.c.r] = z.values.real
+		df[self.c.x] = z.values.imag
+
+		self.df = df
+
+		return None
+
+	def three_winding_count(self):
+		"""
+			Returns the number of three winding transformers in the SAV case, these are not included in the branch data
+		:return int number:
+		"""
+		func_count = psspy.atr3count
+		ierr_count, number = func_count(sid=self.sid, owner=1, ties=1, flag=self.flag, entry=1)
+		if ierr_count > 0:
+			self.logger.critical(
+				(
+					'Unable to retrieve the number of three winding transformers in the PSSE SAV case and the '
+					'following error codes {} from the functions <{}>'
+				).format(ierr_count, func_count.__name__)
+			)
+			raise SyntaxError('Error importing data from PSSE SAV case')
+		return number
+
+
 class PsseControl:
 	"""
 		Class to obtain and store the PSSE data
@@ -673,6 +793,10 @@ class PsseControl:
 		self.sid = sid
 		self.areas = areas
 
+		# Busbars in each bus subsystem that has been defined (along with the SID actually used) so that a subsystem
+		# is not defined again for the same busbars, cleared whenever a SAV case is loaded
+		self.subsystems = dict()
+
 		# Status flag for whether SAV case is converted or not
 		self.converted = False
 
@@ -788,6 +912,7 @@ class PsseControl:
 		self.set_outputs()
 
 		self.converted = False
+		self.subsystems = dict()
 
 		return None
 
@@ -1149,6 +1274,7 @@ class PsseControl:
 		"""
 		# PSSE functions
 		func_subsys_init = psspy.bsysinit
+		func_subsys_bulk = psspy.bsys
 		func_subsys_add = psspy.bsyso
 
 		num_buses = len(buses)
@@ -1163,6 +1289,18 @@ class PsseControl:
 			)
 			return self.sid
 
+		# Subsystem has already been defined for these busbars since the SAV case was loaded, e.g. for an IEC study
+		# where the busbars with the same pre-fault voltage are faulted for each fault time.  A BKDY study followed by
+		# an IEC study still defines the subsystem again since the SAV case is reloaded in between.
+		bus_set = frozenset(buses)
+		requested_sid = sid
+		if requested_sid in self.subsystems and self.subsystems[requested_sid][0] == bus_set:
+			self.sid = self.subsystems[requested_sid][1]
+			self.logger.debug(
+				'Bus subsystem with SID = {} already defined for the {} busbars'.format(self.sid, num_buses)
+			)
+			return self.sid
+
 		# Initialise desired bus subsystem
 		ierr_init = func_subsys_init(sid=sid)
 		if ierr_init == 1:
@@ -1187,22 +1325,40 @@ class PsseControl:
 				self.logger.critical('{}\n{}'.format(msg0, msg1))
 				raise ValueError('Not possible to define subsystem')
 
-		# Loop through each bus and add to bus subsystem
-		# Seems to produce an error if done via the sub-system definition method
-		for bus in buses:
-			ierr = func_subsys_add(sid=sid, busnum=bus)
-			if ierr == 0:
-				self.logger.debug('Busbar {} added to bus subsystem with SID = {}'.format(bus, sid))
-			else:
-				self.logger.critical(
-					(
-						'Unable to add busbar {} to subsystem with SID = {} and function '
-						'<{}> returned the following error code {}'
-					).format(bus, sid, func_subsys_add.__name__, ierr)
-				)
-				raise ValueError('Unable to add busbar to subsystem')
+		# All busbars are added with a single call and only if that fails are they added one at a time so that the
+		# busbar causing the error can be reported
+		ierr_bulk = func_subsys_bulk(
+			sid=sid, usekv=0, basekv=[0.0, 0.0], numarea=0, areas=[], numbus=num_buses, buses=list(buses),
+			numowner=0, owners=[], numzone=0, zones=[]
+		)
+		if ierr_bulk == 0:
+			self.logger.debug('{} busbars added to bus subsystem with SID = {}'.format(num_buses, sid))
+		else:
+			self.logger.warning(
+				(
+					'Unable to define the bus subsystem with SID = {} in a single call and function <{}> returned the '
+					'error code {}, busbars will instead be added one at a time'
+				).format(sid, func_subsys_bulk.__name__, ierr_bulk)
+			)
+			# Clear anything partially added
+			func_subsys_init(sid=sid)
+
+			for bus in buses:
+				ierr = func_subsys_add(sid=sid, busnum=bus)
+				if ierr > 0:
+					self.logger.critical(
+						(
+							'Unable to add busbar {} to subsystem with SID = {} and function '
+							'<{}> returned the following error code {}'
+						).format(bus, sid, func_subsys_add.__name__, ierr)
+					)
+					raise ValueError('Unable to add busbar to subsystem')
+			self.logger.debug('{} busbars added individually to bus subsystem with SID = {}'.format(num_buses, sid))
 
 		self.sid = sid
+		# Any other subsystem previously defined using this SID has now been replaced
+		self.subsystems = dict((k, v) for k, v in self.subsystems.items() if v[1] != sid)
+		self.subsystems[requested_sid] = (bus_set, sid)
 
 		return sid
 
@@ -1288,18 +1444,39 @@ class BkdyFaultStudy:
 	"""
 		Class that contains all the routines necessary for the BKDY fault study method
 	"""
-	def __init__(self, psse_control):
+	def __init__(self, psse_control, streaming=False, output_folder=None, engine=constants.ShortCircuit.engine):
 		"""
 			Function deals with the processing of all the routines necessary to calculate the fault currents using
 			the BKDY method
 		:param PsseControl psse_control:  Handle to PSSE for running of studies
+		:param bool streaming: (optional=False) - If set to True then the BKDY reports are streamed into the combined
+								results in chunks rather than each being processed in full
+		:param str output_folder: (optional=None) - Folder for the BKDY output files, if None then the script folder
+								is used
+		:param str engine: (optional) - Engine from constants.ShortCircuit.engines used to calculate the fault
+								currents, if the native engine then the native short circuit solver is used rather
+								than BKDY and the results differ as detailed in
+								constants.ShortCircuit.native_engine_note
 		"""
+		self.logger = logging.getLogger(constants.Logging.logger_name)
+		if engine not in constants.ShortCircuit.engines:
+			self.logger.critical(
+				'The fault study engine {} is not one of the available engines: {}'.format(
+					engine, ', '.join(constants.ShortCircuit.engines)
+				)
+			)
+			raise ValueError('Unknown fault study engine {}'.format(engine))
+
 		self.psse = psse_control
+		self.streaming = streaming
+		self.output_folder = output_folder
+		self.engine = engine
 		# Subsystem used for selecting all the busbars
 		self.sid = 1
 		self.all_buses = 1
+		# Busbars to be faulted, if empty then all busbars are faulted
+		self.buses = list()
 
-		self.logger = logging.getLogger(constants.Logging.logger_name)
 		self.breaker_duty_file = str()
 		# Dictionary created to relate output names to files
 		self.bkdy_files = dict()
@@ -1418,30 +1595,36 @@ class BkdyFaultStudy:
 		# Associate this file with the BkdyFile class
 		self.bkdy_files[name] = BkdyFile(output_file=output_file, fault_time=fault_time)
 
-	def combine_bkdy_output(self, delete=True):
+	def combine_bkdy_output(self, delete=True, columns=constants.BkdyFileOutput.record_columns):
 		"""
 			Combines output from bkdy files.
 			The particular results that are exported are based on the values detailed in constants.SHEPD.results which
 			relate to the name of each result file.  If they cannot be found then all results are exported with the
 			particular name appended to each of the headings.
 		:param bool delete: (optional=True) - Will delete the original bkdy output files
+		:param tuple columns: (optional) - If streaming then only these columns are retained in the combined results
 		:return pd.DataFrame() self.df_combined_results:  DataFrame of the combined results ready for excel export
 		"""
-		# Empty dictionary that will be populated with DataFrames as they are processed
-		dfs = dict()
-		# Loops through each of the results and processes the files
-		for fault_time, bkdy_file in self.bkdy_files.iteritems():
-			self.logger.debug(
-				'Processing the BKDY results for fault named: {} and stored in: {}'.format(fault_time, bkdy_file)
-			)
-			# Extract all data from file and delete file since no longer needed
-			df = bkdy_file.process_bkdy_output(delete=delete)
-			# #name = '{} {}'.format(fault_time, constants.SHEPD.time_units)
-			dfs[fault_time] = df
+		if self.streaming:
+			self.df_combined_results = self.stream_bkdy_output(delete=delete, columns=columns)
+		else:
+			# Empty dictionary that will be populated with DataFrames as they are processed
+			dfs = dict()
+			# Loops through each of the results and processes the files, files are removed once processed in the same
+			# way as when streaming so a later study does not process them again
+			for fault_time in list(self.bkdy_files.keys()):
+				bkdy_file = self.bkdy_files.pop(fault_time)
+				self.logger.debug(
+					'Processing the BKDY results for fault named: {} and stored in: {}'.format(fault_time, bkdy_file)
+				)
+				# Extract all data from file and delete file since no longer needed
+				df = bkdy_file.process_bkdy_output(delete=delete)
+				# #name = '{} {}'.format(fault_time, constants.SHEPD.time_units)
+				dfs[fault_time] = df
 
-		# Combine results into a single DataFrame with an additional level to identify the fault by name.
-		# Subsequent data extraction then deals with processing the relevant data
-		self.df_combined_results = pd.concat(dfs.values(), axis=1, keys=dfs.keys())
+			# Combine results into a single DataFrame with an additional level to identify the fault by name.
+			# Subsequent data extraction then deals with processing the relevant data
+			self.df_combined_results = pd.concat(dfs.values(), axis=1, keys=dfs.keys())
 
 		# Check for any negative R and X values and report busbars which have these values
 		df_negative_impedance = self.df_combined_results[
@@ -1460,7 +1643,31 @@ class BkdyFaultStudy:
 
 		return self.df_combined_results
 
-	def calculate_fault_currents(self, fault_times, g74_infeed, buses=list(), delete=True):
+	def stream_bkdy_output(self, delete=True, columns=constants.BkdyFileOutput.record_columns):
+		"""
+			Streams the records from each of the bkdy files into a single DataFrame.  Each file is read in chunks which
+			are folded into the combined results as they are read, so the complete BKDY reports are never held in memory
+			and only the retained columns are kept for each fault time.
+		:param bool delete: (optional=True) - Will delete the original bkdy output files once they have been read
+		:param tuple columns: (optional) - Columns to retain in the combined results
+		:return pd.DataFrame df:  DataFrame of the combined results
+		"""
+		combiner = BkdyResultCombiner(columns=columns, fault_times=list(self.bkdy_files.keys()))
+		for fault_time in list(self.bkdy_files.keys()):
+			bkdy_file = self.bkdy_files.pop(fault_time)
+			self.logger.debug(
+				'Streaming the BKDY results for fault named: {} and stored in: {}'.format(fault_time, bkdy_file.output_file)
+			)
+			combiner.add_records(
+				fault_time=fault_time,
+				records=bkdy_file.iter_bkdy_records(chunk_size=constants.BkdyFileOutput.chunk_size, delete=delete)
+			)
+
+		return combiner.combine()
+
+	def calculate_fault_currents(
+			self, fault_times, g74_infeed, buses=list(), delete=True, executor=None, cache=None, incremental=None
+	):
 		"""
 			Function calculates the fault currents at every busbar listed taking into consideration
 			that the DC component and peak make has to be calculated based on t=0 and only the RMS
@@ -1472,12 +1679,14 @@ class BkdyFaultStudy:
 		:param G74FaultInfeed() g74_infeed:  Reference to the g74 handle so that machine parameters can be updated
 		:param list buses: (optional) List of busbars to be faulted if empty list then all busbars faulted
 		:param bool delete: (optional=True) - Will delete the original bkdy output files
-		:return None:
+		:param g74.parallel.FaultTimeExecutor executor: (optional=None) - If provided then the fault times are shared
+								between separate PSSE worker processes rather than run in this PSSE session
+		:param g74.cache.ResultCache cache: (optional=None) - If provided then the results are returned from the cache
+								if this study has already been run for the SAV case and stored in it otherwise
+		:param g74.incremental.IncrementalStudy incremental: (optional=None) - If provided then only the busbars
+								affected by changes since the previous study are faulted
+		:return pd.DataFrame df:
 		"""
-		# Fault current calculation to determine Ik'', peak make and DC decrement
-		# Calculate the fault impedance values for the initial time of 0.0
-		g74_infeed.calculate_machine_impedance(fault_time=0.0, update=True)
-
 		# Initial fault must be carried out at 0.0 ms to get peak and Ik'' value
 		if constants.G74.min_fault_time not in fault_times:
 			fault_times.append(constants.G74.min_fault_time)
@@ -1502,18 +1711,76 @@ class BkdyFaultStudy:
 		# Sort list of times into ascending order
 		fault_times.sort()
 
-		# Produce name of results files for initial run
-		# TODO: Change this to use the temporary folder rather than script folder (same folder as BKDY and log file outputs)
-		current_script_path = os.path.dirname(os.path.realpath(__file__))
-		initial_fault_files = [
-			os.path.join(current_script_path, 'fault_ik_init{:.5f}{}'.format(x, constants.General.ext_csv))
-			for x in fault_times
-		]
-		ac_decrement_files = [
-			os.path.join(current_script_path, 'fault_ik_decr{:.5f}{}'.format(x, constants.General.ext_csv))
-			for x in fault_times
-		]
+		if cache is not None:
+			key = cache.key(buses=buses, fault_times=fault_times, study=constants.GUI.bkdy_3ph, engine=self.engine)
+			with instrumentation.span(constants.Instrumentation.span_cache):
+				cached = cache.get(key=key)
+			if cached is not None:
+				df, metadata = cached
+				self.unreliable_faulted_buses.extend(metadata.get('unreliable_faulted_buses', list()))
+				return df
+		else:
+			key = None
 
+		if incremental is None:
+			df = self.run_fault_currents(
+				fault_times=fault_times, g74_infeed=g74_infeed, buses=buses, delete=delete, executor=executor
+			)
+		else:
+			incremental_key, requested, to_fault, df_previous = incremental.plan(
+				buses=buses, fault_times=fault_times, study=constants.GUI.bkdy_3ph, engine=self.engine
+			)
+			if df_previous is None or to_fault:
+				df_new = self.run_fault_currents(
+					fault_times=fault_times, g74_infeed=g74_infeed, buses=to_fault, delete=delete, executor=executor
+				)
+			else:
+				df_new = None
+			df = incremental.merge(key=incremental_key, requested=requested, df_previous=df_previous, df_new=df_new)
+
+		if cache is not None:
+			with instrumentation.span(constants.Instrumentation.span_cache):
+				cache.put(
+					key=key, df=df, metadata={'unreliable_faulted_buses': list(self.unreliable_faulted_buses)}
+				)
+		return df
+
+	def run_fault_currents(self, fault_times, g74_infeed, buses, delete=True, executor=None):
+		"""
+			Runs the fault study for the busbars and processes the results
+		:param list fault_times:  List of the fault times that should be considered (already sorted)
+		:param G74FaultInfeed() g74_infeed:  Reference to the g74 handle so that machine parameters can be updated
+		:param list buses:  List of busbars to be faulted if empty list then all busbars faulted
+		:param bool delete: (optional=True) - Will delete the original bkdy output files
+		:param g74.parallel.FaultTimeExecutor executor: (optional=None) - If provided then the fault times are shared
+								between separate PSSE worker processes rather than run in this PSSE session
+		:return pd.DataFrame df:
+		"""
+		if executor is None:
+			self.define_faulted_buses(buses=buses)
+			df = self.study_fault_times(
+				fault_times=fault_times, g74_infeed=g74_infeed, delete=delete, output_folder=self.output_folder
+			)
+		else:
+			df, unreliable_buses = executor.run(
+				fault_times=fault_times, study=constants.GUI.bkdy_3ph, buses=buses,
+				breaker_duty_file=self.breaker_duty_file, engine=self.engine
+			)
+			# Busbars with a negative fault impedance are only found by the workers
+			self.unreliable_faulted_buses.extend(unreliable_buses)
+
+		with instrumentation.span(constants.Instrumentation.span_post_processing):
+			df = self.process_combined_results(df)
+			df = self.add_busbar_data(df)
+		return df
+
+	def define_faulted_buses(self, buses):
+		"""
+			Defines the bus subsystem for the busbars to be faulted
+		:param list buses:  List of busbars to be faulted if empty list then all busbars faulted
+		:return None:
+		"""
+		self.buses = list(buses)
 		# Define bus subsystem based on buses
 		if buses:
 			self.psse.define_bus_subsystem(buses=buses)
@@ -1524,49 +1791,117 @@ class BkdyFaultStudy:
 			self.logger.info('No busbars defined and so all busbars will be faulted')
 			self.all_buses = 1
 
+	def study_fault_times(self, fault_times, g74_infeed, delete=True, output_folder=None):
+		"""
+			Runs the BKDY fault study for each fault time, initially with the machines initialised for 0.0 seconds to
+			determine Ik'', the peak make and DC decay and then with the machine parameters recalculated for each fault
+			time to determine the symmetrical break current.
+		:param list fault_times:  List of the fault times that should be considered
+		:param G74FaultInfeed() g74_infeed:  Reference to the g74 handle so that machine parameters can be updated
+		:param bool delete: (optional=True) - Will delete the original bkdy output files
+		:param str output_folder: (optional=None) - Folder for the BKDY output files, if None then the script folder
+								is used
+		:return pd.DataFrame df:  Combined results for each fault time before processing
+		"""
+		if self.engine == constants.ShortCircuit.engine_native:
+			return self.native_fault_times(fault_times=fault_times)
+
+		c = constants.Instrumentation
+		# Fault current calculation to determine Ik'', peak make and DC decrement
+		# Calculate the fault impedance values for the initial time of 0.0
+		with instrumentation.span(c.span_machine_impedance, fault_time=0.0):
+			g74_infeed.calculate_machine_impedance(fault_time=0.0, update=True)
+
+		# Produce name of results files for initial run
+		# TODO: Change this to use the temporary folder rather than script folder (same folder as BKDY and log file outputs)
+		if output_folder is None:
+			output_folder = os.path.dirname(os.path.realpath(__file__))
+		initial_fault_files = [
+			os.path.join(output_folder, 'fault_ik_init{:.5f}{}'.format(x, constants.General.ext_csv))
+			for x in fault_times
+		]
+		ac_decrement_files = [
+			os.path.join(output_folder, 'fault_ik_decr{:.5f}{}'.format(x, constants.General.ext_csv))
+			for x in fault_times
+		]
+
 		# Loop through fault current studies producing fault files initially for ik'' and DC component decay
 		for fault, file_path in zip(fault_times, initial_fault_files):
 			# Run fault study for this result
 			# Fault is given name value for subsequent processing
-			_t = time.time()
 			self.logger.info(
 				'Calculating fault current {:.2f} after fault application to determine DC decay'.format(fault)
 			)
-			self.main(name=fault, output_file=file_path, fault_time=fault)
-			self.logger.info(
-				'Fault currents {:.2f} seconds after application completed in {:.2f} seconds'.format(fault, time.time()-_t)
-			)
+			with instrumentation.span(c.span_bkdy, fault_time=fault, stage='initial'):
+				self.main(name=fault, output_file=file_path, fault_time=fault)
 
 		# Process results from initial fault into a DataFrame and delete if necessary
-		df = self.combine_bkdy_output(delete=delete)
+		with instrumentation.span(c.span_combine, stage='initial'):
+			df = self.combine_bkdy_output(delete=delete)
+
+		# Where the machine values are the same as for the initial fault (i.e. at 0.0 seconds) the initial study has
+		# already determined the symmetrical break current and so it is not repeated
+		initial_reactance = g74_infeed.reactance_at_fault_time(fault_time=constants.G74.min_fault_time)
+		decrement_faults = [
+			(fault, file_path) for fault, file_path in zip(fault_times, ac_decrement_files)
+			if g74_infeed.reactance_at_fault_time(fault_time=fault) != initial_reactance
+		]
+		if not decrement_faults:
+			return df
 
 		# Loop through fault current studies producing fault files initially for ik(t)
-		for fault, file_path in zip(fault_times, ac_decrement_files):
+		for fault, file_path in decrement_faults:
 			# Recalculate machine parameters based on fault time
-			g74_infeed.calculate_machine_impedance(fault_time=fault, update=True)
+			with instrumentation.span(c.span_machine_impedance, fault_time=fault):
+				g74_infeed.calculate_machine_impedance(fault_time=fault, update=True)
 			# TODO: Make this capable as part of debugging for every fault time
 			# Run fault study for this result
-			_t = time.time()
 			self.logger.info(
 				(
 					'Calculating fault current {:.2f} after fault application to determine reduced AC component'
 				).format(fault)
 			)
-			self.main(name=fault, output_file=file_path, fault_time=fault)
-			self.logger.info(
-				(
-					'Fault currents {:.2f} seconds after application completed in {:.2f} seconds'
-				).format(fault, time.time() - _t)
+			with instrumentation.span(c.span_bkdy, fault_time=fault, stage='decrement'):
+				self.main(name=fault, output_file=file_path, fault_time=fault)
+
+		# Process results from ik(t) fault into a DataFrame and delete results files if necessary, only the
+		# symmetrical break current is needed from these results
+		with instrumentation.span(c.span_combine, stage='decrement'):
+			df_decr = self.combine_bkdy_output(
+				delete=delete, columns=(constants.BkdyFileOutput.ibsym, constants.BkdyFileOutput.x)
 			)
 
-		# Process results from ik(t) fault into a DataFrame and delete results files if necessary
-		df_decr = self.combine_bkdy_output(delete=delete)
-
 		# Update ik(t) values in initial calculation with values from second DataFrame
 		df.update(df_decr.xs(constants.BkdyFileOutput.ibsym, axis=1, level=1, drop_level=False))
 
-		df = self.process_combined_results(df)
-		df = self.add_busbar_data(df)
+		return df
+
+	def native_fault_times(self, fault_times):
+		"""
+			Calculates the fault currents for each fault time with the native short circuit solver rather than BKDY.
+			The network is taken from the SAV case currently loaded and the solver includes its own equivalent machines
+			for the embedded load and so any G74 machines already in the SAV case are ignored.
+		:param list fault_times:  List of the fault times that should be considered
+		:return pd.DataFrame df:  Combined results for each fault time before processing in the same format as
+								study_fault_times
+		"""
+		# Imported here since the native solver is built on the data classes in this module
+		import g74.short_circuit as short_circuit
+
+		self.logger.info(constants.ShortCircuit.native_engine_note)
+		with instrumentation.span(constants.Instrumentation.span_native):
+			model = short_circuit.NetworkModel.from_psse()
+			g74_machines = model.df_machines['id'] == constants.G74.machine_id
+			if g74_machines.any():
+				self.logger.debug(
+					'{} G74 machines already in the SAV case are ignored by the native solver'.format(
+						g74_machines.sum()
+					)
+				)
+				model.df_machines = model.df_machines[~g74_machines]
+			solver = short_circuit.ShortCircuitSolver(model=model)
+			# Busbars are returned in the same order as the BKDY report, i.e. the order of the bus subsystem
+			df = solver.calculate_fault_currents(fault_times=fault_times, buses=sorted(set(self.buses)) or None)
 		return df
 
 	def process_combined_results(self, df):
@@ -1790,56 +2125,20 @@ class BkdyFile:
 				raise SyntaxError('BKDY output file already deleted or empty')
 			else:
 				return self.df
-		# Create reg
-		regex_bus = re.compile('[0-9]+')
-		bus = int()
-		start_reached = False
-		c_bkdy_file = constants.BkdyFileOutput()
-		with open(self.output_file, 'rb') as f:
-			for line in f:
-				# Find start of file
-				if not start_reached and constants.BkdyFileOutput.start not in line:
-					continue
-				elif constants.BkdyFileOutput.start in line:
-					start_reached = True
-					continue
-
-				# Find busbar number
-				bus_line = regex_bus.search(line)
-				if bus_line and not bus:
-					bus = int(bus_line.group())
-				elif constants.BkdyFileOutput.current in line:
-					# Get relevant column numbers for this line
-					col_nums, expected_length = c_bkdy_file.col_positions(line_type=c_bkdy_file.current)
-					# Split the line into a list of floats
-					currents = extract_values(line, expected_length)
-
-					# Process results into DataFrame
-					for name, col_num in col_nums.iteritems():
-						self.df.loc[bus, name] = currents[col_num] / c_bkdy_file.num_to_kA
-
-				elif constants.BkdyFileOutput.impedance in line:
-					# TODO: Confirm base value of model to ensure values are presented on 100 MVA base
-					# Get relevant column numbers for this line
-					col_nums, expected_length = c_bkdy_file.col_positions(line_type=c_bkdy_file.impedance)
-					# Split the line into a list of floats
-					impedance = extract_values(line, expected_length=expected_length)
-
-					# Process results into DataFrame
-					for name, col_num in col_nums.iteritems():
-						if col_num > 3:
-							self.df.loc[bus, name] = impedance[col_num] / c_bkdy_file.num_to_kA
-						else:
-							self.df.loc[bus, name] = impedance[col_num]
-
-					# Reset bus since finished processing this busbar
-					bus = int()
+		if constants.BkdyFileOutput.fixed_width:
+			df = self.parse_bkdy_report_fixed_width(output_file=self.output_file)
+		else:
+			# Read the complete report so that the number of results can be determined and the arrays preallocated
+			# rather than growing the DataFrame one cell at a time
+			with open(self.output_file, 'rb') as f:
+				contents = f.read()
+			df = self.parse_bkdy_report(contents=contents)
 
-		# Set name for DataFrame
-		self.df.name = constants.BkdyFileOutput.start
+		self.df = df
 
 		# Determine maximum values for DC and Peak current
 		# TODO: Review if this is best method and not overly pessimistic with requirements of G74
+		c_bkdy_file = constants.BkdyFileOutput
 		self.df[c_bkdy_file.ip] = self.df[[c_bkdy_file.ip_method1, c_bkdy_file.ip_method2]].max(axis=1)
 		self.df[c_bkdy_file.idc] = self.df[[c_bkdy_file.idc_method1, c_bkdy_file.idc_method2]].max(axis=1)
 
@@ -1850,6 +2149,547 @@ class BkdyFile:
 
 		return self.df
 
+	@staticmethod
+	def column_layout():
+		"""
+			Returns the layout used to store the values extracted from each line type of a BKDY report.  Columns are
+			ordered in the same way they are first populated when processing a report.
+		:return (list, dict, dict) (columns, current_map, impedance_map):  Column labels, and for each line type a
+								dictionary of column index in the stored array to the position in the extracted line
+		"""
+		c_bkdy_file = constants.BkdyFileOutput()
+		current_cols, _ = c_bkdy_file.col_positions(line_type=c_bkdy_file.current)
+		impedance_cols, _ = c_bkdy_file.col_positions(line_type=c_bkdy_file.impedance)
+		columns = list(current_cols.keys())
+		columns.extend([name for name in impedance_cols.keys() if name not in current_cols])
+		current_map = dict((columns.index(name), col_num) for name, col_num in current_cols.iteritems())
+		impedance_map = dict((columns.index(name), col_num) for name, col_num in impedance_cols.iteritems())
+
+		return columns, current_map, impedance_map
+
+	@staticmethod
+	def iter_bkdy_lines(lines, start_reached=False):
+		"""
+			Generator that walks through the lines of a BKDY report and returns the values extracted from each
+			FAULT CURRENT and THEVENIN IMPEDANCE line along with the busbar they relate to
+		:param iter lines:  Iterable of the lines in the BKDY report
+		:param bool start_reached: (optional=False) - Set to True if the lines follow the FAULTED BUS header
+		:return (int, str, list) (bus, line_type, values):  Busbar number, line type as defined in
+								constants.BkdyFileOutput and list of values extracted from the line
+		"""
+		c_bkdy_file = constants.BkdyFileOutput()
+		_, current_length = c_bkdy_file.col_positions(line_type=c_bkdy_file.current)
+		_, impedance_length = c_bkdy_file.col_positions(line_type=c_bkdy_file.impedance)
+
+		regex_bus = re.compile('[0-9]+')
+		bus = int()
+		for line in lines:
+			# Find start of file
+			if not start_reached and c_bkdy_file.start not in line:
+				continue
+			elif c_bkdy_file.start in line:
+				start_reached = True
+				continue
+
+			# Find busbar number
+			bus_line = regex_bus.search(line)
+			if bus_line and not bus:
+				bus = int(bus_line.group())
+			elif c_bkdy_file.current in line:
+				# Split the line into a list of floats
+				yield bus, c_bkdy_file.current, extract_values(line, current_length)
+
+			elif c_bkdy_file.impedance in line:
+				# TODO: Confirm base value of model to ensure values are presented on 100 MVA base
+				# Split the line into a list of floats
+				yield bus, c_bkdy_file.impedance, extract_values(line, expected_length=impedance_length)
+
+				# Reset bus since finished processing this busbar
+				bus = int()
+
+	@staticmethod
+	def convert_units(values, columns):
+		"""
+			Converts the currents extracted from a BKDY report to the required unit in a single operation.  Impedance
+			and voltage values (which are in the first columns of the THEVENIN IMPEDANCE line) are left unchanged.
+		:param np.ndarray values:  Array of values with a column for each of the columns
+		:param list columns:  Column labels for the array
+		:return np.ndarray values:  Array with the currents converted
+		"""
+		c_bkdy_file = constants.BkdyFileOutput
+		for i, name in enumerate(columns):
+			if name not in (c_bkdy_file.r, c_bkdy_file.x, c_bkdy_file.v_prefault):
+				values[:, i] /= c_bkdy_file.num_to_kA
+		return values
+
+	@classmethod
+	def parse_bkdy_report(cls, contents):
+		"""
+			Processes the contents of a BKDY report in a single pass.  Values are collected into a preallocated NumPy
+			array and the DataFrame is only produced once all the lines have been processed.
+		:param str contents:  Complete contents of the BKDY report
+		:return pd.DataFrame df:  DataFrame of results indexed by busbar number with column labels as listed in
+								constants.BkdyFileOutput
+		"""
+		columns, _, _ = cls.column_layout()
+		buses, values = cls.regex_values(contents=contents)
+
+		values = cls.convert_units(values=values, columns=columns)
+
+		df = pd.DataFrame(values, index=pd.Index(buses), columns=columns)
+		# Set name for DataFrame
+		df.name = constants.BkdyFileOutput.start
+
+		return df
+
+	@classmethod
+	def regex_values(cls, contents, start_reached=False):
+		"""
+			Extracts the values from the FAULT CURRENT and THEVENIN IMPEDANCE lines using the regex search.  If a
+			busbar is repeated then the original row is overwritten.
+		:param str contents:  Contents of the BKDY report (or a section of it)
+		:param bool start_reached: (optional=False) - Set to True if the contents follow the FAULTED BUS header
+		:return (list, np.ndarray) (buses, values):  Busbar numbers and array of values (units as in the report) with
+								the columns returned by column_layout
+		"""
+		c_bkdy_file = constants.BkdyFileOutput
+		columns, current_map, impedance_map = cls.column_layout()
+		col_maps = {c_bkdy_file.current: current_map.items(), c_bkdy_file.impedance: impedance_map.items()}
+
+		# Every busbar has a FAULT CURRENT and a THEVENIN IMPEDANCE line so this is the upper limit on the number of
+		# busbars that can be included in the report
+		max_rows = contents.count(c_bkdy_file.current) + contents.count(c_bkdy_file.impedance)
+		values = np.full((max_rows, len(columns)), np.nan)
+		# Row position for each busbar, if a busbar is repeated then the original row is overwritten
+		rows = dict()
+		buses = list()
+
+		for bus, line_type, line_values in cls.iter_bkdy_lines(contents.splitlines(), start_reached=start_reached):
+			row = rows.setdefault(bus, len(rows))
+			if row == len(buses):
+				buses.append(bus)
+			for col, col_num in col_maps[line_type]:
+				values[row, col] = line_values[col_num]
+
+		return buses, values[:len(buses)]
+
+	@classmethod
+	def parse_bkdy_report_fixed_width(cls, output_file):
+		"""
+			Processes a BKDY report by memory mapping the file and slicing the values from the fixed column positions
+			defined in constants.BkdyFileOutput.  The report is processed in sections, with all the lines in a section
+			processed at once as NumPy arrays rather than running the regex search on each line.
+		:param str output_file:  Full path to the BKDY report
+		:return pd.DataFrame df:  DataFrame in the same format as parse_bkdy_report
+		"""
+		columns, _, _ = cls.column_layout()
+		buses = list()
+		values = list()
+		for contents in cls.iter_bkdy_sections(output_file=output_file):
+			section_buses, section_values = cls.fixed_width_values(contents=contents)
+			buses.extend(section_buses)
+			values.append(section_values)
+
+		if values:
+			values = np.concatenate(values)
+		else:
+			values = np.full((0, len(columns)), np.nan)
+		buses, values = cls.merge_repeated_buses(buses=buses, values=values)
+
+		values = cls.convert_units(values=values, columns=columns)
+
+		df = pd.DataFrame(values, index=pd.Index(buses), columns=columns)
+		# Set name for DataFrame
+		df.name = constants.BkdyFileOutput.start
+
+		return df
+
+	@staticmethod
+	def iter_bkdy_sections(output_file, section_size=constants.BkdyFileOutput.section_size):
+		"""
+			Generator that memory maps the BKDY report and returns the contents following the FAULTED BUS header in
+			sections of approximately section_size bytes.  Every section ends after a THEVENIN IMPEDANCE line so the
+			results for a busbar are never split between sections.
+		:param str output_file:  Full path to the BKDY report
+		:param int section_size: (optional) - Approximate number of bytes in each section
+		:return str contents:  Contents of the section
+		"""
+		c_bkdy_file = constants.BkdyFileOutput
+		end_marker = '\n{}'.format(c_bkdy_file.impedance)
+		with open(output_file, 'rb') as f:
+			try:
+				mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+			except ValueError:
+				# Empty files cannot be memory mapped
+				return
+			try:
+				# Single search for the header, all busbar results follow this
+				header = mm.find(c_bkdy_file.start)
+				if header == -1:
+					return
+				start = mm.find('\n', header) + 1 or len(mm)
+
+				while start < len(mm):
+					end = start + section_size
+					if end < len(mm):
+						cut = mm.rfind(end_marker, start, end)
+						if cut == -1:
+							# Section is smaller than a single busbar and so extended to the next busbar
+							cut = mm.find(end_marker, end)
+						if cut == -1:
+							end = len(mm)
+						else:
+							end = mm.find('\n', cut + 1) + 1 or len(mm)
+					else:
+						end = len(mm)
+
+					yield mm[start:end]
+					start = end
+			finally:
+				mm.close()
+
+	@classmethod
+	def fixed_width_values(cls, contents):
+		"""
+			Extracts the values from a section of a BKDY report by slicing the fixed column positions.  If the section
+			does not have the layout of a BKDY report then the regex search is used for the whole section instead.
+		:param str contents:  Section of the BKDY report as returned by iter_bkdy_sections
+		:return (list, np.ndarray) (buses, values):  Busbar numbers and array of values (units as in the report) with
+								the columns returned by column_layout
+		"""
+		fields = cls.slice_fixed_width_fields(contents=contents)
+		if fields is None:
+			logging.getLogger(constants.Logging.logger_name).debug(
+				'Section of the BKDY output file does not match the expected fixed width layout and so will be '
+				'processed using the regex search instead'
+			)
+			return cls.regex_values(contents=contents, start_reached=True)
+
+		buses, currents, impedances = fields
+		columns, current_map, impedance_map = cls.column_layout()
+		values = np.full((len(buses), len(columns)), np.nan)
+		for col, col_num in current_map.iteritems():
+			values[:, col] = currents[:, col_num]
+		for col, col_num in impedance_map.iteritems():
+			values[:, col] = impedances[:, col_num]
+
+		return cls.merge_repeated_buses(buses=buses, values=values)
+
+	@staticmethod
+	def merge_repeated_buses(buses, values):
+		"""
+			If a busbar is repeated then the values are combined into the row where the busbar first appeared with the
+			later values overwriting the earlier ones, in the same way as the regex search
+		:param list buses:  Busbar numbers for each row in values
+		:param np.ndarray values:  Array of values
+		:return (list, np.ndarray) (buses, values):  Busbar numbers (each only once) and array of values
+		"""
+		if len(set(buses)) == len(buses):
+			return buses, values
+
+		rows = dict()
+		merged = np.full(values.shape, np.nan)
+		for i, bus in enumerate(buses):
+			row = rows.setdefault(bus, len(rows))
+			filled = ~np.isnan(values[i])
+			merged[row, filled] = values[i, filled]
+		buses = sorted(rows, key=rows.get)
+
+		return buses, merged[:len(buses)]
+
+	@staticmethod
+	def slice_fixed_width_fields(contents):
+		"""
+			Finds the FAULT CURRENT and THEVENIN IMPEDANCE lines in a section of a BKDY report and slices the values
+			from the fixed column positions.  Error values (*********) are converted to 0.0 in the same way as
+			extract_values.  Lines which do not match the fixed width layout, including those with an Infinity or NaN
+			value, are processed individually using extract_values.
+		:param str contents:  Section of the BKDY report following the FAULTED BUS header
+		:return (list, np.ndarray, np.ndarray) (buses, currents, impedances):  Busbar numbers and an array with a
+								column for each of the values in the FAULT CURRENT and THEVENIN IMPEDANCE lines or
+								None if the busbars cannot be identified in the same way as the regex search
+		"""
+		c_bkdy_file = constants.BkdyFileOutput
+		buf = np.frombuffer(contents, dtype=np.uint8)
+
+		# Start position and length of every line
+		newlines = np.flatnonzero(buf == ord('\n'))
+		starts = np.append(0, newlines + 1)
+		ends = np.append(newlines, len(buf))
+		in_section = starts < len(buf)
+		starts = starts[in_section]
+		lengths = ends[in_section] - starts
+
+		# Find the lines that start with each of the line types
+		line_types = list()
+		for prefix in (c_bkdy_file.current, c_bkdy_file.impedance):
+			prefix = np.frombuffer(prefix, dtype=np.uint8)
+			mask = lengths >= len(prefix)
+			chars = buf[starts[mask][:, None] + np.arange(len(prefix))]
+			mask[mask] = (chars == prefix).all(axis=1)
+			line_types.append(np.flatnonzero(mask))
+		current_lines, impedance_lines = line_types
+
+		# Every busbar is expected to be a busbar line followed by a FAULT CURRENT and THEVENIN IMPEDANCE line and
+		# these must be the only lines with numbers in for the busbars to be the same as found by the regex search
+		is_digit = (buf >= ord('0')) & (buf <= ord('9'))
+		digit_lines = np.unique(np.searchsorted(starts, np.flatnonzero(is_digit), side='right') - 1)
+		if (
+				len(current_lines) != contents.count(c_bkdy_file.current) or
+				len(impedance_lines) != contents.count(c_bkdy_file.impedance) or
+				len(current_lines) != len(impedance_lines) or
+				(impedance_lines != current_lines + 1).any() or
+				(len(current_lines) > 0 and current_lines[0] == 0) or
+				not np.array_equal(digit_lines, np.sort(np.concatenate((current_lines - 1, current_lines, impedance_lines))))
+		):
+			return None
+
+		# Busbar numbers are right aligned at the start of the preceding line
+		field = c_bkdy_file.bus_field
+		bus_lines = current_lines - 1
+		# The busbar number must not continue past the end of the field
+		if (lengths[bus_lines] <= field[1]).any() or is_digit[starts[bus_lines] + field[1]].any():
+			return None
+		bus_chars = buf[starts[bus_lines][:, None] + np.arange(field[0], field[1])]
+		if not (is_digit[starts[bus_lines][:, None] + np.arange(field[0], field[1])] | (bus_chars == ord(' '))).all():
+			return None
+		try:
+			buses = [int(bus) for bus in bus_chars.copy().view('S{}'.format(bus_chars.shape[1])).ravel()]
+		except ValueError:
+			# Spaces between the digits
+			return None
+
+		values = list()
+		for lines, fields in (
+				(current_lines, c_bkdy_file.current_fields),
+				(impedance_lines, c_bkdy_file.impedance_fields)
+		):
+			line_length = fields[-1][1]
+			# Lines that are too short or where the last value runs on past the last column
+			irregular = lengths[lines] < line_length
+			tail = buf[np.minimum(starts[lines] + line_length, len(buf) - 1)]
+			irregular |= (lengths[lines] > line_length) & ~np.in1d(tail, np.frombuffer(' \t\r', dtype=np.uint8))
+
+			line_values = np.zeros((len(lines), len(fields)))
+			for i, field in enumerate(fields):
+				chars = buf[np.minimum(starts[lines][:, None] + np.arange(field[0], field[1]), len(buf) - 1)]
+				is_star = chars == ord('*')
+				is_space = chars == ord(' ')
+				# Error values are returned as a single run of 9 * characters and are replaced with 0.0
+				first_star = is_star.argmax(axis=1)
+				last_star = chars.shape[1] - 1 - is_star[:, ::-1].argmax(axis=1)
+				is_error = (
+					(is_star.sum(axis=1) == len(c_bkdy_file.nan_term3)) &
+					(last_star - first_star == len(c_bkdy_file.nan_term3) - 1) &
+					(is_star | is_space).all(axis=1)
+				)
+				# Other values must be right aligned numbers separated from the previous value, anything else (for
+				# example Infinity or NaN) is left for the regex search
+				is_number = (
+					is_space[:, 0] &
+					((chars >= ord('0')) & (chars <= ord('9')) | is_space | (chars == ord('.')) | (chars == ord('-')))
+					.all(axis=1)
+				)
+				irregular |= ~(is_error | is_number)
+
+				to_convert = np.flatnonzero(is_number & ~irregular)
+				raw = chars[to_convert].copy().view('S{}'.format(chars.shape[1])).ravel()
+				try:
+					line_values[to_convert, i] = raw.astype(float)
+				except ValueError:
+					# Values that cannot be converted (for example a - in the middle of a number) are found individually
+					for row, value in zip(to_convert, raw):
+						try:
+							line_values[row, i] = float(value)
+						except ValueError:
+							irregular[row] = True
+
+			# Lines that do not match the fixed width layout are processed using the regex search
+			for row in np.flatnonzero(irregular):
+				start = starts[lines[row]]
+				line = contents[start:start + lengths[lines[row]]]
+				extracted = extract_values(line, expected_length=len(fields))[:len(fields)]
+				line_values[row] = np.nan
+				line_values[row, :len(extracted)] = extracted
+
+			values.append(line_values)
+
+		return buses, values[0], values[1]
+
+	def iter_bkdy_records(self, chunk_size=constants.BkdyFileOutput.chunk_size, delete=False):
+		"""
+			Generator that reads the BKDY report a section at a time and returns the results for each busbar in chunks
+			so that the memory needed is limited by the section and chunk sizes rather than the size of the report.
+		:param int chunk_size: (optional) - Maximum number of busbars returned in each chunk
+		:param bool delete:  (optional=False) - If set to True then will delete the file once it has been read
+		:return pd.DataFrame df_chunk:  DataFrame of the results for up to chunk_size busbars indexed by busbar number
+								with the columns listed in constants.BkdyFileOutput.record_columns
+		"""
+		if self.output_file is None:
+			self.logger.critical(
+				'Attempted to stream the BKDY output file for fault time {:.2f} which has already been deleted'
+				.format(self.fault_time)
+			)
+			raise SyntaxError('BKDY output file already deleted')
+
+		columns, _, _ = self.column_layout()
+		buses = list()
+		values = np.full((0, len(columns)), np.nan)
+
+		if constants.BkdyFileOutput.fixed_width:
+			for contents in self.iter_bkdy_sections(output_file=self.output_file):
+				section_buses, section_values = self.fixed_width_values(contents=contents)
+				buses.extend(section_buses)
+				values = np.concatenate((values, section_values))
+				# Full chunks are returned and the remainder combined with the next section
+				while len(buses) >= chunk_size:
+					chunk_buses, chunk_values = self.merge_repeated_buses(
+						buses=buses[:chunk_size], values=values[:chunk_size]
+					)
+					yield self.records_from_values(values=chunk_values, buses=chunk_buses, columns=columns)
+					buses = buses[chunk_size:]
+					values = values[chunk_size:]
+			buses, values = self.merge_repeated_buses(buses=buses, values=values)
+		else:
+			c_bkdy_file = constants.BkdyFileOutput
+			_, current_map, impedance_map = self.column_layout()
+			col_maps = {c_bkdy_file.current: current_map.items(), c_bkdy_file.impedance: impedance_map.items()}
+			values = np.full((chunk_size, len(columns)), np.nan)
+			rows = dict()
+
+			with open(self.output_file, 'rb') as f:
+				for bus, line_type, line_values in self.iter_bkdy_lines(f):
+					row = rows.setdefault(bus, len(rows))
+					if row == len(buses):
+						# Chunk is full and so is returned before starting on the next busbar
+						if row == chunk_size:
+							yield self.records_from_values(values=values, buses=buses, columns=columns)
+							values = np.full((chunk_size, len(columns)), np.nan)
+							rows = {bus: 0}
+							buses = list()
+							row = 0
+						buses.append(bus)
+					for col, col_num in col_maps[line_type]:
+						values[row, col] = line_values[col_num]
+			values = values[:len(buses)]
+
+		if buses:
+			yield self.records_from_values(values=values, buses=buses, columns=columns)
+
+		# Tidy up by removing file and updating status
+		if delete:
+			os.remove(self.output_file)
+			self.output_file = None
+
+	def records_from_values(self, values, buses, columns):
+		"""
+			Converts a chunk of values extracted from the BKDY report into the records returned when streaming
+		:param np.ndarray values:  Array of the values extracted for each busbar
+		:param list buses:  Busbar numbers for each row in values
+		:param list columns:  Column labels for values
+		:return pd.DataFrame df_chunk:  DataFrame with the columns listed in constants.BkdyFileOutput.record_columns
+		"""
+		c_bkdy_file = constants.BkdyFileOutput
+		values = self.convert_units(values=values, columns=columns)
+		col = dict((name, i) for i, name in enumerate(columns))
+
+		records = dict((name, values[:, col[name]]) for name in c_bkdy_file.record_columns if name in col)
+		# Determine maximum values for DC and Peak current in the same way as when the complete file is processed
+		records[c_bkdy_file.ip] = np.fmax(values[:, col[c_bkdy_file.ip_method1]], values[:, col[c_bkdy_file.ip_method2]])
+		records[c_bkdy_file.idc] = np.fmax(
+			values[:, col[c_bkdy_file.idc_method1]], values[:, col[c_bkdy_file.idc_method2]]
+		)
+
+		return pd.DataFrame(records, index=pd.Index(buses), columns=c_bkdy_file.record_columns)
+
+
+class BkdyResultCombiner:
+	"""
+		Incrementally combines the records streamed from the BKDY report for each fault time.  Each chunk is folded into
+		a single array, with a row for each busbar and a block of columns for each fault time, as soon as it is added.
+		Only the columns required are retained and so the memory used is the size of the combined results plus a
+		single chunk.
+	"""
+	def __init__(self, columns=constants.BkdyFileOutput.record_columns, buses=None, fault_times=None):
+		"""
+		:param tuple columns: (optional) - Columns from the streamed records that should be retained
+		:param list buses: (optional=None) - Busbars expected so the array can be preallocated, any other busbars are
+								added as they are streamed
+		:param list fault_times: (optional=None) - Fault times expected so the array can be preallocated
+		"""
+		self.logger = logging.getLogger(constants.Logging.logger_name)
+		self.columns = list(columns)
+
+		# Row for each busbar and block of columns for each fault time in the order they were added
+		self.rows = collections.OrderedDict()
+		self.blocks = collections.OrderedDict()
+		for bus in buses or list():
+			self.rows.setdefault(int(bus), len(self.rows))
+
+		self.values = np.full(
+			(
+				max(len(self.rows), constants.BkdyFileOutput.chunk_size),
+				max(len(fault_times or list()), 1) * len(self.columns)
+			),
+			np.nan
+		)
+
+	def reserve(self, rows, blocks):
+		"""
+			Enlarges the array if needed so that it can hold the number of busbars and fault times
+		:param int rows:  Number of busbars
+		:param int blocks:  Number of fault times
+		:return None:
+		"""
+		shape = (rows, blocks * len(self.columns))
+		if shape[0] <= self.values.shape[0] and shape[1] <= self.values.shape[1]:
+			return None
+
+		# Size is at least doubled so that the values are only copied a small number of times
+		values = np.full(
+			(
+				max(shape[0], 2 * self.values.shape[0]) if shape[0] > self.values.shape[0] else self.values.shape[0],
+				max(shape[1], 2 * self.values.shape[1]) if shape[1] > self.values.shape[1] else self.values.shape[1]
+			),
+			np.nan
+		)
+		values[:self.values.shape[0], :self.values.shape[1]] = self.values
+		self.values = values
+		return None
+
+	def add_records(self, fault_time, records):
+		"""
+			Adds the records for a particular fault time, repeated busbars overwrite the previous results in the same
+			way as when the whole file is processed
+		:param float fault_time:  Fault time (or name) that these records relate to
+		:param iter records:  Iterable of DataFrames as returned by BkdyFile.iter_bkdy_records
+		:return None:
+		"""
+		block = self.blocks.setdefault(fault_time, len(self.blocks))
+		self.reserve(rows=len(self.rows), blocks=len(self.blocks))
+		first = block * len(self.columns)
+
+		for df_chunk in records:
+			rows = [self.rows.setdefault(int(bus), len(self.rows)) for bus in df_chunk.index]
+			self.reserve(rows=len(self.rows), blocks=len(self.blocks))
+			self.values[rows, first:first + len(self.columns)] = df_chunk[self.columns].values
+
+		return None
+
+	def combine(self):
+		"""
+			Returns the combined records as a single DataFrame with an additional column level to identify the fault
+			time, the array is released once combined.
+		:return pd.DataFrame df:  Combined DataFrame in the same format as BkdyFaultStudy.combine_bkdy_output
+		"""
+		df = pd.DataFrame(
+			self.values[:len(self.rows), :len(self.blocks) * len(self.columns)],
+			index=pd.Index(list(self.rows.keys())),
+			columns=pd.MultiIndex.from_product([list(self.blocks.keys()), self.columns])
+		)
+		self.values = None
+		return df
+
 
 class G74FaultInfeed:
 	"""
@@ -1874,6 +2714,21 @@ class G74FaultInfeed:
 		# Parameter set to True once machines have been added and checked
 		self.machines_checked = False
 
+		# Set of busbars where the bus type, plant and equivalent machine have already been created in the PSSE case
+		# so that only the impedance values need updating for each fault time
+		self.machines_added = set()
+		# X'', X' and X values last written to the PSSE case for each busbar
+		self.injected_reactances = dict()
+		# X'', X' and X values calculated for each fault time so they are only calculated once per study and the
+		# fault time for which the values were last written to the PSSE case
+		self.machine_reactances = dict()
+		self.injected_fault_time = None
+
+		# Count of the PSSE API calls made to add / update machines and the number saved compared to adding every
+		# machine in full for every fault time
+		self.api_calls_made = 0
+		self.api_calls_saved = 0
+
 	def identify_machine_parameters(self, hv_machines=pd.DataFrame()):
 		"""
 			Obtains details of all the loads in the system at each busbar along with the nominal voltage
@@ -1959,88 +2814,189 @@ class G74FaultInfeed:
 
 		# Combine back into a single data_frame
 		self.df_machines = pd.concat([df_33, df_11], axis=0)
+		# Any reactances already calculated were for the previous machines
+		self.machine_reactances = dict()
 
 		self.logger.debug('Parameters calculated for machines connecting to represent embedded load at 11 and 33kV')
 
-	def calculate_machine_impedance(self, fault_time, update=False):
+	@staticmethod
+	def reactance_at_fault_time(fault_time):
 		"""
-			Calculates and updates the machine impedance values based on the fault time
-		:param float fault_time: (optional=0.0) - X'', X' and X parameters based on the fault time input in seconds
-		:param bool update:  If set to True then it will automatically update the machine impedance values once calculated
-		:return None:
+			Calculates the reactance of the equivalent machine at the fault time, used for X'', X' and X
+		:param float fault_time:  Time after the fault in seconds
+		:return float x_value:  Reactance in p.u. on the machine base
 		"""
 		# Calculate X'', X' and X values based on fault_time (based on equation 9.5.2 of G74 1992
 		if fault_time > constants.PSSE.min_fault_time:
-			x_value = 1.0 / ((1.0 / self.c.x11) * math.exp(-fault_time / self.c.t11))
+			x_value = 1.0 / ((1.0 / constants.G74.x11) * math.exp(-fault_time / constants.G74.t11))
 		else:
-			x_value = self.c.x11
+			x_value = constants.G74.x11
+		return x_value
 
-		# Update DataFrame with these values
+	def calculate_machine_impedance(self, fault_time, update=False):
+		"""
+			Calculates and updates the machine impedance values based on the fault time.  The values for each fault
+			time are only calculated once and then reused for each fault study method.
+		:param float fault_time: (optional=0.0) - X'', X' and X parameters based on the fault time input in seconds
+		:param bool update:  If set to True then it will automatically update the machine impedance values once calculated
+		:return None:
+		"""
 		c = constants.Machines
-		# TODO: Confirm, this makes the assumption that the transformer impedance varies with the size of
-		# TODO: the load connected which doesn't seem fully correct.
-		# Update values based on new x_value taking into consideration the transformer reactance
-		self.df_machines.loc[:, (
-									c.xsubtr,
-									c.xtrans,
-									c.xsynch
-								)] = x_value
-
-		self.df_machines.loc[:, (
-									c.xsubtr,
-									c.xtrans,
-									c.xsynch
-								)] = self.df_machines.loc[:, (
-									c.xsubtr,
-									c.xtrans,
-									c.xsynch
-								)].subtract(self.df_machines.loc[:, c.tx_x], axis=0)
+		columns = [c.xsubtr, c.xtrans, c.xsynch]
 
-		self.logger.debug(
-			(
-				"G74 machine values updated for a fault time of {:.2f} seconds based on an x'' of {:.3f} p.u., "
-				"time constant of {:.2f} seconds.  Resulting in x at time of fault of {:.3f} p.u."
-			).format(fault_time, self.c.x11, self.c.t11, x_value))
+		reactances = self.machine_reactances.get(round(fault_time, 6))
+		if reactances is None:
+			x_value = self.reactance_at_fault_time(fault_time=fault_time)
+
+			# TODO: Confirm, this makes the assumption that the transformer impedance varies with the size of
+			# TODO: the load connected which doesn't seem fully correct.
+			# Values based on new x_value taking into consideration the transformer reactance
+			reactances = pd.DataFrame(
+				dict((col, x_value - self.df_machines[c.tx_x]) for col in columns), index=self.df_machines.index
+			)[columns]
+			self.machine_reactances[round(fault_time, 6)] = reactances
+
+			self.logger.debug(
+				(
+					"G74 machine values calculated for a fault time of {:.2f} seconds based on an x'' of {:.3f} p.u., "
+					"time constant of {:.2f} seconds.  Resulting in x at time of fault of {:.3f} p.u."
+				).format(fault_time, self.c.x11, self.c.t11, x_value))
+
+		# Update DataFrame with these values
+		self.df_machines.loc[:, columns] = reactances.values
 
 		# If set to True then will automatically go and update the machine impedance values once calculated
 		if update:
-			self.add_machines()
+			self.add_machines(fault_time=fault_time)
 
-	def add_machines(self):
+	def add_machines(self, incremental=constants.G74.incremental_update, fault_time=None):
 		"""
 			Adds / updates the parameters for every machine in the PSSE base case to ensure the G74 contribution
 			is included.  Will also change the state of busbars to generator buses where appropriate.
+
+			The bus type, plant and machine are only created the first time (or if they are no longer in the PSSE case,
+			for example because the SAV case has been reloaded) and after that only the sequence impedances which vary
+			with fault time are updated.
+		:param bool incremental: (optional) - If True then only the X'', X' and X values that have changed since they
+								were last written are updated
+		:param float fault_time: (optional=None) - Fault time the machine values have been calculated for, if the
+								values for this fault time are already in the PSSE case then only machines which have
+								had to be created again are updated
 		:return None:
 		"""
+		errors = list()
+		calls_made = self.api_calls_made
+
+		# Determine which busbars still need the equivalent machine creating, any busbars which no longer have a
+		# machine must have all of their values written again
+		existing_machines = self.existing_machine_buses()
+		self.machines_added &= existing_machines
+		for bus in set(self.injected_reactances) - self.machines_added:
+			del self.injected_reactances[bus]
+
+		buses_to_create = [bus for bus in self.df_machines.index if bus not in self.machines_added]
+		if buses_to_create:
+			errors.extend(self.create_machines(buses=buses_to_create))
+
+		if incremental and fault_time is not None and fault_time == self.injected_fault_time:
+			buses_to_update = [bus for bus in self.machines_added if bus not in self.injected_reactances]
+		else:
+			buses_to_update = None
+		errors.extend(self.update_machine_impedances(incremental=incremental, buses=buses_to_update))
+		self.injected_fault_time = fault_time
+
+		self.report_machine_errors(errors=errors)
+
+		# Keep track of the calls saved compared to adding every machine in full
+		calls_made = self.api_calls_made - calls_made
+		self.api_calls_saved += self.full_injection_calls() - calls_made
+		self.logger.debug(
+			(
+				'{} PSSE API calls made to update the equivalent machines, {} calls saved in total compared to adding '
+				'all machines in full for every fault time'
+			).format(calls_made, self.api_calls_saved)
+		)
+
+	def full_injection_calls(self):
+		"""
+			Returns the number of PSSE API calls needed to add every machine in full, i.e. a machine_data_2 and
+			seq_machine_data_3 call for every machine along with bus_data_3 and plant_data calls where needed
+		:return int calls:
+		"""
+		bus_states = self.bus_data.df.loc[self.df_machines.index, constants.Busbars.state]
+		plant_buses = self.plant_data.df.loc[:, constants.Plant.bus]
+		return int(
+			2 * len(self.df_machines) +
+			(bus_states == 1).sum() +
+			(~self.df_machines.index.isin(plant_buses)).sum()
+		)
+
+	def existing_machine_buses(self):
+		"""
+			Returns the busbars in the PSSE case that already have an equivalent G74 machine
+		:return set buses:  Busbar numbers with a machine with the G74 machine ID
+		"""
+		# Flag of 4 returns all machines including those out of service
+		ierr_int, iarray = psspy.amachint(sid=-1, flag=4, string=(constants.Machines.bus, ))
+		ierr_char, carray = psspy.amachchar(sid=-1, flag=4, string=(constants.Machines.identifier, ))
+		self.api_calls_made += 2
+
+		if ierr_int > 0 or ierr_char > 0:
+			self.logger.critical(
+				(
+					'Unable to retrieve the machine data from the SAV case and PSSE returned the '
+					'following error codes {} and {} from the functions <{}> and <{}>'
+				).format(ierr_int, ierr_char, psspy.amachint.__name__, psspy.amachchar.__name__)
+			)
+			raise SyntaxError('Error importing data from PSSE SAV case')
+
+		return set(
+			bus for bus, machine_id in zip(iarray[0], carray[0])
+			if machine_id.strip() == self.c.machine_id
+		)
+
+	def create_machines(self, buses):
+		"""
+			Changes the busbar type, adds the plant and adds the equivalent machine for each busbar.  Only needs to
+			be done once since the machine base and source impedance do not vary with fault time.
+		:param list buses:  Busbars to create an equivalent machine for
+		:return list errors:  List of (bus, function name, error code) for any PSSE function that returned an error
+		"""
 		func_machine = psspy.machine_data_2
-		func_machine_seq = psspy.seq_machine_data_3
 		func_bus = psspy.bus_data_3
 		func_plant = psspy.plant_data
 
-		# Loop through every machine and add / update parameters in the PSSE case
-		for bus, machine in self.df_machines.iterrows():
+		# Sets of busbars that need their type changing and that already have a plant so that membership is checked
+		# without searching the DataFrames for every busbar
+		bus_states = self.bus_data.df.loc[buses, constants.Busbars.state]
+		type_1_buses = set(bus_states.index[bus_states == 1])
+		plant_buses = set(self.plant_data.df.loc[:, constants.Plant.bus])
+
+		df = self.df_machines.loc[buses]
+		errors = list()
+		for bus, mva, r_source, x_source in zip(
+				df.index, df[self.c.label_mva], df[constants.Machines.rsource], df[constants.Machines.xsource]
+		):
 			# Check busbar state is the correct type (type codes 2, 3 or 4 do not impact)
 			# Must be done before adding machine otherwise get a missing Plant Data error
-			if self.bus_data.df.loc[bus, constants.Busbars.state] == 1:
+			if bus in type_1_buses:
 				# If busbar is type code 1 (non-generator bus) then change status to 2
-				ierr_bus = func_bus(
-					i=bus,
-					intgar1=constants.Busbars.generator_bus_type_code
-				)
-			else:
-				ierr_bus = 0
+				ierr = func_bus(i=bus, intgar1=constants.Busbars.generator_bus_type_code)
+				self.api_calls_made += 1
+				if ierr > 0:
+					errors.append((bus, func_bus.__name__, ierr))
 
 			# Check if plant already exists and if not add Plant
-			if bus not in self.plant_data.df.loc[:, constants.Plant.bus].tolist():
-				ierr_plant = func_plant(
-					i=bus
-				)
-			else:
-				ierr_plant = 0
+			if bus not in plant_buses:
+				ierr = func_plant(i=bus)
+				self.api_calls_made += 1
+				if ierr > 0:
+					errors.append((bus, func_plant.__name__, ierr))
+				else:
+					plant_buses.add(bus)
 
 			# Add machine / update MVA values
-			# TODO: label_mva is not recognised and so is returning 0 (need to check where this should be populated from)
-			ierr_mac = func_machine(
+			ierr = func_machine(
 				i=bus,
 				id=self.c.machine_id,
 				intgar1=1,			# Ensures machine is in service
@@ -2050,43 +3006,108 @@ class G74FaultInfeed:
 				realar4=0.0,		# Ensures machine Q output is 0.0 (QB)
 				realar5=0.0,		# Ensures machine P output is 0.0 (PT)
 				realar6=0.0,		# Ensures machine P output is 0.0 (PB)
-				realar7=machine[self.c.label_mva],
-				realar8=machine[constants.Machines.rsource],
-				realar9=machine[constants.Machines.xsource]
+				realar7=mva,
+				realar8=r_source,
+				realar9=x_source
 			)
+			self.api_calls_made += 1
+			if ierr > 0:
+				errors.append((bus, func_machine.__name__, ierr))
+			else:
+				self.machines_added.add(bus)
 
-			# Update machine sequence values
-			ierr_seq = func_machine_seq(
-				i=bus,
-				id=self.c.machine_id,
-				realar1=machine[constants.Machines.rpos],
-				realar2=machine[constants.Machines.xsubtr],
-				realar3=machine[constants.Machines.rneg],
-				realar4=machine[constants.Machines.xneg],
-				realar5=machine[constants.Machines.rzero],
-				realar6=machine[constants.Machines.xzero],
-				realar7=machine[constants.Machines.xtrans],
-				realar8=machine[constants.Machines.xsynch]
-			)
-
-			# Error checking / debug writing
-			if sum([ierr_mac, ierr_seq, ierr_bus, ierr_plant]) > 0:
-				self.logger.error(
-					(
-						'An error occurred when trying to add an equivalent machine to represent the fault current '
-						'contribution from embedded load to the busbar {}.  The functions <{}>, <{}>, <{}> and <{}> '
-						'returned the following error codes: {}, {}, {} and {}'
-					).format(
-						bus,
-						func_bus.__name__, func_plant, func_machine.__name__, func_machine_seq.__name__,
-						ierr_bus, ierr_plant, ierr_mac, ierr_seq
-					)
+		self.logger.debug('Equivalent machines created at {} busbars'.format(len(buses)))
+
+		return errors
+
+	def update_machine_impedances(self, incremental=constants.G74.incremental_update, buses=None):
+		"""
+			Updates the sequence impedances of every equivalent machine that has been created.  Machines which have
+			not had their sequence impedances written before are updated in full.
+		:param bool incremental: (optional) - If True then for machines which have already been written only the X'',
+								X' and X values are updated and only if they have changed by more than the tolerance
+		:param list buses: (optional=None) - Only these busbars are considered, if None then every machine created
+		:return list errors:  List of (bus, function name, error code) for any PSSE function that returned an error
+		"""
+		func_machine_seq = psspy.seq_machine_data_3
+
+		c = constants.Machines
+		tolerance = self.c.update_tolerance
+		if buses is None:
+			buses = self.machines_added
+		df = self.df_machines.loc[self.df_machines.index.isin(buses)]
+		errors = list()
+		updated = 0
+		for bus, rpos, xsubtr, rneg, xneg, rzero, xzero, xtrans, xsynch in zip(
+				df.index, df[c.rpos], df[c.xsubtr], df[c.rneg], df[c.xneg], df[c.rzero], df[c.xzero], df[c.xtrans],
+				df[c.xsynch]
+		):
+			reactances = (xsubtr, xtrans, xsynch)
+			previous = self.injected_reactances.get(bus)
+			if incremental and previous is not None:
+				# Skip machines where the values have not changed
+				if all(abs(new - old) <= tolerance for new, old in zip(reactances, previous)):
+					continue
+
+				# Only the time varying reactances are written, all other values are left unchanged
+				ierr = func_machine_seq(
+					i=bus,
+					id=self.c.machine_id,
+					realar2=xsubtr,
+					realar7=xtrans,
+					realar8=xsynch
 				)
 			else:
-				self.logger.debug(
-					'Machine parameters successfully updated for equivalent machine connected to busbar: {} with ID {}'
-					.format(bus, constants.G74.machine_id)
+				# Update machine sequence values
+				ierr = func_machine_seq(
+					i=bus,
+					id=self.c.machine_id,
+					realar1=rpos,
+					realar2=xsubtr,
+					realar3=rneg,
+					realar4=xneg,
+					realar5=rzero,
+					realar6=xzero,
+					realar7=xtrans,
+					realar8=xsynch
 				)
+			self.api_calls_made += 1
+			updated += 1
+
+			if ierr > 0:
+				errors.append((bus, func_machine_seq.__name__, ierr))
+				# Ensure values are written in full next time
+				self.injected_reactances.pop(bus, None)
+			else:
+				self.injected_reactances[bus] = reactances
+
+		self.logger.debug(
+			'Machine parameters updated for {} of {} equivalent machines with ID {}'.format(
+				updated, len(df), self.c.machine_id
+			)
+		)
+
+		return errors
+
+	def report_machine_errors(self, errors):
+		"""
+			Reports all of the errors that occurred when adding / updating the equivalent machines in a single message
+		:param list errors:  List of (bus, function name, error code)
+		:return None:
+		"""
+		if not errors:
+			return None
+
+		df_errors = pd.DataFrame(errors, columns=('Busbar', 'Function', 'Error Code'))
+		self.logger.error(
+			(
+				'An error occurred when trying to add an equivalent machine to represent the fault current '
+				'contribution from embedded load to the following {} busbars.  The PSSE functions returned the '
+				'following error codes:\n{}'
+			).format(df_errors['Busbar'].nunique(), df_errors.to_string(index=False))
+		)
+
+		return None
 
 
 class IecFaults:
@@ -2105,6 +3126,24 @@ class IecFaults:
 
 		self.psse = psse
 
+		self.buses = list()
+		self.sid = -1
+		self.define_faulted_buses(buses=buses)
+
+		# Values used for processing results
+		self.bus_data = BusData()
+		self.result_unit = str()
+		self.result_coordinate = str()
+
+		# Set fault units and coordinates to the correct formats
+		self.psse.set_outputs()
+
+	def define_faulted_buses(self, buses):
+		"""
+			Defines the bus subsystem for the busbars to be faulted
+		:param list buses:  List of busbars to be faulted if empty list then all busbars faulted
+		:return None:
+		"""
 		# Define bus subsystem based on buses
 		if buses:
 			self.psse.define_bus_subsystem(buses=buses)
@@ -2114,29 +3153,22 @@ class IecFaults:
 			self.psse.sid = -1
 
 		self.buses = buses
-		self.sid = psse.sid
-
-		# Values used for processing results
-		self.bus_data = BusData()
-		self.result_unit = str()
-		self.result_coordinate = str()
-
-		# Set fault units and coordinates to the correct formats
-		self.psse.set_outputs()
+		self.sid = self.psse.sid
+		return None
 
-	def extract_value(self, value_to_convert, bus):
+	def extract_values(self, values_to_convert, buses):
 		"""
-			Function processes an individual result to extract the relevant format based on the output format
-		:param complex value_to_convert:  Value that needs returning in the relevant format
-		:param int bus:  Relevant busbar number for this bus, required if extracting the unit data
-		:return float value: The converted value that is returned
+			Function processes an array of results to extract the relevant format based on the output format
+		:param np.ndarray values_to_convert:  Complex values that need returning in the relevant format
+		:param list buses:  Busbar numbers for each value, required if extracting the unit data
+		:return np.ndarray values: The converted values that are returned
 		"""
 		if self.result_coordinate == 'rectangular':
 			# If rectangular then magnitude is given by absolute of complex number
-			value = abs(value_to_convert)
+			values = np.abs(values_to_convert)
 		elif self.result_coordinate == 'polar':
 			# If polar then first value is magnitude and second value is angle
-			value = value_to_convert.real
+			values = values_to_convert.real
 		else:
 			self.logger.critical(
 				'Unexpected value <{}> returned for IEC fault current coordinates'.format(self.result_coordinate)
@@ -2145,38 +3177,37 @@ class IecFaults:
 
 		# Convert to required kA or A value
 		if self.result_unit == 'pu':
-			bus_nominal_voltage = self.bus_data.df.loc[bus, self.bus_data.c.nominal]
-			# Convert value to kA
-			value = value*(constants.PSSE.base_mva / (bus_nominal_voltage*3**0.5))
+			bus_nominal_voltage = self.bus_data.df.loc[buses, self.bus_data.c.nominal].values.astype(float)
+			# Convert values to kA
+			values = values*(constants.PSSE.base_mva / (bus_nominal_voltage*3**0.5))
 		elif self.result_unit == 'physical':
-			value = value / constants.BkdyFileOutput.num_to_kA
+			values = values / constants.BkdyFileOutput.num_to_kA
 		else:
 			self.logger.critical(
 				'Unexpected value <{}> returned for IEC fault current results unit'.format(self.result_unit)
 			)
 			raise SyntaxError('Unexpected value returned for IEC fault current unit')
 
-		return value
+		return values
 
-	def extract_impedance(self, value_to_convert, bus):
+	def extract_impedances(self, values_to_convert):
 		"""
-			Function processes an individual result to extract the relevant format based on the output format
-			and in the case of impedance returns as R, X and Z values
-		:param complex value_to_convert:  Value that needs returning in the relevant format
-		:param int bus:  Relevant busbar number for this bus, required if extracting the unit data
-		:return (float, float, float) (R, X, Z): The converted impedance values in ohms
+			Function processes an array of impedances to extract the relevant format based on the output format
+			and returns them as R, X and Z values
+		:param np.ndarray values_to_convert:  Complex impedances that need returning in the relevant format
+		:return (np.ndarray, np.ndarray, np.ndarray) (R, X, Z): The converted impedance values
 		"""
 		if self.result_coordinate == 'rectangular':
 			# If rectangular then magnitude is given by absolute of complex number
-			z = abs(value_to_convert)
-			r = value_to_convert.real
-			x = value_to_convert.imag
+			z = np.abs(values_to_convert)
+			r = values_to_convert.real
+			x = values_to_convert.imag
 
 		elif self.result_coordinate == 'polar':
 			# If polar then first value is magnitude and second value is angle
-			z = value_to_convert.real
-			r = value_to_convert.real * math.cos(value_to_convert.imag)
-			x = value_to_convert.real * math.sin(value_to_convert.imag)
+			z = values_to_convert.real
+			r = values_to_convert.real * np.cos(values_to_convert.imag)
+			x = values_to_convert.real * np.sin(values_to_convert.imag)
 		else:
 			self.logger.critical(
 				'Unexpected value <{}> returned for IEC fault current coordinates'.format(self.result_coordinate)
@@ -2185,12 +3216,15 @@ class IecFaults:
 
 		return r, x, z
 
-	def fault_study(self, fault_time, lll=True, lg=False):
+	def fault_study(self, fault_time, lll=True, lg=False, batched=constants.IEC.batched):
 		"""
 			Calculate fault using IEC methodology for either a 3 phase or LG fault
 		:param float fault_time:  Breaker opening time
 		:param bool lll: Whether to carry out LLL fault study
 		:param bool lg: Whether to carry out LG fault study
+		:param bool batched: (optional) - If True then busbars with the same pre-fault voltage (within any tolerance
+							defined in constants.IEC) are faulted with a single call to pssarrays.iecs_currents rather
+							than a call for every busbar
 		:return pd.DataFrame df:
 		"""
 		# IEC method does not allow a breaker opening time of 0.0 seconds and so adjusted to use a slightly larger value
@@ -2204,9 +3238,6 @@ class IecFaults:
 			)
 			fault_time = constants.PSSE.min_fault_time
 
-		# PSSE functions
-		func_iecs = pssarrays.iecs_currents
-
 		# Get latest busbar data
 		self.bus_data = BusData()
 		# If looking at all busbars then produce list of buses based on all busbars
@@ -2214,84 +3245,198 @@ class IecFaults:
 			buses_to_fault = self.bus_data.df[self.bus_data.c.bus].tolist()
 		else:
 			buses_to_fault = self.buses
-
-		# Constant definition for all output data
-		c = constants.BkdyFileOutput
-		df = pd.DataFrame()
+		# Repeated busbars are only faulted once
+		buses_to_fault = pd.Index(buses_to_fault).unique().tolist()
+		if not buses_to_fault:
+			return pd.DataFrame()
+
+		# Busbars which are not in the case or are out of service have no pre-fault voltage to fault them with
+		missing_buses = pd.Index(buses_to_fault).difference(self.bus_data.df.index).tolist()
+		if missing_buses:
+			self.logger.critical(
+				(
+					'The busbars {} requested for the IEC fault current calculation are either not in the SAV case or '
+					'are out of service'
+				).format(missing_buses)
+			)
+			raise ValueError('Busbars requested for IEC fault current calculation not in service')
 
 		# Get parameters appropriate for fault type
-		flt3ph = 0
-		fltlg = 0
 		if lll and lg:
 			raise SyntaxError('Only able to perform either 3Ph or L-G fault in a single calculation')
-		elif lll:
-			flt3ph = 1
-		elif lg:
-			fltlg = 1
-		else:
+		elif not lll and not lg:
 			raise ValueError('No fault currents requested')
 
-		# Loop through each busbar and perform fault current calculation
-		for bus in buses_to_fault:
-			# Get the pre-fault voltage for this busbar
-			pre_fault_v = self.bus_data.df.loc[bus, self.bus_data.c.voltage]
-			# TODO: Need to confirm parameters for IEC fault current calculation
-			iec_results = func_iecs(
-				sid=self.sid,
-				flt3ph=flt3ph,
-				fltlg=fltlg,
-				fltloc=0,
-				# Line charging set to 1, 0.0 in positive and negative sequences
-				lnchrg=1,
-				# Zero sequence transformer impedance correction is ignored
-				zcorec=0,
-				# Load treated as 0.0 in positive, negative sequences
-				loadop=1,
-				optnftrc=2,
-				brktime=fault_time,
-				vfactorc=pre_fault_v
-			)
-			if iec_results.ierr > 0:
-				self.logger.critical(
-					(
-						'Error running a fault current calculation on busbar {} with pre fault voltage of {:.2f} and '
-						'circuit breaker opening time of {:.2f} seconds.  The function <{}> returned the error code {} '
-					).format(bus, pre_fault_v, fault_time, func_iecs.__name__, iec_results.ierr)
+		if batched:
+			dfs = list()
+			# Each group of busbars is faulted in a separate subsystem so that all the busbars in the group are
+			# faulted with a single calculation
+			for pre_fault_v, group_buses in self.group_buses_by_voltage(buses=buses_to_fault):
+				sid = self.psse.define_bus_subsystem(buses=group_buses, sid=constants.IEC.batch_sid)
+				iec_results = self.run_iecs_currents(
+					sid=sid, fault_time=fault_time, pre_fault_v=pre_fault_v, lll=lll, lg=lg, buses=group_buses
 				)
-				raise ValueError('Error running IEC fault current')
-			else:
-				self.result_coordinate = iec_results.scfmt
-				self.result_unit = iec_results.scunit
+				dfs.append(self.unpack_results(iec_results=iec_results, buses=group_buses, lll=lll, lg=lg))
+
+			# Restore the subsystem that was defined for the study
+			self.psse.sid = self.sid
+			df = pd.concat(dfs, axis=0).reindex(buses_to_fault)
+		else:
+			dfs = list()
+			# Loop through each busbar and perform fault current calculation
+			for bus in buses_to_fault:
+				# Get the pre-fault voltage for this busbar
+				pre_fault_v = self.bus_data.df.loc[bus, self.bus_data.c.voltage]
+				iec_results = self.run_iecs_currents(
+					sid=self.sid, fault_time=fault_time, pre_fault_v=pre_fault_v, lll=lll, lg=lg, buses=[bus]
+				)
+				dfs.append(self.unpack_results(iec_results=iec_results, buses=[bus], lll=lll, lg=lg))
+			df = pd.concat(dfs, axis=0)
+
+		# Return the DataFrame of the results for completed faults
+		return df
 
-				bus_idx = iec_results.fltbus.index(bus)
+	def group_buses_by_voltage(self, buses, tolerance=constants.IEC.vfactor_tolerance):
+		"""
+			Groups the busbars based on their pre-fault voltage rounded to the tolerance
+		:param list buses:  Busbars to be faulted
+		:param float tolerance: (optional) - Tolerance in p.u. that the pre-fault voltage is rounded to, if 0.0 then
+							only busbars with exactly the same pre-fault voltage are grouped
+		:return list groups:  List of (pre_fault_v, buses) for each group of busbars
+		"""
+		pre_fault_v = self.bus_data.df.loc[buses, self.bus_data.c.voltage].astype(float)
+		if not tolerance:
+			groups = [(v, group.index.tolist()) for v, group in pre_fault_v.groupby(pre_fault_v, sort=True)]
+			self.logger.debug(
+				'{} busbars with the same pre-fault voltage are faulted in {} groups'.format(len(buses), len(groups))
+			)
+			return groups
 
-				if lll:
-					# Define flt_data for 3 phase faults
-					flt_data = iec_results.flt3ph[bus_idx]
-					# Process results for a 3 phase fault
-					df.loc[bus, c.ik11] = self.extract_value(flt_data.ia1, bus)
+		rounded_v = (pre_fault_v / tolerance).round() * tolerance
+		groups = [
+			(round(v, 6), group.index.tolist())
+			for v, group in rounded_v.groupby(rounded_v, sort=True)
+		]
+		self.logger.info(
+			(
+				'The pre-fault voltage factor (vfactorc) used for the IEC fault current calculation is rounded to the '
+				'nearest {} p.u. so that {} busbars can be faulted in {} groups, the largest change in pre-fault '
+				'voltage is {:.6f} p.u.'
+			).format(tolerance, len(buses), len(groups), (rounded_v - pre_fault_v).abs().max())
+		)
 
-				elif lg:
-					# Process results for a LG fault
-					# Define flt_data for LG faults
-					flt_data = iec_results.fltlg[bus_idx]
+		return groups
 
-					# I0 == LG fault current Ik''/3 so multiply by 3 to get value
-					df.loc[bus, c.ik11] = self.extract_value(flt_data.ia0, bus) * 3
+	def run_iecs_currents(self, sid, fault_time, pre_fault_v, lll, lg, buses):
+		"""
+			Runs the IEC fault current calculation for all of the busbars in the subsystem
+		:param int sid:  Subsystem with the busbars to be faulted
+		:param float fault_time:  Breaker opening time
+		:param float pre_fault_v:  Pre-fault voltage (p.u.) to use for the busbars
+		:param bool lll: Whether to carry out LLL fault study
+		:param bool lg: Whether to carry out LG fault study
+		:param list buses:  Busbars being faulted, only used for error reporting
+		:return iec_results:  Results returned by pssarrays.iecs_currents
+		"""
+		# PSSE functions
+		func_iecs = pssarrays.iecs_currents
 
-				# Remaining values are not study specific
-				df.loc[bus, c.ip] = self.extract_value(flt_data.ipc, bus)
-				df.loc[bus, c.idc] = self.extract_value(flt_data.idc, bus)
-				df.loc[bus, c.ibsym] = self.extract_value(flt_data.ibsym, bus)
-				df.loc[bus, c.ibasym] = self.extract_value(flt_data.ibuns, bus)
+		# TODO: Need to confirm parameters for IEC fault current calculation
+		iec_results = func_iecs(
+			sid=sid,
+			flt3ph=int(lll),
+			fltlg=int(lg),
+			fltloc=0,
+			# Line charging set to 1, 0.0 in positive and negative sequences
+			lnchrg=1,
+			# Zero sequence transformer impedance correction is ignored
+			zcorec=0,
+			# Load treated as 0.0 in positive, negative sequences
+			loadop=1,
+			optnftrc=2,
+			brktime=fault_time,
+			vfactorc=pre_fault_v
+		)
+		if iec_results.ierr > 0:
+			self.logger.critical(
+				(
+					'Error running a fault current calculation on busbars {} with pre fault voltage of {:.2f} and '
+					'circuit breaker opening time of {:.2f} seconds.  The function <{}> returned the error code {} '
+				).format(buses, pre_fault_v, fault_time, func_iecs.__name__, iec_results.ierr)
+			)
+			raise ValueError('Error running IEC fault current')
 
-				# Extract impedance values
-				df.loc[bus, c.r], df.loc[bus, c.x], _ = self.extract_impedance(iec_results.thevz[bus_idx].z1, bus)
+		self.result_coordinate = iec_results.scfmt
+		self.result_unit = iec_results.scunit
 
-		# Return the DataFrame of the results for completed faults
-		return df
+		return iec_results
+
+	def unpack_results(self, iec_results, buses, lll, lg):
+		"""
+			Extracts the results for the faulted busbars from the IEC fault current calculation.  The results are
+			first collected into complex arrays so that the unit and coordinate conversion is applied to all busbars
+			at once.
+		:param iec_results:  Results returned by pssarrays.iecs_currents
+		:param list buses:  Busbars to return results for
+		:param bool lll: Whether results are for a LLL fault
+		:param bool lg: Whether results are for a LG fault
+		:return pd.DataFrame df:  Results for each busbar
+		"""
+		# Constant definition for all output data
+		c = constants.BkdyFileOutput
+		columns = (c.ik11, c.ip, c.idc, c.ibsym, c.ibasym, c.r, c.x)
+
+		# Lookup of position of each busbar in the results
+		bus_positions = dict((bus, i) for i, bus in enumerate(iec_results.fltbus))
+		idx = [bus_positions[bus] for bus in buses]
+
+		if lll:
+			# Define flt_data for 3 phase faults
+			flt_data = [iec_results.flt3ph[i] for i in idx]
+			ik11 = np.array([x.ia1 for x in flt_data], dtype=complex)
+		else:
+			# Define flt_data for LG faults
+			flt_data = [iec_results.fltlg[i] for i in idx]
+			ik11 = np.array([x.ia0 for x in flt_data], dtype=complex)
+
+		# Collect each result into a single complex array, columns are in the same order as values
+		values = np.empty((len(columns) - 1, len(buses)), dtype=complex)
+		values[0] = ik11
+		values[1] = [x.ipc for x in flt_data]
+		values[2] = [x.idc for x in flt_data]
+		values[3] = [x.ibsym for x in flt_data]
+		values[4] = [x.ibuns for x in flt_data]
+		values[5] = [iec_results.thevz[i].z1 for i in idx]
+
+		# Convert all current values in a single operation
+		data = np.empty((len(buses), len(columns)))
+		data[:, :5] = self.extract_values(values_to_convert=values[:5], buses=buses).T
+		if lg:
+			# I0 == LG fault current Ik''/3 so multiply by 3 to get value
+			data[:, 0] *= 3
+
+		# Extract impedance values
+		data[:, 5], data[:, 6], _ = self.extract_impedances(values_to_convert=values[5])
+
+		return pd.DataFrame(data, index=pd.Index(buses), columns=columns)
+
+	@staticmethod
+	def study_type(lll, lg):
+		"""
+			Returns the fault study type for the IEC fault
+		:param bool lll: Whether to carry out LLL fault study
+		:param bool lg: Whether to carry out LG fault study
+		:return str study:  Either constants.GUI.iec_3ph or constants.GUI.iec_lg
+		"""
+		if lll and lg:
+			raise SyntaxError('Only able to perform either 3Ph or L-G fault in a single calculation')
+		elif not lll and not lg:
+			raise ValueError('No fault currents requested')
+		return constants.GUI.iec_3ph if lll else constants.GUI.iec_lg
 
-	def calculate_fault_currents(self, fault_times, g74_infeed, lll=True, lg=False):
+	def calculate_fault_currents(
+			self, fault_times, g74_infeed, lll=True, lg=False, executor=None, cache=None, incremental=None
+	):
 		"""
 			Function calculates the fault currents at every busbar listed taking into consideration
 			that the DC component and peak make has to be calculated based on t=0 and only the RMS
@@ -2301,13 +3446,40 @@ class IecFaults:
 			initialised for time == 0ms and then for every timestep with machine parameters recalculated.
 		:param list fault_times:  List of the fault times that should be considered
 		:param G74FaultInfeed() g74_infeed:  Reference to the g74 handle so that machine parameters can be updated
-		:param list buses: (optional) List of busbars to be faulted if empty list then all busbars faulted
-		:return None:
+		:param bool lll: Whether to carry out LLL fault study
+		:param bool lg: Whether to carry out LG fault study
+		:param g74.parallel.FaultTimeExecutor executor: (optional=None) - If provided then the fault times are shared
+								between separate PSSE worker processes rather than run in this PSSE session
+		:param g74.cache.ResultCache cache: (optional=None) - If provided then the results are returned from the cache
+								if this study has already been run for the SAV case and stored in it otherwise
+		:param g74.incremental.IncrementalStudy incremental: (optional=None) - If provided then only the busbars
+								affected by changes since the previous study are faulted
+		:return pd.DataFrame df:
 		"""
-		# Fault current calculation to determine Ik'', peak make and DC decrement
-		# Calculate the fault impedance values for the initial time of 0.0
-		g74_infeed.calculate_machine_impedance(fault_time=0.0, update=True)
+		study = self.study_type(lll=lll, lg=lg)
+		dfs = self.calculate_study_fault_currents(
+			fault_times=fault_times, g74_infeed=g74_infeed, studies=[study], executor=executor, cache=cache,
+			incremental=incremental
+		)
+		return dfs[study]
 
+	def calculate_study_fault_currents(
+			self, fault_times, g74_infeed, studies, executor=None, cache=None, incremental=None
+	):
+		"""
+			Calculates the fault currents for each of the IEC fault studies.  The equivalent machines are only updated
+			once for each fault time with the LLL and LG faults both studied before moving on to the next fault time.
+		:param list fault_times:  List of the fault times that should be considered
+		:param G74FaultInfeed() g74_infeed:  Reference to the g74 handle so that machine parameters can be updated
+		:param list studies:  Fault studies to carry out, constants.GUI.iec_3ph and / or constants.GUI.iec_lg
+		:param g74.parallel.FaultTimeExecutor executor: (optional=None) - If provided then the fault times are shared
+								between separate PSSE worker processes rather than run in this PSSE session
+		:param g74.cache.ResultCache cache: (optional=None) - If provided then the results are returned from the cache
+								if this study has already been run for the SAV case and stored in it otherwise
+		:param g74.incremental.IncrementalStudy incremental: (optional=None) - If provided then only the busbars
+								affected by changes since the previous study are faulted
+		:return collections.OrderedDict dfs:  Processed results for each study
+		"""
 		# Initial fault must be carried out at 0.0 ms to get peak and Ik'' value
 		if constants.G74.min_fault_time not in fault_times:
 			fault_times.append(constants.G74.min_fault_time)
@@ -2334,32 +3506,139 @@ class IecFaults:
 
 		# TODO: Add in calculation for DC component and IC pk
 
+		dfs = collections.OrderedDict()
+		keys = dict()
+		for study in studies:
+			if cache is not None:
+				keys[study] = cache.key(buses=self.buses, fault_times=fault_times, study=study)
+				with instrumentation.span(constants.Instrumentation.span_cache):
+					cached = cache.get(key=keys[study])
+				if cached is not None:
+					dfs[study], _ = cached
+		studies_to_run = [study for study in studies if study not in dfs]
+		if not studies_to_run:
+			return dfs
+
+		if incremental is None:
+			results = self.run_fault_currents(
+				fault_times=fault_times, g74_infeed=g74_infeed, studies=studies_to_run, buses=self.buses,
+				executor=executor
+			)
+		else:
+			plans = dict(
+				(study, incremental.plan(buses=self.buses, fault_times=fault_times, study=study))
+				for study in studies_to_run
+			)
+			# All the studies are run together for every busbar that needs faulting for any of the studies
+			if any(df_previous is None for _, _, _, df_previous in plans.values()):
+				to_fault = list(self.buses)
+				run_study = True
+			else:
+				to_fault = sorted(set(bus for _, _, buses, _ in plans.values() for bus in buses))
+				run_study = bool(to_fault)
+
+			if run_study:
+				results_new = self.run_fault_currents(
+					fault_times=fault_times, g74_infeed=g74_infeed, studies=studies_to_run, buses=to_fault,
+					executor=executor
+				)
+			else:
+				results_new = dict()
+			results = dict(
+				(
+					study,
+					incremental.merge(
+						key=key, requested=requested, df_previous=df_previous, df_new=results_new.get(study)
+					)
+				)
+				for study, (key, requested, _, df_previous) in plans.items()
+			)
+
+		for study in studies_to_run:
+			df = results[study]
+			if cache is not None:
+				with instrumentation.span(constants.Instrumentation.span_cache):
+					cache.put(key=keys[study], df=df)
+			dfs[study] = df
+
+		# Returned in the order the studies were requested
+		return collections.OrderedDict((study, dfs[study]) for study in studies)
+
+	def run_fault_currents(self, fault_times, g74_infeed, studies, buses, executor=None):
+		"""
+			Runs the IEC fault studies for the busbars and processes the results
+		:param list fault_times:  List of the fault times that should be considered (already sorted)
+		:param G74FaultInfeed() g74_infeed:  Reference to the g74 handle so that machine parameters can be updated
+		:param list studies:  Fault studies to carry out, constants.GUI.iec_3ph and / or constants.GUI.iec_lg
+		:param list buses:  Busbars to fault, if empty then all busbars are faulted
+		:param g74.parallel.FaultTimeExecutor executor: (optional=None) - If provided then the fault times are shared
+								between separate PSSE worker processes rather than run in this PSSE session
+		:return dict dfs:  Processed results for each study
+		"""
+		# Subsystem is only changed for the duration of these studies
+		original_buses = self.buses
+		if list(buses) != list(original_buses):
+			self.define_faulted_buses(buses=buses)
+		try:
+			if executor is None:
+				results = self.study_fault_types(fault_times=fault_times, g74_infeed=g74_infeed, studies=studies)
+			else:
+				results = dict(
+					(study, executor.run(fault_times=fault_times, study=study, buses=self.buses)[0]) for study in studies
+				)
+		finally:
+			if list(buses) != list(original_buses):
+				self.define_faulted_buses(buses=original_buses)
+
+		dfs = dict()
+		for study in studies:
+			with instrumentation.span(constants.Instrumentation.span_post_processing):
+				df = self.process_combined_results(results[study])
+				dfs[study] = self.add_busbar_data(df)
+		return dfs
+
+	def study_fault_times(self, fault_times, g74_infeed, lll=True, lg=False):
+		"""
+			Runs the IEC fault study for each fault time with the machine parameters recalculated for each fault time
+		:param list fault_times:  List of the fault times that should be considered
+		:param G74FaultInfeed() g74_infeed:  Reference to the g74 handle so that machine parameters can be updated
+		:param bool lll: Whether to carry out LLL fault study
+		:param bool lg: Whether to carry out LG fault study
+		:return pd.DataFrame df:  Combined results for each fault time before processing
+		"""
+		study = self.study_type(lll=lll, lg=lg)
+		return self.study_fault_types(fault_times=fault_times, g74_infeed=g74_infeed, studies=[study])[study]
+
+	def study_fault_types(self, fault_times, g74_infeed, studies):
+		"""
+			Runs each of the IEC fault studies for each fault time, the machine parameters are recalculated once for
+			each fault time and shared by all of the studies
+		:param list fault_times:  List of the fault times that should be considered
+		:param G74FaultInfeed() g74_infeed:  Reference to the g74 handle so that machine parameters can be updated
+		:param list studies:  Fault studies to carry out, constants.GUI.iec_3ph and / or constants.GUI.iec_lg
+		:return dict dfs:  Combined results for each fault time before processing for each study
+		"""
 		# Loop through fault current studies producing fault files initially for ik'' and DC component decay
-		dfs = list()
+		dfs = dict((study, list()) for study in studies)
 
 		for fault_time in fault_times:
 			# Recalculate machine parameters based on fault time
-			g74_infeed.calculate_machine_impedance(fault_time=fault_time, update=True)
+			with instrumentation.span(constants.Instrumentation.span_machine_impedance, fault_time=fault_time):
+				g74_infeed.calculate_machine_impedance(fault_time=fault_time, update=True)
 
 			# Run fault study for this result
-			_t = time.time()
 			self.logger.info(
 				(
 					'Calculating fault current {:.2f} after fault application to determine reduced AC component'
 				).format(fault_time)
 			)
-			df = self.fault_study(fault_time=fault_time, lll=lll, lg=lg)
-			dfs.append(df)
-			self.logger.info(
-				(
-					'Fault currents {:.2f} seconds after application completed in {:.2f} seconds'
-				).format(fault_time, time.time() - _t)
-			)
+			for study in studies:
+				lll = study == constants.GUI.iec_3ph
+				lg = study == constants.GUI.iec_lg
+				with instrumentation.span(constants.Instrumentation.span_iec, fault_time=fault_time, lll=lll, lg=lg):
+					dfs[study].append(self.fault_study(fault_time=fault_time, lll=lll, lg=lg))
 
-		df = pd.concat(dfs, axis=1, keys=fault_times)
-		df = self.process_combined_results(df)
-		df = self.add_busbar_data(df)
-		return df
+		return dict((study, pd.concat(dfs[study], axis=1, keys=fault_times)) for study in studies)
 
 	def process_combined_results(self, df):
 		"""
@@ -0,0 +1,270 @@
+"""
+#######################################################################################################################
+###											PSSE G74 Fault Studies													###
+###		Study service with long running worker processes which keep PSSE initialised between fault studies			###
+###																													###
+###		Code developed by David Mills (david.mills@PSCconsulting.com, +44 7899 984158) as part of PSC 		 		###
+###		project JK7938 - SHEPD - studies and automation																###
+###																													###
+#######################################################################################################################
+"""
+
+import os
+import time
+import Queue
+import logging
+import multiprocessing
+
+import g74
+import g74.batch as batch
+import g74.mock_psse as mock_psse
+import g74.constants as constants
+
+
+def psse_session():
+	"""
+		Initialises PSSE in the worker process, this is only done once and then reused for every study
+	:return g74.psse.PsseControl psse_control:
+	"""
+	psse_control = g74.psse.PsseControl()
+	# PSSE will already be available if a stand in backend has been installed
+	if 'psspy' not in g74.psse.__dict__:
+		g74.psse.InitialisePsspy().initialise_psse(running_from_psse=psse_control.run_in_psse)
+	return psse_control
+
+
+def mock_psse_session():
+	"""
+		Installs the stand in PSSE backend in the worker process so the service can be used without PSSE
+	:return g74.psse.PsseControl psse_control:
+	"""
+	mock_psse.install()
+	return psse_session()
+
+
+def study_job(session, job):
+	"""
+		Runs the fault study for a job using the PSSE session of the worker process
+	:param dict session:  Details of the worker with the keys psse, logger and output_folder
+	:param dict job:  Case to study with the keys in constants.Batch
+	:return (dict, dict) (summary, results):  See g74.batch.run_case
+	"""
+	summary, results = batch.run_case(
+		case=job, psse_control=session['psse'], logger=session['logger'], output_folder=session['output_folder']
+	)
+	summary[constants.Service.key_worker] = os.getpid()
+	return summary, results
+
+
+def service_worker(jobs, results, output_folder, initialiser, worker):
+	"""
+		Long running worker process which initialises PSSE once and then runs each job from the queue until it is
+		told to stop
+	:param multiprocessing.Queue jobs:  (job_id, job) for each job to run, None to stop the worker
+	:param multiprocessing.Queue results:  (job_id, success, result or error message) is added for each job
+	:param str output_folder:  Folder for the results and log files
+	:param initialiser:  Function that initialises PSSE and returns the session used for every job
+	:param worker:  Function that takes the session and a job and returns the result
+	:return None:
+	"""
+	# Worker processes are not able to start their own worker processes
+	constants.Parallel.processes = 1
+	logger = g74.Logger(
+		pth_logs=os.path.join(output_folder, constants.Batch.logs_folder),
+		uid='{}_{}'.format(constants.Service.uid, os.getpid()), debug=constants.DEBUG_MODE
+	)
+
+	t0 = time.time()
+	session = dict(psse=initialiser(), logger=logger, output_folder=output_folder)
+	logger.info('PSSE initialised in worker process {} in {:.2f} seconds'.format(os.getpid(), time.time() - t0))
+
+	while True:
+		task = jobs.get()
+		if task is None:
+			break
+		job_id, job = task
+		try:
+			results.put((job_id, True, worker(session, job)))
+		except Exception as error:
+			logger.error('Job {} failed in worker process {} with the error: {}'.format(job_id, os.getpid(), error))
+			results.put((job_id, False, str(error)))
+
+	return None
+
+
+class StudyService:
+	"""
+		Keeps a number of worker processes running, each of which initialises PSSE once, so that fault studies
+		submitted back to back do not have to initialise PSSE again.  The SAV case is still loaded for each study
+		since the study makes changes to the case loaded in PSSE.
+
+		The initialiser and worker are pluggable so that a stand in backend can be used, e.g.
+			with StudyService(output_folder=folder, processes=2) as service:
+				job_ids = [service.submit(sav_case=pth) for pth in sav_cases]
+				summaries = [service.result(job_id=job_id)[0] for job_id in job_ids]
+	"""
+	def __init__(
+			self, output_folder, processes=constants.Service.processes, initialiser=psse_session, worker=study_job
+	):
+		"""
+		:param str output_folder:  Folder for the results and log files
+		:param int processes: (optional) - Number of worker processes, each requires a PSSE licence
+		:param initialiser: (optional) - Function that initialises PSSE and returns the session used for every job,
+							must be defined at module level so it can be pickled
+		:param worker: (optional) - Function that takes the session and a job and returns (summary, results), must
+							be defined at module level so it can be pickled
+		"""
+		self.logger = logging.getLogger(constants.Logging.logger_name)
+		self.output_folder = output_folder
+		if not os.path.isdir(os.path.join(output_folder, constants.Batch.logs_folder)):
+			os.makedirs(os.path.join(output_folder, constants.Batch.logs_folder))
+
+		self.jobs = multiprocessing.Queue()
+		self.results = multiprocessing.Queue()
+		self.workers = [
+			multiprocessing.Process(
+				target=service_worker, args=(self.jobs, self.results, output_folder, initialiser, worker)
+			)
+			for _ in range(max(1, int(processes)))
+		]
+		for process in self.workers:
+			process.daemon = True
+			process.start()
+
+		# Jobs which have been submitted and results received but not yet returned
+		self.job_count = 0
+		self.pending = set()
+		self.completed = dict()
+		self.logger.info('Study service started with {} worker processes'.format(len(self.workers)))
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+	def submit(
+			self, sav_case, buses=list(), fault_times=constants.Batch.default_fault_times,
+			studies=constants.Batch.default_studies, excel=constants.Export.excel, name=None,
+			engine=constants.Batch.default_engine
+	):
+		"""
+			Adds a fault study to the queue to be run by the next available worker process
+		:param str sav_case:  Full path to the SAV case to study
+		:param list buses: (optional) - Busbars to fault, if empty then all busbars are faulted
+		:param list fault_times: (optional) - Fault times to study
+		:param list studies: (optional) - Studies from constants.GUI.fault_types to carry out
+		:param bool excel: (optional) - If False then the results are not written to an Excel workbook
+		:param str name: (optional=None) - Name used for the Excel workbook, if None then based on the SAV case
+		:param str engine: (optional) - Engine from constants.ShortCircuit.engines for the 3 phase fault study
+		:return int job_id:  Identifier used to get the result
+		"""
+		c = constants.Batch
+		if not os.path.isfile(sav_case):
+			self.logger.critical('The SAV case {} submitted to the study service does not exist'.format(sav_case))
+			raise ValueError('SAV case does not exist')
+		unknown = [x for x in studies if x not in constants.GUI.fault_types]
+		if unknown:
+			self.logger.critical(
+				'The studies {} submitted to the study service are not recognised'.format(', '.join(unknown))
+			)
+			raise ValueError('Unrecognised study')
+		if engine not in constants.ShortCircuit.engines:
+			self.logger.critical('The engine {} submitted to the study service is not recognised'.format(engine))
+			raise ValueError('Unrecognised engine')
+
+		self.job_count += 1
+		job_id = self.job_count
+		if name is None:
+			name = '{}_{}'.format(os.path.splitext(os.path.basename(sav_case))[0], job_id)
+		job = {
+			c.name: name,
+			c.sav_case: os.path.abspath(sav_case),
+			c.buses: [int(x) for x in buses],
+			c.fault_times: [float(x) for x in fault_times],
+			c.studies: list(studies),
+			c.excel: excel,
+			c.engine: engine
+		}
+		self.jobs.put((job_id, job))
+		self.pending.add(job_id)
+		self.logger.debug('Job {} submitted to the study service for the SAV case {}'.format(job_id, sav_case))
+		return job_id
+
+	def receive(self):
+		"""
+			Receives the next result from the worker processes
+		:return bool received:  False if no result was received before the poll interval
+		"""
+		try:
+			job_id, success, result = self.results.get(timeout=constants.Service.poll_seconds)
+		except Queue.Empty:
+			return False
+		self.pending.discard(job_id)
+		self.completed[job_id] = (success, result)
+		return True
+
+	def result(self, job_id, timeout=None):
+		"""
+			Waits for a job to be completed and returns the result
+		:param int job_id:  Identifier returned by submit
+		:param float timeout: (optional=None) - Maximum number of seconds to wait, if None then waits until complete
+		:return (dict, dict) (summary, results):  Summary of the study and the results for each type of fault study
+		"""
+		if job_id not in self.pending and job_id not in self.completed:
+			self.logger.critical('Job {} has not been submitted to the study service'.format(job_id))
+			raise ValueError('Unknown job')
+
+		t0 = time.time()
+		while job_id not in self.completed:
+			if not self.receive():
+				if not any(process.is_alive() for process in self.workers):
+					self.logger.critical('All study service worker processes have stopped')
+					raise ValueError('Study service stopped')
+				if timeout is not None and time.time() - t0 > timeout:
+					self.logger.critical('Job {} not completed within {} seconds'.format(job_id, timeout))
+					raise ValueError('Job timed out')
+
+		success, result = self.completed.pop(job_id)
+		if not success:
+			self.logger.critical('Job {} failed with the error: {}'.format(job_id, result))
+			raise ValueError('Job failed')
+
+		summary, results = result
+		summary[constants.Service.key_job] = job_id
+		return summary, results
+
+	def close(self, timeout=None):
+		"""
+			Stops the worker processes once they have finished any jobs already submitted
+		:param float timeout: (optional=None) - Maximum number of seconds to wait for the jobs already submitted, if
+							None then waits until they are complete.  Any worker still running is then terminated.
+		:return None:
+		"""
+		# Each worker stops when it takes a request to stop and so only one is needed for each worker
+		running = [process for process in self.workers if process.is_alive()]
+		for _ in running:
+			self.jobs.put(None)
+
+		# Results are received while waiting since a worker cannot stop until its results have been taken
+		t0 = time.time()
+		while any(process.is_alive() for process in running):
+			if timeout is not None and time.time() - t0 > timeout:
+				break
+			self.receive()
+		while self.receive():
+			pass
+
+		for process in self.workers:
+			process.join(timeout=constants.Service.poll_seconds)
+			if process.is_alive():
+				self.logger.warning(
+					'Study service worker process {} did not stop within {} seconds and has been terminated'.format(
+						process.pid, timeout
+					)
+				)
+				process.terminate()
+				process.join()
+		self.workers = list()
+		self.logger.info('Study service stopped')
+		return None
@@ -0,0 +1,751 @@
+"""
+#######################################################################################################################
+###											PSSE G74 Fault Studies													###
+###		Native short circuit solver that calculates the fault currents using sparse matrices.  This is the engine	###
+###		behind the stand in PSSE backend used for testing and benchmarking without PSSE and can be selected in		###
+###		place of the PSSE BKDY fault study for the G74 3 phase fault studies (constants.ShortCircuit.engine)		###
+###																													###
+###		Code developed by David Mills (david.mills@PSCconsulting.com, +44 7899 984158) as part of PSC 		 		###
+###		project JK7938 - SHEPD - studies and automation																###
+###																													###
+#######################################################################################################################
+"""
+
+import json
+import math
+import logging
+
+import numpy as np
+import pandas as pd
+import scipy.sparse
+import scipy.sparse.csgraph
+import scipy.sparse.linalg
+
+import g74.constants as constants
+import g74.psse as psse
+
+
+def symbolic_factor(y_lower):
+	"""
+		Determines the structure of each column of the lower triangular factor of a symmetric matrix, including the
+		fill in, from the structure of the matrix.  The structure of a column is the structure of the matrix below the
+		diagonal combined with the structure of its children in the elimination tree.
+	:param scipy.sparse.csc_matrix y_lower:  Lower triangular part of the matrix, excluding the diagonal, in the order
+							it is factorised
+	:return (list, np.ndarray) (structure, parent):  Rows below the diagonal in each column of the factor in ascending
+							order and the parent of each column in the elimination tree (-1 for the root of each tree)
+	"""
+	n = y_lower.shape[0]
+	structure = [None] * n
+	children = [list() for _ in range(n)]
+	parent = np.full(n, -1, dtype=int)
+	for i in range(n):
+		rows = set(y_lower.indices[y_lower.indptr[i]:y_lower.indptr[i + 1]].tolist())
+		for child in children[i]:
+			rows.update(structure[child])
+		rows.discard(i)
+		structure[i] = sorted(rows)
+		if rows:
+			parent[i] = structure[i][0]
+			children[parent[i]].append(i)
+		# Structure of the children is no longer needed by this column
+		children[i] = None
+
+	return structure, parent
+
+
+def selected_inverse_diagonal(y, positions):
+	"""
+		Calculates the diagonal entries of the inverse of a sparse complex symmetric matrix for the requested positions
+		using the Takahashi recursion on the LDL' factors.  The entries of the inverse are only calculated within the
+		structure of the factors and only for the columns on the path from each requested position to the root of the
+		elimination tree, so neither the inverse nor a dense right hand side is ever formed.  For the meshed and radial
+		networks studied the time and memory therefore scale with the number of non-zero entries in the factors.
+	:param scipy.sparse.csc_matrix y:  Complex symmetric matrix
+	:param np.ndarray positions:  Positions in the matrix to return the diagonal entry of the inverse for
+	:return np.ndarray z:  Diagonal entries of the inverse or None if the matrix is not symmetric or could not be
+							factorised without pivoting off the diagonal
+	"""
+	if (y != y.T).nnz > 0:
+		return None
+
+	# Diagonal pivots are required so that the factors are L D L' with the same ordering for the rows and columns
+	lu = scipy.sparse.linalg.splu(
+		y, permc_spec=constants.ShortCircuit.ordering, diag_pivot_thresh=0.0, options=dict(SymmetricMode=True)
+	)
+	if not np.array_equal(lu.perm_r, lu.perm_c):
+		return None
+	order = lu.perm_c
+	unordered = np.empty(len(order), dtype=int)
+	unordered[order] = np.arange(len(order))
+	structure, parent = symbolic_factor(scipy.sparse.tril(y[unordered, :][:, unordered], k=-1, format='csc'))
+	factor_l = lu.L.tocsc()
+	factor_d = lu.U.diagonal()
+
+	# Columns on the path from each requested position to the root of the elimination tree
+	needed = np.zeros(len(order), dtype=bool)
+	for i in order[positions]:
+		while i != -1 and not needed[i]:
+			needed[i] = True
+			i = parent[i]
+
+	# Diagonal and the entries below the diagonal of each column of the inverse that has been calculated
+	z_diag = np.zeros(len(order), dtype=complex)
+	z_columns = [None] * len(order)
+	for i in np.flatnonzero(needed)[::-1]:
+		rows = np.array(structure[i], dtype=int)
+		if len(rows) == 0:
+			z_diag[i] = 1.0 / factor_d[i]
+			continue
+
+		# Entries of the factor which are numerically zero are not stored and so are placed within the structure
+		l_rows = factor_l.indices[factor_l.indptr[i]:factor_l.indptr[i + 1]]
+		l_values = factor_l.data[factor_l.indptr[i]:factor_l.indptr[i + 1]][l_rows > i]
+		l_rows = l_rows[l_rows > i]
+		l_positions = rows.searchsorted(l_rows)
+		if (l_positions >= len(rows)).any() or (rows[np.minimum(l_positions, len(rows) - 1)] != l_rows).any():
+			return None
+		l_column = np.zeros(len(rows), dtype=complex)
+		l_column[l_positions] = l_values
+
+		# Entries of the inverse between the rows of this column, these are all in later columns which have already
+		# been calculated
+		z_block = np.empty((len(rows), len(rows)), dtype=complex)
+		z_block[np.arange(len(rows)), np.arange(len(rows))] = z_diag[rows]
+		for j, k in enumerate(rows[:-1]):
+			k_rows, k_values = z_columns[k]
+			values = k_values[k_rows.searchsorted(rows[j + 1:])]
+			z_block[j + 1:, j] = values
+			z_block[j, j + 1:] = values
+
+		z_column = -z_block.dot(l_column)
+		z_diag[i] = 1.0 / factor_d[i] - l_column.dot(z_column)
+		z_columns[i] = (rows, z_column)
+
+	return z_diag[order[positions]]
+
+
+def impedance_diagonal(y_series, y_shunt, positions, batch_size=constants.ShortCircuit.batch_size):
+	"""
+		Calculates the diagonal entries of the impedance matrix (inverse of the admittance matrix) for the requested
+		busbars only using selected_inverse_diagonal.  If the admittance matrix cannot be factorised for that then it
+		is factorised with pivoting and solved for a batch of unit vectors at a time instead, with the batch limited so
+		that the right hand side is no more than constants.ShortCircuit.max_batch_values.  Busbars in islands with no
+		path to ground are returned with an infinite impedance.
+	:param scipy.sparse.csc_matrix y_series:  Admittance matrix of the branches between busbars
+	:param np.ndarray y_shunt:  Admittance to ground at each busbar
+	:param np.ndarray positions:  Positions of the busbars in the admittance matrix
+	:param int batch_size: (optional) - Maximum number of busbars solved for at the same time if the batched solve is
+							needed
+	:return np.ndarray z:  Diagonal impedance for each busbar
+	"""
+	y = y_series + scipy.sparse.diags(y_shunt, format='csc')
+
+	# Busbars in islands without a path to ground cannot be solved and so are removed
+	_, labels = scipy.sparse.csgraph.connected_components(abs(y), directed=False)
+	grounded = np.flatnonzero(np.in1d(labels, np.unique(labels[y_shunt != 0])))
+	# Position of each busbar in the reduced matrix
+	reduced = np.full(y.shape[0], -1, dtype=int)
+	reduced[grounded] = np.arange(len(grounded))
+
+	z = np.full(len(positions), np.inf + 0j, dtype=complex)
+	if len(grounded) == 0:
+		return z
+
+	y = y[grounded, :][:, grounded].tocsc()
+	positions = reduced[positions]
+	to_solve = np.flatnonzero(positions >= 0)
+
+	z_selected = selected_inverse_diagonal(y=y, positions=positions[to_solve])
+	if z_selected is not None:
+		z[to_solve] = z_selected
+		return z
+
+	logger = logging.getLogger(constants.Logging.logger_name)
+	logger.debug(
+		'Admittance matrix could not be factorised with diagonal pivots and so the impedances are solved in batches'
+	)
+	lu = scipy.sparse.linalg.splu(y)
+	batch_size = max(1, min(batch_size, constants.ShortCircuit.max_batch_values // y.shape[0]))
+	for start in range(0, len(to_solve), batch_size):
+		batch = to_solve[start:start + batch_size]
+		columns = np.arange(len(batch))
+		rhs = np.zeros((y.shape[0], len(batch)), dtype=complex)
+		rhs[positions[batch], columns] = 1.0
+		z[batch] = lu.solve(rhs)[positions[batch], columns]
+
+	return z
+
+
+class NetworkModel:
+	"""
+		Busbar, branch, machine and load data needed for the short circuit calculations.  Can either be populated from
+		a network description (JSON) file which does not need PSSE or from the SAV case loaded in PSSE.  Three winding
+		transformers cannot be represented and so SAV cases which contain them are rejected.
+
+		All impedances are in p.u., branch impedances are on the system base and machine impedances are on the
+		machine base.
+	"""
+	def __init__(
+			self, buses, branches, machines=None, loads=None, zero_sequence_shunts=None,
+			base_mva=constants.PSSE.base_mva
+	):
+		"""
+		:param pd.DataFrame buses:  Busbar data with the columns in constants.ShortCircuit.bus_columns
+		:param pd.DataFrame branches:  Branch data with the columns in constants.ShortCircuit.branch_columns and
+									optionally the zero sequence impedance
+		:param pd.DataFrame machines: (optional) - Machine data with the columns in
+									constants.ShortCircuit.machine_columns and optionally the negative and zero
+									sequence impedances
+		:param pd.DataFrame loads: (optional) - Load data with the columns in constants.ShortCircuit.load_columns
+		:param pd.DataFrame zero_sequence_shunts: (optional) - Zero sequence impedance to ground at busbars, for example
+									earthed transformer windings, with the columns in
+									constants.ShortCircuit.zero_sequence_shunt_columns
+		:param float base_mva: (optional=100.0) - System base MVA
+		"""
+		self.logger = logging.getLogger(constants.Logging.logger_name)
+		self.c = constants.ShortCircuit
+
+		self.base_mva = float(base_mva)
+		self.df_buses = self.table(buses, self.c.bus_columns)
+		self.df_buses['bus'] = self.df_buses['bus'].astype(int)
+		self.df_buses.index = self.df_buses['bus']
+		self.df_branches = self.table(branches, self.c.branch_columns, self.c.branch_sequence_columns)
+		self.df_machines = self.table(machines, self.c.machine_columns, self.c.machine_sequence_columns)
+		self.df_loads = self.table(loads, self.c.load_columns)
+		self.df_zero_sequence_shunts = self.table(zero_sequence_shunts, self.c.zero_sequence_shunt_columns)
+
+		# Check all the busbars referred to exist
+		referenced_buses = pd.concat([
+			self.df_branches['from_bus'], self.df_branches['to_bus'], self.df_machines['bus'], self.df_loads['bus'],
+			self.df_zero_sequence_shunts['bus']
+		])
+		missing_buses = set(referenced_buses) - set(self.df_buses.index)
+		if missing_buses:
+			self.logger.critical(
+				'The following busbars are referred to in the network description but are not defined: {}'.format(
+					sorted(missing_buses)
+				)
+			)
+			raise ValueError('Busbars missing from network description')
+
+	@staticmethod
+	def table(data, columns, optional_columns=tuple()):
+		"""
+			Converts the input data into a DataFrame with the expected columns
+		:param data:  DataFrame or list of dictionaries, if None then an empty DataFrame is returned
+		:param tuple columns:  Columns expected in the table
+		:param tuple optional_columns: (optional) - Columns which are populated with NaN if not provided
+		:return pd.DataFrame df:
+		"""
+		if data is None:
+			data = list()
+		df = pd.DataFrame(data)
+		missing_columns = [col for col in columns if col not in df.columns]
+		if missing_columns and not df.empty:
+			raise ValueError('Network description table is missing the columns {}'.format(missing_columns))
+		return df.reindex(columns=columns + optional_columns).reset_index(drop=True)
+
+	@classmethod
+	def from_json(cls, pth):
+		"""
+			Produces the network model from a network description (JSON) file in the format:
+				{
+					"base_mva": 100.0,
+					"buses": [{"bus": 1, "name": "A", "nominal_kv": 33.0, "voltage_pu": 1.0}, ...],
+					"branches": [{"from_bus": 1, "to_bus": 2, "r": 0.01, "x": 0.1, "b": 0.0, "status": 1}, ...],
+					"machines": [
+						{"bus": 1, "id": "1", "mva": 100.0, "r": 0.0, "x_subtr": 0.2, "x_trans": 0.3, "x_synch": 1.5},
+						...
+					],
+					"loads": [{"bus": 2, "mva": 5.0}, ...],
+					"zero_sequence_shunts": [{"bus": 2, "r": 0.0, "x": 0.5}, ...]
+				}
+			Branches can also include "r0" and "x0" and machines "r2", "x2", "r0" and "x0" for the negative and zero
+			sequence networks.
+		:param str pth:  Full path to the network description
+		:return NetworkModel model:
+		"""
+		with open(pth, 'r') as f:
+			data = json.load(f)
+		return cls.from_dict(data=data)
+
+	@classmethod
+	def from_dict(cls, data):
+		"""
+			Produces the network model from a dictionary in the same format as the network description file
+		:param dict data:
+		:return NetworkModel model:
+		"""
+		c = constants.ShortCircuit
+		return cls(
+			buses=data[c.key_buses],
+			branches=data.get(c.key_branches),
+			machines=data.get(c.key_machines),
+			loads=data.get(c.key_loads),
+			zero_sequence_shunts=data.get(c.key_zero_sequence_shunts),
+			base_mva=data.get(c.key_base_mva, constants.PSSE.base_mva)
+		)
+
+	def to_dict(self):
+		"""
+			Returns the network model as a dictionary in the same format as the network description file
+		:return dict data:
+		"""
+		c = self.c
+		return {
+			c.key_base_mva: self.base_mva,
+			c.key_buses: self.df_buses.to_dict(orient='records'),
+			c.key_branches: self.df_branches.to_dict(orient='records'),
+			c.key_machines: self.df_machines.to_dict(orient='records'),
+			c.key_loads: self.df_loads.to_dict(orient='records'),
+			c.key_zero_sequence_shunts: self.df_zero_sequence_shunts.to_dict(orient='records')
+		}
+
+	def to_json(self, pth):
+		"""
+			Writes the network model to a network description (JSON) file
+		:param str pth:  Full path to the file to write
+		:return None:
+		"""
+		with open(pth, 'w') as f:
+			json.dump(self.to_dict(), f, indent=1, default=lambda x: x.item())
+
+	@classmethod
+	def from_psse(cls):
+		"""
+			Produces the network model from the SAV case currently loaded in PSSE.  Three winding transformers are not
+			included in psse.BranchData and so the model would be missing branches if the SAV case contains any.
+		:return NetworkModel model:
+		"""
+		logger = logging.getLogger(constants.Logging.logger_name)
+		bus_data = psse.BusData()
+		branch_data = psse.BranchData()
+		three_winding = branch_data.three_winding_count()
+		if three_winding > 0:
+			logger.critical(
+				(
+					'The SAV case contains {} three winding transformers which cannot be represented in the native '
+					'short circuit model'
+				).format(three_winding)
+			)
+			raise ValueError('Three winding transformers not supported')
+
+		machine_data = psse.MachineData()
+		machine_data.update()
+		load_data = psse.LoadData()
+
+		c_bus = constants.Busbars
+		buses = pd.DataFrame({
+			'bus': bus_data.df[c_bus.bus].astype(int),
+			'name': bus_data.df[c_bus.bus_name].astype(str).str.strip(),
+			'nominal_kv': bus_data.df[c_bus.nominal].astype(float),
+			'voltage_pu': bus_data.df[c_bus.voltage].astype(float)
+		})
+
+		c_brn = constants.Branches
+		# Branch data is combined with the complex impedances and so only the real part is needed
+		columns = [c_brn.from_bus, c_brn.to_bus, c_brn.r, c_brn.x, c_brn.charging, c_brn.status]
+		df = branch_data.df[columns].apply(np.real)
+		branches = pd.DataFrame({
+			'from_bus': df[c_brn.from_bus].astype(int),
+			'to_bus': df[c_brn.to_bus].astype(int),
+			'r': df[c_brn.r].astype(float),
+			'x': df[c_brn.x].astype(float),
+			'b': df[c_brn.charging].astype(float),
+			'status': df[c_brn.status].astype(int)
+		})
+
+		c_mac = constants.Machines
+		machines = pd.DataFrame({
+			'bus': machine_data.df[c_mac.bus].astype(int),
+			'id': machine_data.df[c_mac.identifier].astype(str).str.strip(),
+			'mva': machine_data.df[c_mac.mbase].astype(float),
+			'r': machine_data.df[c_mac.rpos].astype(float),
+			'x_subtr': machine_data.df[c_mac.xsubtr].astype(float),
+			'x_trans': machine_data.df[c_mac.xtrans].astype(float),
+			'x_synch': machine_data.df[c_mac.xsynch].astype(float)
+		})
+
+		df_loads = load_data.summary()
+		loads = pd.DataFrame({
+			'bus': df_loads.index.astype(int),
+			'mva': df_loads[constants.Loads.load].astype(float).values
+		})
+
+		return cls(buses=buses, branches=branches, machines=machines, loads=loads)
+
+
+class ShortCircuitSolver:
+	"""
+		Calculates the 3 phase fault currents at every busbar by building the positive sequence admittance matrix,
+		factorising it and solving for the thevenin impedance of each faulted busbar.  The contribution from embedded
+		load is represented by an equivalent machine at each load in line with G74 with the same parameters and
+		decrement as used by G74FaultInfeed.
+	"""
+	def __init__(self, model, batch_size=constants.ShortCircuit.batch_size):
+		"""
+		:param NetworkModel model:  Network to carry out the fault studies on
+		:param int batch_size: (optional) - Number of busbars solved for at the same time if the admittance matrix
+							cannot be factorised for the selected inverse
+		"""
+		self.logger = logging.getLogger(constants.Logging.logger_name)
+		self.model = model
+		self.batch_size = batch_size
+
+		# Lookup from busbar number to position in the admittance matrix
+		self.bus_index = pd.Index(self.model.df_buses['bus'].astype(int))
+
+		# Branch admittances only need calculating once
+		self.y_branches = self.branch_admittance_matrix()
+
+		# Equivalent machines representing the embedded load
+		self.df_load_machines = self.load_machine_parameters()
+
+	def bus_positions(self, buses):
+		"""
+			Returns the positions of the busbars in the admittance matrix
+		:param buses:  List of busbar numbers
+		:return np.ndarray positions:
+		"""
+		return self.bus_index.get_indexer(pd.Index(buses).astype(int))
+
+	def branch_admittance_matrix(self, r='r', x='x'):
+		"""
+			Produces the sparse admittance matrix for the in-service branches.  Line charging is ignored in line with the
+			IEC calculation and transformers are at nominal ratio with no phase shift (see
+			constants.ShortCircuit.native_engine_note).
+		:param str r: (optional='r') - Column with the branch resistance for the sequence network
+		:param str x: (optional='x') - Column with the branch reactance for the sequence network
+		:return scipy.sparse.csc_matrix y:
+		"""
+		df = self.model.df_branches
+		# Branches without an impedance in this sequence network are not connected
+		df = df[(df['status'].astype(int) > 0) & df[r].notnull() & df[x].notnull()]
+
+		n = len(self.bus_index)
+		i = self.bus_positions(df['from_bus'])
+		j = self.bus_positions(df['to_bus'])
+		y = 1.0 / (df[r].values.astype(float) + 1j * df[x].values.astype(float))
+
+		rows = np.concatenate((i, j, i, j))
+		cols = np.concatenate((i, j, j, i))
+		data = np.concatenate((y, y, -y, -y))
+		return scipy.sparse.csc_matrix((data, (rows, cols)), shape=(n, n), dtype=complex)
+
+	def load_machine_parameters(self):
+		"""
+			Calculates the base and resistance of the equivalent machine representing the embedded load at each busbar,
+			using the same 11 kV and 33 kV parameters as G74FaultInfeed.calculate_machine_mva_values
+		:return pd.DataFrame df:  Equivalent machines with the columns bus, mva, r, tx_x and the negative and zero
+								sequence impedances
+		"""
+		c = constants.G74
+		df_loads = self.model.df_loads
+		if df_loads.empty:
+			return pd.DataFrame(columns=('bus', 'mva', 'r', 'tx_x', 'r2', 'x2', 'r0', 'x0'))
+
+		# Total load at each busbar, loads below the minimum value are ignored
+		df = df_loads.groupby('bus')['mva'].sum()
+		df = df[df > c.min_load_mva]
+		nominal = self.model.df_buses.loc[df.index, 'nominal_kv'].astype(float).values
+
+		is_33 = nominal > 11.0
+		m = constants.Machines
+		return pd.DataFrame({
+			'bus': df.index.astype(int),
+			'mva': np.where(is_33, c.mva_33, c.mva_11) * df.values,
+			'r': np.where(is_33, c.parameters_33[m.rpos], c.parameters_11[m.rpos]),
+			'tx_x': np.where(is_33, c.parameters_33[m.tx_x], c.parameters_11[m.tx_x]),
+			# Negative and zero sequence values are not updated with fault time
+			'r2': np.where(is_33, c.parameters_33[m.rneg], c.parameters_11[m.rneg]),
+			'x2': np.where(is_33, c.parameters_33[m.xneg], c.parameters_11[m.xneg]),
+			'r0': np.where(is_33, c.parameters_33[m.rzero], c.parameters_11[m.rzero]),
+			'x0': np.where(is_33, c.parameters_33[m.xzero], c.parameters_11[m.xzero])
+		})
+
+	def machine_admittances(self, fault_time):
+		"""
+			Calculates the admittance to ground at each busbar from the machines and the equivalent machines
+			representing the embedded load at the fault time.  Machines are represented by their subtransient
+			impedance whereas the equivalent machines decay in line with G74.
+		:param float fault_time:  Time after the fault in seconds
+		:return np.ndarray y:  Admittance (p.u. on system base) to ground at each busbar
+		"""
+		n = len(self.bus_index)
+		base_mva = self.model.base_mva
+		y = np.zeros(n, dtype=complex)
+
+		df = self.model.df_machines
+		if not df.empty:
+			z = (df['r'].values.astype(float) + 1j * df['x_subtr'].values.astype(float))
+			z = z * base_mva / df['mva'].values.astype(float)
+			np.add.at(y, self.bus_positions(df['bus']), 1.0 / z)
+
+		df = self.df_load_machines
+		if not df.empty:
+			# Same calculation as G74FaultInfeed.calculate_machine_impedance
+			x = psse.G74FaultInfeed.reactance_at_fault_time(fault_time=fault_time) - df['tx_x'].values
+			z = (df['r'].values + 1j * x) * base_mva / df['mva'].values
+			np.add.at(y, self.bus_positions(df['bus']), 1.0 / z)
+
+		return y
+
+	def thevenin_impedances(self, fault_time, buses):
+		"""
+			Calculates the thevenin impedance at each of the busbars by factorising the admittance matrix once and then
+			calculating only the entries of the impedance matrix needed for its diagonal.  Busbars which are not
+			connected to any source are returned with an infinite impedance.
+		:param float fault_time:  Time after the fault in seconds
+		:param list buses:  Busbars to return the impedance for
+		:return np.ndarray z:  Thevenin impedance (p.u. on system base) of each busbar
+		"""
+		return impedance_diagonal(
+			y_series=self.y_branches, y_shunt=self.machine_admittances(fault_time=fault_time),
+			positions=self.bus_positions(buses), batch_size=self.batch_size
+		)
+
+	def calculate_fault_currents(self, fault_times, buses=None):
+		"""
+			Calculates the 3 phase fault currents at every fault time and returns them in the same format as
+			BkdyFaultStudy.combine_bkdy_output.  Ik'', the peak and the DC decay are based on the thevenin impedance at
+			0.0 seconds whereas the symmetrical break current is based on the thevenin impedance at the fault time.  The
+			peak is calculated in the same way as BKDY (sqrt(2) x Ik'' + DC at the fault time) rather than with the IEC
+			60909 kappa factor.
+
+			Unlike BKDY the machines in the model are represented by their subtransient impedance at every fault time
+			(see constants.ShortCircuit.native_engine_note), only the equivalent machines for the embedded load decay.
+		:param list fault_times:  Fault times in seconds
+		:param list buses: (optional=None) - Busbars to fault, if None then all busbars are faulted
+		:return pd.DataFrame df:  Results with the fault time as the first level of the columns
+		"""
+		c = constants.BkdyFileOutput
+		if buses is None:
+			buses = self.bus_index.tolist()
+
+		df_buses = self.model.df_buses.loc[buses]
+		v_prefault = df_buses['voltage_pu'].values.astype(float)
+		# Base current at each busbar converted to the output units
+		i_base = self.model.base_mva / (3**0.5 * df_buses['nominal_kv'].values.astype(float))
+		i_base = i_base * 1000.0 / c.num_to_kA
+
+		# Initial values are based on the thevenin impedance at the time of fault
+		z0 = self.thevenin_impedances(fault_time=constants.G74.min_fault_time, buses=buses)
+		ik11 = v_prefault / np.abs(z0) * i_base
+		# Busbars which could not be solved have no fault current
+		solved = np.isfinite(z0)
+		r_x = np.zeros(len(buses))
+		r_x[solved] = z0.real[solved] / z0.imag[solved]
+
+		dfs = list()
+		for fault_time in fault_times:
+			if fault_time == constants.G74.min_fault_time:
+				z = z0
+			else:
+				z = self.thevenin_impedances(fault_time=fault_time, buses=buses)
+			ibsym = v_prefault / np.abs(z) * i_base
+			idc = 2**0.5 * ik11 * np.exp(-2.0 * math.pi * constants.ShortCircuit.frequency * fault_time * r_x)
+
+			df = pd.DataFrame(index=pd.Index(buses))
+			df[c.ik11] = ik11
+			df[c.ibsym] = ibsym
+			df[c.ibasym] = (ibsym**2 + idc**2)**0.5
+			df[c.idc] = idc
+			# Peak current in line with the TOT PEAK value in the BKDY report for the initial study
+			df[c.ip] = 2**0.5 * ik11 + idc
+			df[c.r] = np.where(solved, z.real, np.nan)
+			df[c.x] = np.where(solved, z.imag, np.nan)
+			df[c.v_prefault] = v_prefault
+			dfs.append(df)
+
+			self.logger.debug(
+				'Native fault current calculation for {} busbars completed for {:.2f} seconds'.format(
+					len(buses), fault_time
+				)
+			)
+
+		return pd.concat(dfs, axis=1, keys=fault_times)
+
+
+class SequenceFaultSolver(ShortCircuitSolver):
+	"""
+		Calculates single line to ground fault currents from the positive, negative and zero sequence networks.  Only
+		the diagonal entries of each sequence impedance matrix are calculated for the busbars being faulted.
+
+		Machines without a negative sequence impedance use their subtransient impedance and machines without a zero
+		sequence impedance are assumed to be unearthed.  Branches without a zero sequence impedance are not connected
+		in the zero sequence network.
+	"""
+	def __init__(self, model, batch_size=constants.ShortCircuit.batch_size):
+		"""
+		:param NetworkModel model:  Network to carry out the fault studies on
+		:param int batch_size: (optional) - Number of busbars solved for at the same time if the admittance matrix
+							cannot be factorised for the selected inverse
+		"""
+		ShortCircuitSolver.__init__(self, model=model, batch_size=batch_size)
+
+		# Negative sequence branch impedances are the same as the positive sequence
+		self.y_branches_zero = self.branch_admittance_matrix(r='r0', x='x0')
+
+		# Negative and zero sequence impedances do not vary with fault time
+		self.y_shunt_negative = self.sequence_admittances(r='r2', x='x2', default_r='r', default_x='x_subtr')
+		self.y_shunt_zero = self.sequence_admittances(r='r0', x='x0')
+
+		df = self.model.df_zero_sequence_shunts
+		if not df.empty:
+			z = df['r'].values.astype(float) + 1j * df['x'].values.astype(float)
+			np.add.at(self.y_shunt_zero, self.bus_positions(df['bus']), 1.0 / z)
+
+		# Negative and zero sequence impedances of the busbars already solved for
+		self.z_negative = pd.Series(dtype=complex)
+		self.z_zero = pd.Series(dtype=complex)
+
+	def sequence_admittances(self, r, x, default_r=None, default_x=None):
+		"""
+			Calculates the negative or zero sequence admittance to ground at each busbar from the machines and the
+			equivalent machines representing the embedded load
+		:param str r:  Column with the machine resistance for the sequence network
+		:param str x:  Column with the machine reactance for the sequence network
+		:param str default_r: (optional=None) - Column used if the resistance is not provided, if None then the machine
+							is not connected in the sequence network
+		:param str default_x: (optional=None) - Column used if the reactance is not provided
+		:return np.ndarray y:  Admittance (p.u. on system base) to ground at each busbar
+		"""
+		y = np.zeros(len(self.bus_index), dtype=complex)
+		base_mva = self.model.base_mva
+
+		df = self.model.df_machines
+		if not df.empty:
+			r_values = df[r].astype(float)
+			x_values = df[x].astype(float)
+			if default_r is not None:
+				r_values = r_values.fillna(df[default_r].astype(float))
+				x_values = x_values.fillna(df[default_x].astype(float))
+			connected = (r_values.notnull() & x_values.notnull()).values
+			z = (r_values.values + 1j * x_values.values)[connected]
+			z = z * base_mva / df['mva'].values.astype(float)[connected]
+			np.add.at(y, self.bus_positions(df['bus'][connected]), 1.0 / z)
+
+		df = self.df_load_machines
+		if not df.empty:
+			z = (df[r].values + 1j * df[x].values) * base_mva / df['mva'].values
+			np.add.at(y, self.bus_positions(df['bus']), 1.0 / z)
+
+		return y
+
+	def fixed_impedances(self, buses):
+		"""
+			Returns the negative and zero sequence thevenin impedances at each busbar.  These do not vary with fault
+			time and so the admittance matrices are only solved for busbars which have not already been solved.
+		:param list buses:  Busbars to return the impedance for
+		:return (np.ndarray, np.ndarray) (z2, z0):
+		"""
+		buses = pd.Index(buses).astype(int)
+		missing = buses.difference(self.z_negative.index)
+		if len(missing) > 0:
+			positions = self.bus_positions(missing)
+			z2 = impedance_diagonal(
+				y_series=self.y_branches, y_shunt=self.y_shunt_negative, positions=positions, batch_size=self.batch_size
+			)
+			z0 = impedance_diagonal(
+				y_series=self.y_branches_zero, y_shunt=self.y_shunt_zero, positions=positions,
+				batch_size=self.batch_size
+			)
+			self.z_negative = self.z_negative.append(pd.Series(z2, index=missing))
+			self.z_zero = self.z_zero.append(pd.Series(z0, index=missing))
+
+		return self.z_negative.loc[buses].values, self.z_zero.loc[buses].values
+
+	def sequence_impedances(self, fault_time, buses):
+		"""
+			Calculates the positive, negative and zero sequence thevenin impedances at each busbar.  Only the positive
+			sequence is solved for each fault time.
+		:param float fault_time:  Time after the fault in seconds
+		:param list buses:  Busbars to return the impedance for
+		:return (np.ndarray, np.ndarray, np.ndarray) (z1, z2, z0):
+		"""
+		z1 = self.thevenin_impedances(fault_time=fault_time, buses=buses)
+		z2, z0 = self.fixed_impedances(buses=buses)
+		return z1, z2, z0
+
+	def fault_study(self, fault_time, buses=None, z_initial=None, impedances=None):
+		"""
+			Calculates the single line to ground fault current at every busbar for a single fault time and returns the
+			results in the same format as IecFaults.fault_study
+		:param float fault_time:  Time after the fault in seconds
+		:param list buses: (optional=None) - Busbars to fault, if None then all busbars are faulted
+		:param np.ndarray z_initial: (optional=None) - Total sequence impedance (z1+z2+z0) at 0.0 seconds used for Ik'',
+							the peak make and the DC decay, if None then calculated
+		:param tuple impedances: (optional=None) - (z1, z2, z0) already calculated for this fault time, if None then
+							calculated
+		:return pd.DataFrame df:
+		"""
+		c = constants.BkdyFileOutput
+		if buses is None:
+			buses = self.bus_index.tolist()
+
+		df_buses = self.model.df_buses.loc[buses]
+		v_prefault = df_buses['voltage_pu'].values.astype(float)
+		# Base current at each busbar converted to the output units
+		i_base = self.model.base_mva / (3**0.5 * df_buses['nominal_kv'].values.astype(float))
+		i_base = i_base * 1000.0 / c.num_to_kA
+
+		if impedances is None:
+			impedances = self.sequence_impedances(fault_time=fault_time, buses=buses)
+		z1, z2, z0 = impedances
+		z_total = z1 + z2 + z0
+		if z_initial is None:
+			z_initial = z_total
+
+		# Fault current is 3 times the zero sequence current
+		ibsym = 3.0 * v_prefault / np.abs(z_total) * i_base
+		ik11 = 3.0 * v_prefault / np.abs(z_initial) * i_base
+
+		# Peak and DC decay based on the X/R of the fault loop at the time of fault
+		solved = np.isfinite(z_initial)
+		r_x = np.zeros(len(buses))
+		r_x[solved] = z_initial.real[solved] / z_initial.imag[solved]
+		ip = (1.02 + 0.98 * np.exp(-3.0 * r_x)) * 2**0.5 * ik11
+		idc = 2**0.5 * ik11 * np.exp(-2.0 * math.pi * constants.ShortCircuit.frequency * fault_time * r_x)
+
+		solved = np.isfinite(z1)
+		df = pd.DataFrame(index=pd.Index(buses))
+		df[c.ik11] = ik11
+		df[c.ip] = ip
+		df[c.idc] = idc
+		df[c.ibsym] = ibsym
+		df[c.ibasym] = (ibsym**2 + idc**2)**0.5
+		# Impedance is the positive sequence thevenin impedance in line with IecFaults
+		df[c.r] = np.where(solved, z1.real, np.nan)
+		df[c.x] = np.where(solved, z1.imag, np.nan)
+
+		return df
+
+	def calculate_fault_currents(self, fault_times, buses=None):
+		"""
+			Calculates the single line to ground fault currents at every fault time and returns them in the same
+			format as the combined results in IecFaults.calculate_fault_currents before processing
+		:param list fault_times:  Fault times in seconds
+		:param list buses: (optional=None) - Busbars to fault, if None then all busbars are faulted
+		:return pd.DataFrame df:  Results with the fault time as the first level of the columns
+		"""
+		if buses is None:
+			buses = self.bus_index.tolist()
+
+		initial = self.sequence_impedances(fault_time=constants.G74.min_fault_time, buses=buses)
+		z_initial = sum(initial)
+
+		dfs = list()
+		for fault_time in fault_times:
+			# Solution at the time of fault has already been calculated
+			impedances = initial if fault_time == constants.G74.min_fault_time else None
+			dfs.append(
+				self.fault_study(fault_time=fault_time, buses=buses, z_initial=z_initial, impedances=impedances)
+			)
+			self.logger.debug(
+				'Native LG fault current calculation for {} busbars completed for {:.2f} seconds'.format(
+					len(buses), fault_time
+				)
+			)
+
+		return pd.concat(dfs, axis=1, keys=fault_times)
@@ -0,0 +1,392 @@
+"""
+#######################################################################################################################
+###											PSSE G74 Fault Studies													###
+###		Generates synthetic 132/33/11 kV networks of a chosen size along with the BKDY reports and IEC results		###
+###		that PSSE would produce for them so that each stage of the G74 fault studies can be benchmarked			###
+###																													###
+###		Code developed by David Mills (david.mills@PSCconsulting.com, +44 7899 984158) as part of PSC 		 		###
+###		project JK7938 - SHEPD - studies and automation																###
+###																													###
+#######################################################################################################################
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+import g74.constants as constants
+import g74.mock_psse as mock_psse
+import g74.short_circuit as short_circuit
+
+
+def series_admittance(y1, y2):
+	"""
+		Combines admittances in series, if either admittance is zero (open circuit) the result is zero
+	:param np.ndarray y1:
+	:param np.ndarray y2:
+	:return np.ndarray y:
+	"""
+	total = y1 + y2
+	y = np.zeros(len(total), dtype=complex)
+	connected = total != 0
+	y[connected] = y1[connected] * y2[connected] / total[connected]
+	return y
+
+
+class SyntheticNetwork:
+	"""
+		Parameterised 132/33/11 kV network for scaling benchmarks.  Busbars are numbered from 1 in order of voltage
+		level (132 kV, 33 kV and then 11 kV) and each busbar is connected back to a busbar with a lower number so the
+		backbone of the network is a radial tree fed from the grid infeed at busbar 1.  Busbars at a different voltage
+		to the busbar they are fed from are connected by a transformer which is earthed on the lower voltage side.
+		Meshed networks include additional ties between busbars at the same voltage.
+
+		For radial networks the thevenin impedances are calculated in a single pass up and down the tree rather than
+		by factorising the admittance matrix, which is quicker for producing BKDY reports and IEC results for networks
+		with 100k busbars.  For meshed networks the ties mean this is not possible and so the impedances are calculated
+		from the full admittance matrix of self.model by the native solver.
+	"""
+	def __init__(
+			self, number_of_buses, number_of_loads=None, number_of_machines=None, meshed=False,
+			seed=constants.Synthetic.seed
+	):
+		"""
+		:param int number_of_buses:  Total number of busbars, must be at least 3
+		:param int number_of_loads: (optional=None) - Number of loads, if None then the same as the number of 11 kV
+							busbars.  Loads are connected at random 33 kV and 11 kV busbars.
+		:param int number_of_machines: (optional=None) - Number of embedded machines in addition to the grid infeed,
+							if None then 1 for every 100 busbars.  Machines are connected at random 33 kV and 11 kV
+							busbars.
+		:param bool meshed: (optional=False) - If True then ties are added between busbars at the same voltage
+		:param int seed: (optional) - Seed for the random values so that the same network can be reproduced
+		"""
+		self.logger = logging.getLogger(constants.Logging.logger_name)
+		self.c = constants.Synthetic
+
+		n = int(number_of_buses)
+		if n < 3:
+			self.logger.critical(
+				(
+					'A synthetic network needs at least 3 busbars to include each voltage level but {} were requested'
+				).format(number_of_buses)
+			)
+			raise ValueError('Too few busbars for synthetic network')
+
+		self.rng = np.random.RandomState(seed)
+		self.meshed = meshed
+
+		# Number of busbars at each voltage level
+		n_132 = max(1, int(round(n * self.c.fraction_132)))
+		n_33 = max(1, int(round(n * self.c.fraction_33)))
+		n_33 = min(n_33, n - n_132 - 1)
+		self.level_counts = (n_132, n_33, n - n_132 - n_33)
+
+		self.buses = np.arange(1, n + 1)
+		self.nominal_kv = np.repeat((self.c.kv_132, self.c.kv_33, self.c.kv_11), self.level_counts)
+		self.voltage_pu = self.rng.uniform(*self.c.voltage_pu, size=n)
+		self.names = ['S{:.0f}_{}'.format(kv, bus) for kv, bus in zip(self.nominal_kv, self.buses)]
+
+		# Radial backbone and the impedance of the branch from each busbar back to its parent
+		self.parent = self.random_tree()
+		df_branches, df_zero_sequence_shunts = self.backbone_branches()
+		# Admittance of the branch back to the parent busbar in each sequence network, 0 where not connected
+		self.y_edge_positive = np.zeros(n, dtype=complex)
+		self.y_edge_positive[1:] = 1.0 / (df_branches['r'].values + 1j * df_branches['x'].values)
+		self.y_edge_zero = np.zeros(n, dtype=complex)
+		z0 = df_branches['r0'].values + 1j * df_branches['x0'].values
+		connected = np.isfinite(z0)
+		self.y_edge_zero[1:][connected] = 1.0 / z0[connected]
+		self.depth_levels = self.tree_depth_levels()
+
+		if meshed:
+			df_branches = pd.concat([df_branches, self.ties()], ignore_index=True)
+
+		if number_of_loads is None:
+			number_of_loads = self.level_counts[2]
+		if number_of_machines is None:
+			number_of_machines = n // 100
+
+		df_buses = pd.DataFrame({
+			'bus': self.buses, 'name': self.names, 'nominal_kv': self.nominal_kv, 'voltage_pu': self.voltage_pu
+		})
+		self.model = short_circuit.NetworkModel(
+			buses=df_buses, branches=df_branches, machines=self.machines(number_of_machines=number_of_machines),
+			loads=self.loads(number_of_loads=number_of_loads), zero_sequence_shunts=df_zero_sequence_shunts
+		)
+
+		# Only produced when the results are first needed
+		self._solver = None
+
+		self.logger.debug(
+			'Synthetic network with {} busbars ({} at 132 kV, {} at 33 kV and {} at 11 kV), {} branches, {} machines '
+			'and {} loads produced'.format(
+				n, self.level_counts[0], self.level_counts[1], self.level_counts[2], len(self.model.df_branches),
+				len(self.model.df_machines), len(self.model.df_loads)
+			)
+		)
+
+	def random_tree(self):
+		"""
+			Connects each busbar to a random busbar with a lower number at the same voltage or the voltage level above
+		:return np.ndarray parent:  Position of the busbar each busbar is fed from, -1 for the grid infeed busbar
+		"""
+		positions = np.arange(len(self.buses))
+		# First position of the busbars that each busbar can be connected to
+		lowest = np.repeat((0, 0, self.level_counts[0]), self.level_counts)
+		parent = lowest + np.floor(self.rng.uniform(size=len(positions)) * (positions - lowest)).astype(int)
+		parent[0] = -1
+		return parent
+
+	def impedances(self, nominal_kv, transformer):
+		"""
+			Returns random branch impedances for branches at the voltages provided
+		:param np.ndarray nominal_kv:  Voltage of the higher voltage side of each branch
+		:param np.ndarray transformer:  True for branches which are transformers
+		:return (np.ndarray, np.ndarray) (r, x):
+		"""
+		r = np.empty(len(nominal_kv))
+		x = np.empty(len(nominal_kv))
+		for kv, (r_line, x_line) in self.c.line_impedance.items():
+			r_tx, x_tx = self.c.transformer_impedance.get(kv, (np.nan, np.nan))
+			at_kv = nominal_kv == kv
+			r[at_kv] = np.where(transformer[at_kv], r_tx, r_line)
+			x[at_kv] = np.where(transformer[at_kv], x_tx, x_line)
+		factor = self.rng.uniform(*self.c.impedance_factor, size=len(nominal_kv))
+		return r * factor, x * factor
+
+	def backbone_branches(self):
+		"""
+			Produces the branches of the radial backbone, each busbar other than the grid infeed busbar is connected to
+			its parent busbar.  Transformers are not connected in the zero sequence network but are instead earthed on
+			the lower voltage side.
+		:return (pd.DataFrame, pd.DataFrame) (df_branches, df_zero_sequence_shunts):
+		"""
+		children = np.arange(1, len(self.buses))
+		parents = self.parent[1:]
+		transformer = self.nominal_kv[parents] != self.nominal_kv[children]
+		r, x = self.impedances(nominal_kv=self.nominal_kv[parents], transformer=transformer)
+
+		df_branches = pd.DataFrame({
+			'from_bus': self.buses[parents], 'to_bus': self.buses[children], 'r': r, 'x': x, 'b': 0.0, 'status': 1,
+			'r0': np.where(transformer, np.nan, r * self.c.line_zero_sequence_factor),
+			'x0': np.where(transformer, np.nan, x * self.c.line_zero_sequence_factor)
+		})
+		df_zero_sequence_shunts = pd.DataFrame({
+			'bus': self.buses[children][transformer], 'r': r[transformer], 'x': x[transformer]
+		})
+		return df_branches, df_zero_sequence_shunts
+
+	def ties(self):
+		"""
+			Produces additional branches between random busbars at the same voltage to mesh the network
+		:return pd.DataFrame df_ties:
+		"""
+		starts = np.cumsum((0, ) + self.level_counts[:-1])
+		# Only voltage levels with more than one busbar can have ties
+		levels = np.flatnonzero(np.array(self.level_counts) > 1)
+		number_of_ties = int(round(len(self.buses) * self.c.mesh_fraction)) if len(levels) else 0
+		level = levels[self.rng.randint(0, len(levels), size=number_of_ties)]
+		counts = np.take(self.level_counts, level)
+		offset = np.floor(self.rng.uniform(size=number_of_ties) * counts).astype(int)
+		# Tie is connected to a different busbar at the same voltage
+		step = 1 + np.floor(self.rng.uniform(size=number_of_ties) * (counts - 1)).astype(int)
+		from_position = starts[level] + offset
+		to_position = starts[level] + (offset + step) % counts
+
+		r, x = self.impedances(
+			nominal_kv=self.nominal_kv[from_position], transformer=np.zeros(len(from_position), dtype=bool)
+		)
+		return pd.DataFrame({
+			'from_bus': self.buses[from_position], 'to_bus': self.buses[to_position], 'r': r, 'x': x, 'b': 0.0,
+			'status': 1, 'r0': r * self.c.line_zero_sequence_factor, 'x0': x * self.c.line_zero_sequence_factor
+		})
+
+	def machines(self, number_of_machines):
+		"""
+			Produces the grid infeed at busbar 1 and the embedded machines at random 33 kV and 11 kV busbars
+		:param int number_of_machines:  Number of embedded machines
+		:return pd.DataFrame df_machines:
+		"""
+		r, x_subtr, x_trans, x_synch, r0, x0 = self.c.grid_parameters
+		grid = pd.DataFrame([{
+			'bus': self.buses[0], 'id': '1', 'mva': self.c.grid_mva, 'r': r, 'x_subtr': x_subtr, 'x_trans': x_trans,
+			'x_synch': x_synch, 'r0': r0, 'x0': x0
+		}])
+
+		r, x_subtr, x_trans, x_synch = self.c.machine_parameters
+		df = pd.DataFrame({
+			'bus': self.rng.choice(self.buses[self.level_counts[0]:], size=int(number_of_machines)),
+			'mva': self.rng.uniform(*self.c.machine_mva, size=int(number_of_machines)),
+			'r': r, 'x_subtr': x_subtr, 'x_trans': x_trans, 'x_synch': x_synch
+		})
+		# Machines at the same busbar need different IDs
+		df['id'] = (df.groupby('bus').cumcount() + 1).astype(str)
+		return pd.concat([grid, df], ignore_index=True, sort=False)
+
+	def loads(self, number_of_loads):
+		"""
+			Produces loads at random 33 kV and 11 kV busbars
+		:param int number_of_loads:  Number of loads
+		:return pd.DataFrame df_loads:
+		"""
+		candidates = self.buses[self.level_counts[0]:]
+		return pd.DataFrame({
+			'bus': self.rng.choice(candidates, size=int(number_of_loads), replace=number_of_loads > len(candidates)),
+			'mva': self.rng.uniform(*self.c.load_mva, size=int(number_of_loads))
+		})
+
+	def tree_depth_levels(self):
+		"""
+			Groups the busbars by the number of branches between them and the grid infeed busbar
+		:return list levels:  Positions of the busbars at each depth starting with the grid infeed busbar
+		"""
+		depth = np.zeros(len(self.buses), dtype=int)
+		while True:
+			new_depth = depth.copy()
+			new_depth[1:] = depth[self.parent[1:]] + 1
+			if np.array_equal(new_depth, depth):
+				break
+			depth = new_depth
+		order = np.argsort(depth, kind='mergesort')
+		return np.split(order, np.cumsum(np.bincount(depth))[:-1])
+
+	def radial_impedances(self, y_edge, y_shunt):
+		"""
+			Calculates the thevenin impedance at every busbar of the radial backbone.  The admittance of the subtree
+			below each busbar is found working up from the furthest busbars and then the admittance of the rest of the
+			network is found working back down from the grid infeed busbar.
+		:param np.ndarray y_edge:  Admittance of the branch from each busbar to its parent, 0 if not connected
+		:param np.ndarray y_shunt:  Admittance to ground at each busbar
+		:return np.ndarray z:  Thevenin impedance at each busbar, infinite if there is no path to ground
+		"""
+		y_below = np.array(y_shunt, dtype=complex)
+		# Admittance each busbar contributes to its parent
+		y_contribution = np.zeros(len(y_below), dtype=complex)
+		for positions in reversed(self.depth_levels[1:]):
+			y_contribution[positions] = series_admittance(y_below[positions], y_edge[positions])
+			np.add.at(y_below, self.parent[positions], y_contribution[positions])
+
+		y_above = np.zeros(len(y_below), dtype=complex)
+		for positions in self.depth_levels[1:]:
+			parents = self.parent[positions]
+			y_above[positions] = series_admittance(
+				y_above[parents] + y_below[parents] - y_contribution[positions], y_edge[positions]
+			)
+
+		y = y_below + y_above
+		z = np.full(len(y), np.inf + 0j, dtype=complex)
+		z[y != 0] = 1.0 / y[y != 0]
+		return z
+
+	@property
+	def solver(self):
+		"""
+			Native solver used for the admittance of the machines and equivalent machines representing the embedded
+			load at each busbar and for the thevenin impedances of meshed networks
+		:return short_circuit.SequenceFaultSolver solver:
+		"""
+		if self._solver is None:
+			self._solver = short_circuit.SequenceFaultSolver(model=self.model)
+		return self._solver
+
+	def bus_positions(self, buses=None):
+		"""
+			Returns the positions of the busbars
+		:param list buses: (optional=None) - Busbars to return, if None then all busbars
+		:return (list, np.ndarray) (buses, positions):
+		"""
+		if buses is None:
+			return self.buses.tolist(), np.arange(len(self.buses))
+		return list(buses), np.asarray(buses, dtype=int) - 1
+
+	def thevenin_impedances(self, fault_time, buses=None):
+		"""
+			Calculates the positive sequence thevenin impedance at each busbar including the equivalent machines
+			representing the embedded load at the fault time
+		:param float fault_time:  Time after the fault in seconds
+		:param list buses: (optional=None) - Busbars to return the impedance for, if None then all busbars
+		:return np.ndarray z:  Thevenin impedance (p.u. on system base) of each busbar
+		"""
+		buses, positions = self.bus_positions(buses=buses)
+		if self.meshed:
+			return self.solver.thevenin_impedances(fault_time=fault_time, buses=buses)
+
+		z = self.radial_impedances(
+			y_edge=self.y_edge_positive, y_shunt=self.solver.machine_admittances(fault_time=fault_time)
+		)
+		return z[positions]
+
+	def sequence_impedances(self, fault_time, buses=None):
+		"""
+			Calculates the positive, negative and zero sequence thevenin impedances at each busbar
+		:param float fault_time:  Time after the fault in seconds
+		:param list buses: (optional=None) - Busbars to return the impedance for, if None then all busbars
+		:return (np.ndarray, np.ndarray, np.ndarray) (z1, z2, z0):
+		"""
+		buses, positions = self.bus_positions(buses=buses)
+		if self.meshed:
+			return self.solver.sequence_impedances(fault_time=fault_time, buses=buses)
+
+		z1 = self.thevenin_impedances(fault_time=fault_time, buses=buses)
+		z2 = self.radial_impedances(y_edge=self.y_edge_positive, y_shunt=self.solver.y_shunt_negative)
+		z0 = self.radial_impedances(y_edge=self.y_edge_zero, y_shunt=self.solver.y_shunt_zero)
+		return z1, z2[positions], z0[positions]
+
+	def bkdy_report(self, fault_time, buses=None, date=None):
+		"""
+			Produces the BKDY report that PSSE would write for this network in the format processed by BkdyFile
+		:param float fault_time:  Fault duty time in seconds
+		:param list buses: (optional=None) - Busbars to include, if None then all busbars
+		:param str date: (optional=None) - Date included in the header, if None then the current time is used
+		:return str contents:
+		"""
+		buses, positions = self.bus_positions(buses=buses)
+		return mock_psse.format_bkdy_report(
+			fault_time=fault_time, buses=buses, names=[self.names[i] for i in positions],
+			nominal_kv=self.nominal_kv[positions], v_prefault=self.voltage_pu[positions],
+			z=self.thevenin_impedances(fault_time=fault_time, buses=buses), date=date
+		)
+
+	def write_bkdy_report(self, pth, fault_time, buses=None):
+		"""
+			Writes the BKDY report for this network to a file
+		:param str pth:  Full path to the report to write
+		:param float fault_time:  Fault duty time in seconds
+		:param list buses: (optional=None) - Busbars to include, if None then all busbars
+		:return str pth:
+		"""
+		with open(pth, 'w') as f:
+			f.write(self.bkdy_report(fault_time=fault_time, buses=buses))
+		return pth
+
+	def iec_results(self, fault_time, lll=True, lg=False, buses=None, vfactor=None, scfmt='polar', scunit='physical'):
+		"""
+			Produces the results that pssarrays.iecs_currents would return for this network in the format processed by
+			IecFaults.unpack_results
+		:param float fault_time:  Breaker opening time
+		:param bool lll: (optional=True) - Whether to include LLL fault results
+		:param bool lg: (optional=False) - Whether to include LG fault results
+		:param list buses: (optional=None) - Busbars to fault, if None then all busbars
+		:param float vfactor: (optional=None) - Voltage factor, if None then the pre-fault voltage of each busbar
+		:param str scfmt: (optional='polar') - Coordinates of the results, polar or rectangular
+		:param str scunit: (optional='physical') - Units of the currents, physical or pu
+		:return mock_psse.IecResults results:
+		"""
+		buses, positions = self.bus_positions(buses=buses)
+		z1, z2, z0 = self.sequence_impedances(fault_time=fault_time, buses=buses)
+		if vfactor is None:
+			vfactor = self.voltage_pu[positions]
+		return mock_psse.iec_results(
+			buses=buses, nominal_kv=self.nominal_kv[positions], z1=z1, z2=z2, z0=z0, brktime=fault_time,
+			vfactorc=vfactor, flt3ph=int(lll), fltlg=int(lg), scfmt=scfmt, scunit=scunit, base_mva=self.model.base_mva
+		)
+
+	def to_json(self, pth):
+		"""
+			Writes the network to a network description (JSON) file which can be loaded by the stand in PSSE backend
+		:param str pth:  Full path to the file to write
+		:return str pth:
+		"""
+		self.model.to_json(pth=pth)
+		return pth
@@ -0,0 +1,175 @@
+"""
+#######################################################################################################################
+###											PSSE G74 Fault Studies													###
+###		Unit tests associated with the headless batch runner, these do not require PSSE							###
+###																													###
+###		Code developed by David Mills (david.mills@PSCconsulting.com, +44 7899 984158) as part of PSC 		 		###
+###		project JK7938 - SHEPD - studies and automation																###
+###																													###
+#######################################################################################################################
+"""
+
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+import pandas as pd
+
+import g74
+import g74.batch as test_module
+import g74.mock_psse as mock_psse
+import g74.synthetic as synthetic
+import g74.constants as constants
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_LOGS = os.path.join(TESTS_DIR, 'logs')
+
+two_up = os.path.abspath(os.path.join(TESTS_DIR, '../..'))
+sys.path.append(two_up)
+
+DELETE_LOG_FILES = True
+
+
+# ----- UNIT TESTS -----
+class TestBatch(unittest.TestCase):
+	"""
+		Tests the fault study is carried out for each case in a manifest and the results are consolidated
+	"""
+	logger = None
+
+	@classmethod
+	def setUpClass(cls):
+		"""
+			Initialise logger and write a manifest for two synthetic cases
+		"""
+		cls.logger = g74.Logger(pth_logs=TEST_LOGS, uid='TestBatch', debug=g74.constants.DEBUG_MODE)
+		cls.temp_folder = tempfile.mkdtemp()
+		c = constants.Batch
+		for name, buses in (('case_a', 20), ('case_b', 30)):
+			synthetic.SyntheticNetwork(number_of_buses=buses).to_json(
+				pth=os.path.join(cls.temp_folder, '{}.sav'.format(name))
+			)
+		cls.manifest = {
+			c.fault_times: [0.0, 0.06],
+			c.studies: [constants.GUI.bkdy_3ph, constants.GUI.iec_3ph],
+			c.cases: [{c.sav_case: 'case_a.sav'}, {c.name: 'second', c.sav_case: 'case_b.sav', c.excel: False}]
+		}
+		cls.pth_manifest = cls.write_manifest(manifest=cls.manifest, name='manifest.json')
+
+		cls.original = os.environ.get(constants.Cache.folder_env_var)
+		os.environ[constants.Cache.folder_env_var] = os.path.join(cls.temp_folder, 'cache')
+
+	@classmethod
+	def write_manifest(cls, manifest, name):
+		pth = os.path.join(cls.temp_folder, name)
+		with open(pth, 'w') as f:
+			json.dump(manifest, f)
+		return pth
+
+	def test_load_manifest(self):
+		"""
+			Tests the defaults are applied to each case and invalid manifests are rejected
+		:return:
+		"""
+		c = constants.Batch
+		cases = test_module.load_manifest(pth_manifest=self.pth_manifest)
+		self.assertEqual([case[c.name] for case in cases], ['case_a', 'second'])
+		self.assertEqual(cases[1][c.sav_case], os.path.join(self.temp_folder, 'case_b.sav'))
+		self.assertEqual(cases[0][c.fault_times], [0.0, 0.06])
+		self.assertEqual(test_module.fault_types(studies=cases[0][c.studies]), ((1, ), (1, 0)))
+		self.assertEqual([case[c.engine] for case in cases], [c.default_engine] * 2)
+
+		# Engine given to the batch is used for any case which does not include one
+		manifest = dict(self.manifest)
+		manifest[c.cases] = [{c.sav_case: 'case_a.sav'}, {c.sav_case: 'case_b.sav', c.engine: c.default_engine}]
+		pth = self.write_manifest(manifest=manifest, name='engine.json')
+		cases = test_module.load_manifest(pth_manifest=pth, engine=constants.ShortCircuit.engine_native)
+		self.assertEqual(
+			[case[c.engine] for case in cases], [constants.ShortCircuit.engine_native, c.default_engine]
+		)
+
+		for manifest in (
+				{c.cases: [{c.sav_case: 'missing.sav'}]},
+				{c.cases: [{c.sav_case: 'case_a.sav'}, {c.sav_case: 'case_a.sav'}]},
+				{c.studies: ['BKDY_LG'], c.cases: [{c.sav_case: 'case_a.sav'}]},
+				{c.engine: 'PSSE', c.cases: [{c.sav_case: 'case_a.sav'}]}
+		):
+			pth = self.write_manifest(manifest=manifest, name='invalid.json')
+			self.assertRaises(ValueError, test_module.load_manifest, pth_manifest=pth)
+
+	def test_run_batch(self):
+		"""
+			Tests each case is studied and the results are consolidated with the case as the first level of the index
+		:return:
+		"""
+		c = constants.Batch
+		output_folder = os.path.join(self.temp_folder, 'serial')
+		mock_psse.install()
+		try:
+			summaries = test_module.run_batch(
+				pth_manifest=self.pth_manifest, output_folder=output_folder, formats=list(), logger=self.logger
+			)
+		finally:
+			mock_psse.uninstall()
+
+		self.assertEqual([x[c.key_status] for x in summaries], [c.status_complete] * 2)
+		self.assertTrue(os.path.isfile(os.path.join(output_folder, 'case_a.xlsx')))
+		self.assertFalse(os.path.isfile(os.path.join(output_folder, 'second.xlsx')))
+
+		pth_results = os.path.join(output_folder, '{}.xlsx'.format(c.results_name))
+		self.assertEqual(summaries[0][c.key_results], [pth_results])
+		df = pd.read_excel(pth_results, sheet_name=constants.Excel.bkdy_sheet_name, header=None)
+		self.assertEqual(df.iloc[:, 0].dropna().iloc[-1], 'second')
+		with open(os.path.join(output_folder, c.summary_file), 'r') as f:
+			self.assertEqual(len(json.load(f)), 2)
+
+	def test_failed_case(self):
+		"""
+			Tests a case which fails is reported in the summary without stopping the other cases
+		:return:
+		"""
+		c = constants.Batch
+		pth_invalid = os.path.join(self.temp_folder, 'invalid.sav')
+		with open(pth_invalid, 'w') as f:
+			f.write('not a SAV case')
+		manifest = dict(self.manifest)
+		manifest[c.cases] = [{c.sav_case: 'invalid.sav'}, {c.sav_case: 'case_a.sav'}]
+		pth = self.write_manifest(manifest=manifest, name='failed.json')
+
+		mock_psse.install()
+		try:
+			summaries = test_module.run_batch(
+				pth_manifest=pth, output_folder=os.path.join(self.temp_folder, 'failed'), formats=list(),
+				logger=self.logger
+			)
+		finally:
+			mock_psse.uninstall()
+
+		self.assertEqual([x[c.key_status] for x in summaries], [c.status_failed, c.status_complete])
+		self.assertIn(c.key_error, summaries[0])
+		self.assertEqual(summaries[0][c.key_results], list())
+
+	@classmethod
+	def tearDownClass(cls):
+		shutil.rmtree(cls.temp_folder)
+		os.environ.pop(constants.Cache.folder_env_var)
+		if cls.original is not None:
+			os.environ[constants.Cache.folder_env_var] = cls.original
+
+		# Delete log files created by logger
+		if DELETE_LOG_FILES:
+			paths = [
+				cls.logger.pth_debug_log,
+				cls.logger.pth_progress_log,
+				cls.logger.pth_error_log,
+			] + [
+				os.path.join(TEST_LOGS, '{}{}'.format(name, constants.Instrumentation.trace_suffix))
+				for name in ('case_a', 'second')
+			]
+			del cls.logger
+			for pth in paths:
+				if os.path.exists(pth):
+					os.remove(pth)
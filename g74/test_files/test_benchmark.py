@@ -0,0 +1,182 @@
+"""
+#######################################################################################################################
+###											PSSE G74 Fault Studies													###
+###		Unit tests associated with the benchmarks of the fault study pipeline, these do not require PSSE			###
+###																													###
+###		Code developed by David Mills (david.mills@PSCconsulting.com, +44 7899 984158) as part of PSC 		 		###
+###		project JK7938 - SHEPD - studies and automation																###
+###																													###
+#######################################################################################################################
+"""
+
+import unittest
+import os
+import sys
+import copy
+import json
+import shutil
+import tempfile
+
+import g74
+import g74.benchmark as test_module
+import g74.constants as constants
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_LOGS = os.path.join(TESTS_DIR, 'logs')
+
+two_up = os.path.abspath(os.path.join(TESTS_DIR, '../..'))
+sys.path.append(two_up)
+
+DELETE_LOG_FILES = True
+
+
+# ----- UNIT TESTS -----
+class TestPipelineBenchmark(unittest.TestCase):
+	"""
+		Tests the stages of the fault study pipeline are benchmarked and compared against a baseline
+	"""
+	logger = None
+
+	@classmethod
+	def setUpClass(cls):
+		"""
+			Initialise logger and run the benchmark for a small network
+		"""
+		cls.logger = g74.Logger(pth_logs=TEST_LOGS, uid='TestBenchmark', debug=g74.constants.DEBUG_MODE)
+		cls.temp_folder = tempfile.mkdtemp()
+		cls.pth_results = os.path.join(cls.temp_folder, 'benchmark.json')
+		cls.results = test_module.run_pipeline_benchmarks(
+			sizes=(200, ), pth_results=cls.pth_results, fault_times=(0.0, 0.06), local_logger=cls.logger
+		)
+
+	def test_stage_results(self):
+		"""
+			Tests the stages are taken from the spans recorded by the fault study and the results are written to JSON
+		:return:
+		"""
+		c = constants.Benchmark
+		ci = constants.Instrumentation
+		with open(self.pth_results, 'r') as f:
+			results = json.load(f)
+		self.assertEqual(len(results[c.key_runs]), 1)
+
+		run = self.results[c.key_runs][0]
+		self.assertEqual(run[c.key_buses], 200)
+		stages = run[c.key_stages]
+		self.assertEqual(list(stages.keys())[:4], [ci.span_load_case, ci.span_idev, ci.span_g74, ci.span_bkdy_study])
+		for name in (ci.span_bkdy, ci.span_machine_impedance):
+			for fault_time in (0.0, 0.06):
+				self.assertEqual(stages[c.stage_fault_time.format(name, fault_time)][c.key_depth], 1)
+		for name in (ci.span_combine, ci.span_excel, ci.span_excel_save):
+			self.assertIn(name, stages)
+		self.assertTrue(all(stage[c.key_seconds] >= 0.0 for stage in stages.values()))
+		# Each BKDY span is a call to the stand in PSSE backend
+		self.assertEqual(
+			run[c.key_api_calls]['psspy.bkdy'],
+			sum(stage[c.key_calls] for name, stage in stages.items() if name.startswith(ci.span_bkdy + '_'))
+		)
+
+		# Peak memory is measured for every stage unless it is a known limitation on this platform
+		if not run[c.key_limitations]:
+			self.assertTrue(all(stage[c.key_peak_rss] > 0.0 for stage in stages.values()))
+			self.assertTrue(
+				stages[ci.span_bkdy_study][c.key_peak_rss] >=
+				stages[c.stage_fault_time.format(ci.span_bkdy, 0.06)][c.key_peak_rss]
+			)
+
+	def test_memory_limitation(self):
+		"""
+			Tests a platform without a measure of the peak memory is reported as a known limitation
+		:return:
+		"""
+		peak_rss = test_module.peak_rss
+		test_module.peak_rss = lambda: None
+		try:
+			limitations = test_module.memory_limitations()
+			self.assertIsNone(test_module.measure_peak_rss())
+		finally:
+			test_module.peak_rss = peak_rss
+		self.assertEqual(limitations, [constants.Benchmark.limitation_no_memory])
+
+	def test_mock_solve(self):
+		"""
+			Tests the pipeline can also be run with the fault currents solved by the stand in PSSE backend
+		:return:
+		"""
+		c = constants.Benchmark
+		run = test_module.benchmark_pipeline(
+			number_of_buses=100, local_logger=self.logger, fault_times=(0.0, ), radial_solve=False
+		)
+		self.assertIn(c.stage_fault_time.format(constants.Instrumentation.span_bkdy, 0.0), run[c.key_stages])
+
+	def test_compare_to_baseline(self):
+		"""
+			Tests that only stages slower than the baseline by more than the tolerance are reported as regressions
+		:return:
+		"""
+		c = constants.Benchmark
+		ci = constants.Instrumentation
+		baseline = {
+			c.key_runs: [{
+				c.key_buses: 200,
+				c.key_stages: {
+					ci.span_bkdy_study: {c.key_seconds: 1.0, c.key_peak_rss: 100.0},
+					ci.span_excel: {c.key_seconds: 1.0, c.key_peak_rss: 100.0},
+					ci.span_combine: {c.key_seconds: 0.001, c.key_peak_rss: None}
+				}
+			}]
+		}
+		results = copy.deepcopy(baseline)
+		stages = results[c.key_runs][0][c.key_stages]
+		stages[ci.span_bkdy_study][c.key_seconds] = 1.1
+		stages[ci.span_excel][c.key_seconds] = 2.0
+		stages[ci.span_excel][c.key_peak_rss] = 200.0
+		# Below the minimum time and so ignored
+		stages[ci.span_combine][c.key_seconds] = 0.01
+
+		regressions = test_module.compare_to_baseline(results=results, baseline=baseline)
+		self.assertEqual(
+			sorted((x['stage'], x['measure']) for x in regressions),
+			[(ci.span_excel, c.key_peak_rss), (ci.span_excel, c.key_seconds)]
+		)
+		self.assertEqual(test_module.compare_to_baseline(results=self.results, baseline=self.results), list())
+
+	def test_excel_transpose(self):
+		"""
+			Tests each option for the transposed Excel sheet is benchmarked and skipping it reduces the file size
+		:return:
+		"""
+		c = constants.Benchmark
+		run = test_module.benchmark_excel_transpose(number_of_buses=200, fault_times=(0.0, 0.06))
+		stages = run[c.key_stages]
+		self.assertEqual(
+			list(stages.keys()),
+			[
+				c.stage_transpose.format(x) for x in (
+					constants.Excel.transpose_full, constants.Excel.transpose_streamed, constants.Excel.transpose_none
+				)
+			]
+		)
+		self.assertLess(
+			stages[c.stage_transpose.format(constants.Excel.transpose_none)][c.key_file_size],
+			stages[c.stage_transpose.format(constants.Excel.transpose_streamed)][c.key_file_size]
+		)
+
+	@classmethod
+	def tearDownClass(cls):
+		shutil.rmtree(cls.temp_folder)
+
+		# Delete log files created by logger
+		if DELETE_LOG_FILES:
+			paths = [
+				cls.logger.pth_debug_log,
+				cls.logger.pth_progress_log,
+				cls.logger.pth_error_log
+			] + [
+				os.path.join(TEST_LOGS, 'benchmark_{}{}'.format(x, constants.Instrumentation.trace_suffix))
+				for x in (100, 200)
+			]
+			del cls.logger
+			for pth in paths:
+				if os.path.exists(pth):
+					os.remove(pth)
@@ -0,0 +1,222 @@
+"""
+#######################################################################################################################
+###											PSSE G74 Fault Studies													###
+###		Unit tests associated with the cache of fault study results, these do not require PSSE						###
+###																													###
+###		Code developed by David Mills (david.mills@PSCconsulting.com, +44 7899 984158) as part of PSC 		 		###
+###		project JK7938 - SHEPD - studies and automation																###
+###																													###
+#######################################################################################################################
+"""
+
+import unittest
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import g74
+import g74.cache as test_module
+import g74.instrumentation as instrumentation
+import g74.mock_psse as mock_psse
+import g74.synthetic as synthetic
+import g74.constants as constants
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_LOGS = os.path.join(TESTS_DIR, 'logs')
+
+two_up = os.path.abspath(os.path.join(TESTS_DIR, '../..'))
+sys.path.append(two_up)
+
+DELETE_LOG_FILES = True
+
+
+# ----- UNIT TESTS -----
+class TestResultCache(unittest.TestCase):
+	"""
+		Tests fault study results are stored and returned by the cache
+	"""
+	logger = None
+
+	@classmethod
+	def setUpClass(cls):
+		"""
+			Initialise logger
+		"""
+		cls.logger = g74.Logger(pth_logs=TEST_LOGS, uid='TestResultCache', debug=g74.constants.DEBUG_MODE)
+		cls.temp_folder = tempfile.mkdtemp()
+		cls.pth_sav = os.path.join(cls.temp_folder, 'case.sav')
+		with open(cls.pth_sav, 'wb') as f:
+			f.write(b'SAV case')
+
+	def setUp(self):
+		self.cache_folder = tempfile.mkdtemp(dir=self.temp_folder)
+		self.cache = test_module.ResultCache(pth_sav=self.pth_sav, folder=self.cache_folder, bypass=False)
+		self.df = pd.DataFrame(
+			np.random.rand(4, 4), index=[10, 20, 30, 40],
+			columns=pd.MultiIndex.from_product([(0.0, 0.06), ('ik', 'ip')])
+		)
+
+	def test_key(self):
+		"""
+			Tests the key only changes when the inputs which affect the results change
+		:return:
+		"""
+		key = self.cache.key(buses=[20, 10], fault_times=[0.06, 0.0], study=constants.GUI.bkdy_3ph)
+		self.assertEqual(key, self.cache.key(buses=[10, 20], fault_times=[0.0, 0.06], study=constants.GUI.bkdy_3ph))
+		self.assertNotEqual(key, self.cache.key(buses=[10], fault_times=[0.0, 0.06], study=constants.GUI.bkdy_3ph))
+		self.assertNotEqual(key, self.cache.key(buses=[10, 20], fault_times=[0.0], study=constants.GUI.bkdy_3ph))
+		self.assertNotEqual(key, self.cache.key(buses=[10, 20], fault_times=[0.0, 0.06], study=constants.GUI.iec_3ph))
+
+		changes = (
+			(constants.G74, 'min_load_mva'), (constants.IEC, 'vfactor_tolerance'), (constants.PSSE, 'min_fault_time')
+		)
+		for cls, name in changes:
+			original = getattr(cls, name)
+			setattr(cls, name, original * 2.0 if original else 0.001)
+			try:
+				self.assertNotEqual(
+					key, self.cache.key(buses=[10, 20], fault_times=[0.0, 0.06], study=constants.GUI.bkdy_3ph)
+				)
+			finally:
+				setattr(cls, name, original)
+
+		# Change to the source code
+		folder = os.path.dirname(os.path.abspath(test_module.__file__))
+		original = test_module.code_version(folder=folder)
+		test_module.CODE_VERSIONS[folder] = 'changed'
+		try:
+			self.assertNotEqual(
+				key, self.cache.key(buses=[10, 20], fault_times=[0.0, 0.06], study=constants.GUI.bkdy_3ph)
+			)
+		finally:
+			test_module.CODE_VERSIONS[folder] = original
+		self.assertEqual(key, self.cache.key(buses=[10, 20], fault_times=[0.0, 0.06], study=constants.GUI.bkdy_3ph))
+
+		# Values must not depend on where objects are stored in memory otherwise the key changes for each process
+		for name in constants.Cache.result_classes:
+			self.assertNotIn(' at 0x', repr(test_module.class_parameters(getattr(constants, name))))
+
+		pth_sav = os.path.join(self.temp_folder, 'changed.sav')
+		with open(pth_sav, 'wb') as f:
+			f.write(b'Changed SAV case')
+		cache = test_module.ResultCache(pth_sav=pth_sav, folder=self.cache_folder)
+		self.assertNotEqual(key, cache.key(buses=[10, 20], fault_times=[0.0, 0.06], study=constants.GUI.bkdy_3ph))
+
+	def test_enabled(self):
+		"""
+			Tests the cache is only used if enabled with the setting or the environment variable
+		:return:
+		"""
+		original = os.environ.pop(constants.Cache.env_var, None)
+		try:
+			self.assertFalse(test_module.cache_enabled())
+			self.assertTrue(test_module.cache_enabled(setting=True))
+			os.environ[constants.Cache.env_var] = 'yes'
+			self.assertTrue(test_module.cache_enabled())
+			self.assertFalse(test_module.cache_enabled(setting=False))
+		finally:
+			os.environ.pop(constants.Cache.env_var, None)
+			if original is not None:
+				os.environ[constants.Cache.env_var] = original
+
+	def test_get_and_bypass(self):
+		"""
+			Tests the stored results are returned unchanged unless the cache is bypassed
+		:return:
+		"""
+		key = self.cache.key(buses=list(), fault_times=[0.0], study=constants.GUI.iec_lg)
+		self.assertIsNone(self.cache.get(key=key))
+
+		self.cache.put(key=key, df=self.df, metadata={'unreliable_faulted_buses': [30]})
+		df, metadata = self.cache.get(key=key)
+		pd.testing.assert_frame_equal(df, self.df)
+		self.assertEqual(metadata['unreliable_faulted_buses'], [30])
+
+		self.cache.bypass = True
+		self.assertIsNone(self.cache.get(key=key))
+
+		# Bypass is also enabled by the environment variable
+		original = os.environ.pop(constants.Cache.bypass_env_var, None)
+		try:
+			os.environ[constants.Cache.bypass_env_var] = 'true'
+			self.assertTrue(test_module.ResultCache(pth_sav=self.pth_sav, folder=self.cache_folder).bypass)
+		finally:
+			os.environ.pop(constants.Cache.bypass_env_var, None)
+			if original is not None:
+				os.environ[constants.Cache.bypass_env_var] = original
+
+	def test_least_recently_used_evicted(self):
+		"""
+			Tests the least recently used results are deleted once the cache exceeds the maximum size
+		:return:
+		"""
+		keys = ['first', 'second', 'third']
+		pth = self.cache.put(key=keys[0], df=self.df)
+		size = os.path.getsize(pth)
+		self.cache.max_bytes = int(size * 2.5)
+
+		self.cache.put(key=keys[1], df=self.df)
+		# Modified times set in the past and the first result then used so that the second is the least recent
+		for i, key in enumerate(keys[:2]):
+			os.utime(self.cache.path(key=key), (time.time() - 100 + i, time.time() - 100 + i))
+		self.assertIsNotNone(self.cache.get(key=keys[0]))
+
+		self.cache.put(key=keys[2], df=self.df)
+		self.assertTrue(os.path.exists(self.cache.path(key=keys[0])))
+		self.assertFalse(os.path.exists(self.cache.path(key=keys[1])))
+		self.assertTrue(os.path.exists(self.cache.path(key=keys[2])))
+
+	def test_fault_study_cached(self):
+		"""
+			Tests repeating the fault study for the same SAV case uses the cached results without any fault studies
+		:return:
+		"""
+		import Fault_Calculations
+
+		network = synthetic.SyntheticNetwork(number_of_buses=30)
+		pth_sav = network.to_json(pth=os.path.join(self.temp_folder, 'synthetic.sav'))
+		original = os.environ.get(constants.Cache.folder_env_var)
+		os.environ[constants.Cache.folder_env_var] = self.cache_folder
+		mock_psse.install()
+		try:
+			api_calls = list()
+			for i in range(2):
+				Fault_Calculations.fault_study(
+					psse_handler=g74.psse.PsseControl(), local_uid='TestResultCache', sav_case=pth_sav,
+					local_temp_folder=self.temp_folder, excel_file=os.path.join(self.temp_folder, 'results.xlsx'),
+					fault_times=[0.0, 0.06], buses=list(), local_logger=self.logger, fault_types=((1, ), (1, 0)),
+					use_cache=True
+				)
+				api_calls.append(instrumentation.RECORDER.api_calls)
+		finally:
+			mock_psse.uninstall()
+			os.environ.pop(constants.Cache.folder_env_var)
+			if original is not None:
+				os.environ[constants.Cache.folder_env_var] = original
+
+		self.assertIn('psspy.bkdy', api_calls[0])
+		self.assertIn('pssarrays.iecs_currents', api_calls[0])
+		self.assertNotIn('psspy.bkdy', api_calls[1])
+		self.assertNotIn('pssarrays.iecs_currents', api_calls[1])
+
+	@classmethod
+	def tearDownClass(cls):
+		shutil.rmtree(cls.temp_folder)
+
+		# Delete log files created by logger
+		if DELETE_LOG_FILES:
+			paths = [
+				cls.logger.pth_debug_log,
+				cls.logger.pth_progress_log,
+				cls.logger.pth_error_log,
+				os.path.join(TEST_LOGS, 'TestResultCache{}'.format(constants.Instrumentation.trace_suffix))
+			]
+			del cls.logger
+			for pth in paths:
+				if os.path.exists(pth):
+					os.remove(pth)
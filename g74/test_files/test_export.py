@@ -0,0 +1,182 @@
+"""
+#######################################################################################################################
+###											PSSE G74 Fault Studies													###
+###		Unit tests associated with exporting results to columnar binary formats, these do not require PSSE			###
+###																													###
+###		Code developed by David Mills (david.mills@PSCconsulting.com, +44 7899 984158) as part of PSC 		 		###
+###		project JK7938 - SHEPD - studies and automation																###
+###																													###
+#######################################################################################################################
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import g74
+import g74.export as test_module
+import g74.constants as constants
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_LOGS = os.path.join(TESTS_DIR, 'logs')
+
+two_up = os.path.abspath(os.path.join(TESTS_DIR, '../..'))
+sys.path.append(two_up)
+
+DELETE_LOG_FILES = True
+
+
+def package_installed(name):
+	"""
+		Determines whether an optional package is installed
+	:param str name:
+	:return bool installed:
+	"""
+	try:
+		__import__(name)
+	except ImportError:
+		return False
+	return True
+
+
+# ----- UNIT TESTS -----
+class TestExport(unittest.TestCase):
+	"""
+		Tests the fault study results are exported with the column headers and metadata needed to read them back in
+	"""
+	logger = None
+
+	@classmethod
+	def setUpClass(cls):
+		"""
+			Initialise logger and create results in the same format as the studies
+		"""
+		cls.logger = g74.Logger(pth_logs=TEST_LOGS, uid='TestExport', debug=g74.constants.DEBUG_MODE)
+		cls.temp_folder = tempfile.mkdtemp()
+		columns = pd.MultiIndex.from_product(
+			[('0.0 seconds', '0.06 seconds'), ('Ik (kA)', 'X/R')], names=constants.SHEPD.output_headers
+		)
+		cls.df = pd.DataFrame(
+			np.arange(12.0).reshape(3, 4), index=pd.Index([10, 20, 30], name=constants.General.bus_number),
+			columns=columns
+		)
+		cls.df.insert(0, ('Node Details', 'Name'), ['BUS A', 'BUS B', 'BUS C'])
+		cls.metadata = {constants.Export.method: constants.GUI.bkdy_3ph, constants.Export.fault_times: [0.0, 0.06]}
+
+	def test_export_formats(self):
+		"""
+			Tests the formats can be set with the environment variable and unknown formats are rejected
+		:return:
+		"""
+		env_var = constants.Export.env_var
+		original = os.environ.pop(env_var, None)
+		try:
+			self.assertEqual(test_module.export_formats(), constants.Export.formats)
+			os.environ[env_var] = 'Parquet, hdf5'
+			self.assertEqual(test_module.export_formats(), (constants.Export.parquet, constants.Export.hdf5))
+			self.assertEqual(test_module.export_formats(setting=list()), tuple())
+			self.assertRaises(ValueError, test_module.export_formats, setting=['csv'])
+		finally:
+			os.environ.pop(env_var, None)
+			if original is not None:
+				os.environ[env_var] = original
+
+	def test_columns_restored(self):
+		"""
+			Tests the column headers are combined into a single level and then restored to the original levels
+		:return:
+		"""
+		df_flat, columns = test_module.flatten_columns(df=self.df)
+		self.assertEqual(df_flat.columns.nlevels, 1)
+		self.assertEqual(df_flat.columns[1], '0.0 seconds{}Ik (kA)'.format(constants.Export.separator))
+
+		metadata = {
+			constants.Export.columns: columns,
+			constants.Export.column_levels: list(constants.SHEPD.output_headers),
+			constants.Export.index_names: [constants.General.bus_number]
+		}
+		pd.testing.assert_frame_equal(test_module.restore_columns(df=df_flat, metadata=metadata), self.df)
+
+	@unittest.skipIf(package_installed('pyarrow'), 'Only tested when pyarrow is not installed')
+	def test_missing_package(self):
+		"""
+			Tests the export is skipped rather than failing if the optional package is not installed
+		:return:
+		"""
+		results_export = test_module.ResultsExport(
+			pth_excel=os.path.join(self.temp_folder, 'missing.xlsx'), formats=[constants.Export.parquet], excel=False
+		)
+		results_export.write_fault_data(
+			df=self.df, message='BKDY', sheet_name=constants.Excel.bkdy_sheet_name, method=constants.GUI.bkdy_3ph,
+			fault_times=[0.0, 0.06]
+		)
+		results_export.close()
+		self.assertEqual(results_export.files, list())
+		self.assertFalse(os.path.exists(os.path.join(self.temp_folder, 'missing.xlsx')))
+
+	def test_failed_study_removed(self):
+		"""
+			Tests the workbook is saved if the studies complete but removed rather than left partially written if a
+			study fails
+		:return:
+		"""
+		for name, fail in (('complete.xlsx', False), ('failed.xlsx', True)):
+			pth_excel = os.path.join(self.temp_folder, name)
+			try:
+				with test_module.ResultsExport(pth_excel=pth_excel, formats=list(), excel=True) as results_export:
+					results_export.write_fault_data(
+						df=self.df, message='BKDY', sheet_name=constants.Excel.bkdy_sheet_name,
+						method=constants.GUI.bkdy_3ph, fault_times=[0.0, 0.06]
+					)
+					if fail:
+						raise ValueError('Study failed')
+			except ValueError:
+				self.assertTrue(fail)
+			self.assertEqual(os.path.exists(pth_excel), not fail)
+
+	def round_trip(self, fmt):
+		"""
+			Tests the results and metadata read back in match those written
+		:param str fmt:  Format to test
+		:return:
+		"""
+		pth = os.path.join(self.temp_folder, 'results{}'.format(constants.Export.extensions[fmt]))
+		self.assertEqual(test_module.write_results(pth=pth, df=self.df, metadata=self.metadata, fmt=fmt), pth)
+		df, metadata = test_module.read_results(pth=pth)
+		pd.testing.assert_frame_equal(df, self.df)
+		self.assertEqual(df.columns.names, list(constants.SHEPD.output_headers))
+		self.assertEqual(metadata[constants.Export.method], constants.GUI.bkdy_3ph)
+		self.assertEqual(metadata[constants.Export.fault_times], [0.0, 0.06])
+
+	@unittest.skipUnless(package_installed('pyarrow'), 'pyarrow is not installed')
+	def test_parquet(self):
+		self.round_trip(fmt=constants.Export.parquet)
+
+	@unittest.skipUnless(package_installed('pyarrow'), 'pyarrow is not installed')
+	def test_feather(self):
+		self.round_trip(fmt=constants.Export.feather)
+
+	@unittest.skipUnless(package_installed('tables'), 'pytables is not installed')
+	def test_hdf5(self):
+		self.round_trip(fmt=constants.Export.hdf5)
+
+	@classmethod
+	def tearDownClass(cls):
+		shutil.rmtree(cls.temp_folder)
+
+		# Delete log files created by logger
+		if DELETE_LOG_FILES:
+			paths = [
+				cls.logger.pth_debug_log,
+				cls.logger.pth_progress_log,
+				cls.logger.pth_error_log
+			]
+			del cls.logger
+			for pth in paths:
+				if os.path.exists(pth):
+					os.remove(pth)
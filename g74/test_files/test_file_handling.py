@@ -12,9 +12,12 @@
 import unittest
 import os
 import sys
+import shutil
+import tempfile
 
 import g74
 import g74.file_handling as test_module
+import numpy as np
 import pandas as pd
 
 TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -149,5 +152,79 @@ class TestWorksheetNameChecker(unittest.TestCase):
 				if os.path.isfile(f):
 					os.remove(f)
 
+
+class TestResultsWorkbook(unittest.TestCase):
+	"""
+		Tests the results of several studies are written to the same workbook
+	"""
+	@classmethod
+	def setUpClass(cls):
+		"""
+			Creates fault current results in the same format as the studies
+		"""
+		cls.temp_folder = tempfile.mkdtemp()
+		columns = pd.MultiIndex.from_product(
+			[('0.0 seconds', '0.06 seconds'), ('Ik (kA)', 'X/R')], names=['Time after fault:', 'Value:']
+		)
+		cls.df = pd.DataFrame(
+			np.arange(12.0).reshape(3, 4), index=pd.Index([10, 20, 30], name='Busbar Number'), columns=columns
+		)
+		cls.df.iloc[1, 2] = np.nan
+		cls.df.insert(0, ('Node Details', 'Name'), ['BUS A', 'BUS B', 'BUS C'])
+
+	def test_all_sheets_written(self):
+		"""
+			Tests the sheets for each study are kept and the rows streamed in constant memory mode produce the same
+			layout as pandas
+		:return:
+		"""
+		c = g74.constants.Excel
+		sheets = dict()
+		# Written entirely by pandas as the reference
+		options = ((True, c.transpose_streamed), (False, c.transpose_streamed), (False, c.transpose_full))
+		for constant_memory, transpose in options:
+			pth = os.path.join(self.temp_folder, 'results_{}_{}.xlsx'.format(constant_memory, transpose))
+			with test_module.ResultsWorkbook(
+					pth=pth, constant_memory=constant_memory, transpose=transpose
+			) as results_wkbk:
+				results_wkbk.write_fault_data(df=self.df, message='BKDY', sheet_name='BKDY')
+				results_wkbk.write_fault_data(df=self.df, message='IEC', sheet_name='IEC')
+			sheets[(constant_memory, transpose)] = pd.read_excel(pth, sheet_name=None, header=None)
+
+		expected = sheets[(False, c.transpose_full)]
+		self.assertEqual(sorted(expected.keys()), ['BKDY', 'BKDY_transposed', 'IEC', 'IEC_transposed'])
+		self.assertEqual(expected['IEC'].iloc[0, 0], 'IEC')
+		for option in options[:2]:
+			self.assertEqual(sorted(sheets[option].keys()), sorted(expected.keys()))
+			for sheet_name, df in sheets[option].items():
+				pd.testing.assert_frame_equal(df, expected[sheet_name])
+
+	def test_transposed_sheet_skipped(self):
+		"""
+			Tests the transposed sheet is not written if disabled or if there are too many busbars
+		:return:
+		"""
+		pth = os.path.join(self.temp_folder, 'results_none.xlsx')
+		with test_module.ResultsWorkbook(pth=pth, transpose=g74.constants.Excel.transpose_none) as results_wkbk:
+			results_wkbk.write_fault_data(df=self.df, message='BKDY', sheet_name='BKDY')
+		self.assertEqual(list(pd.read_excel(pth, sheet_name=None).keys()), ['BKDY'])
+
+		original = g74.constants.Excel.max_columns
+		g74.constants.Excel.max_columns = len(self.df.index)
+		try:
+			pth = os.path.join(self.temp_folder, 'results_limit.xlsx')
+			with test_module.ResultsWorkbook(pth=pth) as results_wkbk:
+				results_wkbk.write_fault_data(df=self.df, message='BKDY', sheet_name='BKDY')
+		finally:
+			g74.constants.Excel.max_columns = original
+		self.assertEqual(list(pd.read_excel(pth, sheet_name=None).keys()), ['BKDY'])
+
+		self.assertRaises(ValueError, test_module.ResultsWorkbook, pth=pth, transpose='lazy')
+
+	@classmethod
+	def tearDownClass(cls):
+		shutil.rmtree(cls.temp_folder)
+
+
 if __name__ == '__main__':
 	unittest.main()
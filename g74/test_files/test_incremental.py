@@ -0,0 +1,194 @@
+"""
+#######################################################################################################################
+###											PSSE G74 Fault Studies													###
+###		Unit tests associated with the incremental re-study, these do not require PSSE								###
+###																													###
+###		Code developed by David Mills (david.mills@PSCconsulting.com, +44 7899 984158) as part of PSC 		 		###
+###		project JK7938 - SHEPD - studies and automation																###
+###																													###
+#######################################################################################################################
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+import pandas as pd
+
+import g74
+import g74.incremental as test_module
+import g74.cache as cache
+import g74.mock_psse as mock_psse
+import g74.synthetic as synthetic
+import g74.constants as constants
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_LOGS = os.path.join(TESTS_DIR, 'logs')
+
+two_up = os.path.abspath(os.path.join(TESTS_DIR, '../..'))
+sys.path.append(two_up)
+
+DELETE_LOG_FILES = True
+
+
+def snapshot_data(branches, loads):
+	"""
+		Produces the data for a snapshot of a simple network
+	:param list branches:  (from_bus, to_bus) for each branch
+	:param dict loads:  Load at each busbar
+	:return dict data:
+	"""
+	c = constants.Incremental
+	buses = sorted(set(bus for branch in branches for bus in branch))
+	return {
+		c.buses: pd.DataFrame(
+			[(bus, 1, 11.0, 1.0) for bus in buses],
+			columns=[
+				constants.Busbars.bus, constants.Busbars.state, constants.Busbars.nominal, constants.Busbars.voltage
+			]
+		),
+		c.machines: pd.DataFrame(columns=[constants.Machines.bus, constants.Machines.identifier]),
+		c.loads: pd.DataFrame(
+			[(bus, '1', load) for bus, load in sorted(loads.items())],
+			columns=[constants.Loads.bus, constants.Loads.identifier, constants.Loads.load]
+		),
+		c.branches: pd.DataFrame(
+			[(from_bus, to_bus, 1, 0.01, 0.1, 0.0) for from_bus, to_bus in branches],
+			columns=[
+				constants.Branches.from_bus, constants.Branches.to_bus, constants.Branches.status, constants.Branches.r,
+				constants.Branches.x, constants.Branches.charging
+			]
+		)
+	}
+
+
+# ----- UNIT TESTS -----
+class TestIncrementalStudy(unittest.TestCase):
+	"""
+		Tests only the busbars close to changes in the SAV case are faulted again
+	"""
+	logger = None
+
+	@classmethod
+	def setUpClass(cls):
+		"""
+			Initialise logger
+		"""
+		cls.logger = g74.Logger(pth_logs=TEST_LOGS, uid='TestIncrementalStudy', debug=g74.constants.DEBUG_MODE)
+		cls.temp_folder = tempfile.mkdtemp()
+
+	def test_affected_buses(self):
+		"""
+			Tests the busbars within the maximum number of branches of a change are identified and every connected
+			busbar is affected by a change to a load
+		:return:
+		"""
+		branches = [(1, 2), (2, 3), (3, 4), (4, 5), (5, 6), (10, 11)]
+		loads = {1: 5.0, 6: 5.0, 10: 5.0}
+		previous = test_module.NetworkSnapshot(data=snapshot_data(branches=branches, loads=loads))
+		self.assertEqual(previous.three_winding, 0)
+
+		current = test_module.NetworkSnapshot(
+			data=snapshot_data(branches=branches, loads={1: 5.0, 6: 5.0000001, 10: 5.0})
+		)
+		self.assertEqual(current.affected_buses(previous=previous), set())
+
+		# Changes to the loads affect the fault currents throughout the connected network
+		current = test_module.NetworkSnapshot(data=snapshot_data(branches=branches, loads={1: 7.0, 6: 5.0, 10: 5.0}))
+		self.assertEqual(current.changed_buses(previous=previous), {1})
+		self.assertEqual(current.affected_buses(previous=previous, max_distance=1), {1, 2, 3, 4, 5, 6})
+
+		# Busbars close to a branch which has been removed or added are affected
+		current = test_module.NetworkSnapshot(data=snapshot_data(branches=branches[1:], loads=loads))
+		self.assertEqual(current.changed_buses(previous=previous), {1, 2})
+		self.assertEqual(current.affected_buses(previous=previous, max_distance=1), {1, 2, 3})
+		current = test_module.NetworkSnapshot(data=snapshot_data(branches=branches + [(6, 7)], loads=loads))
+		self.assertEqual(current.affected_buses(previous=previous, max_distance=1), {5, 6, 7})
+
+	def test_iec_incremental(self):
+		"""
+			Tests the IEC study for a changed SAV case only faults the affected busbars and the results for these
+			busbars match a full study of the changed case
+		:return:
+		"""
+		network = synthetic.SyntheticNetwork(number_of_buses=40)
+		pth_original = network.to_json(pth=os.path.join(self.temp_folder, 'original.sav'))
+		model = network.model
+		changed_bus = int(model.df_branches['to_bus'].iloc[-1])
+		model.df_branches.loc[model.df_branches.index[-1], 'x'] *= 2.0
+		pth_changed = os.path.join(self.temp_folder, 'changed.sav')
+		model.to_json(pth=pth_changed)
+		model.df_loads.loc[model.df_loads.index[-1], 'mva'] *= 2.0
+		pth_load = os.path.join(self.temp_folder, 'load.sav')
+		model.to_json(pth=pth_load)
+
+		cache_folder = os.path.join(self.temp_folder, 'cache')
+		fault_times = [0.0, 0.01]
+		study_type = constants.GUI.iec_3ph
+
+		def run(pth_sav, incremental, three_winding=0):
+			mock_psspy, _ = mock_psse.install()
+			mock_psspy.three_winding = three_winding
+			try:
+				psse_control = g74.psse.PsseControl()
+				psse_control.load_data_case(pth_sav=pth_sav)
+				result_cache = cache.ResultCache(pth_sav=pth_sav, folder=cache_folder, bypass=False)
+				study = test_module.IncrementalStudy(cache=result_cache) if incremental else None
+				g74_infeed = g74.psse.G74FaultInfeed()
+				g74_infeed.identify_machine_parameters()
+				g74_infeed.calculate_machine_mva_values()
+				iec = g74.psse.IecFaults(psse=psse_control, buses=list())
+				df = iec.calculate_fault_currents(
+					fault_times=list(fault_times), g74_infeed=g74_infeed, lll=True, incremental=study
+				)
+			finally:
+				mock_psse.uninstall()
+			return df, study
+
+		df_original, _ = run(pth_sav=pth_original, incremental=True)
+		df_incremental, study = run(pth_sav=pth_changed, incremental=True)
+		df_full, _ = run(pth_sav=pth_changed, incremental=False)
+
+		self.assertEqual(df_incremental.index.tolist(), df_full.index.tolist())
+		self.assertEqual(df_incremental.columns.tolist(), df_full.columns.tolist())
+		# Busbars close to the change match the full study and all others are the previous results
+		self.assertIn(changed_bus, df_incremental.index)
+		pd.testing.assert_series_equal(df_incremental.loc[changed_bus], df_full.loc[changed_bus])
+		unchanged = [bus for bus in df_incremental.index if (df_incremental.loc[bus] == df_original.loc[bus]).all()]
+		self.assertTrue(0 < len(unchanged) < len(df_incremental))
+
+		# Approximation is reported with the results
+		reused = study.metadata(study=study_type)[constants.Incremental.key_metadata][constants.Incremental.key_reused]
+		self.assertEqual(reused, study.reused[study_type][0])
+		self.assertTrue(0 < reused < len(df_incremental))
+		self.assertIn(str(reused), study.note(study=study_type))
+
+		# Repeating the study without any further changes does not fault any busbars
+		_, _, to_fault, df_previous = study.plan(buses=list(), fault_times=fault_times, study=study_type)
+		self.assertEqual(to_fault, list())
+		pd.testing.assert_frame_equal(df_previous, df_incremental)
+
+		# Change to a load or a case with three winding transformers results in every busbar being faulted
+		_, study = run(pth_sav=pth_load, incremental=True)
+		self.assertEqual(study.reused[study_type][0], 0)
+		self.assertIsNone(study.note(study=study_type))
+		_, study = run(pth_sav=pth_changed, incremental=True, three_winding=1)
+		self.assertEqual(study.reused[study_type][0], 0)
+
+	@classmethod
+	def tearDownClass(cls):
+		shutil.rmtree(cls.temp_folder)
+
+		# Delete log files created by logger
+		if DELETE_LOG_FILES:
+			paths = [
+				cls.logger.pth_debug_log,
+				cls.logger.pth_progress_log,
+				cls.logger.pth_error_log
+			]
+			del cls.logger
+			for pth in paths:
+				if os.path.exists(pth):
+					os.remove(pth)
@@ -0,0 +1,188 @@
+"""
+#######################################################################################################################
+###											PSSE G74 Fault Studies													###
+###		Unit tests associated with the timing spans and PSSE API call counters, these do not require PSSE			###
+###																													###
+###		Code developed by David Mills (david.mills@PSCconsulting.com, +44 7899 984158) as part of PSC 		 		###
+###		project JK7938 - SHEPD - studies and automation																###
+###																													###
+#######################################################################################################################
+"""
+
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+import g74
+import g74.instrumentation as test_module
+import g74.mock_psse as mock_psse
+import g74.synthetic as synthetic
+import g74.constants as constants
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_LOGS = os.path.join(TESTS_DIR, 'logs')
+
+two_up = os.path.abspath(os.path.join(TESTS_DIR, '../..'))
+sys.path.append(two_up)
+
+DELETE_LOG_FILES = True
+
+
+class DummyApi:
+	"""
+		Stand in for an API module with a single function
+	"""
+	version = 33
+
+	def __init__(self):
+		pass
+
+	@staticmethod
+	def bkdy(sid, all):
+		"""
+			Returns 0 as for a successful call
+		"""
+		return 0
+
+
+# ----- UNIT TESTS -----
+class TestInstrumentation(unittest.TestCase):
+	"""
+		Tests the spans and API call counts are recorded and exported
+	"""
+	logger = None
+
+	@classmethod
+	def setUpClass(cls):
+		"""
+			Initialise logger
+		"""
+		cls.logger = g74.Logger(pth_logs=TEST_LOGS, uid='TestInstrumentation', debug=g74.constants.DEBUG_MODE)
+		cls.temp_folder = tempfile.mkdtemp()
+
+	def setUp(self):
+		self.recorder = test_module.Recorder()
+
+	def test_nested_spans(self):
+		"""
+			Tests nested spans are recorded with their depth and combined by name in the summary
+		:return:
+		"""
+		c = constants.Instrumentation
+		with self.recorder.span('study'):
+			for fault_time in (0.0, 0.06):
+				with self.recorder.span('fault_time', fault_time=fault_time):
+					pass
+
+		self.assertEqual([x.name for x in self.recorder.spans], ['fault_time', 'fault_time', 'study'])
+		self.assertEqual([x.depth for x in self.recorder.spans], [1, 1, 0])
+		self.assertEqual(self.recorder.spans[1].args, {'fault_time': 0.06})
+
+		df = self.recorder.summary()
+		self.assertEqual(df.loc['fault_time', c.col_calls], 2)
+		self.assertEqual(df.loc['study', c.col_calls], 1)
+		self.assertTrue(df.loc['study', c.col_total] >= df.loc['fault_time', c.col_total])
+
+	def test_span_peak_memory(self):
+		"""
+			Tests the peak memory is only recorded if it can be measured and that a span has at least the peak of the
+			spans nested within it
+		:return:
+		"""
+		with self.recorder.span('study'):
+			pass
+		self.assertIsNone(self.recorder.spans[0].peak_memory)
+
+		# Peak memory since the previous measurement at the start and end of each span
+		measurements = iter([5.0, 10.0, 50.0, 20.0])
+		self.recorder.reset()
+		self.recorder.memory = lambda: next(measurements)
+		with self.recorder.span('study'):
+			with self.recorder.span('fault_time'):
+				pass
+		self.assertEqual(
+			[(x.name, x.peak_memory) for x in self.recorder.spans], [('fault_time', 50.0), ('study', 50.0)]
+		)
+
+	def test_api_counter(self):
+		"""
+			Tests calls to the API functions are counted without changing the function names or other attributes
+		:return:
+		"""
+		api = test_module.ApiCounter(module=DummyApi(), prefix='psspy', recorder=self.recorder)
+		for _ in range(3):
+			self.assertEqual(api.bkdy(sid=1, all=1), 0)
+
+		self.assertEqual(api.bkdy.__name__, 'bkdy')
+		self.assertEqual(api.version, 33)
+		self.assertEqual(self.recorder.api_calls['psspy.bkdy'][0], 3)
+		self.assertEqual(self.recorder.summary().loc['psspy.bkdy', constants.Instrumentation.col_calls], 3)
+
+	def test_chrome_trace_export(self):
+		"""
+			Tests the Chrome trace is written next to the log files with an event for each span
+		:return:
+		"""
+		with self.recorder.span('outer'):
+			with self.recorder.span('inner'):
+				pass
+		self.recorder.record_api_call(name='psspy.bkdy', duration=0.1)
+
+		pth_trace = self.recorder.export(pth_logs=self.temp_folder, uid='study')
+		self.assertEqual(
+			pth_trace, os.path.join(self.temp_folder, 'study{}'.format(constants.Instrumentation.trace_suffix))
+		)
+		with open(pth_trace, 'r') as f:
+			trace = json.load(f)
+
+		self.assertEqual([x['name'] for x in trace['traceEvents']], ['outer', 'inner'])
+		self.assertTrue(all(x['ph'] == 'X' for x in trace['traceEvents']))
+		self.assertEqual(trace['otherData']['api_calls']['psspy.bkdy'][constants.Instrumentation.col_calls], 1)
+
+	def test_fault_study_trace(self):
+		"""
+			Tests the complete fault study run against the stand in PSSE backend records the spans and API calls
+		:return:
+		"""
+		import Fault_Calculations
+
+		network = synthetic.SyntheticNetwork(number_of_buses=50)
+		pth_sav = network.to_json(pth=os.path.join(self.temp_folder, 'synthetic.sav'))
+		mock_psse.install()
+		try:
+			Fault_Calculations.fault_study(
+				psse_handler=g74.psse.PsseControl(), local_uid='TestInstrumentation', sav_case=pth_sav,
+				local_temp_folder=self.temp_folder, excel_file=os.path.join(self.temp_folder, 'results.xlsx'),
+				fault_times=[0.0, 0.01, 0.06], buses=list(), local_logger=self.logger, use_cache=False
+			)
+		finally:
+			mock_psse.uninstall()
+
+		c = constants.Instrumentation
+		df = test_module.RECORDER.summary()
+		self.assertEqual(df.loc[c.span_bkdy, c.col_calls], 5)
+		self.assertEqual(df.loc['psspy.bkdy', c.col_calls], 5)
+		self.assertEqual(df.loc[c.span_excel, c.col_calls], 1)
+		self.assertTrue(
+			os.path.exists(os.path.join(TEST_LOGS, 'TestInstrumentation{}'.format(c.trace_suffix)))
+		)
+
+	@classmethod
+	def tearDownClass(cls):
+		shutil.rmtree(cls.temp_folder)
+
+		# Delete log files created by logger
+		if DELETE_LOG_FILES:
+			paths = [
+				cls.logger.pth_debug_log,
+				cls.logger.pth_progress_log,
+				cls.logger.pth_error_log,
+				os.path.join(TEST_LOGS, 'TestInstrumentation{}'.format(constants.Instrumentation.trace_suffix))
+			]
+			del cls.logger
+			for pth in paths:
+				if os.path.exists(pth):
+					os.remove(pth)
@@ -0,0 +1,571 @@
+"""
+#######################################################################################################################
+###											PSSE G74 Fault Studies													###
+###		Unit tests associated with the stand in PSSE backend, these run the PSSE routines without PSSE				###
+###																													###
+###		Code developed by David Mills (david.mills@PSCconsulting.com, +44 7899 984158) as part of PSC 		 		###
+###		project JK7938 - SHEPD - studies and automation																###
+###																													###
+#######################################################################################################################
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+import g74
+import g74.mock_psse as test_module
+import g74.psse as psse
+import g74.short_circuit as short_circuit
+import g74.parallel
+import g74.cache
+import g74.constants as constants
+import numpy as np
+import pandas as pd
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_LOGS = os.path.join(TESTS_DIR, 'logs')
+
+two_up = os.path.abspath(os.path.join(TESTS_DIR, '../..'))
+sys.path.append(two_up)
+
+DELETE_LOG_FILES = True
+
+# Small network with a source at busbar 1 and embedded load at busbars 2 and 3
+TEST_NETWORK = {
+	'base_mva': 100.0,
+	'buses': [
+		{'bus': 1, 'name': 'GRID', 'nominal_kv': 132.0, 'voltage_pu': 1.0},
+		{'bus': 2, 'name': 'PRIMARY', 'nominal_kv': 33.0, 'voltage_pu': 1.01},
+		{'bus': 3, 'name': 'LOAD', 'nominal_kv': 11.0, 'voltage_pu': 0.99}
+	],
+	'branches': [
+		{'from_bus': 1, 'to_bus': 2, 'r': 0.01, 'x': 0.1, 'b': 0.0, 'status': 1},
+		{'from_bus': 2, 'to_bus': 3, 'r': 0.05, 'x': 0.6, 'b': 0.0, 'status': 1}
+	],
+	'machines': [
+		{'bus': 1, 'id': '1', 'mva': 200.0, 'r': 0.005, 'x_subtr': 0.2, 'x_trans': 0.3, 'x_synch': 1.5}
+	],
+	'loads': [
+		{'bus': 2, 'mva': 10.0},
+		{'bus': 3, 'mva': 5.0}
+	]
+}
+
+
+# ----- UNIT TESTS -----
+class TestMockPsse(unittest.TestCase):
+	"""
+		Tests the PSSE routines run against the stand in backend match the native short circuit solver
+	"""
+	logger = None
+
+	@classmethod
+	def setUpClass(cls):
+		"""
+			Initialise logger, write the network description and install the stand in backend
+		"""
+		cls.logger = g74.Logger(pth_logs=TEST_LOGS, uid='TestMockPsse', debug=g74.constants.DEBUG_MODE)
+		cls.temp_folder = tempfile.mkdtemp()
+		cls.model = short_circuit.NetworkModel.from_dict(data=TEST_NETWORK)
+		cls.pth_sav = os.path.join(cls.temp_folder, 'network.json')
+		cls.model.to_json(pth=cls.pth_sav)
+		cls.fault_times = [0.0, 0.01, 0.06]
+
+	def setUp(self):
+		"""
+			Reload the case before each test
+		"""
+		self.psspy, self.pssarrays = test_module.install()
+		self.psse = psse.PsseControl()
+		self.psse.load_data_case(pth_sav=self.pth_sav)
+		self.g74_infeed = psse.G74FaultInfeed()
+		self.g74_infeed.identify_machine_parameters()
+		self.g74_infeed.calculate_machine_mva_values()
+
+	def test_data_extraction(self):
+		"""
+			Tests the busbar, load and machine data is returned in the format expected
+		:return:
+		"""
+		bus_data = psse.BusData()
+		self.assertEqual(bus_data.df[bus_data.c.bus].tolist(), [1, 2, 3])
+		self.assertEqual(bus_data.df.loc[3, bus_data.c.nominal], 11.0)
+
+		df_loads = psse.LoadData().summary()
+		self.assertEqual(df_loads[constants.Loads.load].tolist(), [10.0, 5.0])
+
+		machine_data = psse.MachineData()
+		machine_data.update()
+		self.assertEqual(machine_data.df[constants.Machines.xsubtr].tolist(), [0.2])
+
+	def test_network_model_from_case(self):
+		"""
+			Tests the network model can be produced from the case loaded and that it is rejected if there are three
+			winding transformers since these cannot be represented
+		:return:
+		"""
+		model = short_circuit.NetworkModel.from_psse()
+		self.assertEqual(model.df_buses['bus'].tolist(), self.model.df_buses['bus'].tolist())
+		self.assertEqual(len(model.df_branches), len(self.model.df_branches))
+
+		self.psspy.three_winding = 1
+		self.assertRaises(ValueError, short_circuit.NetworkModel.from_psse)
+
+	def test_g74_machines_added(self):
+		"""
+			Tests the equivalent machines are added to the case and kept when the case is saved and reloaded
+		:return:
+		"""
+		self.g74_infeed.calculate_machine_impedance(fault_time=0.0, update=True)
+		self.assertEqual(self.g74_infeed.existing_machine_buses(), {2, 3})
+		self.assertEqual(self.psspy.calls['machine_data_2'], 2)
+
+		pth_sav = os.path.join(self.temp_folder, 'with_machines.json')
+		self.psse.save_data_case(pth_sav=pth_sav)
+		self.psse.load_data_case(pth_sav=pth_sav)
+		self.assertEqual(self.g74_infeed.existing_machine_buses(), {2, 3})
+
+	def test_machine_impedance_memoised(self):
+		"""
+			Tests the machine reactances are only calculated once for each fault time and are not written to the case
+			again when they are already in it
+		:return:
+		"""
+		self.g74_infeed.calculate_machine_impedance(fault_time=0.06, update=True)
+		reactances = self.g74_infeed.machine_reactances[0.06]
+		seq_calls = self.psspy.calls['seq_machine_data_3']
+
+		self.g74_infeed.calculate_machine_impedance(fault_time=0.06, update=True)
+		self.assertIs(self.g74_infeed.machine_reactances[0.06], reactances)
+		self.assertEqual(self.psspy.calls['seq_machine_data_3'], seq_calls)
+
+		# Machines no longer in the case once it is reloaded are created and written again
+		self.psse.load_data_case(pth_sav=self.pth_sav)
+		self.g74_infeed.calculate_machine_impedance(fault_time=0.06, update=True)
+		self.assertEqual(self.psspy.calls['seq_machine_data_3'], seq_calls + 2)
+		self.assertEqual(self.g74_infeed.existing_machine_buses(), {2, 3})
+
+	def test_incremental_machine_update(self):
+		"""
+			Tests an incremental update of the equivalent machines skips the machines that have not changed, writes
+			those that have and counts the PSSE API calls saved
+		:return:
+		"""
+		c = constants.Machines
+		machine_id = self.g74_infeed.c.machine_id
+		self.g74_infeed.calculate_machine_impedance(fault_time=0.06, update=True)
+		seq_calls = self.psspy.calls['seq_machine_data_3']
+		saved = self.g74_infeed.api_calls_saved
+		xsubtr = self.psspy.machines[(2, machine_id)]['XSUBTR']
+
+		# Only the machine at busbar 3 has changed
+		self.g74_infeed.df_machines.loc[3, c.xsubtr] += 0.1
+		self.g74_infeed.add_machines(incremental=True)
+		self.assertEqual(self.psspy.calls['seq_machine_data_3'], seq_calls + 1)
+		self.assertEqual(self.psspy.machines[(2, machine_id)]['XSUBTR'], xsubtr)
+		self.assertAlmostEqual(
+			self.psspy.machines[(3, machine_id)]['XSUBTR'], self.g74_infeed.df_machines.loc[3, c.xsubtr]
+		)
+		# Adding every machine in full compared to checking which machines exist (amachint and amachchar) and a
+		# single sequence data update
+		full_calls = self.g74_infeed.full_injection_calls()
+		self.assertEqual(self.g74_infeed.api_calls_saved - saved, full_calls - 3)
+
+		# Nothing is written if nothing has changed
+		self.g74_infeed.add_machines(incremental=True)
+		self.assertEqual(self.psspy.calls['seq_machine_data_3'], seq_calls + 1)
+		self.assertEqual(self.g74_infeed.api_calls_saved - saved, (full_calls - 3) + (full_calls - 2))
+
+	def test_incremental_machine_update_matches(self):
+		"""
+			Tests the equivalent machines in the case after each fault time are the same whether they are updated
+			incrementally or written in full
+		:return:
+		"""
+		c = constants.BkdyFileOutput
+		fault_times = [0.0, 0.0, 0.01, 0.06, 0.06, 0.1, 0.06, 0.0]
+		machines = dict()
+		api_calls = dict()
+		for incremental in (True, False):
+			self.psse.load_data_case(pth_sav=self.pth_sav)
+			g74_infeed = psse.G74FaultInfeed()
+			g74_infeed.identify_machine_parameters()
+			g74_infeed.calculate_machine_mva_values()
+			bkdy = psse.BkdyFaultStudy(psse_control=self.psse, streaming=True)
+			bkdy.create_breaker_duty_file(target_path=os.path.join(self.temp_folder, 'breaker_duty.idev'))
+			bkdy.define_faulted_buses(buses=list())
+
+			machines[incremental] = list()
+			for i, fault_time in enumerate(fault_times):
+				g74_infeed.calculate_machine_impedance(fault_time=fault_time, update=False)
+				g74_infeed.add_machines(incremental=incremental, fault_time=fault_time)
+				machines[incremental].append(pd.DataFrame(self.psspy.machines).T)
+
+				# Fault currents depend on the machines in the case
+				output_file = os.path.join(self.temp_folder, 'fault_{}_{}.csv'.format(int(incremental), i))
+				bkdy.main(name=i, output_file=output_file, fault_time=fault_time)
+			machines[incremental].append(bkdy.combine_bkdy_output(delete=True))
+			api_calls[incremental] = g74_infeed.api_calls_made
+
+		for df_incremental, df_full in zip(machines[True], machines[False]):
+			pd.testing.assert_frame_equal(df_incremental, df_full)
+		self.assertTrue((machines[True][-1].xs(c.ibsym, axis=1, level=1) > 0.0).all().all())
+		self.assertLess(api_calls[True], api_calls[False])
+
+	def test_iec_studies_share_machine_update(self):
+		"""
+			Tests the LLL and LG IEC studies run together update the machines once for each fault time and give the
+			same results as running each study separately
+		:return:
+		"""
+		iec = psse.IecFaults(psse=self.psse, buses=[1, 2, 3])
+		studies = [constants.GUI.iec_3ph, constants.GUI.iec_lg]
+		dfs = iec.study_fault_types(fault_times=list(self.fault_times), g74_infeed=self.g74_infeed, studies=studies)
+		self.assertEqual(self.psspy.calls['amachint'], len(self.fault_times))
+
+		for study in studies:
+			df = iec.study_fault_times(
+				fault_times=list(self.fault_times), g74_infeed=self.g74_infeed,
+				lll=study == constants.GUI.iec_3ph, lg=study == constants.GUI.iec_lg
+			)
+			pd.testing.assert_frame_equal(dfs[study], df)
+
+	def test_bus_subsystem_defined_once(self):
+		"""
+			Tests the bus subsystem is defined with a single call and not defined again for the same busbars
+		:return:
+		"""
+		sid = self.psse.define_bus_subsystem(buses=[3, 1])
+		self.assertEqual(self.psspy.calls['bsys'], 1)
+		self.assertEqual(self.psspy.calls['bsyso'], 0)
+		self.assertEqual(self.psspy.subsystem_buses(sid=sid), [1, 3])
+
+		self.assertEqual(self.psse.define_bus_subsystem(buses=[1, 3]), sid)
+		self.assertEqual(self.psspy.calls['bsys'], 1)
+		self.assertEqual(self.psspy.calls['bsysinit'], 1)
+
+		# Subsystems are no longer defined once the case is reloaded
+		self.psse.load_data_case(pth_sav=self.pth_sav)
+		self.psse.define_bus_subsystem(buses=[1, 3])
+		self.assertEqual(self.psspy.calls['bsys'], 2)
+
+	def test_bus_subsystem_bkdy_then_iec(self):
+		"""
+			Tests the bus subsystem for a BKDY study is defined again for the IEC study after the SAV case is reloaded
+			in the same way as in Fault_Calculations.fault_study
+		:return:
+		"""
+		bkdy = psse.BkdyFaultStudy(psse_control=self.psse)
+		bkdy.define_faulted_buses(buses=[3, 1])
+		self.assertEqual(self.psspy.calls['bsys'], 1)
+
+		# SAV case is reloaded since the BKDY study converts the case
+		self.psse.load_data_case(pth_sav=self.pth_sav)
+		self.assertIsNone(self.psspy.subsystem_buses(sid=bkdy.sid))
+
+		iec = psse.IecFaults(psse=self.psse, buses=[3, 1])
+		self.assertEqual(self.psspy.calls['bsys'], 2)
+		self.assertEqual(iec.sid, bkdy.sid)
+		self.assertEqual(self.psspy.subsystem_buses(sid=iec.sid), [1, 3])
+
+	def test_bus_subsystem_fallback(self):
+		"""
+			Tests the busbars are added one at a time if the single call fails so the busbar causing the error is found
+		:return:
+		"""
+		self.assertRaises(ValueError, self.psse.define_bus_subsystem, buses=[1, 99])
+		self.assertEqual(self.psspy.calls['bsys'], 1)
+		self.assertEqual(self.psspy.calls['bsyso'], 2)
+		self.assertNotIn(constants.PSSE.sid, self.psse.subsystems)
+
+	def test_bkdy_matches_native_solver(self):
+		"""
+			Tests the BKDY study with the equivalent machines for embedded load matches the native solver, including the
+			peak and DC values since the stand in backend keeps the subtransient impedance of the existing machines
+		:return:
+		"""
+		c = constants.BkdyFileOutput
+		bkdy = psse.BkdyFaultStudy(psse_control=self.psse, streaming=True)
+		bkdy.create_breaker_duty_file(target_path=os.path.join(self.temp_folder, 'breaker_duty.idev'))
+		bkdy.define_faulted_buses(buses=list())
+		df = bkdy.study_fault_times(
+			fault_times=list(self.fault_times), g74_infeed=self.g74_infeed, output_folder=self.temp_folder
+		)
+		df_expected = short_circuit.ShortCircuitSolver(model=self.model).calculate_fault_currents(
+			fault_times=self.fault_times
+		)
+
+		for fault_time in self.fault_times:
+			for col in (c.ik11, c.ibsym, c.ip, c.idc):
+				np.testing.assert_allclose(
+					df.loc[[1, 2, 3], (fault_time, col)].values, df_expected[(fault_time, col)].values, rtol=1e-4
+				)
+
+	def test_native_engine(self):
+		"""
+			Tests the native engine gives the same results in the same format as BKDY without running BKDY or adding the
+			equivalent machines, both in this session and in a worker process
+		:return:
+		"""
+		fault_times = list(self.fault_times)
+		bkdy = psse.BkdyFaultStudy(psse_control=self.psse, streaming=True, output_folder=self.temp_folder)
+		bkdy.create_breaker_duty_file(target_path=os.path.join(self.temp_folder, 'breaker_duty.idev'))
+		df_bkdy = bkdy.calculate_fault_currents(fault_times=list(fault_times), g74_infeed=self.g74_infeed, buses=[3, 1])
+
+		self.setUp()
+		native = psse.BkdyFaultStudy(psse_control=self.psse, engine=constants.ShortCircuit.engine_native)
+		df_native = native.calculate_fault_currents(
+			fault_times=list(fault_times), g74_infeed=self.g74_infeed, buses=[3, 1]
+		)
+		self.assertEqual(self.psspy.calls['bkdy'], 0)
+		self.assertEqual(self.psspy.calls['machine_data_2'], 0)
+		pd.testing.assert_index_equal(df_native.index, df_bkdy.index)
+		pd.testing.assert_index_equal(df_native.columns, df_bkdy.columns)
+		# Values in the BKDY report are rounded and so the X/R only matches to the precision of the report
+		np.testing.assert_allclose(
+			df_native.select_dtypes(exclude=[object]).values, df_bkdy.select_dtypes(exclude=[object]).values, rtol=1e-3
+		)
+
+		df, unreliable_buses = g74.parallel.psse_fault_time_worker(task={
+			'pth_sav': self.pth_sav, 'study': constants.GUI.bkdy_3ph, 'fault_times': fault_times, 'buses': [3, 1],
+			'breaker_duty_file': str(), 'engine': constants.ShortCircuit.engine_native
+		})
+		self.assertEqual(self.psspy.calls['bkdy'], 0)
+		pd.testing.assert_frame_equal(df, native.native_fault_times(fault_times=fault_times))
+		self.assertEqual(unreliable_buses, list())
+
+		self.assertRaises(ValueError, psse.BkdyFaultStudy, psse_control=self.psse, engine='PSSE')
+
+	def test_worker_unreliable_buses(self):
+		"""
+			Tests that a busbar with a negative fault impedance found by the worker processes is reported by the study
+			and stored with the cached results, whether the fault times or the busbars are shared between the workers
+		:return:
+		"""
+		# Busbar 4 is connected through a series capacitor and so has a negative fault impedance
+		network = dict(TEST_NETWORK)
+		network['buses'] = TEST_NETWORK['buses'] + [
+			{'bus': 4, 'name': 'CAPACITOR', 'nominal_kv': 11.0, 'voltage_pu': 0.99}
+		]
+		network['branches'] = TEST_NETWORK['branches'] + [
+			{'from_bus': 3, 'to_bus': 4, 'r': 0.0, 'x': -1.5, 'b': 0.0, 'status': 1}
+		]
+		pth_sav = os.path.join(self.temp_folder, 'negative_impedance.json')
+		short_circuit.NetworkModel.from_dict(data=network).to_json(pth=pth_sav)
+		self.psse.load_data_case(pth_sav=pth_sav)
+
+		for executor in (
+				g74.parallel.FaultTimeExecutor(pth_sav=pth_sav, processes=2),
+				g74.parallel.BusPartitionScheduler(pth_sav=pth_sav, processes=2)
+		):
+			cache = g74.cache.ResultCache(
+				pth_sav=pth_sav, folder=os.path.join(self.temp_folder, type(executor).__name__), bypass=False
+			)
+			bkdy = psse.BkdyFaultStudy(psse_control=self.psse, streaming=True, output_folder=self.temp_folder)
+			bkdy.create_breaker_duty_file(target_path=os.path.join(self.temp_folder, 'breaker_duty.idev'))
+			bkdy.calculate_fault_currents(
+				fault_times=list(self.fault_times), g74_infeed=self.g74_infeed, executor=executor, cache=cache
+			)
+			self.assertEqual(set(bkdy.unreliable_faulted_buses), {4})
+
+			# Busbar is still reported when the results are returned from the cache
+			bkdy_cached = psse.BkdyFaultStudy(psse_control=self.psse, streaming=True, output_folder=self.temp_folder)
+			bkdy_cached.calculate_fault_currents(
+				fault_times=list(self.fault_times), g74_infeed=self.g74_infeed, executor=executor, cache=cache
+			)
+			self.assertEqual(set(bkdy_cached.unreliable_faulted_buses), {4})
+
+	def test_worker_initialised_in_process(self):
+		"""
+			Tests the default worker runs in worker processes which start without the backend of the main process, as is
+			the case when the worker processes are spawned, and gives the same results as running in this process
+		:return:
+		"""
+		pth_idev = os.path.join(self.temp_folder, 'breaker_duty.idev')
+		bkdy = psse.BkdyFaultStudy(psse_control=self.psse, streaming=True, output_folder=self.temp_folder)
+		bkdy.create_breaker_duty_file(target_path=pth_idev)
+		fault_times = list(self.fault_times)
+		df_expected, _ = g74.parallel.FaultTimeExecutor(pth_sav=self.pth_sav, processes=1).run(
+			fault_times=fault_times, study=constants.GUI.bkdy_3ph, buses=[3, 1], breaker_duty_file=pth_idev
+		)
+
+		# Backend is only available in the worker processes because the initialiser installs it when they start
+		test_module.uninstall()
+		executor = g74.parallel.FaultTimeExecutor(
+			pth_sav=self.pth_sav, processes=2, initialiser=test_module.install, pth_logs=self.temp_folder
+		)
+		df, unreliable_buses = executor.run(
+			fault_times=fault_times, study=constants.GUI.bkdy_3ph, buses=[3, 1], breaker_duty_file=pth_idev
+		)
+		self.assertNotIn('psspy', psse.__dict__)
+		pd.testing.assert_frame_equal(df, df_expected)
+		self.assertEqual(unreliable_buses, list())
+
+	def test_shards_initialised_in_process(self):
+		"""
+			Tests the default worker runs each shard of busbars in worker processes which start without the backend of
+			the main process and the shards are merged back into the order of the busbars
+		:return:
+		"""
+		pth_idev = os.path.join(self.temp_folder, 'breaker_duty.idev')
+		bkdy = psse.BkdyFaultStudy(psse_control=self.psse, streaming=True, output_folder=self.temp_folder)
+		bkdy.create_breaker_duty_file(target_path=pth_idev)
+		fault_times = list(self.fault_times)
+		buses = [3, 1, 2]
+		df_expected, _ = g74.parallel.BusPartitionScheduler(pth_sav=self.pth_sav, processes=1).run(
+			fault_times=fault_times, study=constants.GUI.bkdy_3ph, buses=buses, breaker_duty_file=pth_idev
+		)
+
+		# Backend is only available in the worker processes because the initialiser installs it when they start
+		test_module.uninstall()
+		scheduler = g74.parallel.BusPartitionScheduler(
+			pth_sav=self.pth_sav, processes=2, shards=3, initialiser=test_module.install, pth_logs=self.temp_folder
+		)
+		df, unreliable_buses = scheduler.run(
+			fault_times=fault_times, study=constants.GUI.bkdy_3ph, buses=buses, breaker_duty_file=pth_idev
+		)
+		self.assertNotIn('psspy', psse.__dict__)
+		self.assertEqual(df.index.tolist(), buses)
+		pd.testing.assert_frame_equal(df, df_expected)
+		self.assertEqual(unreliable_buses, list())
+
+	def test_bkdy_streaming_matches(self):
+		"""
+			Tests the BKDY study gives the same results whether or not the reports are streamed when the decrement
+			study is skipped for some fault times
+		:return:
+		"""
+		dfs = list()
+		for streaming in (False, True):
+			test_module.install()
+			self.psse = psse.PsseControl()
+			self.psse.load_data_case(pth_sav=self.pth_sav)
+			bkdy = psse.BkdyFaultStudy(psse_control=self.psse, streaming=streaming)
+			bkdy.create_breaker_duty_file(target_path=os.path.join(self.temp_folder, 'breaker_duty.idev'))
+			bkdy.define_faulted_buses(buses=list())
+			g74_infeed = psse.G74FaultInfeed()
+			g74_infeed.identify_machine_parameters()
+			g74_infeed.calculate_machine_mva_values()
+			dfs.append(
+				bkdy.study_fault_times(
+					fault_times=list(self.fault_times), g74_infeed=g74_infeed, output_folder=self.temp_folder
+				).sort_index(axis=1)
+			)
+			# Reports processed by the initial study are not left to be processed again
+			self.assertEqual(bkdy.bkdy_files, dict())
+
+		# Only the columns needed for the combined results are retained when streaming
+		pd.testing.assert_frame_equal(dfs[0].loc[:, dfs[1].columns], dfs[1])
+
+	def test_iec_matches_native_solver(self):
+		"""
+			Tests the IEC study with the equivalent machines for embedded load matches the native solver
+		:return:
+		"""
+		c = constants.BkdyFileOutput
+		iec = psse.IecFaults(psse=self.psse, buses=[3, 1, 2])
+		df = iec.study_fault_times(fault_times=list(self.fault_times), g74_infeed=self.g74_infeed)
+		df_expected = short_circuit.ShortCircuitSolver(model=self.model).calculate_fault_currents(
+			fault_times=self.fault_times, buses=[3, 1, 2]
+		)
+
+		self.assertEqual(df.index.tolist(), [3, 1, 2])
+		for fault_time in self.fault_times:
+			np.testing.assert_allclose(df[(fault_time, c.ibsym)].values, df_expected[(fault_time, c.ibsym)].values)
+
+	def test_iec_out_of_service_busbar(self):
+		"""
+			Tests the IEC study fails rather than returning empty results if a busbar requested is out of service
+		:return:
+		"""
+		iec = psse.IecFaults(psse=self.psse, buses=[3, 2])
+		self.psspy.buses[2]['TYPE'] = 4
+		for batched in (True, False):
+			self.assertRaises(ValueError, iec.fault_study, fault_time=0.06, batched=batched)
+
+	def test_iec_batched_matches_per_bus(self):
+		"""
+			Tests that by default faulting the busbars grouped by pre-fault voltage gives exactly the same results as
+			faulting each busbar individually, only busbars with the same pre-fault voltage are grouped
+		:return:
+		"""
+		self.assertEqual(constants.IEC.vfactor_tolerance, 0.0)
+		# Busbars 2 and 3 have the same pre-fault voltage, busbar 1 is within 0.01 p.u.
+		self.psspy.buses[1]['PU'] = 1.005
+		self.psspy.buses[3]['PU'] = 1.01
+		iec = psse.IecFaults(psse=self.psse, buses=[3, 1, 2])
+
+		for lll, lg in ((True, False), (False, True)):
+			calls = self.psspy.calls['iecs_currents']
+			df_single = iec.fault_study(fault_time=0.06, lll=lll, lg=lg, batched=False)
+			self.assertEqual(self.psspy.calls['iecs_currents'] - calls, 3)
+
+			calls = self.psspy.calls['iecs_currents']
+			df_batched = iec.fault_study(fault_time=0.06, lll=lll, lg=lg, batched=True)
+			self.assertEqual(self.psspy.calls['iecs_currents'] - calls, 2)
+			pd.testing.assert_frame_equal(df_single, df_batched)
+
+		# Rounding the pre-fault voltages changes the results and so is only used if a tolerance is set
+		self.assertEqual(len(iec.group_buses_by_voltage(buses=[3, 1, 2], tolerance=0.05)), 1)
+
+	def test_iec_sequence_components(self):
+		"""
+			Tests the IEC results have the sequence components of the faulted phase, i.e. only a positive sequence
+			current for a 3 phase fault and equal positive and zero sequence currents for a LG fault
+		:return:
+		"""
+		results = test_module.iec_results(
+			buses=[1], nominal_kv=[11.0], z1=[0.1j], z2=[0.1j], z0=[0.2j], brktime=0.06, flt3ph=1, fltlg=1,
+			scfmt='rectangular', scunit='pu'
+		)
+		self.assertAlmostEqual(results.flt3ph[0].ia1, 1.0 / 0.1j)
+		self.assertEqual(results.flt3ph[0].ia0, 0.0)
+		self.assertAlmostEqual(results.flt3ph[0].ibsym, 1.0 / 0.1j)
+
+		i_fault = 3.0 / 0.4j
+		self.assertAlmostEqual(results.fltlg[0].ia1, i_fault / 3.0)
+		self.assertAlmostEqual(results.fltlg[0].ia0, i_fault / 3.0)
+		self.assertAlmostEqual(results.fltlg[0].ibsym, i_fault)
+
+	def test_bkdy_report_layout(self):
+		"""
+			Tests the BKDY report written by the stand in backend gives the same results with the fixed width and
+			regex processing
+		:return:
+		"""
+		contents = test_module.format_bkdy_report(
+			fault_time=0.06, buses=[1, 22, 333], names=['A', 'B', 'ISOLATED'], nominal_kv=[132.0, 33.0, 11.0],
+			v_prefault=[1.0, 1.0, 1.0], z=[0.001 + 0.01j, 0.01 + 0.2j, complex(np.inf)]
+		)
+		pth_report = os.path.join(self.temp_folder, 'report.csv')
+		with open(pth_report, 'w') as f:
+			f.write(contents)
+
+		df_fixed = psse.BkdyFile.parse_bkdy_report_fixed_width(output_file=pth_report)
+		df_regex = psse.BkdyFile.parse_bkdy_report(contents=contents)
+		self.assertIsNotNone(df_fixed)
+		self.assertTrue(df_fixed.equals(df_regex))
+		self.assertEqual(df_fixed.index.tolist(), [1, 22, 333])
+		self.assertEqual(df_fixed.loc[333, constants.BkdyFileOutput.ik11], 0.0)
+
+	def tearDown(self):
+		test_module.uninstall()
+
+	@classmethod
+	def tearDownClass(cls):
+		shutil.rmtree(cls.temp_folder)
+
+		# Delete log files created by logger
+		if DELETE_LOG_FILES:
+			paths = [
+				cls.logger.pth_debug_log,
+				cls.logger.pth_progress_log,
+				cls.logger.pth_error_log
+			]
+			del cls.logger
+			for pth in paths:
+				if os.path.exists(pth):
+					os.remove(pth)
@@ -0,0 +1,233 @@
+"""
+#######################################################################################################################
+###											PSSE G74 Fault Studies													###
+###		Unit tests associated with running fault studies in separate worker processes, these use a stub worker		###
+###		rather than PSSE																							###
+###																													###
+###		Code developed by David Mills (david.mills@PSCconsulting.com, +44 7899 984158) as part of PSC 		 		###
+###		project JK7938 - SHEPD - studies and automation																###
+###																													###
+#######################################################################################################################
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+import g74
+import g74.parallel as test_module
+import g74.constants as constants
+import pandas as pd
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_LOGS = os.path.join(TESTS_DIR, 'logs')
+
+two_up = os.path.abspath(os.path.join(TESTS_DIR, '../..'))
+sys.path.append(two_up)
+
+DELETE_LOG_FILES = True
+
+STUB_BUSES = [10, 20, 30]
+
+
+def stub_worker(task):
+	"""
+		Stub worker which returns results that depend on the busbar and fault time so that the combined results can be
+		checked, any of the busbars listed as unreliable in the task are reported as unreliable
+	:param dict task:
+	:return (pd.DataFrame, list) (df, unreliable_buses):
+	"""
+	c = constants.BkdyFileOutput
+	buses = task['buses'] or STUB_BUSES
+	dfs = [
+		pd.DataFrame(
+			{c.ik11: [bus * 1.0 for bus in buses], c.ibsym: [bus * (1.0 - fault_time) for bus in buses]},
+			index=buses, columns=(c.ik11, c.ibsym)
+		)
+		for fault_time in task['fault_times']
+	]
+	unreliable_buses = [bus for bus in buses if bus in task.get('unreliable_buses', list())]
+	return pd.concat(dfs, axis=1, keys=task['fault_times']), unreliable_buses
+
+
+def failing_once_worker(task):
+	"""
+		Stub worker which fails the first time it is run for a shard that includes the failing busbar, a file is used to
+		record the failure so that this works across processes
+	:param dict task:
+	:return (pd.DataFrame, list) (df, unreliable_buses):
+	"""
+	pth_marker = os.path.join(task['marker_folder'], 'shard_{}'.format(task['buses'][0]))
+	with open(os.path.join(task['marker_folder'], 'calls.txt'), 'a') as f:
+		f.write('{}\n'.format(task['buses'][0]))
+
+	if task['failing_bus'] in task['buses'] and not os.path.exists(pth_marker):
+		open(pth_marker, 'w').close()
+		raise RuntimeError('Stub worker failure')
+
+	return stub_worker(task=task)
+
+
+# ----- UNIT TESTS -----
+class TestFaultTimeExecutor(unittest.TestCase):
+	"""
+		Tests sharing fault times between worker processes
+	"""
+	logger = None
+
+	@classmethod
+	def setUpClass(cls):
+		"""
+			Initialise logger
+		"""
+		cls.logger = g74.Logger(pth_logs=TEST_LOGS, uid='TestParallel', debug=g74.constants.DEBUG_MODE)
+		cls.fault_times = [0.0, 0.01, 0.05, 0.06, 0.1]
+
+	def test_split_fault_times(self):
+		"""
+			Tests the fault times are shared evenly between the workers
+		:return:
+		"""
+		executor = test_module.FaultTimeExecutor(pth_sav=str(), processes=2, worker=stub_worker)
+		groups = executor.split_fault_times(fault_times=self.fault_times)
+		self.assertEqual(groups, [[0.0, 0.05, 0.1], [0.01, 0.06]])
+
+		executor = test_module.FaultTimeExecutor(pth_sav=str(), processes=16, worker=stub_worker)
+		self.assertEqual(len(executor.split_fault_times(fault_times=self.fault_times)), len(self.fault_times))
+
+	def test_parallel_matches_serial(self):
+		"""
+			Tests the results combined from separate worker processes match running in a single process
+		:return:
+		"""
+		df_serial, _ = stub_worker(task=dict(fault_times=self.fault_times, buses=list()))
+
+		for processes in (1, 3):
+			executor = test_module.FaultTimeExecutor(pth_sav=str(), processes=processes, worker=stub_worker)
+			df, unreliable_buses = executor.run(fault_times=self.fault_times, study=constants.GUI.bkdy_3ph)
+			pd.testing.assert_frame_equal(df, df_serial)
+			self.assertEqual(unreliable_buses, list())
+
+	def test_unreliable_buses_returned(self):
+		"""
+			Tests the busbars reported as unreliable by each worker are returned with the combined results
+		:return:
+		"""
+		executor = test_module.FaultTimeExecutor(pth_sav=str(), processes=2, worker=stub_worker)
+		_, unreliable_buses = executor.run(
+			fault_times=self.fault_times, study=constants.GUI.bkdy_3ph, unreliable_buses=[20]
+		)
+		# Reported by both workers
+		self.assertEqual(unreliable_buses, [20, 20])
+
+	@classmethod
+	def tearDownClass(cls):
+		# Delete log files created by logger
+		if DELETE_LOG_FILES:
+			paths = [
+				cls.logger.pth_debug_log,
+				cls.logger.pth_progress_log,
+				cls.logger.pth_error_log
+			]
+			del cls.logger
+			for pth in paths:
+				if os.path.exists(pth):
+					os.remove(pth)
+
+
+class TestBusPartitionScheduler(unittest.TestCase):
+	"""
+		Tests splitting busbars into shards which are run in separate worker processes
+	"""
+	logger = None
+
+	@classmethod
+	def setUpClass(cls):
+		"""
+			Initialise logger
+		"""
+		cls.logger = g74.Logger(pth_logs=TEST_LOGS, uid='TestBusPartition', debug=g74.constants.DEBUG_MODE)
+		cls.fault_times = [0.0, 0.01, 0.06]
+		cls.buses = [50, 10, 40, 20, 70, 30, 60]
+
+	def test_split_buses(self):
+		"""
+			Tests the busbars are split into balanced shards in order
+		:return:
+		"""
+		scheduler = test_module.BusPartitionScheduler(pth_sav=str(), processes=3, worker=stub_worker)
+		shards = scheduler.split_buses(buses=self.buses)
+		self.assertEqual(shards, [[50, 10, 40], [20, 70], [30, 60]])
+
+		scheduler = test_module.BusPartitionScheduler(pth_sav=str(), processes=2, worker=stub_worker, shards=16)
+		self.assertEqual(len(scheduler.split_buses(buses=self.buses)), len(self.buses))
+
+	def test_shards_merged_in_bus_order(self):
+		"""
+			Tests the results from each shard are merged back in the original busbar order
+		:return:
+		"""
+		df_serial, _ = stub_worker(task=dict(fault_times=self.fault_times, buses=self.buses))
+
+		for processes in (1, 3):
+			scheduler = test_module.BusPartitionScheduler(pth_sav=str(), processes=processes, worker=stub_worker)
+			df, unreliable_buses = scheduler.run(
+				fault_times=self.fault_times, study=constants.GUI.bkdy_3ph, buses=self.buses, unreliable_buses=[70, 30]
+			)
+			pd.testing.assert_frame_equal(df, df_serial)
+			# Reported by the shards they are in
+			self.assertEqual(sorted(unreliable_buses), [30, 70])
+
+	def test_failed_shard_retried(self):
+		"""
+			Tests that only a shard that fails is rerun and that it fails if there are no retries left
+		:return:
+		"""
+		df_serial, _ = stub_worker(task=dict(fault_times=self.fault_times, buses=self.buses))
+
+		for processes in (1, 3):
+			marker_folder = tempfile.mkdtemp()
+			try:
+				scheduler = test_module.BusPartitionScheduler(
+					pth_sav=str(), processes=processes, worker=failing_once_worker, retries=1, shards=3
+				)
+				df, _ = scheduler.run(
+					fault_times=self.fault_times, study=constants.GUI.bkdy_3ph, buses=self.buses,
+					marker_folder=marker_folder, failing_bus=70
+				)
+				with open(os.path.join(marker_folder, 'calls.txt'), 'r') as f:
+					calls = sorted(int(x) for x in f.read().split())
+			finally:
+				shutil.rmtree(marker_folder)
+
+			pd.testing.assert_frame_equal(df, df_serial)
+			# Only the shard starting with busbar 20 is run twice
+			self.assertEqual(calls, [20, 20, 30, 50])
+
+		marker_folder = tempfile.mkdtemp()
+		try:
+			scheduler = test_module.BusPartitionScheduler(
+				pth_sav=str(), processes=1, worker=failing_once_worker, retries=0, shards=3
+			)
+			self.assertRaises(
+				ValueError, scheduler.run, fault_times=self.fault_times, study=constants.GUI.bkdy_3ph,
+				buses=self.buses, marker_folder=marker_folder, failing_bus=70
+			)
+		finally:
+			shutil.rmtree(marker_folder)
+
+	@classmethod
+	def tearDownClass(cls):
+		# Delete log files created by logger
+		if DELETE_LOG_FILES:
+			paths = [
+				cls.logger.pth_debug_log,
+				cls.logger.pth_progress_log,
+				cls.logger.pth_error_log
+			]
+			del cls.logger
+			for pth in paths:
+				if os.path.exists(pth):
+					os.remove(pth)
@@ -0,0 +1,128 @@
+"""
+#######################################################################################################################
+###											PSSE G74 Fault Studies													###
+###		Unit tests associated with profiling of the fault study, these do not require PSSE							###
+###																													###
+###		Code developed by David Mills (david.mills@PSCconsulting.com, +44 7899 984158) as part of PSC 		 		###
+###		project JK7938 - SHEPD - studies and automation																###
+###																													###
+#######################################################################################################################
+"""
+
+import unittest
+import os
+import sys
+import time
+import pstats
+import shutil
+import tempfile
+
+import g74
+import g74.profiling as test_module
+import g74.constants as constants
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_LOGS = os.path.join(TESTS_DIR, 'logs')
+
+two_up = os.path.abspath(os.path.join(TESTS_DIR, '../..'))
+sys.path.append(two_up)
+
+DELETE_LOG_FILES = True
+
+
+def slow_study(duration, fail=False):
+	"""
+		Stand in for the fault study which takes some time
+	:param float duration:  Time in seconds
+	:param bool fail: (optional=False) - If True then an error is raised once complete
+	:return float duration:
+	"""
+	t0 = time.time()
+	while time.time() - t0 < duration:
+		sum(range(1000))
+	if fail:
+		raise ValueError('Study failed')
+	return duration
+
+
+# ----- UNIT TESTS -----
+class TestProfiling(unittest.TestCase):
+	"""
+		Tests the profiling of a fault study
+	"""
+	logger = None
+
+	@classmethod
+	def setUpClass(cls):
+		"""
+			Initialise logger
+		"""
+		cls.logger = g74.Logger(pth_logs=TEST_LOGS, uid='TestProfiling', debug=g74.constants.DEBUG_MODE)
+		cls.temp_folder = tempfile.mkdtemp()
+
+	def test_profiling_enabled(self):
+		"""
+			Tests profiling is enabled by the environment variable or the GUI setting
+		:return:
+		"""
+		env_var = constants.Profiling.env_var
+		original = os.environ.pop(env_var, None)
+		try:
+			self.assertFalse(test_module.profiling_enabled())
+			self.assertTrue(test_module.profiling_enabled(gui_setting=True))
+			os.environ[env_var] = 'True'
+			self.assertTrue(test_module.profiling_enabled())
+			os.environ[env_var] = '0'
+			self.assertFalse(test_module.profiling_enabled())
+		finally:
+			os.environ.pop(env_var, None)
+			if original is not None:
+				os.environ[env_var] = original
+
+	def test_profile_call(self):
+		"""
+			Tests the cProfile stats and collapsed stacks are written and the result of the function returned
+		:return:
+		"""
+		result, pth_stats, pth_collapsed = test_module.profile_call(slow_study, self.temp_folder, 'study', duration=0.2)
+		self.assertEqual(result, 0.2)
+		self.assertEqual(pth_stats, os.path.join(self.temp_folder, 'study{}'.format(constants.Profiling.stats_suffix)))
+
+		stats = pstats.Stats(pth_stats)
+		self.assertTrue(any(func[2] == 'slow_study' for func in stats.stats))
+
+		with open(pth_collapsed, 'r') as f:
+			lines = f.read().splitlines()
+		self.assertTrue(lines)
+		# Each line is the stack with the outermost frame first followed by the number of samples
+		stack, count = lines[0].rsplit(' ', 1)
+		self.assertTrue(int(count) > 0)
+		self.assertTrue(any('slow_study' in line.rsplit(' ', 1)[0].split(';')[-1] for line in lines))
+
+	def test_profile_written_on_failure(self):
+		"""
+			Tests the profile is still written if the study fails
+		:return:
+		"""
+		self.assertRaises(
+			ValueError, test_module.profile_call, slow_study, self.temp_folder, 'failed', duration=0.05, fail=True
+		)
+		self.assertTrue(
+			os.path.exists(os.path.join(self.temp_folder, 'failed{}'.format(constants.Profiling.collapsed_suffix)))
+		)
+
+	@classmethod
+	def tearDownClass(cls):
+		shutil.rmtree(cls.temp_folder)
+
+		# Delete log files created by logger
+		if DELETE_LOG_FILES:
+			paths = [
+				cls.logger.pth_debug_log,
+				cls.logger.pth_progress_log,
+				cls.logger.pth_error_log
+			]
+			del cls.logger
+			for pth in paths:
+				if os.path.exists(pth):
+					os.remove(pth)
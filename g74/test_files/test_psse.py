@@ -203,6 +203,181 @@ class TestBkdyNonPSSEComponents(unittest.TestCase):
 		self.assertAlmostEqual(df.loc[5001, constants.BkdyFileOutput.ik11], 6.1801, places=2)
 		self.assertAlmostEqual(df.loc[5101, constants.BkdyFileOutput.ibsym], 3.7529, places=2)
 
+	def test_bkdy_report_parse(self):
+		"""
+			Tests that the single pass parser returns a value for every busbar in the BKDY export
+		"""
+		with open(self.output_file, 'rb') as f:
+			contents = f.read()
+
+		df = test_module.BkdyFile.parse_bkdy_report(contents=contents)
+		self.assertEqual(df.shape, (24, 10))
+		self.assertEqual(df.index[0], 1)
+		self.assertEqual(df.index[-1], 5101)
+		self.assertAlmostEqual(df.loc[101, constants.BkdyFileOutput.r], 0.08802, places=5)
+		self.assertAlmostEqual(df.loc[101, constants.BkdyFileOutput.idc_method1], 0.2690, places=4)
+		# Infinite thevenin impedance values are returned as 0.0
+		self.assertEqual(df.loc[11, constants.BkdyFileOutput.x], 0.0)
+
+	def test_bkdy_report_fixed_width(self):
+		"""
+			Tests that the fixed width processing of the memory mapped BKDY export returns the same values as the
+			regex search and that a line with a different layout is left for the regex search
+		"""
+		with open(self.output_file, 'rb') as f:
+			contents = f.read()
+
+		df_regex = test_module.BkdyFile.parse_bkdy_report(contents=contents)
+		df_fixed = test_module.BkdyFile.parse_bkdy_report_fixed_width(output_file=self.output_file)
+		self.assertTrue(df_fixed.equals(df_regex))
+
+		# Values no longer aligned with the fixed columns
+		test_file = os.path.join(TESTS_DIR, 'bkdy_output_misaligned{}'.format(constants.General.ext_csv))
+		with open(test_file, 'wb') as f:
+			f.write(contents.replace('  2683.4  -107.94', '2683.4-107.94    '))
+		df_fixed = test_module.BkdyFile.parse_bkdy_report_fixed_width(output_file=test_file)
+		df = test_module.BkdyFile(output_file=test_file, fault_time=0.01).process_bkdy_output(delete=True)
+		self.assertTrue(df_fixed.equals(df_regex))
+		self.assertAlmostEqual(df.loc[1, constants.BkdyFileOutput.ik11], 2.6834, places=4)
+
+	def test_bkdy_report_sections(self):
+		"""
+			Tests that the fixed width processing gives the same values when the report is split into sections
+		"""
+		sections = list(test_module.BkdyFile.iter_bkdy_sections(output_file=self.output_file, section_size=500))
+		self.assertGreater(len(sections), 1)
+		for contents in sections:
+			self.assertTrue(contents.rstrip().splitlines()[-1].startswith(constants.BkdyFileOutput.impedance))
+
+		buses = list()
+		for contents in sections:
+			section_buses, _ = test_module.BkdyFile.fixed_width_values(contents=contents)
+			buses.extend(section_buses)
+		df = test_module.BkdyFile.parse_bkdy_report_fixed_width(output_file=self.output_file)
+		self.assertEqual(buses, df.index.tolist())
+
+	def test_bkdy_report_infinity(self):
+		"""
+			Tests that a line with an Infinity value is left for the regex search so that it is processed in the same
+			way whether or not the fixed width processing is used and that the other lines are still sliced
+		"""
+		with open(self.output_file, 'rb') as f:
+			contents = f.read()
+		original = 'THEVENIN IMPEDANCE:           0.09242  0.09914 V: 1.0000     0.00      0.0   1999.6   2827.8'
+		infinity = 'THEVENIN IMPEDANCE:           0.09242  0.09914 V: 1.0000     0.00 Infinity   1999.6   2827.8'
+		self.assertIn(original, contents)
+		contents = contents.replace(original, infinity)
+		test_file = os.path.join(TESTS_DIR, 'bkdy_output_infinity{}'.format(constants.General.ext_csv))
+		with open(test_file, 'wb') as f:
+			f.write(contents)
+
+		df_regex = test_module.BkdyFile.parse_bkdy_report(contents=contents)
+
+		# Count the lines processed using the regex search
+		lines = list()
+		extract_values = test_module.extract_values
+
+		def counted_extract_values(line, expected_length=0):
+			lines.append(line)
+			return extract_values(line, expected_length=expected_length)
+
+		fixed_width = constants.BkdyFileOutput.fixed_width
+		test_module.extract_values = counted_extract_values
+		constants.BkdyFileOutput.fixed_width = True
+		try:
+			df_fixed = test_module.BkdyFile.parse_bkdy_report_fixed_width(output_file=test_file)
+			chunks = list(test_module.BkdyFile(output_file=test_file, fault_time=0.01).iter_bkdy_records(chunk_size=5))
+		finally:
+			test_module.extract_values = extract_values
+			constants.BkdyFileOutput.fixed_width = fixed_width
+		self.assertEqual([line.rstrip() for line in lines], [infinity, infinity])
+
+		df = test_module.BkdyFile(output_file=test_file, fault_time=0.01).process_bkdy_output(delete=True)
+		pd.testing.assert_frame_equal(df_fixed, df_regex)
+		pd.testing.assert_frame_equal(df[df_regex.columns], df_regex)
+		columns = list(constants.BkdyFileOutput.record_columns)
+		self.assertTrue(pd.concat(chunks).equals(df[columns]))
+
+	def test_bkdy_fixed_width_matches_regex(self):
+		"""
+			Tests that the fixed width processing of the BKDY export split into sections of different sizes and the
+			combined results for several fault times are identical to those from the regex search
+		"""
+		with open(self.output_file, 'rb') as f:
+			contents = f.read()
+		df_regex = test_module.BkdyFile.parse_bkdy_report(contents=contents)
+
+		for section_size in (1, 200, 500, len(contents)):
+			buses = list()
+			values = list()
+			sections = test_module.BkdyFile.iter_bkdy_sections(output_file=self.output_file, section_size=section_size)
+			for section in sections:
+				section_buses, section_values = test_module.BkdyFile.fixed_width_values(contents=section)
+				buses.extend(section_buses)
+				values.append(section_values)
+			columns, _, _ = test_module.BkdyFile.column_layout()
+			values = test_module.BkdyFile.convert_units(values=np.concatenate(values), columns=columns)
+			self.assertEqual(buses, df_regex.index.tolist())
+			self.assertTrue(np.array_equal(values, df_regex.values))
+
+		fault_times = (0.0, 0.01, 0.06, 0.1)
+		dfs = list()
+		fixed_width = constants.BkdyFileOutput.fixed_width
+		try:
+			for use_fixed_width in (False, True):
+				constants.BkdyFileOutput.fixed_width = use_fixed_width
+				combiner = test_module.BkdyResultCombiner()
+				for fault_time in fault_times:
+					bkdy_file = test_module.BkdyFile(output_file=self.output_file, fault_time=fault_time)
+					combiner.add_records(fault_time=fault_time, records=bkdy_file.iter_bkdy_records(chunk_size=7))
+				dfs.append(combiner.combine())
+		finally:
+			constants.BkdyFileOutput.fixed_width = fixed_width
+		pd.testing.assert_frame_equal(dfs[0], dfs[1])
+
+	def test_bkdy_file_streaming(self):
+		"""
+			Tests that streaming the BKDY export returns the same values as processing the complete file
+		"""
+		df = test_module.BkdyFile(output_file=self.output_file, fault_time=0.01).process_bkdy_output()
+
+		bkdy_file = test_module.BkdyFile(output_file=self.output_file, fault_time=0.01)
+		chunks = list(bkdy_file.iter_bkdy_records(chunk_size=5))
+		self.assertEqual([len(df_chunk) for df_chunk in chunks], [5, 5, 5, 5, 4])
+
+		df_streamed = pd.concat(chunks)
+		columns = list(constants.BkdyFileOutput.record_columns)
+		self.assertTrue(df_streamed.equals(df[columns]))
+
+	def test_bkdy_result_combiner(self):
+		"""
+			Tests that streamed results for multiple fault times are combined with only the requested columns
+		"""
+		fault_times = (0.01, 0.06)
+		columns = (constants.BkdyFileOutput.ibsym, constants.BkdyFileOutput.x)
+		combiner = test_module.BkdyResultCombiner(columns=columns)
+		for fault_time in fault_times:
+			bkdy_file = test_module.BkdyFile(output_file=self.output_file, fault_time=fault_time)
+			combiner.add_records(fault_time=fault_time, records=bkdy_file.iter_bkdy_records(chunk_size=7))
+
+		df = combiner.combine()
+		self.assertEqual(df.shape, (24, 4))
+		self.assertAlmostEqual(df.loc[5101, (0.06, constants.BkdyFileOutput.ibsym)], 3.7529, places=4)
+		# Records are released once combined
+		self.assertIsNone(combiner.values)
+
+		# Records are folded into the same result whether or not the array is preallocated
+		df_expected = test_module.BkdyFile(output_file=self.output_file, fault_time=0.06).process_bkdy_output()
+		for buses in (None, df.index.tolist()):
+			combiner = test_module.BkdyResultCombiner(columns=columns, buses=buses, fault_times=fault_times)
+			for fault_time in fault_times:
+				bkdy_file = test_module.BkdyFile(output_file=self.output_file, fault_time=fault_time)
+				combiner.add_records(fault_time=fault_time, records=bkdy_file.iter_bkdy_records(chunk_size=5))
+			df_combined = combiner.combine()
+			pd.testing.assert_frame_equal(df_combined, df, check_names=False)
+			for fault_time in fault_times:
+				self.assertTrue(np.allclose(df_combined[fault_time].values, df_expected.loc[:, columns].values))
+
 	def test_bkdy_file_import_fails(self):
 		"""
 			Checks that if a file has been deleted and attempts to process again then an error
@@ -422,6 +597,24 @@ class TestIECComponents(unittest.TestCase):
 			df = iec.fault_study(fault_time=fault_time, lll=True)
 			dfs.append(df)
 
+	def test_calculate_iec_batched_matches_per_bus(self):
+		"""
+			Function tests that faulting busbars grouped by pre-fault voltage returns the same results as faulting
+			each busbar individually
+		:return:
+		"""
+		# Reload SAV case
+		self.psse.load_data_case()
+
+		buses_to_test = [11, 33]
+		iec = test_module.IecFaults(psse=self.psse, buses=buses_to_test)
+
+		for lll, lg in ((True, False), (False, True)):
+			df_single = iec.fault_study(fault_time=0.06, lll=lll, lg=lg, batched=False)
+			df_batched = iec.fault_study(fault_time=0.06, lll=lll, lg=lg, batched=True)
+			pd.testing.assert_frame_equal(df_single, df_batched, check_less_precise=True)
+			self.assertEqual(self.psse.sid, iec.sid)
+
 	def test_calculate_iec_lg(self):
 		"""
 			Function tests complete calculation of IEC faults using 3 phase fault current calculation
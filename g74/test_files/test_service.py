@@ -0,0 +1,181 @@
+"""
+#######################################################################################################################
+###											PSSE G74 Fault Studies													###
+###		Unit tests associated with the study service, these use a stub session or the stand in PSSE backend			###
+###		rather than PSSE																							###
+###																													###
+###		Code developed by David Mills (david.mills@PSCconsulting.com, +44 7899 984158) as part of PSC 		 		###
+###		project JK7938 - SHEPD - studies and automation																###
+###																													###
+#######################################################################################################################
+"""
+
+import unittest
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+import pandas as pd
+
+import g74
+import g74.service as test_module
+import g74.synthetic as synthetic
+import g74.constants as constants
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_LOGS = os.path.join(TESTS_DIR, 'logs')
+
+two_up = os.path.abspath(os.path.join(TESTS_DIR, '../..'))
+sys.path.append(two_up)
+
+DELETE_LOG_FILES = True
+
+
+def stub_session():
+	"""
+		Stub session which counts the jobs run so it can be confirmed the session is reused
+	:return dict session:
+	"""
+	return {'initialised': os.getpid(), 'jobs': 0}
+
+
+def stub_job(session, job):
+	"""
+		Stub worker which fails for any job without busbars
+	:param dict session:
+	:param dict job:
+	:return (dict, dict) (summary, results):
+	"""
+	if not job[constants.Batch.buses]:
+		raise ValueError('No busbars')
+	session['psse']['jobs'] += 1
+	return {constants.Service.key_worker: session['psse']['initialised'], 'jobs': session['psse']['jobs']}, dict()
+
+
+def slow_job(session, job):
+	"""
+		Stub worker which takes the first fault time in seconds to complete
+	:param dict session:
+	:param dict job:
+	:return (dict, dict) (summary, results):
+	"""
+	time.sleep(job[constants.Batch.fault_times][0])
+	return {constants.Service.key_worker: session['psse']['initialised']}, dict()
+
+
+# ----- UNIT TESTS -----
+class TestStudyService(unittest.TestCase):
+	"""
+		Tests jobs submitted to the study service are run by worker processes which are only initialised once
+	"""
+	logger = None
+
+	@classmethod
+	def setUpClass(cls):
+		"""
+			Initialise logger and create a synthetic SAV case
+		"""
+		cls.logger = g74.Logger(pth_logs=TEST_LOGS, uid='TestStudyService', debug=g74.constants.DEBUG_MODE)
+		cls.temp_folder = tempfile.mkdtemp()
+		cls.pth_sav = synthetic.SyntheticNetwork(number_of_buses=20).to_json(
+			pth=os.path.join(cls.temp_folder, 'synthetic.sav')
+		)
+
+		cls.original = os.environ.get(constants.Cache.folder_env_var)
+		os.environ[constants.Cache.folder_env_var] = os.path.join(cls.temp_folder, 'cache')
+
+	def test_session_reused(self):
+		"""
+			Tests each job is run using the same session and a failed job does not stop the service
+		:return:
+		"""
+		output_folder = os.path.join(self.temp_folder, 'stub')
+		with test_module.StudyService(
+				output_folder=output_folder, processes=1, initialiser=stub_session, worker=stub_job
+		) as service:
+			job_ids = [service.submit(sav_case=self.pth_sav, buses=[1]) for _ in range(3)]
+			failed_id = service.submit(sav_case=self.pth_sav)
+			summaries = [service.result(job_id=job_id, timeout=60)[0] for job_id in job_ids]
+			self.assertRaises(ValueError, service.result, job_id=failed_id, timeout=60)
+			summary, _ = service.result(job_id=service.submit(sav_case=self.pth_sav, buses=[1]), timeout=60)
+
+		self.assertEqual([x[constants.Service.key_job] for x in summaries], job_ids)
+		self.assertEqual([x['jobs'] for x in summaries + [summary]], [1, 2, 3, 4])
+		self.assertEqual(len(set(x[constants.Service.key_worker] for x in summaries + [summary])), 1)
+		self.assertRaises(ValueError, service.submit, sav_case=os.path.join(self.temp_folder, 'missing.sav'))
+
+	def test_close_waits_for_jobs(self):
+		"""
+			Tests closing the service waits for the jobs already submitted and only asks each worker to stop once
+			even if the jobs take longer than the poll interval
+		:return:
+		"""
+		service = test_module.StudyService(
+			output_folder=os.path.join(self.temp_folder, 'close'), processes=2, initialiser=stub_session,
+			worker=slow_job
+		)
+		stops = list()
+		put = service.jobs.put
+
+		def counted_put(obj, *args, **kwargs):
+			if obj is None:
+				stops.append(obj)
+			return put(obj, *args, **kwargs)
+
+		service.jobs.put = counted_put
+		job_ids = [
+			service.submit(sav_case=self.pth_sav, buses=[1], fault_times=[3 * constants.Service.poll_seconds])
+			for _ in range(2)
+		]
+		service.close()
+
+		self.assertEqual(len(stops), 2)
+		self.assertEqual(service.workers, list())
+		self.assertEqual(sorted(service.completed), job_ids)
+		self.assertTrue(all(success for success, _ in service.completed.values()))
+
+	def test_fault_study(self):
+		"""
+			Tests the fault study is run using the stand in PSSE backend and repeat studies give the same results
+		:return:
+		"""
+		c = constants.Batch
+		output_folder = os.path.join(self.temp_folder, 'mock')
+		with test_module.StudyService(
+				output_folder=output_folder, processes=2, initialiser=test_module.mock_psse_session
+		) as service:
+			job_ids = [
+				service.submit(
+					sav_case=self.pth_sav, fault_times=[0.0, 0.06], studies=[constants.GUI.bkdy_3ph], excel=excel
+				)
+				for excel in (True, False)
+			]
+			outcomes = [service.result(job_id=job_id, timeout=300) for job_id in job_ids]
+
+		self.assertEqual([summary[c.key_status] for summary, _ in outcomes], [c.status_complete] * 2)
+		self.assertTrue(os.path.isfile(os.path.join(output_folder, 'synthetic_1.xlsx')))
+		self.assertFalse(os.path.isfile(os.path.join(output_folder, 'synthetic_2.xlsx')))
+		pd.testing.assert_frame_equal(
+			outcomes[0][1][constants.GUI.bkdy_3ph], outcomes[1][1][constants.GUI.bkdy_3ph]
+		)
+
+	@classmethod
+	def tearDownClass(cls):
+		shutil.rmtree(cls.temp_folder)
+		os.environ.pop(constants.Cache.folder_env_var)
+		if cls.original is not None:
+			os.environ[constants.Cache.folder_env_var] = cls.original
+
+		# Delete log files created by logger
+		if DELETE_LOG_FILES:
+			paths = [
+				cls.logger.pth_debug_log,
+				cls.logger.pth_progress_log,
+				cls.logger.pth_error_log
+			]
+			del cls.logger
+			for pth in paths:
+				if os.path.exists(pth):
+					os.remove(pth)
@@ -0,0 +1,290 @@
+"""
+#######################################################################################################################
+###											PSSE G74 Fault Studies													###
+###		Unit tests associated with the native short circuit solver, these do not require PSSE						###
+###																													###
+###		Code developed by David Mills (david.mills@PSCconsulting.com, +44 7899 984158) as part of PSC 		 		###
+###		project JK7938 - SHEPD - studies and automation																###
+###																													###
+#######################################################################################################################
+"""
+
+import unittest
+import os
+import sys
+import math
+import time
+import tempfile
+
+import g74
+import g74.short_circuit as test_module
+import g74.synthetic as synthetic
+import g74.constants as constants
+import numpy as np
+import scipy.sparse
+import scipy.sparse.linalg
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_LOGS = os.path.join(TESTS_DIR, 'logs')
+
+two_up = os.path.abspath(os.path.join(TESTS_DIR, '../..'))
+sys.path.append(two_up)
+
+DELETE_LOG_FILES = True
+
+# Small network with a source at busbar 1, embedded load at busbar 3 and an unconnected busbar 4
+TEST_NETWORK = {
+	'base_mva': 100.0,
+	'buses': [
+		{'bus': 1, 'name': 'GRID', 'nominal_kv': 33.0, 'voltage_pu': 1.0},
+		{'bus': 2, 'name': 'PRIMARY', 'nominal_kv': 33.0, 'voltage_pu': 1.0},
+		{'bus': 3, 'name': 'LOAD', 'nominal_kv': 11.0, 'voltage_pu': 1.0},
+		{'bus': 4, 'name': 'ISOLATED', 'nominal_kv': 11.0, 'voltage_pu': 1.0}
+	],
+	'branches': [
+		{'from_bus': 1, 'to_bus': 2, 'r': 0.01, 'x': 0.1, 'b': 0.0, 'status': 1},
+		{'from_bus': 2, 'to_bus': 3, 'r': 0.05, 'x': 0.6, 'b': 0.0, 'status': 1}
+	],
+	'machines': [
+		{'bus': 1, 'id': '1', 'mva': 200.0, 'r': 0.005, 'x_subtr': 0.2, 'x_trans': 0.3, 'x_synch': 1.5}
+	],
+	'loads': [
+		{'bus': 3, 'mva': 5.0}
+	]
+}
+
+
+# ----- UNIT TESTS -----
+class TestShortCircuitSolver(unittest.TestCase):
+	"""
+		Tests the native short circuit solver against a dense calculation
+	"""
+	logger = None
+
+	@classmethod
+	def setUpClass(cls):
+		"""
+			Initialise logger
+		"""
+		cls.logger = g74.Logger(pth_logs=TEST_LOGS, uid='TestShortCircuit', debug=g74.constants.DEBUG_MODE)
+		cls.model = test_module.NetworkModel.from_dict(data=TEST_NETWORK)
+
+	def test_network_json_round_trip(self):
+		"""
+			Tests that the network model can be written to and read from a network description file
+		:return:
+		"""
+		handle, pth = tempfile.mkstemp(suffix='.json')
+		os.close(handle)
+		try:
+			self.model.to_json(pth=pth)
+			model = test_module.NetworkModel.from_json(pth=pth)
+		finally:
+			os.remove(pth)
+
+		self.assertTrue(model.df_buses.equals(self.model.df_buses))
+		self.assertTrue(model.df_branches.equals(self.model.df_branches))
+		self.assertEqual(model.base_mva, self.model.base_mva)
+
+	def test_missing_busbar_fails(self):
+		"""
+			Tests that a branch to a busbar which is not defined raises an error
+		:return:
+		"""
+		data = dict(TEST_NETWORK)
+		data['branches'] = [{'from_bus': 1, 'to_bus': 5, 'r': 0.01, 'x': 0.1, 'b': 0.0, 'status': 1}]
+		self.assertRaises(ValueError, test_module.NetworkModel.from_dict, data)
+
+	def test_thevenin_impedance_matches_dense_inverse(self):
+		"""
+			Tests the thevenin impedances from the selected inverse match the diagonal of the inverse of the admittance
+			matrix
+		:return:
+		"""
+		solver = test_module.ShortCircuitSolver(model=self.model)
+		for fault_time in (0.0, 0.06):
+			z = solver.thevenin_impedances(fault_time=fault_time, buses=[1, 2, 3, 4])
+
+			y = solver.y_branches.toarray() + np.diag(solver.machine_admittances(fault_time=fault_time))
+			expected = np.diag(np.linalg.inv(y[:3, :3]))
+			np.testing.assert_allclose(z[:3], expected)
+			# Busbar 4 has no source
+			self.assertTrue(np.isinf(z[3]))
+
+	def test_impedance_diagonal_off_diagonal_pivot(self):
+		"""
+			Tests the impedances are solved in batches if the admittance matrix needs pivoting off the diagonal, which
+			is the case if the busbar eliminated first has a shunt that cancels out its branch
+		:return:
+		"""
+		y_branch = 1.0 / complex(0.01, 0.1)
+		y_series = scipy.sparse.csc_matrix(np.array([[y_branch, -y_branch], [-y_branch, y_branch]]))
+		for y_shunt, selected in (
+				(np.array([1.0 / complex(0.02, 0.2), -y_branch]), False),
+				(np.array([-y_branch, 1.0 / complex(0.02, 0.2)]), True)
+		):
+			y = y_series + scipy.sparse.diags(y_shunt, format='csc')
+			expected = np.diag(np.linalg.inv(y.toarray()))
+			z_selected = test_module.selected_inverse_diagonal(y=y, positions=np.arange(2))
+			self.assertEqual(z_selected is not None, selected)
+
+			z = test_module.impedance_diagonal(y_series=y_series, y_shunt=y_shunt, positions=np.arange(2), batch_size=1)
+			np.testing.assert_allclose(z, expected, atol=1e-12)
+
+	def test_impedance_diagonal_scaling(self):
+		"""
+			Tests the selected inverse for synthetic networks with 20k busbars matches the radial solution and for a
+			meshed network matches solving for the requested busbars, the time taken is logged
+		:return:
+		"""
+		number_of_buses = 20000
+		network = synthetic.SyntheticNetwork(number_of_buses=number_of_buses)
+		solver = test_module.ShortCircuitSolver(model=network.model)
+		t0 = time.time()
+		z = solver.thevenin_impedances(fault_time=0.06, buses=network.buses.tolist())
+		self.logger.info(
+			'Thevenin impedances for a radial network with {} busbars calculated in {:.2f} seconds'.format(
+				number_of_buses, time.time() - t0
+			)
+		)
+		np.testing.assert_allclose(z, network.thevenin_impedances(fault_time=0.06))
+
+		network = synthetic.SyntheticNetwork(number_of_buses=number_of_buses, meshed=True)
+		solver = test_module.ShortCircuitSolver(model=network.model)
+		buses = network.buses[::1000].tolist()
+		t0 = time.time()
+		z = solver.thevenin_impedances(fault_time=0.06, buses=buses)
+		self.logger.info(
+			'Thevenin impedances for a meshed network with {} busbars calculated in {:.2f} seconds'.format(
+				number_of_buses, time.time() - t0
+			)
+		)
+		y = solver.y_branches + scipy.sparse.diags(solver.machine_admittances(fault_time=0.06), format='csc')
+		unit_vectors = np.zeros((number_of_buses, len(buses)), dtype=complex)
+		unit_vectors[solver.bus_positions(buses), np.arange(len(buses))] = 1.0
+		expected = scipy.sparse.linalg.splu(y.tocsc()).solve(unit_vectors)
+		np.testing.assert_allclose(z, expected[solver.bus_positions(buses), np.arange(len(buses))])
+
+	def test_fault_currents(self):
+		"""
+			Tests the fault currents are calculated from the thevenin impedance and decay with fault time
+		:return:
+		"""
+		c = constants.BkdyFileOutput
+		solver = test_module.ShortCircuitSolver(model=self.model)
+		fault_times = [0.0, 0.01, 0.06]
+		df = solver.calculate_fault_currents(fault_times=fault_times)
+
+		self.assertEqual(df.shape, (4, 8 * len(fault_times)))
+		z = complex(df.loc[2, (0.0, c.r)], df.loc[2, (0.0, c.x)])
+		expected_ik11 = 1.0 / abs(z) * 100.0 / (math.sqrt(3) * 33.0) * 1000.0 / c.num_to_kA
+		self.assertAlmostEqual(df.loc[2, (0.0, c.ik11)], expected_ik11)
+		# DC component decays with the X/R of the thevenin impedance at the time of fault
+		expected_idc = math.sqrt(2) * expected_ik11 * math.exp(-2.0 * math.pi * 50.0 * 0.06 * z.real / z.imag)
+		self.assertAlmostEqual(df.loc[2, (0.06, c.idc)], expected_idc)
+
+		# Contribution from the embedded load decays and so the break current reduces with time
+		self.assertTrue(df.loc[3, (0.06, c.ibsym)] < df.loc[3, (0.01, c.ibsym)] < df.loc[3, (0.0, c.ibsym)])
+		# No fault current at a busbar without a source
+		self.assertEqual(df.loc[4, (0.0, c.ik11)], 0.0)
+
+	def test_lg_fault_currents_match_dense_inverse(self):
+		"""
+			Tests the LG fault currents calculated from the sequence impedances match a dense calculation for a
+			radial network with many busbars
+		:return:
+		"""
+		c = constants.BkdyFileOutput
+		number_of_buses = 500
+		data = {
+			'buses': [
+				{'bus': i, 'name': str(i), 'nominal_kv': 11.0, 'voltage_pu': 1.0} for i in range(1, number_of_buses + 1)
+			],
+			'branches': [
+				{'from_bus': i, 'to_bus': i + 1, 'r': 0.001, 'x': 0.002, 'b': 0.0, 'status': 1, 'r0': 0.003, 'x0': 0.007}
+				for i in range(1, number_of_buses)
+			],
+			'machines': [
+				{
+					'bus': 1, 'id': '1', 'mva': 100.0, 'r': 0.01, 'x_subtr': 0.2, 'x_trans': 0.3, 'x_synch': 1.5,
+					'r2': 0.01, 'x2': 0.25
+				}
+			],
+			'zero_sequence_shunts': [{'bus': 1, 'r': 0.0, 'x': 0.1}]
+		}
+		model = test_module.NetworkModel.from_dict(data=data)
+		solver = test_module.SequenceFaultSolver(model=model)
+		df = solver.calculate_fault_currents(fault_times=[0.0, 0.06])
+		self.assertEqual(df.shape, (number_of_buses, 14))
+
+		z = list()
+		for y_series, y_shunt in (
+				(solver.y_branches, solver.machine_admittances(fault_time=0.0)),
+				(solver.y_branches, solver.y_shunt_negative),
+				(solver.y_branches_zero, solver.y_shunt_zero)
+		):
+			z.append(np.diag(np.linalg.inv(y_series.toarray() + np.diag(y_shunt))))
+		i_base = 100.0 / (math.sqrt(3) * 11.0) * 1000.0 / c.num_to_kA
+		expected = 3.0 / np.abs(z[0] + z[1] + z[2]) * i_base
+
+		np.testing.assert_allclose(df[(0.0, c.ik11)].values, expected)
+		# No embedded load so no decrement in the symmetrical current
+		np.testing.assert_allclose(df[(0.06, c.ibsym)].values, expected)
+
+	def test_lg_fixed_impedances_solved_once(self):
+		"""
+			Tests the negative and zero sequence impedances are only solved once and the positive sequence is only
+			solved once for each fault time
+		:return:
+		"""
+		calls = list()
+		impedance_diagonal = test_module.impedance_diagonal
+
+		def counted(**kwargs):
+			calls.append(len(kwargs['positions']))
+			return impedance_diagonal(**kwargs)
+
+		solver = test_module.SequenceFaultSolver(model=self.model)
+		df_expected = solver.fault_study(fault_time=0.06, buses=[1, 2, 3])
+		solver = test_module.SequenceFaultSolver(model=self.model)
+		test_module.impedance_diagonal = counted
+		try:
+			df = solver.calculate_fault_currents(fault_times=[0.0, 0.06], buses=[1, 2, 3])
+			# Positive sequence for each fault time and the negative and zero sequence once
+			self.assertEqual(len(calls), 4)
+			solver.fault_study(fault_time=0.1, buses=[2, 3, 4])
+			# Only busbar 4 is solved in the negative and zero sequence networks
+			self.assertEqual(calls[4:], [3, 1, 1])
+		finally:
+			test_module.impedance_diagonal = impedance_diagonal
+
+		for column in (constants.BkdyFileOutput.ibsym, constants.BkdyFileOutput.r, constants.BkdyFileOutput.x):
+			np.testing.assert_allclose(df[(0.06, column)].values, df_expected[column].values)
+
+	def test_lg_fault_unearthed(self):
+		"""
+			Tests that there is no LG fault current if there is no path to earth in the zero sequence network
+		:return:
+		"""
+		c = constants.BkdyFileOutput
+		# Equivalent machines for embedded load have a very high but finite zero sequence impedance and so are removed
+		data = dict(TEST_NETWORK)
+		data['loads'] = None
+		solver = test_module.SequenceFaultSolver(model=test_module.NetworkModel.from_dict(data=data))
+		df = solver.fault_study(fault_time=0.0)
+		self.assertTrue((df[c.ik11] == 0.0).all())
+		self.assertTrue(df.loc[1, c.x] > 0.0)
+
+	@classmethod
+	def tearDownClass(cls):
+		# Delete log files created by logger
+		if DELETE_LOG_FILES:
+			paths = [
+				cls.logger.pth_debug_log,
+				cls.logger.pth_progress_log,
+				cls.logger.pth_error_log
+			]
+			del cls.logger
+			for pth in paths:
+				if os.path.exists(pth):
+					os.remove(pth)
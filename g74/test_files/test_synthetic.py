@@ -0,0 +1,163 @@
+"""
+#######################################################################################################################
+###											PSSE G74 Fault Studies													###
+###		Unit tests associated with the synthetic networks used for benchmarking, these do not require PSSE			###
+###																													###
+###		Code developed by David Mills (david.mills@PSCconsulting.com, +44 7899 984158) as part of PSC 		 		###
+###		project JK7938 - SHEPD - studies and automation																###
+###																													###
+#######################################################################################################################
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+import g74
+import g74.synthetic as test_module
+import g74.mock_psse as mock_psse
+import g74.psse as psse
+import g74.short_circuit as short_circuit
+import g74.constants as constants
+import numpy as np
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_LOGS = os.path.join(TESTS_DIR, 'logs')
+
+two_up = os.path.abspath(os.path.join(TESTS_DIR, '../..'))
+sys.path.append(two_up)
+
+DELETE_LOG_FILES = True
+
+
+# ----- UNIT TESTS -----
+class TestSyntheticNetwork(unittest.TestCase):
+	"""
+		Tests the synthetic networks and the BKDY reports and IEC results produced for them
+	"""
+	logger = None
+
+	@classmethod
+	def setUpClass(cls):
+		"""
+			Initialise logger and produce a radial network small enough to check with the native solvers
+		"""
+		cls.logger = g74.Logger(pth_logs=TEST_LOGS, uid='TestSynthetic', debug=g74.constants.DEBUG_MODE)
+		cls.temp_folder = tempfile.mkdtemp()
+		cls.network = test_module.SyntheticNetwork(number_of_buses=300, number_of_loads=250, number_of_machines=5)
+		cls.buses = cls.network.buses.tolist()
+
+	def test_network_size(self):
+		"""
+			Tests the network has the requested number of busbars, loads and machines at each voltage level
+		:return:
+		"""
+		model = self.network.model
+		self.assertEqual(len(model.df_buses), 300)
+		self.assertEqual(len(model.df_loads), 250)
+		# Embedded machines plus the grid infeed
+		self.assertEqual(len(model.df_machines), 6)
+		self.assertEqual(self.network.level_counts, (3, 30, 267))
+		# Radial network has one branch feeding each busbar other than the grid infeed busbar
+		self.assertEqual(len(model.df_branches), 299)
+
+		meshed = test_module.SyntheticNetwork(number_of_buses=300, meshed=True)
+		self.assertEqual(len(meshed.model.df_branches), 299 + 15)
+		# Same seed gives the same network
+		self.assertTrue(meshed.model.df_buses.equals(test_module.SyntheticNetwork(number_of_buses=300).model.df_buses))
+
+	def test_radial_impedances_match_native_solver(self):
+		"""
+			Tests the thevenin impedances calculated by working along the radial network match the sparse solver
+		:return:
+		"""
+		solver = short_circuit.SequenceFaultSolver(model=self.network.model)
+		for fault_time in (0.0, 0.06):
+			z = self.network.sequence_impedances(fault_time=fault_time)
+			z_expected = solver.sequence_impedances(fault_time=fault_time, buses=self.buses)
+			for z_sequence, z_sequence_expected in zip(z, z_expected):
+				np.testing.assert_allclose(z_sequence, z_sequence_expected)
+
+	def test_meshed_impedances_match_native_solver(self):
+		"""
+			Tests the thevenin impedances of a meshed network include the ties and so differ from the radial backbone
+		:return:
+		"""
+		meshed = test_module.SyntheticNetwork(number_of_buses=300, number_of_loads=250, number_of_machines=5, meshed=True)
+		solver = short_circuit.SequenceFaultSolver(model=meshed.model)
+		z = meshed.sequence_impedances(fault_time=0.06)
+		z_expected = solver.sequence_impedances(fault_time=0.06, buses=self.buses)
+		for z_sequence, z_sequence_expected in zip(z, z_expected):
+			np.testing.assert_allclose(z_sequence, z_sequence_expected)
+		z_backbone = meshed.radial_impedances(
+			y_edge=meshed.y_edge_positive, y_shunt=meshed.solver.machine_admittances(fault_time=0.06)
+		)
+		self.assertFalse(np.allclose(z[0], z_backbone))
+
+		# BKDY report is produced for the meshed network
+		pth_report = meshed.write_bkdy_report(pth=os.path.join(self.temp_folder, 'bkdy_meshed.csv'), fault_time=0.06)
+		df = psse.BkdyFile(output_file=pth_report, fault_time=0.06).process_bkdy_output()
+		df_expected = short_circuit.ShortCircuitSolver(model=meshed.model).calculate_fault_currents(fault_times=[0.06])
+		np.testing.assert_allclose(
+			df[constants.BkdyFileOutput.ibsym].values, df_expected[(0.06, constants.BkdyFileOutput.ibsym)].values,
+			rtol=1e-3
+		)
+
+	def test_bkdy_report_processed(self):
+		"""
+			Tests the BKDY report is processed by BkdyFile and gives the same fault currents as the native solver
+		:return:
+		"""
+		c = constants.BkdyFileOutput
+		pth_report = self.network.write_bkdy_report(
+			pth=os.path.join(self.temp_folder, 'bkdy.csv'), fault_time=0.06
+		)
+		df = psse.BkdyFile(output_file=pth_report, fault_time=0.06).process_bkdy_output()
+		df_expected = short_circuit.ShortCircuitSolver(model=self.network.model).calculate_fault_currents(
+			fault_times=[0.06]
+		)
+
+		self.assertEqual(df.index.tolist(), self.buses)
+		# Report is written to 1 decimal place in amps
+		np.testing.assert_allclose(df[c.ibsym].values, df_expected[(0.06, c.ibsym)].values, rtol=1e-3)
+
+	def test_iec_results_unpacked(self):
+		"""
+			Tests the IEC results are unpacked by IecFaults and give the same LG fault currents as the native solver
+		:return:
+		"""
+		c = constants.BkdyFileOutput
+		buses = self.buses[::-10]
+		mock_psse.install(pth_sav=self.network.to_json(pth=os.path.join(self.temp_folder, 'network.json')))
+		try:
+			iec = psse.IecFaults(psse=psse.PsseControl(), buses=buses)
+			iec_results = self.network.iec_results(fault_time=0.06, lll=False, lg=True, buses=buses)
+			iec.result_coordinate = iec_results.scfmt
+			iec.result_unit = iec_results.scunit
+			df = iec.unpack_results(iec_results=iec_results, buses=buses, lll=False, lg=True)
+		finally:
+			mock_psse.uninstall()
+
+		df_expected = short_circuit.SequenceFaultSolver(model=self.network.model).fault_study(
+			fault_time=0.06, buses=buses
+		)
+		self.assertEqual(df.index.tolist(), buses)
+		np.testing.assert_allclose(df[c.ibsym].values, df_expected[c.ibsym].values)
+
+	@classmethod
+	def tearDownClass(cls):
+		shutil.rmtree(cls.temp_folder)
+
+		# Delete log files created by logger
+		if DELETE_LOG_FILES:
+			paths = [
+				cls.logger.pth_debug_log,
+				cls.logger.pth_progress_log,
+				cls.logger.pth_error_log
+			]
+			del cls.logger
+			for pth in paths:
+				if os.path.exists(pth):
+					os.remove(pth)